@@ -1,9 +1,14 @@
 #!/usr/bin/env python3
 import argparse
 import asyncio
-import concurrent.futures
+import contextlib
 import logging
+import multiprocessing
 import os
+import shutil
+import signal
+import tempfile
+import time
 
 import aiohttp.web
 import aiohttp_swagger
@@ -16,9 +21,11 @@ import compliance_tests
 import components
 import consts
 import ctx_util
+import deliverydb
 import deliverydb.cache
 import dora
 import eol
+import executors
 import features
 import k8s.util
 import lookups
@@ -31,10 +38,12 @@ import middleware.route_feature_check as rfc
 import osinfo
 import paths
 import rescore.artefacts
+import responsibles.resolution
 import secret_mgmt
 import service_extensions
 import special_component
 import sprint
+import yp
 
 
 ci.log.configure_default_logging(print_thread_id=True)
@@ -48,9 +57,60 @@ def parse_args():
     parser = argparse.ArgumentParser()
     parser.add_argument('--productive', action='store_true', default=False)
     parser.add_argument('--port', default=5000, type=int)
-    parser.add_argument('--max-workers', default=4, type=int)
+    parser.add_argument(
+        '--max-workers',
+        default=executors.lane_cfgs[executors.ExecutorLane.DEFAULT].max_workers,
+        type=int,
+        help='number of threads of the default executor (lane)',
+    )
+    parser.add_argument(
+        '--executor-lane',
+        action='append',
+        default=[],
+        type=executors.parse_lane_cfg,
+        help=f'''
+            `<lane>=<max-workers>[/<max-queue-depth>]` to overwrite the sizes of an executor lane
+            (may be specified multiple times), lanes: {", ".join(executors.ExecutorLane)}
+        ''',
+    )
+    parser.add_argument(
+        '--workers',
+        default=1,
+        type=int,
+        help='number of worker processes sharing the listening socket (each with own caches/pools)',
+    )
+    parser.add_argument(
+        '--shutdown-timeout',
+        default=30,
+        type=float,
+        help='seconds to wait for in-flight requests to finish upon shutdown',
+    )
     parser.add_argument('--shortcut-auth', action='store_true', default=False)
     parser.add_argument('--delivery-db-url', default=None)
+    parser.add_argument(
+        '--delivery-db-pool-size',
+        default=deliverydb.pool_cfgs[deliverydb.PoolLane.REQUEST].pool_size,
+        type=int,
+        help='number of persistent delivery-db connections used to serve requests',
+    )
+    parser.add_argument(
+        '--delivery-db-max-overflow',
+        default=deliverydb.pool_cfgs[deliverydb.PoolLane.REQUEST].max_overflow,
+        type=int,
+        help='number of additional delivery-db connections used to serve requests at peak load',
+    )
+    parser.add_argument(
+        '--delivery-db-low-prio-pool-size',
+        default=deliverydb.pool_cfgs[deliverydb.PoolLane.LOW_PRIO].pool_size,
+        type=int,
+        help='number of delivery-db connections used for low-priority work (e.g. caching)',
+    )
+    parser.add_argument(
+        '--delivery-db-cache-advisory-locks',
+        action='store_true',
+        default=False,
+        help='coordinate computations of cached functions and routes across replicas (postgres)',
+    )
     parser.add_argument('--cache-dir', default=default_cache_dir)
     parser.add_argument(
         '--invalid-semver-ok',
@@ -180,9 +240,11 @@ def add_app_context_vars(
         port=parsed_arguments.port,
     )
 
-    app[consts.APP_ADDRESSBOOK_ENTRIES] = addressbook_entries
-    app[consts.APP_ADDRESSBOOK_GITHUB_MAPPINGS] = addressbook_github_mappings
-    app[consts.APP_ADDRESSBOOK_SOURCE] = addressbook_source
+    app[consts.APP_ADDRESSBOOK] = yp.Addressbook(
+        entries=addressbook_entries,
+        github_mappings=addressbook_github_mappings,
+        source=addressbook_source,
+    )
     app[consts.APP_BASE_URL] = base_url
     app[consts.APP_COMPONENT_DESCRIPTOR_LOOKUP] = component_descriptor_lookup
     app[consts.APP_COMPONENT_WITH_TESTS_CALLBACK] = component_with_tests_callback
@@ -196,6 +258,9 @@ def add_app_context_vars(
     app[consts.APP_NAMESPACE_CALLBACK] = namespace_callback
     app[consts.APP_OCI_CLIENT] = oci_client
     app[consts.APP_PROFILES_CALLBACK] = profiles_callback
+    app[consts.APP_RESPONSIBLES_RESOLVER] = responsibles.resolution.ResponsiblesResolver(
+        github_api_lookup=github_api_lookup,
+    )
     app[consts.APP_SECRET_FACTORY] = secret_factory
     app[consts.APP_SPECIAL_COMPONENT_CALLBACK] = special_component_callback
     app[consts.APP_SPRINTS] = sprints
@@ -385,12 +450,64 @@ def add_routes(
     return app
 
 
-async def initialise_app():
+async def _dispose_delivery_db_pools(app: aiohttp.web.Application):
+    await deliverydb.dispose_sessionmakers()
+
+
+async def _delivery_db_data_migrations(app: aiohttp.web.Application):
+    '''
+    applies pending data migrations of the delivery-db in the background (see
+    `deliverydb.migrate_data`), so that startup is not delayed by long-running migrations
+    '''
+    delivery_db_feature = features.get_feature(features.FeatureDeliveryDB)
+    if delivery_db_feature.state is not features.FeatureStates.AVAILABLE:
+        yield
+        return
+
+    async def migrate_data():
+        try:
+            sessionmaker = await deliverydb.sqlalchemy_sessionmaker(
+                db_url=delivery_db_feature.db_url,
+                lane=deliverydb.PoolLane.LOW_PRIO,
+            )
+            if await deliverydb.migrate_data(engine=sessionmaker.kw['bind']):
+                logger.info('applied pending delivery-db data migrations')
+        except Exception as e:
+            logger.warning(f'failed to apply delivery-db data migrations: {e}')
+
+    task = asyncio.create_task(migrate_data())
+
+    yield
+
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
+
+
+async def initialise_app(
+    worker_id: int | None=None,
+):
+    '''
+    initialises the app including its lookups, clients and connection pools. In multi-process mode,
+    this is done separately by each worker process (see `run_workers`), i.e. workers do not share any
+    state (besides the listening socket and the aggregated metrics).
+    '''
     parsed_arguments = parse_args()
 
-    executor = concurrent.futures.ThreadPoolExecutor(max_workers=parsed_arguments.max_workers)
+    executors.configure_lanes(
+        executors.ExecutorLaneCfg(
+            lane=executors.ExecutorLane.DEFAULT,
+            max_workers=parsed_arguments.max_workers,
+        ),
+        *parsed_arguments.executor_lane,
+    )
     loop = asyncio.get_running_loop()
-    loop.set_default_executor(executor)
+    loop.set_default_executor(executors.executor(lane=executors.ExecutorLane.DEFAULT))
+
+    if parsed_arguments.delivery_db_cache_advisory_locks:
+        deliverydb.cache.single_flight_cfg = deliverydb.cache.SingleFlightCfg(
+            advisory_locks=True,
+        )
 
     secret_factory = ctx_util.secret_factory()
 
@@ -420,6 +537,11 @@ async def initialise_app():
         client_max_size=0, # max request body size is already configured via ingress
     )
 
+    app[consts.APP_WORKER_ID] = worker_id
+    # data migrations are cancelled before the pools are disposed
+    app.cleanup_ctx.append(_delivery_db_data_migrations)
+    app.on_cleanup.append(_dispose_delivery_db_pools)
+
     app = middleware.prometheus.add_prometheus_middleware(app=app)
 
     app = add_app_context_vars(
@@ -445,35 +567,199 @@ async def initialise_app():
     return app
 
 
-async def run_app():
-    parsed_arguments = parse_args()
+async def serve(
+    parsed_arguments,
+    worker_id: int | None=None,
+):
+    '''
+    serves the app until SIGTERM or SIGINT is received, afterwards in-flight requests are given
+    `--shutdown-timeout` seconds to finish before the app is cleaned up (e.g. pools are closed)
+    '''
+    app = await initialise_app(worker_id=worker_id)
+
+    runner = aiohttp.web.AppRunner(
+        app,
+        shutdown_timeout=parsed_arguments.shutdown_timeout,
+    )
+    await runner.setup()
+    await aiohttp.web.TCPSite(
+        runner=runner,
+        host='0.0.0.0' if parsed_arguments.productive else '127.0.0.1',
+        port=parsed_arguments.port,
+        # allows multiple worker processes to listen on the same port, the kernel distributes
+        # incoming connections among them
+        reuse_port=worker_id is not None,
+    ).start()
 
-    port = parsed_arguments.port
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stop_event.set)
+
+    await stop_event.wait()
+
+    logger.info(f'shutting down {worker_id=}')
+    await runner.cleanup()
+
+
+def _run_worker(worker_id: int):
+    asyncio.run(serve(
+        parsed_arguments=parse_args(),
+        worker_id=worker_id,
+    ))
+
+
+# workers which exit before running for `WORKER_MIN_UPTIME_SECONDS` are considered to fail upon
+# start (e.g. because of an invalid configuration), those are restarted with an exponential backoff
+WORKER_MIN_UPTIME_SECONDS = 10
+WORKER_RESTART_BACKOFF_SECONDS = 1
+WORKER_RESTART_MAX_BACKOFF_SECONDS = 60
+WORKER_MAX_IMMEDIATE_FAILURES = 5
+WORKER_SUPERVISION_INTERVAL_SECONDS = 1
+
+
+def run_workers(
+    workers: int,
+    shutdown_timeout: float,
+):
+    '''
+    spawns `workers` processes which each serve the app on the same port (using SO_REUSEPORT) and
+    restarts them if they exit unexpectedly. If a worker fails immediately after it was started
+    `WORKER_MAX_IMMEDIATE_FAILURES` times in a row, all workers are stopped and `RuntimeError` is
+    raised. Metrics of all workers are aggregated using the prometheus multiprocess mode. Upon
+    SIGTERM or SIGINT, the signal is forwarded to all workers and those are given `shutdown_timeout`
+    seconds (plus some slack) to exit gracefully.
+    '''
+    # workers are spawned (instead of forked) so that they do not inherit any state (e.g. threads or
+    # event loops) and the prometheus client picks up the multiprocess directory upon import
+    mp_context = multiprocessing.get_context('spawn')
+
+    created_multiproc_dir = False
+    if not middleware.prometheus.multiprocess_mode():
+        os.environ[middleware.prometheus.MULTIPROC_DIR_ENV_VAR] = tempfile.mkdtemp(
+            prefix='prometheus-',
+        )
+        created_multiproc_dir = True
 
-    app = await initialise_app()
+    stopping = False
 
-    if parsed_arguments.productive:
-        host = '0.0.0.0'
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
 
-    else:
-        host = '127.0.0.1'
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    def start_worker(worker_id: int) -> multiprocessing.Process:
+        process = mp_context.Process(
+            target=_run_worker,
+            args=(worker_id,),
+            name=f'worker-{worker_id}',
+        )
+        process.start()
+        logger.info(f'started {worker_id=} ({process.pid=})')
+        return process
+
+    processes = {
+        worker_id: start_worker(worker_id)
+        for worker_id in range(workers)
+    }
+    started_at = dict.fromkeys(processes, time.monotonic())
+    immediate_failures = dict.fromkeys(processes, 0)
+    restart_at: dict[int, float] = {} # workers which exited and are waiting to be restarted
+
+    try:
+        while not stopping:
+            now = time.monotonic()
+
+            for worker_id, process in processes.items():
+                if stopping:
+                    break
+
+                if worker_id in restart_at:
+                    if now >= restart_at[worker_id]:
+                        del restart_at[worker_id]
+                        processes[worker_id] = start_worker(worker_id)
+                        started_at[worker_id] = now
+                    continue
+
+                if process.is_alive():
+                    continue
+
+                middleware.prometheus.mark_worker_dead(pid=process.pid)
+
+                if now - started_at[worker_id] < WORKER_MIN_UPTIME_SECONDS:
+                    immediate_failures[worker_id] += 1
+                else:
+                    immediate_failures[worker_id] = 0
+
+                if immediate_failures[worker_id] >= WORKER_MAX_IMMEDIATE_FAILURES:
+                    raise RuntimeError(
+                        f'{worker_id=} exited immediately after it was started '
+                        f'{immediate_failures[worker_id]} times in a row ({process.exitcode=}), '
+                        'giving up'
+                    )
+
+                backoff_seconds = min(
+                    WORKER_RESTART_BACKOFF_SECONDS * 2 ** immediate_failures[worker_id],
+                    WORKER_RESTART_MAX_BACKOFF_SECONDS,
+                )
+                logger.warning(
+                    f'{worker_id=} exited unexpectedly ({process.exitcode=}), restarting in '
+                    f'{backoff_seconds} seconds'
+                )
+                restart_at[worker_id] = now + backoff_seconds
+
+            time.sleep(WORKER_SUPERVISION_INTERVAL_SECONDS)
+
+    finally:
+        for process in processes.values():
+            if process.is_alive():
+                process.terminate() # SIGTERM -> graceful shutdown
+
+        deadline = time.monotonic() + shutdown_timeout + 10
+        for worker_id, process in processes.items():
+            if worker_id in restart_at:
+                continue # already exited (and marked as dead)
+
+            process.join(timeout=max(deadline - time.monotonic(), 0))
+
+            if process.is_alive():
+                logger.warning(f'{worker_id=} did not shut down in time, killing it')
+                process.kill()
+                process.join()
+
+            middleware.prometheus.mark_worker_dead(pid=process.pid)
+
+        if created_multiproc_dir:
+            shutil.rmtree(os.environ[middleware.prometheus.MULTIPROC_DIR_ENV_VAR])
+
+
+async def run_app():
+    parsed_arguments = parse_args()
+
+    if not parsed_arguments.productive:
         print('running in development mode')
         print()
-        print(f'listening at {host}:{port}')
+        print(f'listening at 127.0.0.1:{parsed_arguments.port}')
         print()
 
-    runner = aiohttp.web.AppRunner(app)
-    await runner.setup()
-    await aiohttp.web.TCPSite(
-        runner=runner,
-        host=host,
-        port=port,
-    ).start()
+    await serve(parsed_arguments=parsed_arguments)
 
-    await asyncio.Event().wait()
+
+def main():
+    parsed_arguments = parse_args()
+
+    if parsed_arguments.workers > 1:
+        run_workers(
+            workers=parsed_arguments.workers,
+            shutdown_timeout=parsed_arguments.shutdown_timeout,
+        )
+    else:
+        asyncio.run(run_app())
 
 
 if __name__ == '__main__':
-    asyncio.run(run_app())
+    main()
 else:
     app = initialise_app
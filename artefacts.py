@@ -1,15 +1,128 @@
 import json
 import zlib
 
+import aiohttp
+import aiohttp.hdrs
 import aiohttp.web
 
+import oci.client_async
 import oci.model
 import ocm
 
 import consts
+import executors
+import oci_util
 import util
 
 
+# blobs are relayed in chunks which scale with the blob size (within these bounds), so that large
+# blobs do not cost one event loop iteration per few kiB
+MIN_CHUNK_SIZE = 64 * 1024 # 64 KiB
+MAX_CHUNK_SIZE = 1024 * 1024 # 1 MiB
+
+
+def chunk_size(
+    content_length: int | None,
+) -> int:
+    if not content_length:
+        return MIN_CHUNK_SIZE
+
+    return min(max(content_length // 64, MIN_CHUNK_SIZE), MAX_CHUNK_SIZE)
+
+
+def entity_tag(
+    digest: str,
+    unzip: bool,
+) -> str:
+    # blobs are content-addressed, hence their digest is a strong validator for their content
+    if unzip:
+        return f'{digest}+gunzip'
+
+    return digest
+
+
+def requested_range(
+    request: aiohttp.web.Request,
+    etag: str,
+) -> slice | None:
+    '''
+    returns the requested octet range (`stop` is exclusive, negative `start` denotes a suffix) or
+    `None` if the whole blob is to be returned. As permitted by RFC 9110, malformed and multiple
+    ranges as well as ranges which are conditional on another entity (`If-Range`) are ignored.
+    '''
+    if not request.headers.get(aiohttp.hdrs.RANGE):
+        return None
+
+    if (if_range := request.headers.get(aiohttp.hdrs.IF_RANGE)) and if_range != f'"{etag}"':
+        return None
+
+    try:
+        return request.http_range
+    except ValueError:
+        return None
+
+
+def range_header(
+    octet_range: slice,
+) -> str:
+    if octet_range.start < 0:
+        return f'bytes={octet_range.start}'
+
+    if octet_range.stop is None:
+        return f'bytes={octet_range.start}-'
+
+    return f'bytes={octet_range.start}-{octet_range.stop - 1}'
+
+
+async def fetch_blob(
+    oci_client: oci.client_async.Client,
+    image_reference: str,
+    digest: str,
+    octet_range: slice | None=None,
+) -> aiohttp.ClientResponse:
+    '''
+    retrieves the blob from the OCI registry, passing-through the requested `octet_range`. Note that
+    registries may ignore the range and respond with the whole blob (status 200) instead.
+    '''
+    async def fetch_whole_blob() -> aiohttp.ClientResponse:
+        res = await oci_client.blob(
+            image_reference=image_reference,
+            digest=digest,
+            absent_ok=True,
+        )
+        if not res:
+            raise aiohttp.web.HTTPNotFound(text=f'Did not find blob {digest=}')
+        return res
+
+    if not octet_range:
+        return await fetch_whole_blob()
+
+    try:
+        res = await oci_util.request_async(
+            oci_client=oci_client,
+            image_reference=image_reference,
+            url=oci_client.routes.blob_url(image_reference=image_reference, digest=digest),
+            method='GET',
+            action='pull',
+            headers={aiohttp.hdrs.RANGE: range_header(octet_range)},
+            timeout=None,
+            warn_if_not_ok=False,
+        )
+    except NotImplementedError:
+        # same as a registry ignoring the requested range
+        return await fetch_whole_blob()
+
+    if res.status == 404:
+        raise aiohttp.web.HTTPNotFound(text=f'Did not find blob {digest=}')
+    if res.status == 416:
+        raise aiohttp.web.HTTPRequestRangeNotSatisfiable(
+            headers={aiohttp.hdrs.CONTENT_RANGE: res.headers.get(aiohttp.hdrs.CONTENT_RANGE, '')},
+        )
+    res.raise_for_status()
+
+    return res
+
+
 class ArtefactBlob(aiohttp.web.View):
     async def get(self):
         '''
@@ -49,6 +162,28 @@ class ArtefactBlob(aiohttp.web.View):
           description:
             if true and artefact's access is gzipped, returned content will be unzipped (for
             convenience)
+        - in: header
+          name: Range
+          type: string
+          required: false
+          description:
+            single octet range (e.g. `bytes=1024-`) to retrieve, e.g. to resume a download; not
+            supported for unzipped content
+        - in: header
+          name: If-None-Match
+          type: string
+          required: false
+          description:
+            entity-tag of a previous response (derived from the blob digest)
+        responses:
+          "200":
+            description: the artefact's content
+          "206":
+            description: the requested range of the artefact's content
+          "304":
+            description: the artefact's content did not change
+          "416":
+            description: the requested range is not satisfiable
         '''
         params = self.request.rel_url.query
 
@@ -115,12 +250,28 @@ class ArtefactBlob(aiohttp.web.View):
         access: ocm.LocalBlobAccess
         digest = access.globalAccess.digest if access.globalAccess else access.localReference
 
-        oci_client = self.request.app[consts.APP_OCI_CLIENT]
-        blob = await oci_client.blob(
-            image_reference=component.current_ocm_repo.component_oci_ref(component),
-            digest=digest,
-            absent_ok=True,
-        )
+        oci_client: oci.client_async.Client = self.request.app[consts.APP_OCI_CLIENT]
+        image_reference = component.current_ocm_repo.component_oci_ref(component)
+
+        is_unzipped = unzip and access.mediaType == 'application/gzip'
+        etag = entity_tag(digest=digest, unzip=is_unzipped)
+
+        if (if_none_match := self.request.if_none_match) and any(
+            candidate.value in (etag, '*')
+            for candidate in if_none_match
+        ):
+            # the client's copy must only be confirmed if the blob is (still) available
+            res = await oci_client.head_blob(
+                image_reference=image_reference,
+                digest=digest,
+                absent_ok=True,
+            )
+            res.release()
+
+            if res.status == 404:
+                raise aiohttp.web.HTTPNotFound(text=f'Did not find blob {digest=}')
+
+            raise aiohttp.web.HTTPNotModified(headers={aiohttp.hdrs.ETAG: f'"{etag}"'})
 
         if access.mediaType == 'application/pdf':
             file_ending = '.pdf'
@@ -133,30 +284,120 @@ class ArtefactBlob(aiohttp.web.View):
 
         fname = f'{component.name}_{component.version}_{artefact.name}{file_ending}'
 
-        if unzip and access.mediaType == 'application/gzip':
-            response = aiohttp.web.StreamResponse(
+        # ranges refer to the returned content, which is only known upfront w/o decompression
+        octet_range = None if is_unzipped else requested_range(request=self.request, etag=etag)
+
+        blob = await fetch_blob(
+            oci_client=oci_client,
+            image_reference=image_reference,
+            digest=digest,
+            octet_range=octet_range,
+        )
+
+        try:
+            if is_unzipped:
+                return await self._stream_unzipped(
+                    blob=blob,
+                    headers={
+                        'Content-Type': artefact.type,
+                        'Content-Disposition': f'attachment; filename="{fname}"',
+                        aiohttp.hdrs.ETAG: f'"{etag}"',
+                        aiohttp.hdrs.ACCEPT_RANGES: 'none',
+                    },
+                )
+
+            return await self._stream(
+                blob=blob,
                 headers={
-                    'Content-Type': artefact.type,
+                    'Content-Type': access.mediaType,
                     'Content-Disposition': f'attachment; filename="{fname}"',
+                    aiohttp.hdrs.ETAG: f'"{etag}"',
+                    aiohttp.hdrs.ACCEPT_RANGES: 'bytes',
                 },
+                octet_range=octet_range,
             )
+        finally:
+            blob.release()
+
+    async def _stream_unzipped(
+        self,
+        blob: aiohttp.ClientResponse,
+        headers: dict[str, str],
+    ) -> aiohttp.web.StreamResponse:
+        response = aiohttp.web.StreamResponse(headers=headers)
+
+        # reserve the lane before the response is started, so that a saturated lane results in a
+        # proper error response rather than in an aborted one
+        with executors.reserved(executors.ExecutorLane.CPU):
             await response.prepare(self.request)
 
             decompressor = zlib.decompressobj(wbits=31)
-            async for chunk in blob.content.iter_chunked(4096):
-                await response.write(decompressor.decompress(chunk))
+            async for chunk in blob.content.iter_chunked(chunk_size(blob.content_length)):
+                # decompression of large chunks would block the event loop noticeably
+                await response.write(await executors.run_in_lane(
+                    executors.ExecutorLane.CPU,
+                    decompressor.decompress,
+                    chunk,
+                ))
             await response.write(decompressor.flush())
-        else:
-            response = aiohttp.web.StreamResponse(
-                headers={
-                    'Content-Type': access.mediaType,
-                    'Content-Disposition': f'attachment; filename="{fname}"',
-                },
+
+        await response.write_eof()
+        return response
+
+    async def _stream(
+        self,
+        blob: aiohttp.ClientResponse,
+        headers: dict[str, str],
+        octet_range: slice | None,
+    ) -> aiohttp.web.StreamResponse:
+        '''
+        relays the blob as-is. If the OCI registry did not honour the requested `octet_range` (but
+        returned the whole blob), the range is cut out of the blob instead.
+        '''
+        response = aiohttp.web.StreamResponse(headers=headers)
+        content_length = blob.content_length
+        skip_octets = 0
+
+        if blob.status == 206:
+            response.set_status(206)
+            response.headers[aiohttp.hdrs.CONTENT_RANGE] = blob.headers[aiohttp.hdrs.CONTENT_RANGE]
+
+        elif octet_range and content_length is not None:
+            start, stop, _ = octet_range.indices(content_length)
+
+            if start >= stop:
+                raise aiohttp.web.HTTPRequestRangeNotSatisfiable(
+                    headers={aiohttp.hdrs.CONTENT_RANGE: f'bytes */{content_length}'},
+                )
+
+            response.set_status(206)
+            response.headers[aiohttp.hdrs.CONTENT_RANGE] = (
+                f'bytes {start}-{stop - 1}/{content_length}'
             )
-            await response.prepare(self.request)
+            skip_octets, content_length = start, stop - start
+
+        if content_length is not None:
+            response.content_length = content_length
+
+        await response.prepare(self.request)
 
-            async for chunk in blob.content.iter_chunked(4096):
-                await response.write(chunk)
+        remaining_octets = content_length
+        async for chunk in blob.content.iter_chunked(chunk_size(content_length)):
+            if skip_octets:
+                if len(chunk) <= skip_octets:
+                    skip_octets -= len(chunk)
+                    continue
+                chunk = chunk[skip_octets:]
+                skip_octets = 0
+
+            if remaining_octets is not None:
+                chunk = chunk[:remaining_octets]
+                remaining_octets -= len(chunk)
+
+            await response.write(chunk)
+
+            if remaining_octets == 0:
+                break
 
         await response.write_eof()
         return response
@@ -12,6 +12,7 @@ import tarutil
 import bdba.client
 import bdba.model
 import bdba_extension.scanning
+import blobcache
 import deliverydb_cache.model as dcm
 import deliverydb_cache.util as dcu
 import k8s.logging
@@ -62,6 +63,7 @@ def scan(
     delivery_client: delivery.client.DeliveryServiceClient,
     oci_client: oci.client.Client,
     secret_factory: secret_mgmt.SecretFactory,
+    blob_cache: blobcache.BlobCache | None=None,
     **kwargs,
 ):
     logger.info(f'scanning {artefact}')
@@ -139,7 +141,12 @@ def scan(
     access = resource_node.resource.access
 
     if access.type is ocm.AccessType.OCI_REGISTRY:
-        content_iterator = oci.image_layers_as_tarfile_generator(
+        if blob_cache:
+            image_layers_as_tarfile_generator = blob_cache.image_layers_as_tarfile_generator
+        else:
+            image_layers_as_tarfile_generator = oci.image_layers_as_tarfile_generator
+
+        content_iterator = image_layers_as_tarfile_generator(
             image_reference=access.imageReference,
             oci_client=oci_client,
             include_config_blob=False,
@@ -175,6 +182,7 @@ def scan(
                     access=access,
                     oci_client=oci_client,
                     image_reference=image_reference,
+                    blob_cache=blob_cache,
                 ),
             ]
         )
@@ -254,18 +254,16 @@ def iter_artefact_metadata(
             ),
         )
 
-        stale_findings = []
-        for existing_finding in existing_findings:
-            for finding in findings:
-                if (
-                    existing_finding.meta.type == finding.meta.type
-                    and existing_finding.data.key == finding.data.key
-                ):
-                    # finding still appeared in current scan result -> keep it
-                    break
-            else:
-                # finding did not appear in current scan result -> delete it
-                stale_findings.append(existing_finding)
+        finding_keys = {
+            (finding.meta.type, finding.data.key)
+            for finding in findings
+        }
+
+        # findings which did not appear in the current scan result anymore are deleted
+        stale_findings = [
+            existing_finding for existing_finding in existing_findings
+            if (existing_finding.meta.type, existing_finding.data.key) not in finding_keys
+        ]
 
         if stale_findings:
             delivery_client.delete_metadata(data=stale_findings)
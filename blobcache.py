@@ -0,0 +1,405 @@
+'''
+Node-local, content-addressed cache for (OCI) blobs. Scanning extensions (e.g. malware, osid, bdba
+and crypto) typically process the same (base-) image layers over and over again, hence sharing
+retrieved blobs via this cache saves both registry bandwidth and download latency.
+
+Blobs are stored using their digest as key, i.e. they are immutable by definition. Upon retrieval,
+the digest of the received content is verified before it is added to the cache. Concurrent
+retrievals of the same blob (both from different threads and different processes sharing the same
+cache directory) are deduplicated, i.e. only one download is done and all other callers wait for it
+to finish ("single-flight").
+'''
+import collections.abc
+import contextlib
+import fcntl
+import hashlib
+import logging
+import os
+import tarfile
+import tempfile
+import threading
+import typing
+
+import ioutil
+import oci.client
+import oci.model
+import tarutil
+
+
+logger = logging.getLogger(__name__)
+
+default_chunk_size = tarfile.RECORDSIZE
+
+
+class DigestMismatchError(ValueError):
+    pass
+
+
+def _split_digest(digest: str) -> tuple[str, str]:
+    algorithm, hexdigest = digest.lower().split(':', 1)
+
+    if algorithm not in hashlib.algorithms_available:
+        raise ValueError(f'unsupported digest algorithm {algorithm=} ({digest=})')
+
+    if not hexdigest or not all(c in '0123456789abcdef' for c in hexdigest):
+        raise ValueError(f'invalid digest {digest=}')
+
+    return algorithm, hexdigest
+
+
+class BlobCache:
+    '''
+    Size-bounded, content-addressed filesystem cache for blobs. If `max_total_size_mib` is reached,
+    the least recently used blobs are removed from the cache until enough space is available again.
+    Blobs which exceed the total cache size are not cached at all but still streamed to the caller
+    (backed by an anonymous temporary file).
+
+    The cache directory may be shared by multiple processes (e.g. by mounting the same node-local
+    volume into several extension pods), synchronisation is done using advisory file locks.
+
+    @param cache_dir:
+        the directory to store the blobs in
+    @param max_total_size_mib:
+        the maximum allowed total cache size in MiB, if `None`, eviction is disabled
+    '''
+    def __init__(
+        self,
+        cache_dir: str,
+        max_total_size_mib: int | None=None,
+    ):
+        self.cache_dir = cache_dir
+        # convert MiB -> bytes
+        self._max_total_size = max_total_size_mib * 1024 * 1024 if max_total_size_mib else None
+
+        self._in_flight_locks: dict[str, threading.Lock] = {}
+        self._in_flight_refs = {}
+        self._in_flight_lock = threading.Lock()
+        self._eviction_lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def path(self, digest: str) -> str:
+        algorithm, hexdigest = _split_digest(digest)
+        return os.path.join(self.cache_dir, algorithm, hexdigest)
+
+    def __contains__(self, digest: str) -> bool:
+        return os.path.isfile(self.path(digest))
+
+    @contextlib.contextmanager
+    def _single_flight(
+        self,
+        digest: str,
+    ) -> collections.abc.Generator[None, None, None]:
+        '''
+        serialises retrievals of the same `digest` across threads (using an in-memory lock) and
+        across processes (using an advisory lock on a file next to the blob)
+        '''
+        with self._in_flight_lock:
+            if not (lock := self._in_flight_locks.get(digest)):
+                lock = self._in_flight_locks[digest] = threading.Lock()
+                self._in_flight_refs[digest] = 0
+            self._in_flight_refs[digest] += 1
+
+        try:
+            with lock:
+                lock_path = f'{self.path(digest)}.lock'
+                os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+
+                with open(lock_path, 'a') as lock_file:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                    try:
+                        yield
+                    finally:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        finally:
+            with self._in_flight_lock:
+                self._in_flight_refs[digest] -= 1
+                if not self._in_flight_refs[digest]:
+                    del self._in_flight_refs[digest]
+                    del self._in_flight_locks[digest]
+
+    def _iter_entries(self) -> collections.abc.Generator[os.DirEntry, None, None]:
+        for algorithm_dir in os.scandir(self.cache_dir):
+            if not algorithm_dir.is_dir():
+                continue
+
+            for entry in os.scandir(algorithm_dir.path):
+                if not entry.is_file() or '.' in entry.name:
+                    continue # skip lock- and temporary files
+
+                yield entry
+
+    def _iter_lock_paths(self) -> collections.abc.Generator[str, None, None]:
+        for algorithm_dir in os.scandir(self.cache_dir):
+            if not algorithm_dir.is_dir():
+                continue
+
+            for entry in os.scandir(algorithm_dir.path):
+                if entry.name.endswith('.lock'):
+                    yield entry.path
+
+    def _remove_lock_file(
+        self,
+        lock_path: str,
+    ):
+        '''
+        removes the lock file unless it is currently locked. A process which opened the lock file
+        just before it is removed locks the removed file, which at worst causes a redundant (still
+        verified and atomically replaced) retrieval of the blob.
+        '''
+        try:
+            lock_file = open(lock_path, 'rb')
+        except FileNotFoundError:
+            return
+
+        with lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return # blob is currently being retrieved
+
+            try:
+                os.remove(lock_path)
+            except OSError:
+                pass
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def total_size(self) -> int:
+        return sum(entry.stat().st_size for entry in self._iter_entries())
+
+    def _evict(
+        self,
+        required_size: int,
+    ):
+        '''
+        removes least recently used blobs until `required_size` octets fit into the cache. Blobs
+        which are still opened by readers remain readable (POSIX unlink semantics). Lock files of
+        blobs which are not cached (anymore) are removed as well.
+        '''
+        if not self._max_total_size:
+            return
+
+        with self._eviction_lock:
+            entries = sorted(
+                ((entry.path, entry.stat()) for entry in self._iter_entries()),
+                key=lambda path_and_stat: path_and_stat[1].st_mtime,
+            )
+            total_size = sum(stat.st_size for _, stat in entries)
+
+            for path, stat in entries:
+                if total_size + required_size <= self._max_total_size:
+                    break
+
+                logger.debug(f'evicting {path=} from blob cache')
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                total_size -= stat.st_size
+
+            for lock_path in self._iter_lock_paths():
+                if not os.path.exists(lock_path.removesuffix('.lock')):
+                    self._remove_lock_file(lock_path)
+
+    def _write_verified(
+        self,
+        digest: str,
+        content: collections.abc.Iterable[bytes],
+        fileobj: typing.BinaryIO,
+    ):
+        algorithm, hexdigest = _split_digest(digest)
+        hasher = hashlib.new(algorithm)
+
+        for chunk in content:
+            hasher.update(chunk)
+            fileobj.write(chunk)
+
+        if (actual := hasher.hexdigest()) != hexdigest:
+            raise DigestMismatchError(f'expected {digest=}, but received {algorithm}:{actual}')
+
+        fileobj.flush()
+
+    def open(
+        self,
+        digest: str,
+        fetch: collections.abc.Callable[[], collections.abc.Iterable[bytes]],
+        size: int | None=None,
+    ) -> typing.BinaryIO:
+        '''
+        returns a (seekable) binary file object for the blob with the given `digest`. If the blob is
+        not cached yet, it is retrieved using `fetch` (which must return an iterable of chunks). The
+        caller is responsible for closing the returned file object.
+
+        @param size:
+            the (expected) blob size in octets, used to make room in the cache upfront
+        '''
+        path = self.path(digest)
+
+        with self._single_flight(digest):
+            try:
+                fileobj = open(path, 'rb')
+                os.utime(path) # mark as recently used
+                self.hits += 1
+                return fileobj
+            except FileNotFoundError:
+                pass
+
+            self.misses += 1
+
+            if self._max_total_size and size and size > self._max_total_size:
+                logger.info(f'{digest=} exceeds blob cache size ({size=}), will not cache it')
+                fileobj = tempfile.TemporaryFile()
+                try:
+                    self._write_verified(digest=digest, content=fetch(), fileobj=fileobj)
+                except Exception:
+                    fileobj.close()
+                    raise
+                fileobj.seek(0)
+                return fileobj
+
+            self._evict(required_size=size or 0)
+
+            with tempfile.NamedTemporaryFile(
+                dir=os.path.dirname(path),
+                prefix=f'{os.path.basename(path)}.',
+                suffix='.tmp',
+                delete=False,
+            ) as tmp_file:
+                try:
+                    self._write_verified(digest=digest, content=fetch(), fileobj=tmp_file)
+                except Exception:
+                    os.unlink(tmp_file.name)
+                    raise
+
+            os.replace(tmp_file.name, path)
+
+            if not size:
+                # size was not known upfront, hence make sure cache does not overflow afterwards
+                self._evict(required_size=0)
+
+            return open(path, 'rb')
+
+    def iter_content(
+        self,
+        digest: str,
+        fetch: collections.abc.Callable[[], collections.abc.Iterable[bytes]],
+        size: int | None=None,
+        chunk_size: int=default_chunk_size,
+    ) -> collections.abc.Generator[bytes, None, None]:
+        with self.open(
+            digest=digest,
+            fetch=fetch,
+            size=size,
+        ) as fileobj:
+            while (chunk := fileobj.read(chunk_size)):
+                yield chunk
+
+    def open_oci_blob(
+        self,
+        oci_client: oci.client.Client,
+        image_reference: str | oci.model.OciImageReference,
+        digest: str,
+        size: int | None=None,
+        chunk_size: int=default_chunk_size,
+    ) -> typing.BinaryIO:
+        def fetch():
+            return oci_client.blob(
+                image_reference=image_reference,
+                digest=digest,
+                stream=True,
+            ).iter_content(chunk_size=chunk_size)
+
+        return self.open(
+            digest=digest,
+            fetch=fetch,
+            size=size,
+        )
+
+    def iter_oci_blob(
+        self,
+        oci_client: oci.client.Client,
+        image_reference: str | oci.model.OciImageReference,
+        digest: str,
+        size: int | None=None,
+        chunk_size: int=default_chunk_size,
+    ) -> collections.abc.Generator[bytes, None, None]:
+        with self.open_oci_blob(
+            oci_client=oci_client,
+            image_reference=image_reference,
+            digest=digest,
+            size=size,
+            chunk_size=chunk_size,
+        ) as fileobj:
+            while (chunk := fileobj.read(chunk_size)):
+                yield chunk
+
+    def oci_blob_descriptor(
+        self,
+        oci_client: oci.client.Client,
+        image_reference: str | oci.model.OciImageReference,
+        blob_ref: oci.model.OciBlobRef,
+        name: str | None=None,
+        chunk_size: int=default_chunk_size,
+    ) -> ioutil.BlobDescriptor:
+        return ioutil.BlobDescriptor(
+            content=self.iter_oci_blob(
+                oci_client=oci_client,
+                image_reference=image_reference,
+                digest=blob_ref.digest,
+                size=blob_ref.size,
+                chunk_size=chunk_size,
+            ),
+            size=blob_ref.size,
+            name=name,
+        )
+
+    def image_layers_as_tarfile_generator(
+        self,
+        image_reference: str | oci.model.OciImageReference,
+        oci_client: oci.client.Client,
+        chunk_size: int=default_chunk_size,
+        include_config_blob: bool=True,
+        fallback_to_first_subimage_if_index: bool=False,
+    ) -> collections.abc.Generator[bytes, None, None]:
+        '''
+        cache-backed drop-in replacement for `oci.image_layers_as_tarfile_generator`, i.e. returns
+        a generator yielding a tar-archive with the passed oci-image's layer-blobs as members
+        '''
+        manifest = oci_client.manifest(
+            image_reference=image_reference,
+            accept=oci.model.MimeTypes.prefer_multiarch,
+        )
+
+        image_reference = oci.model.OciImageReference.to_image_ref(image_reference)
+
+        if fallback_to_first_subimage_if_index and isinstance(
+            manifest,
+            oci.model.OciImageManifestList,
+        ):
+            logger.warning(
+                f'image-index handling not fully implemented - will only scan first image, '
+                f'{image_reference=}, {manifest.mediaType=}'
+            )
+            manifest_ref = manifest.manifests[0]
+            manifest = oci_client.manifest(
+                image_reference=f'{image_reference.ref_without_tag}@{manifest_ref.digest}',
+            )
+
+        blob_refs = manifest.blobs() if include_config_blob else manifest.layers
+
+        return tarutil.concat_blobs_as_tarstream(
+            blobs=(
+                self.oci_blob_descriptor(
+                    oci_client=oci_client,
+                    image_reference=image_reference,
+                    blob_ref=blob_ref,
+                    name=f'{blob_ref.digest}.tar',
+                    chunk_size=chunk_size,
+                )
+                for blob_ref in blob_refs
+            ),
+        )
@@ -16,13 +16,12 @@ import sqlalchemy.ext.asyncio as sqlasync
 import sqlalchemy.sql.elements
 
 import ci.log
-import cnudie.iter
-import cnudie.iter_async
 import cnudie.retrieve_async
 import oci.client_async
 import ocm
 
 import compliance_summary
+import component_graph
 import components as components_module
 import ctx_util
 import deliverydb
@@ -112,6 +111,12 @@ async def prune_cache(
                     break # deleted enough cache entries
                 entry = row[0]
                 prunable_size -= entry.size
+
+                if entry.chunk_count:
+                    await db_session.execute(
+                        sqlalchemy.delete(dm.DBCacheChunk)
+                        .where(dm.DBCacheChunk.cache_id == entry.id)
+                    )
                 await db_session.delete(entry)
             else:
                 continue
@@ -174,17 +179,18 @@ async def prefill_compliance_summary_caches(
         )
 
         for version in versions:
-            component_descriptor = await component_descriptor_lookup(ocm.ComponentIdentity(
-                name=component.component_name,
-                version=version,
-            ))
-
-            async for component_node in cnudie.iter_async.iter(
-                component=component_descriptor.component,
-                lookup=component_descriptor_lookup,
-                node_filter=cnudie.iter.Filter.components,
-            ):
-                component_id = component_node.component_id
+            # also persists the dependency graph so that it is readily available for the service
+            dependency_graph = await component_graph.dependency_graph_store.graph(
+                component_id=ocm.ComponentIdentity(
+                    name=component.component_name,
+                    version=version,
+                ),
+                component_descriptor_lookup=component_descriptor_lookup,
+                db_session=db_session,
+            )
+
+            for path in dependency_graph.iter_paths():
+                component_id = path[-1][0]
 
                 if component_id in seen_component_ids:
                     continue
@@ -0,0 +1,247 @@
+'''
+Process-wide statistics of caches and (multi-tiered) lookup chains, e.g. the component descriptor
+lookup chain (in-memory -> filesystem -> delivery-db -> ... -> oci), the delivery-db cache
+decorators and the filesystem caches (see `caching`). Statistics are kept as plain counters so that
+they can be recorded without any dependency towards prometheus. Additionally, each recording is
+forwarded to the registered `CacheMetricsObserver`s, the delivery-service uses this to record the
+statistics as prometheus metrics (see `middleware.prometheus.PrometheusCacheMetricsObserver`), so
+that they are aggregated across worker processes.
+
+Statistics are labelled by cache tier and cache name (e.g. the cached function or the template of
+the cached route). To keep the cardinality of the labels bounded, only the first
+`max_names_per_tier` names of each tier are tracked separately, all other names are accumulated as
+`OTHER_NAME`.
+'''
+import bisect
+import collections
+import collections.abc
+import dataclasses
+import enum
+import threading
+
+
+# upper bounds (seconds) of the latency histogram buckets, an implicit `+Inf` bucket is appended
+LATENCY_BUCKETS_SECONDS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+OTHER_NAME = 'other'
+
+
+class CacheTier(enum.StrEnum):
+    IN_MEMORY = 'in-memory'
+    FILESYSTEM = 'filesystem'
+    DELIVERY_DB = 'delivery-db'
+    DELIVERY_SERVICE = 'delivery-service'
+    OCI = 'oci'
+
+
+class CacheResult(enum.StrEnum):
+    HIT = 'hit'
+    MISS = 'miss'
+    ERROR = 'error'
+
+
+@dataclasses.dataclass
+class CacheMetrics:
+    '''
+    statistics of a single cache (tier). `latency_bucket_counts` contains the (non-cumulative) count
+    of observations per bucket of `LATENCY_BUCKETS_SECONDS` (plus one for the `+Inf` bucket).
+    '''
+    results: collections.Counter = dataclasses.field(default_factory=collections.Counter)
+    latency_bucket_counts: list[int] = dataclasses.field(
+        default_factory=lambda: [0] * (len(LATENCY_BUCKETS_SECONDS) + 1),
+    )
+    latency_seconds_sum: float = 0
+    served_bytes: int = 0
+    evictions: int = 0
+
+    def cumulative_latency_buckets(self) -> list[tuple[str, int]]:
+        '''
+        returns the latency buckets in the format expected by prometheus histograms, i.e. tuples of
+        upper bound and cumulative count
+        '''
+        upper_bounds = [str(upper_bound) for upper_bound in LATENCY_BUCKETS_SECONDS] + ['+Inf']
+
+        buckets = []
+        count = 0
+        for upper_bound, bucket_count in zip(upper_bounds, self.latency_bucket_counts):
+            count += bucket_count
+            buckets.append((upper_bound, count))
+
+        return buckets
+
+
+class CacheMetricsObserver:
+    '''
+    is notified about each recording of a `CacheMetricsRegistry`, `name` is already bounded (i.e.
+    it might be `OTHER_NAME`)
+    '''
+    def record(
+        self,
+        tier: str,
+        name: str,
+        result: CacheResult,
+        latency_seconds: float | None,
+        served_bytes: int,
+    ):
+        pass
+
+    def record_eviction(
+        self,
+        tier: str,
+        name: str,
+        count: int,
+    ):
+        pass
+
+
+class CacheMetricsRegistry:
+    def __init__(
+        self,
+        max_names_per_tier: int=256,
+    ):
+        self.max_names_per_tier = max_names_per_tier
+
+        self._metrics: dict[tuple[str, str], CacheMetrics] = {}
+        self._names_per_tier: collections.Counter = collections.Counter()
+        self._observers: list[CacheMetricsObserver] = []
+        self._lock = threading.Lock()
+
+    def add_observer(
+        self,
+        observer: CacheMetricsObserver,
+    ):
+        with self._lock:
+            if observer not in self._observers:
+                self._observers.append(observer)
+
+    def _cache_metrics(
+        self,
+        tier: CacheTier | str,
+        name: str,
+    ) -> tuple[tuple[str, str], CacheMetrics]:
+        # caller must hold `self._lock`
+        tier = str(tier)
+        key = (tier, name)
+
+        if cache_metrics := self._metrics.get(key):
+            return key, cache_metrics
+
+        if self._names_per_tier[tier] >= self.max_names_per_tier:
+            key = (tier, OTHER_NAME)
+            if cache_metrics := self._metrics.get(key):
+                return key, cache_metrics
+        else:
+            self._names_per_tier[tier] += 1
+
+        cache_metrics = self._metrics[key] = CacheMetrics()
+        return key, cache_metrics
+
+    def record(
+        self,
+        tier: CacheTier | str,
+        name: str,
+        result: CacheResult,
+        latency_seconds: float | None=None,
+        served_bytes: int=0,
+    ):
+        '''
+        records the result of a single cache lookup. `served_bytes` should only be set in case of a
+        cache hit and if the size of the served value is known without additional costs.
+        '''
+        result = CacheResult(result)
+
+        with self._lock:
+            (tier, name), cache_metrics = self._cache_metrics(tier=tier, name=name)
+            observers = tuple(self._observers)
+
+            cache_metrics.results[result] += 1
+            cache_metrics.served_bytes += served_bytes
+
+            if latency_seconds is not None:
+                cache_metrics.latency_seconds_sum += latency_seconds
+                cache_metrics.latency_bucket_counts[
+                    bisect.bisect_left(LATENCY_BUCKETS_SECONDS, latency_seconds)
+                ] += 1
+
+        for observer in observers:
+            observer.record(
+                tier=tier,
+                name=name,
+                result=result,
+                latency_seconds=latency_seconds,
+                served_bytes=served_bytes,
+            )
+
+    def record_eviction(
+        self,
+        tier: CacheTier | str,
+        name: str,
+        count: int=1,
+    ):
+        with self._lock:
+            (tier, name), cache_metrics = self._cache_metrics(tier=tier, name=name)
+            observers = tuple(self._observers)
+
+            cache_metrics.evictions += count
+
+        for observer in observers:
+            observer.record_eviction(
+                tier=tier,
+                name=name,
+                count=count,
+            )
+
+    def metrics(self) -> dict[tuple[str, str], CacheMetrics]:
+        '''
+        returns a snapshot of the statistics of all known caches by their (tier, name)
+        '''
+        with self._lock:
+            return {
+                key: dataclasses.replace(
+                    cache_metrics,
+                    results=collections.Counter(cache_metrics.results),
+                    latency_bucket_counts=list(cache_metrics.latency_bucket_counts),
+                )
+                for key, cache_metrics in self._metrics.items()
+            }
+
+    def clear(self):
+        with self._lock:
+            self._metrics.clear()
+            self._names_per_tier.clear()
+
+
+cache_metrics_registry = CacheMetricsRegistry()
+
+
+def record(
+    tier: CacheTier | str,
+    name: str,
+    result: CacheResult,
+    latency_seconds: float | None=None,
+    served_bytes: int=0,
+):
+    cache_metrics_registry.record(
+        tier=tier,
+        name=name,
+        result=result,
+        latency_seconds=latency_seconds,
+        served_bytes=served_bytes,
+    )
+
+
+def record_eviction(
+    tier: CacheTier | str,
+    name: str,
+    count: int=1,
+):
+    cache_metrics_registry.record_eviction(
+        tier=tier,
+        name=name,
+        count=count,
+    )
+
+
+def function_name(func: collections.abc.Callable) -> str:
+    return f'{func.__module__}.{func.__qualname__}'
@@ -5,9 +5,12 @@ import hashlib
 import os
 import pickle
 import threading
+import time
 
 import cachetools.keys
 
+import cache_metrics
+
 
 own_dir = os.path.abspath(os.path.dirname(__file__))
 default_cache_dir = os.path.join(own_dir, '.cache', 'dora')
@@ -17,7 +20,12 @@ class FilesystemCache:
     '''
     Base class which implements a basic filesytem cache using pickle. This implementation does _not_
     take care of clearing the cache, e.g. if it reaches a certain size.
+
+    `name` is used to label the cache's statistics (see `cache_metrics`), if not set explicitly, it
+    defaults to the name of the (first) function decorated using this cache.
     '''
+    name: str | None = None
+
     def __getitem__(self, filepath: str):
         if os.path.exists(filepath):
             return pickle.load(open(filepath, 'rb'))
@@ -104,6 +112,11 @@ class LFUFilesystemCache(FilesystemCache):
         with self._ref_counters_lock:
             self._ref_counters.pop(filepath)
 
+        cache_metrics.record_eviction(
+            tier=cache_metrics.CacheTier.FILESYSTEM,
+            name=self.name or cache_metrics.OTHER_NAME,
+        )
+
         return (filepath, value)
 
 
@@ -136,24 +149,65 @@ class TTLFilesystemCache(LFUFilesystemCache):
         super().__setitem__(filepath, value)
 
 
+def _lookup(
+    cache: FilesystemCache,
+    filepath: str,
+):
+    '''
+    looks up `filepath` in `cache` and records the result (see `cache_metrics`)
+
+    @raises KeyError: if `filepath` is not contained in `cache`
+    '''
+    start = time.monotonic()
+    result = cache_metrics.CacheResult.ERROR
+    served_bytes = 0
+
+    try:
+        value = cache[filepath]
+        result = cache_metrics.CacheResult.HIT
+        try:
+            served_bytes = os.path.getsize(filepath)
+        except OSError:
+            pass # might have been evicted concurrently
+        return value
+    except KeyError:
+        result = cache_metrics.CacheResult.MISS
+        raise
+    finally:
+        cache_metrics.record(
+            tier=cache_metrics.CacheTier.FILESYSTEM,
+            name=cache.name,
+            result=result,
+            latency_seconds=time.monotonic() - start,
+            served_bytes=served_bytes,
+        )
+
+
 def cached(
     cache: FilesystemCache,
     key_func: collections.abc.Callable=cachetools.keys.hashkey,
-    cache_dir: str=default_cache_dir,
+    cache_dir: str | None=None,
 ):
     '''
     Decorator to wrap a function with a callable that saves results to a defined `FilesystemCache`.
     '''
     def decorator(func):
+        if not cache.name:
+            cache.name = cache_metrics.function_name(func)
+
         def wrapper(*args, **kwargs):
             key = hashlib.sha1(usedforsecurity=False)
             for key_part in key_func(*args, **kwargs):
                 key.update(str(key_part).encode('utf-8'))
 
-            filepath = os.path.join(cache_dir, key.hexdigest())
+            # default is looked up upon each call so that it can be changed after decoration
+            filepath = os.path.join(cache_dir or default_cache_dir, key.hexdigest())
 
             try:
-                return cache[filepath]
+                return _lookup(
+                    cache=cache,
+                    filepath=filepath,
+                )
             except KeyError:
                 pass
 
@@ -169,22 +223,29 @@ def cached(
 def async_cached(
     cache: FilesystemCache,
     key_func: collections.abc.Callable=cachetools.keys.hashkey,
-    cache_dir: str=default_cache_dir,
+    cache_dir: str | None=None,
 ):
     '''
     Decorator to wrap an async function with a callable that saves results to a defined
     `FilesystemCache`.
     '''
     def decorator(func):
+        if not cache.name:
+            cache.name = cache_metrics.function_name(func)
+
         async def wrapper(*args, **kwargs):
             key = hashlib.sha1(usedforsecurity=False)
             for key_part in key_func(*args, **kwargs):
                 key.update(str(key_part).encode('utf-8'))
 
-            filepath = os.path.join(cache_dir, key.hexdigest())
+            # default is looked up upon each call so that it can be changed after decoration
+            filepath = os.path.join(cache_dir or default_cache_dir, key.hexdigest())
 
             try:
-                return cache[filepath]
+                return _lookup(
+                    cache=cache,
+                    filepath=filepath,
+                )
             except KeyError:
                 pass
 
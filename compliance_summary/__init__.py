@@ -1,4 +1,3 @@
-import asyncio
 import collections
 import collections.abc
 import dataclasses
@@ -14,6 +13,7 @@ import ocm
 
 import deliverydb.cache
 import deliverydb.util
+import executors
 import odg.findings
 import odg.model
 import rescore.utility
@@ -21,6 +21,18 @@ import rescore.utility
 
 logger = logging.getLogger(__name__)
 
+# number of findings which are rescored within a single task of the CPU executor lane; if there are
+# less findings, severities are determined directly in the event loop as the overhead of a thread hop
+# would outweigh the costs of the (indexed) rescoring lookups
+SEVERITY_CHUNK_SIZE = 512
+
+# rescorings may either be passed as is or already indexed (preferred if they are used for multiple
+# calls, e.g. for all artefacts of a component)
+type Rescorings = (
+    collections.abc.Iterable[odg.model.ArtefactMetadata]
+    | rescore.utility.RescoringIndex
+)
+
 
 class ComplianceEntryCategorisation(enum.StrEnum):
     UNKNOWN = 'UNKNOWN'
@@ -57,6 +69,20 @@ def rescored_severity_if_any(
     return most_specific_rescoring.data.severity
 
 
+def rescored_severities_if_any(
+    findings: collections.abc.Iterable[odg.model.ArtefactMetadata],
+    rescoring_index: rescore.utility.RescoringIndex,
+) -> list[str | None]:
+    '''
+    Batch variant of `rescored_severity_if_any`
+    '''
+    return [
+        # rescorings are already sorted by specificity and creation date
+        rescorings_for_finding[0].data.severity if rescorings_for_finding else None
+        for rescorings_for_finding in rescoring_index.rescorings_for_findings(findings=findings)
+    ]
+
+
 class ComplianceScanStatus:
     NO_DATA = 'no_data'
     OK = 'ok'
@@ -97,42 +123,88 @@ class ComponentComplianceSummary:
 
 async def severity_for_finding(
     finding: odg.model.ArtefactMetadata,
-    rescorings: collections.abc.Iterable[odg.model.ArtefactMetadata]=tuple(),
+    rescorings: Rescorings=tuple(),
 ) -> ComplianceEntryCategorisation | str | None:
     '''
     Severity for known `ArtefactMetadata`.
     '''
-    if rescorings:
-        loop = asyncio.get_running_loop()
-        rescored_severity = await loop.run_in_executor(None, functools.partial(
-            rescored_severity_if_any,
-            finding=finding,
-            rescorings=rescorings,
-        ))
-        if rescored_severity:
-            return rescored_severity
+    severity, = await severities_for_findings(
+        findings=(finding,),
+        rescorings=rescorings,
+    )
 
-    return finding.data.severity
+    return severity
+
+
+def rescoring_index(
+    rescorings: Rescorings,
+) -> rescore.utility.RescoringIndex:
+    if isinstance(rescorings, rescore.utility.RescoringIndex):
+        return rescorings
+
+    return rescore.utility.RescoringIndex(rescorings=rescorings)
+
+
+async def severities_for_findings(
+    findings: collections.abc.Sequence[odg.model.ArtefactMetadata],
+    rescorings: Rescorings=tuple(),
+) -> list[ComplianceEntryCategorisation | str | None]:
+    '''
+    Severities for known `ArtefactMetadata` (in the same order as `findings`). The rescorings are
+    indexed only once for all findings (callers may also pass an existing index). If there are many
+    findings, they are rescored in chunks using the CPU executor lane.
+    '''
+    if not (index := rescoring_index(rescorings)):
+        return [finding.data.severity for finding in findings]
+
+    rescore_findings = functools.partial(
+        rescored_severities_if_any,
+        rescoring_index=index,
+    )
+
+    if len(findings) <= SEVERITY_CHUNK_SIZE:
+        rescored_severities = rescore_findings(findings)
+    else:
+        rescored_severities = await executors.map_chunks_in_lane(
+            executors.ExecutorLane.CPU,
+            rescore_findings,
+            findings,
+            chunk_size=SEVERITY_CHUNK_SIZE,
+        )
+
+    return [
+        rescored_severity or finding.data.severity
+        for finding, rescored_severity in zip(findings, rescored_severities)
+    ]
 
 
 async def calculate_summary_entry(
     finding_cfg: odg.findings.Finding,
     findings: collections.abc.Iterable[odg.model.ArtefactMetadata],
-    rescorings: collections.abc.Iterable[odg.model.ArtefactMetadata],
+    rescorings: Rescorings,
 ) -> ComplianceSummaryEntry:
     '''
     returns most severe (highest semantic value) `ComplianceSummaryEntry`
     `findings` must be of same datatype and not empty!
     '''
-    most_severe_categorisation = None
+    findings = tuple(findings)
+    severity_names = await severities_for_findings(
+        findings=findings,
+        rescorings=rescorings,
+    )
 
-    for finding in findings:
-        severity_name = await severity_for_finding(
-            finding=finding,
-            rescorings=rescorings,
-        )
+    categorisations_by_id = {
+        categorisation.id: categorisation
+        for categorisation in finding_cfg.categorisations
+    }
+    most_severe_categorisation = None
 
-        categorisation = finding_cfg.categorisation_by_id(severity_name)
+    for finding, severity_name in zip(findings, severity_names):
+        if not (categorisation := categorisations_by_id.get(severity_name)):
+            raise ValueError(
+                f'did not find categorisation with id={severity_name!r} '
+                f'for type "{finding_cfg.type}"'
+            )
 
         if (
             not most_severe_categorisation
@@ -154,7 +226,7 @@ async def compliance_summary_entry(
     datasource: odg.model.Datasource,
     scan_exists: bool,
     findings: collections.abc.Sequence[odg.model.ArtefactMetadata],
-    rescorings: collections.abc.Sequence[odg.model.ArtefactMetadata],
+    rescorings: Rescorings,
 ) -> ComplianceSummaryEntry:
     if not scan_exists:
         return ComplianceSummaryEntry(
@@ -187,7 +259,7 @@ async def artefact_datatype_summary(
     datasource: odg.model.Datasource,
     artefact_scan_infos: collections.abc.Sequence[odg.model.ArtefactMetadata],
     findings: collections.abc.Sequence[odg.model.ArtefactMetadata],
-    rescorings: collections.abc.Sequence[odg.model.ArtefactMetadata],
+    rescorings: Rescorings,
 ) -> ComplianceSummaryEntry:
     findings_for_artefact = [
         finding for finding in findings
@@ -197,25 +269,6 @@ async def artefact_datatype_summary(
         )
     ]
 
-    rescorings_for_artefact = [
-        rescoring for rescoring in rescorings
-        if (
-            rescoring.artefact.artefact_kind is artefact.artefact_kind
-            and rescoring.artefact.artefact.artefact_type == artefact.artefact.artefact_type
-            and (
-                not rescoring.artefact.artefact.artefact_name
-                or rescoring.artefact.artefact.artefact_name == artefact.artefact.artefact_name
-            ) and (
-                not rescoring.artefact.artefact.artefact_version
-                or rescoring.artefact.artefact.artefact_version == artefact.artefact.artefact_version
-            ) and (
-                not rescoring.artefact.artefact.normalised_artefact_extra_id
-                or rescoring.artefact.artefact.normalised_artefact_extra_id
-                    == artefact.artefact.normalised_artefact_extra_id
-            )
-        )
-    ]
-
     for artefact_scan_info in artefact_scan_infos:
         if (
             artefact_scan_info.artefact.artefact_kind is artefact.artefact_kind
@@ -231,7 +284,7 @@ async def artefact_datatype_summary(
         datasource=datasource,
         scan_exists=scan_exists,
         findings=findings_for_artefact,
-        rescorings=rescorings_for_artefact,
+        rescorings=rescorings,
     )
 
 
@@ -283,15 +336,24 @@ async def component_datatype_summaries(
         findings = []
 
     if findings:
-        rescorings = await deliverydb.util.rescorings_for_component(
-            component=component,
-            finding_type=finding_type,
-            db_session=db_session,
+        rescorings = rescore.utility.RescoringIndex(
+            rescorings=await deliverydb.util.rescorings_for_component(
+                component=component,
+                finding_type=finding_type,
+                db_session=db_session,
+            ),
         )
     else:
         # if no findings exist, we don't have to query for rescorings
         rescorings = []
 
+    findings_by_artefact = collections.defaultdict(list)
+    for finding in findings:
+        findings_by_artefact[(
+            finding.artefact.artefact_kind,
+            finding.artefact.artefact,
+        )].append(finding)
+
     summaries = []
     for artefact in component.resources + component.sources:
         artefact = odg.model.component_artefact_id_from_ocm(
@@ -307,7 +369,7 @@ async def component_datatype_summaries(
             finding_cfg=finding_cfg,
             datasource=datasource,
             artefact_scan_infos=artefact_scan_infos,
-            findings=findings,
+            findings=findings_by_artefact.get((artefact.artefact_kind, artefact.artefact), []),
             rescorings=rescorings,
         )
 
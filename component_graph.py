@@ -0,0 +1,510 @@
+'''
+Store for flattened component dependency graphs. Instead of walking the component tree by looking
+up each referenced component descriptor again for every request, the transitive reference graph of a
+component version is calculated once and shared by all consumers.
+
+Graphs are kept in-memory and, if a database session is passed, persisted in the delivery-db cache.
+As released component versions are immutable, graphs which only consist of released component
+versions never expire. Graphs containing non-release versions (e.g. snapshots, which might be
+overwritten) expire after a configurable time-to-live.
+'''
+import asyncio
+import collections.abc
+import dataclasses
+import datetime
+import logging
+
+import cachetools
+import sqlalchemy.ext.asyncio as sqlasync
+
+import cnudie.iter
+import cnudie.retrieve_async
+import ocm
+import ocm.gardener
+import version as versionutil
+
+import deliverydb.cache
+import deliverydb.model as dm
+import deliverydb_cache.model as dcm
+import deliverydb_cache.util as dcu
+import util
+
+
+logger = logging.getLogger(__name__)
+
+# must be increased upon incompatible changes of the (serialised) graph representation so that
+# previously persisted graphs are not used anymore
+GRAPH_FORMAT_VERSION = 1
+
+ComponentPath = tuple[tuple[ocm.ComponentIdentity, cnudie.iter.NodeReferenceType], ...]
+
+
+def _is_release(version: str) -> bool:
+    if not (parsed_version := versionutil.parse_to_semver(
+        version=version,
+        invalid_semver_ok=True,
+    )):
+        return False
+
+    return not (parsed_version.prerelease or parsed_version.build)
+
+
+def iter_references(
+    component: ocm.Component,
+) -> collections.abc.Generator[
+    tuple[ocm.ComponentIdentity, cnudie.iter.NodeReferenceType],
+    None,
+    None,
+]:
+    '''
+    yields the component references of the passed-in `component` in the same order as they are
+    traversed by `cnudie.iter_async.iter`, i.e. regular component references first, followed by
+    the references of the `ExtraComponentReferencesLabel`
+    '''
+    for cref in component.componentReferences:
+        yield (
+            ocm.ComponentIdentity(
+                name=cref.componentName,
+                version=cref.version,
+            ),
+            cnudie.iter.NodeReferenceType.COMPONENT_REFERENCE,
+        )
+
+    if not (extra_crefs_label := component.find_label(
+        name=ocm.gardener.ExtraComponentReferencesLabel.name,
+    )):
+        return
+
+    for extra_cref in extra_crefs_label.value:
+        yield (
+            ocm.ComponentIdentity(
+                name=extra_cref['component_reference']['name'],
+                version=extra_cref['component_reference']['version'],
+            ),
+            cnudie.iter.NodeReferenceType.EXTRA_COMPONENT_REFS_LABEL,
+        )
+
+
+@dataclasses.dataclass(frozen=True)
+class ComponentDependencyGraph:
+    '''
+    Flattened, transitive reference graph of a component version. Each component version is only
+    contained once in `components`, where the first entry is the root component. `references` holds
+    the adjacency list for each component, i.e. the indices of the referenced components alongside
+    the respective reference type.
+    '''
+    components: tuple[ocm.ComponentIdentity, ...]
+    references: tuple[tuple[tuple[int, cnudie.iter.NodeReferenceType], ...], ...]
+
+    @property
+    def root(self) -> ocm.ComponentIdentity:
+        return self.components[0]
+
+    @property
+    def immutable(self) -> bool:
+        return all(_is_release(component_id.version) for component_id in self.components)
+
+    def iter_paths(
+        self,
+        recursion_depth: int=-1,
+    ) -> collections.abc.Generator[ComponentPath, None, None]:
+        '''
+        yields the paths to all (transitively) referenced components, including the root component
+        itself. Paths are yielded in the same order and with the same semantics as the component
+        nodes yielded by `cnudie.iter_async.iter` (w/o pruning of redundant component versions).
+        '''
+        def iter_paths(
+            idx: int,
+            path: ComponentPath,
+            recursion_depth: int,
+        ):
+            yield path
+
+            if recursion_depth == 0:
+                return # stop resolving referenced components
+            elif recursion_depth > 0:
+                recursion_depth -= 1
+
+            for ref_idx, reftype in self.references[idx]:
+                yield from iter_paths(
+                    idx=ref_idx,
+                    path=(*path, (self.components[ref_idx], reftype)),
+                    recursion_depth=recursion_depth,
+                )
+
+        yield from iter_paths(
+            idx=0,
+            path=((self.root, cnudie.iter.NodeReferenceType.COMPONENT_REFERENCE),),
+            recursion_depth=recursion_depth,
+        )
+
+    def as_dict(self) -> dict:
+        return {
+            'components': [
+                [component_id.name, component_id.version]
+                for component_id in self.components
+            ],
+            'references': [
+                [[ref_idx, str(reftype)] for ref_idx, reftype in references]
+                for references in self.references
+            ],
+        }
+
+    @staticmethod
+    def from_dict(raw: dict) -> 'ComponentDependencyGraph':
+        return ComponentDependencyGraph(
+            components=tuple(
+                ocm.ComponentIdentity(
+                    name=name,
+                    version=version,
+                ) for name, version in raw['components']
+            ),
+            references=tuple(
+                tuple(
+                    (ref_idx, cnudie.iter.NodeReferenceType(reftype))
+                    for ref_idx, reftype in references
+                ) for references in raw['references']
+            ),
+        )
+
+
+def merge_graphs(
+    component_id: ocm.ComponentIdentity,
+    referenced_graphs: collections.abc.Iterable[
+        tuple[ComponentDependencyGraph, cnudie.iter.NodeReferenceType]
+    ],
+) -> ComponentDependencyGraph:
+    '''
+    creates the dependency graph of the component with `component_id` from the dependency graphs of
+    its (directly) referenced components
+    '''
+    components = [component_id]
+    references = [[]]
+    idx_for_component_id = {component_id: 0}
+
+    for referenced_graph, reftype in referenced_graphs:
+        idx_mapping = []
+
+        for referenced_component_id in referenced_graph.components:
+            if (idx := idx_for_component_id.get(referenced_component_id)) is None:
+                idx = len(components)
+                idx_for_component_id[referenced_component_id] = idx
+                components.append(referenced_component_id)
+                references.append(None)
+
+            idx_mapping.append(idx)
+
+        for referenced_idx, referenced_references in enumerate(referenced_graph.references):
+            idx = idx_mapping[referenced_idx]
+
+            if references[idx] is not None:
+                # component versions are identical, hence so are their references
+                continue
+
+            references[idx] = [
+                (idx_mapping[ref_idx], ref_reftype)
+                for ref_idx, ref_reftype in referenced_references
+            ]
+
+        references[0].append((idx_mapping[0], reftype))
+
+    return ComponentDependencyGraph(
+        components=tuple(components),
+        references=tuple(tuple(component_references) for component_references in references),
+    )
+
+
+class ComponentDependencyGraphStore:
+    '''
+    Calculates and caches the flattened dependency graphs of component versions. The graphs of
+    referenced component versions are calculated concurrently (with at most
+    `max_concurrent_lookups` concurrent component descriptor lookups) and are cached as well, so
+    that subsequent component versions which share most of their dependencies (e.g. consecutive
+    releases) only require the lookup of the changed component descriptors.
+
+    Concurrent requests for the graph of the same component version are only calculated once. The
+    references of a component version which is already being resolved on the current resolution
+    path (i.e. reference cycles) are skipped, as awaiting the pending graph would never finish.
+    '''
+    def __init__(
+        self,
+        max_cached_graphs: int=4096,
+        mutable_graphs_ttl_seconds: int=10 * 60,
+        max_concurrent_lookups: int=16,
+    ):
+        self.mutable_graphs_ttl_seconds = mutable_graphs_ttl_seconds
+        self.max_concurrent_lookups = max_concurrent_lookups
+
+        self._immutable_graphs = cachetools.LRUCache(maxsize=max_cached_graphs)
+        self._mutable_graphs = cachetools.TTLCache(
+            maxsize=max_cached_graphs,
+            ttl=mutable_graphs_ttl_seconds,
+        )
+        self._pending_graphs: dict[tuple, asyncio.Future[ComponentDependencyGraph]] = {}
+        # keys of the graphs each pending calculation is waiting for
+        self._awaited_graphs: dict[tuple, set[tuple]] = {}
+        self._lookup_semaphore = asyncio.Semaphore(max_concurrent_lookups)
+
+        self.descriptor_lookups = 0
+
+    def _cached_graph(self, key: tuple) -> ComponentDependencyGraph | None:
+        if (graph := self._immutable_graphs.get(key)) is not None:
+            return graph
+
+        return self._mutable_graphs.get(key)
+
+    def _is_awaiting(self, key: tuple, awaited_key: tuple) -> bool:
+        '''
+        returns whether the (pending) calculation of the graph with `key` (transitively) waits for
+        the graph with `awaited_key`, i.e. whether `awaited_key` is on its resolution path
+        '''
+        visited_keys = set()
+        keys = [key]
+
+        while keys:
+            if (key := keys.pop()) == awaited_key:
+                return True
+            if key in visited_keys:
+                continue
+            visited_keys.add(key)
+            keys.extend(self._awaited_graphs.get(key, ()))
+
+        return False
+
+    def _cache_graph(self, key: tuple, graph: ComponentDependencyGraph):
+        if graph.immutable:
+            self._immutable_graphs[key] = graph
+        else:
+            self._mutable_graphs[key] = graph
+
+    async def _component_descriptor(
+        self,
+        component_id: ocm.ComponentIdentity,
+        component_descriptor_lookup: cnudie.retrieve_async.ComponentDescriptorLookupById,
+        ocm_repo: ocm.OcmRepository=None,
+    ) -> ocm.ComponentDescriptor:
+        async with self._lookup_semaphore:
+            self.descriptor_lookups += 1
+
+            return await util.retrieve_component_descriptor(
+                component_id,
+                component_descriptor_lookup=component_descriptor_lookup,
+                ocm_repo=ocm_repo,
+            )
+
+    async def _calculate_graph(
+        self,
+        key: tuple,
+        component_id: ocm.ComponentIdentity,
+        component_descriptor_lookup: cnudie.retrieve_async.ComponentDescriptorLookupById,
+        ocm_repo: ocm.OciOcmRepository=None,
+    ) -> ComponentDependencyGraph:
+        component_descriptor = await self._component_descriptor(
+            component_id=component_id,
+            component_descriptor_lookup=component_descriptor_lookup,
+            ocm_repo=ocm_repo,
+        )
+        references = []
+        awaited_keys = self._awaited_graphs[key] = set()
+
+        for referenced_component_id, reftype in iter_references(component_descriptor.component):
+            # similar to `cnudie.iter_async.iter`, referenced components are not looked-up in the
+            # explicitly specified ocm repository
+            referenced_key = (referenced_component_id.name, referenced_component_id.version, None)
+
+            if self._is_awaiting(key=referenced_key, awaited_key=key):
+                logger.warning(
+                    f'skipping cyclic reference from {component_id} to {referenced_component_id}'
+                )
+                continue
+
+            awaited_keys.add(referenced_key)
+            references.append((referenced_component_id, reftype))
+
+        try:
+            referenced_graphs = await asyncio.gather(*[
+                self._graph(
+                    component_id=referenced_component_id,
+                    component_descriptor_lookup=component_descriptor_lookup,
+                ) for referenced_component_id, _ in references
+            ])
+        finally:
+            del self._awaited_graphs[key]
+
+        return merge_graphs(
+            component_id=component_id,
+            referenced_graphs=zip(
+                referenced_graphs,
+                (reftype for _, reftype in references),
+            ),
+        )
+
+    async def _graph(
+        self,
+        component_id: ocm.ComponentIdentity,
+        component_descriptor_lookup: cnudie.retrieve_async.ComponentDescriptorLookupById,
+        ocm_repo: ocm.OciOcmRepository=None,
+    ) -> ComponentDependencyGraph:
+        key = (component_id.name, component_id.version, ocm_repo.oci_ref if ocm_repo else None)
+
+        if (graph := self._cached_graph(key)) is not None:
+            return graph
+
+        if not (pending_graph := self._pending_graphs.get(key)):
+            pending_graph = asyncio.ensure_future(self._calculate_graph(
+                key=key,
+                component_id=component_id,
+                component_descriptor_lookup=component_descriptor_lookup,
+                ocm_repo=ocm_repo,
+            ))
+            self._pending_graphs[key] = pending_graph
+
+            def on_done(pending_graph: asyncio.Future[ComponentDependencyGraph]):
+                self._pending_graphs.pop(key, None)
+
+                if not pending_graph.cancelled() and not pending_graph.exception():
+                    self._cache_graph(key, pending_graph.result())
+
+            pending_graph.add_done_callback(on_done)
+
+        # shield calculation as it might be awaited by other callers as well
+        return await asyncio.shield(pending_graph)
+
+    async def graph(
+        self,
+        component_id: ocm.ComponentIdentity,
+        component_descriptor_lookup: cnudie.retrieve_async.ComponentDescriptorLookupById,
+        ocm_repo: ocm.OciOcmRepository=None,
+        db_session: sqlasync.session.AsyncSession=None,
+    ) -> ComponentDependencyGraph:
+        '''
+        returns the dependency graph of the component with `component_id`. If `db_session` is
+        passed, the graph is also retrieved from and persisted in the delivery-db cache.
+
+        @raises aiohttp.web.HTTPNotFound: if a component descriptor cannot be found
+        '''
+        key = (component_id.name, component_id.version, ocm_repo.oci_ref if ocm_repo else None)
+
+        if (graph := self._cached_graph(key)) is not None:
+            return graph
+
+        if not db_session:
+            return await self._graph(
+                component_id=component_id,
+                component_descriptor_lookup=component_descriptor_lookup,
+                ocm_repo=ocm_repo,
+            )
+
+        descriptor = dcm.CachedComponentDependencyGraph(
+            encoding_format=dcm.EncodingFormat.JSON,
+            component_name=component_id.name,
+            component_version=component_id.version,
+            ocm_repository=ocm_repo.oci_ref if ocm_repo else None,
+            graph_format_version=GRAPH_FORMAT_VERSION,
+        )
+
+        if value := await deliverydb.cache.find_cached_value(
+            db_session=db_session,
+            id=descriptor.id,
+        ):
+            graph = ComponentDependencyGraph.from_dict(dcu.deserialise_cache_value(
+                value=value,
+                encoding_format=descriptor.encoding_format,
+            ))
+            self._cache_graph(key, graph)
+            return graph
+
+        start = datetime.datetime.now(tz=datetime.timezone.utc)
+        graph = await self._graph(
+            component_id=component_id,
+            component_descriptor_lookup=component_descriptor_lookup,
+            ocm_repo=ocm_repo,
+        )
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+
+        value = dcu.serialise_cache_value(
+            value=graph.as_dict(),
+            encoding_format=descriptor.encoding_format,
+        )
+
+        if graph.immutable:
+            delete_after = None
+        else:
+            delete_after = now + datetime.timedelta(seconds=self.mutable_graphs_ttl_seconds)
+
+        await deliverydb.cache.add_or_update_cache_entry(
+            db_session=db_session,
+            cache_entry=dm.DBCache(
+                id=descriptor.id,
+                descriptor=util.dict_serialisation(dataclasses.asdict(descriptor)),
+                delete_after=delete_after,
+                keep_until=now,
+                costs=int((now - start).total_seconds() * 1000),
+                size=len(value),
+                value=value,
+            ),
+        )
+
+        return graph
+
+    def clear(self):
+        self._immutable_graphs.clear()
+        self._mutable_graphs.clear()
+
+
+dependency_graph_store = ComponentDependencyGraphStore()
+
+
+async def iter_component_nodes(
+    graph: ComponentDependencyGraph,
+    component_descriptor_lookup: cnudie.retrieve_async.ComponentDescriptorLookupById,
+    ocm_repo: ocm.OcmRepository=None,
+    recursion_depth: int=-1,
+    prune_unique: bool=False,
+    max_concurrent_lookups: int=16,
+) -> collections.abc.AsyncGenerator[cnudie.iter.ComponentNode, None, None]:
+    '''
+    yields the component nodes of the passed-in `graph` like `cnudie.iter_async.iter` (using
+    `cnudie.iter.Filter.components` as node filter) would do. However, each component descriptor is
+    only retrieved once, and retrieval happens concurrently before the first node is yielded.
+    '''
+    paths = list(graph.iter_paths(recursion_depth=recursion_depth))
+    component_ids = list(dict.fromkeys(path[-1][0] for path in paths))
+
+    semaphore = asyncio.Semaphore(max_concurrent_lookups)
+
+    async def component(component_id: ocm.ComponentIdentity) -> ocm.Component:
+        async with semaphore:
+            component_descriptor = await util.retrieve_component_descriptor(
+                component_id,
+                component_descriptor_lookup=component_descriptor_lookup,
+                ocm_repo=ocm_repo if component_id == graph.root else None,
+            )
+
+        return component_descriptor.component
+
+    component_for_id = dict(zip(
+        component_ids,
+        await asyncio.gather(*[
+            component(component_id=component_id)
+            for component_id in component_ids
+        ]),
+    ))
+
+    seen_component_ids = set()
+    for path in paths:
+        component_id = path[-1][0]
+
+        if prune_unique:
+            if component_id in seen_component_ids:
+                continue
+            seen_component_ids.add(component_id)
+
+        yield cnudie.iter.ComponentNode(
+            path=tuple(
+                cnudie.iter.NodePathEntry(
+                    component=component_for_id[path_component_id],
+                    reftype=reftype,
+                ) for path_component_id, reftype in path
+            ),
+        )
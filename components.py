@@ -13,7 +13,6 @@ import sqlalchemy.ext.asyncio as sqlasync
 import yaml
 
 import cnudie.iter
-import cnudie.iter_async
 import cnudie.retrieve
 import cnudie.retrieve_async
 import cnudie.util
@@ -22,17 +21,19 @@ import oci.client_async
 import oci.model as om
 import ocm
 import ocm.oci
-import version as versionutil
 
 import compliance_summary as cs
+import component_graph
 import consts
 import deliverydb.cache
+import executors
 import features
 import lookups
 import odg.extensions_cfg
 import responsibles
 import responsibles.labels
 import util
+import version_index
 import yp
 
 
@@ -340,6 +341,7 @@ class ComponentDependencies(aiohttp.web.View):
             component_version=version,
             component_descriptor_lookup=self.request.app[consts.APP_COMPONENT_DESCRIPTOR_LOOKUP],
             ocm_repo=ocm_repo,
+            db_session=self.request.get(consts.REQUEST_DB_SESSION),
         )
 
         filtered_component_dependencies = []
@@ -506,19 +508,23 @@ class ComponentResponsibles(aiohttp.web.View):
                 f'{component.identity()=}, {artifact_name=}'
             )
 
+        # resolving responsibles involves blocking requests towards GitHub
         if responsibles_label:
-            user_identities = tuple(responsibles.user_identities_from_responsibles_label(
-                responsibles_label=responsibles_label,
-                source=main_source,
-                component_identity=component_descriptor.component.identity(),
-                github_api_lookup=self.request.app[consts.APP_GITHUB_API_LOOKUP],
-            ))
-        else:
-            try:
-                user_identities = responsibles.user_identities_from_source(
+            user_identities = await executors.run_in_lane(
+                executors.ExecutorLane.GITHUB,
+                tuple,
+                responsibles.user_identities_from_responsibles_label(
+                    responsibles_label=responsibles_label,
                     source=main_source,
+                    component_identity=component_descriptor.component.identity(),
                     github_api_lookup=self.request.app[consts.APP_GITHUB_API_LOOKUP],
-                )
+                ),
+            )
+        else:
+            try:
+                user_identities = await self.request.app[
+                    consts.APP_RESPONSIBLES_RESOLVER
+                ].user_identities(source=main_source)
             except ValueError:
                 user_identities = []
                 statuses.append(responsibles.Status(
@@ -528,16 +534,17 @@ class ComponentResponsibles(aiohttp.web.View):
                 ))
 
         if user_identities is None: # can be falsy
-            # github statistics pending, client should retry
+            # github statistics pending (resolution continues in the background), client should retry
             return aiohttp.web.Response(
                 status=http.HTTPStatus.ACCEPTED,
             )
 
+        addressbook: yp.Addressbook = self.request.app[consts.APP_ADDRESSBOOK]
         user_identities = [
             yp.inject(
-                addressbook_source=self.request.app[consts.APP_ADDRESSBOOK_SOURCE],
-                addressbook_entries=self.request.app[consts.APP_ADDRESSBOOK_ENTRIES],
-                addressbook_github_mappings=self.request.app[consts.APP_ADDRESSBOOK_GITHUB_MAPPINGS],
+                addressbook_source=addressbook.source,
+                addressbook_entries=addressbook,
+                addressbook_github_mappings=addressbook.github_mappings,
                 user_id=user_id,
             ).identifiers
             for user_id in user_identities
@@ -593,6 +600,29 @@ async def component_versions(
     )
 
 
+async def _version_index(
+    component_name: str,
+    version_lookup: cnudie.retrieve_async.VersionLookupByComponent=None,
+    ocm_repo: ocm.OcmRepository=None,
+    oci_client: oci.client_async.Client=None,
+    db_session: sqlasync.session.AsyncSession=None,
+) -> version_index.ComponentVersionIndex:
+    async def fetch_versions() -> list[str]:
+        return await component_versions(
+            component_name=component_name,
+            version_lookup=version_lookup,
+            ocm_repo=ocm_repo,
+            oci_client=oci_client,
+            db_session=db_session,
+        )
+
+    return await version_index.version_indices.index(
+        component_name=component_name,
+        fetch_versions=fetch_versions,
+        ocm_repo=ocm_repo,
+    )
+
+
 async def greatest_component_version(
     component_name: str,
     version_lookup: cnudie.retrieve_async.VersionLookupByComponent=None,
@@ -602,7 +632,7 @@ async def greatest_component_version(
     invalid_semver_ok: bool=False,
     db_session: sqlasync.session.AsyncSession=None,
 ) -> str | None:
-    versions = await component_versions(
+    index = await _version_index(
         component_name=component_name,
         version_lookup=version_lookup,
         ocm_repo=ocm_repo,
@@ -610,36 +640,10 @@ async def greatest_component_version(
         db_session=db_session,
     )
 
-    greatest_candidate = None
-    greatest_candidate_semver = None
-    for candidate in versions:
-        if isinstance(candidate, str):
-            candidate_semver = versionutil.parse_to_semver(
-                version=candidate,
-                invalid_semver_ok=invalid_semver_ok,
-            )
-
-            if not candidate_semver:
-                continue
-        else:
-            candidate_semver = candidate
-
-        if (
-            version_filter is odg.extensions_cfg.VersionFilter.RELEASES_ONLY
-            and (candidate_semver.prerelease or candidate_semver.build)
-        ):
-            continue
-
-        if not greatest_candidate_semver:
-            greatest_candidate_semver = candidate_semver
-            greatest_candidate = candidate
-            continue
-
-        if candidate_semver > greatest_candidate_semver:
-            greatest_candidate_semver = candidate_semver
-            greatest_candidate = candidate
-
-    return greatest_candidate
+    return index.greatest_version(
+        version_filter=version_filter,
+        invalid_semver_ok=invalid_semver_ok,
+    )
 
 
 async def greatest_component_versions(
@@ -656,7 +660,7 @@ async def greatest_component_versions(
     end_date: datetime.date=None,
     db_session: sqlasync.session.AsyncSession=None,
 ) -> list[str]:
-    versions = await component_versions(
+    index = await _version_index(
         component_name=component_name,
         version_lookup=version_lookup,
         ocm_repo=ocm_repo,
@@ -664,30 +668,10 @@ async def greatest_component_versions(
         db_session=db_session,
     )
 
-    if not versions:
-        return []
-
-    versions = [
-        v for v in versions
-        if versionutil.parse_to_semver(
-            version=v,
-            invalid_semver_ok=invalid_semver_ok,
-        )
-    ]
-
-    if version_filter is odg.extensions_cfg.VersionFilter.RELEASES_ONLY:
-        versions = [
-            v for v in versions
-            if not (pv := versionutil.parse_to_semver(
-                version=v,
-                invalid_semver_ok=invalid_semver_ok,
-            )).prerelease and not pv.build
-        ]
-
-    versions = sorted(versions, key=lambda v: versionutil.parse_to_semver(
-        version=v,
+    versions = index.versions(
+        version_filter=version_filter,
         invalid_semver_ok=invalid_semver_ok,
-    ))
+    )
 
     # If no end_date is provided, default to now
     if not end_date:
@@ -695,30 +679,13 @@ async def greatest_component_versions(
 
     # Handle date range filtering only if start_date is provided
     if start_date:
-        async def filter_by_date_range(versions):
-            for version in reversed(versions):
-                component_descriptor = await util.retrieve_component_descriptor(
-                    ocm.ComponentIdentity(
-                        name=component_name,
-                        version=version,
-                    ),
-                    component_descriptor_lookup
-                )
-                creation_date = util.get_creation_date(
-                    component_descriptor.component
-                ).strftime('%Y-%m-%d')
-
-                if creation_date > end_date:
-                    continue
-
-                if creation_date < start_date:
-                    break
-
-                yield version
-
         versions = [
-            version async for version
-            in filter_by_date_range(versions)
+            version async for version in index.iter_versions_in_date_range(
+                versions=versions,
+                component_descriptor_lookup=component_descriptor_lookup,
+                start_date=start_date,
+                end_date=end_date,
+            )
         ]
 
     if greatest_version:
@@ -829,6 +796,7 @@ async def resolve_component_dependencies(
     component_descriptor_lookup: cnudie.retrieve_async.ComponentDescriptorLookupById,
     ocm_repo: ocm.OcmRepository=None,
     recursion_depth: int=-1,
+    db_session: sqlasync.session.AsyncSession=None,
 ) -> collections.abc.AsyncGenerator[cnudie.iter.ComponentNode, None, None]:
     descriptor = await util.retrieve_component_descriptor(
         ocm.ComponentIdentity(
@@ -847,6 +815,7 @@ async def resolve_component_dependencies(
             component_descriptor_lookup=component_descriptor_lookup,
             ocm_repo=ocm_repo,
             recursion_depth=recursion_depth,
+            db_session=db_session,
         )
     except dacite.exceptions.MissingValueError as e:
         raise aiohttp.web.HTTPFailedDependency(text=str(e))
@@ -1193,33 +1162,36 @@ async def _components(
     component_descriptor_lookup: cnudie.retrieve_async.ComponentDescriptorLookupById,
     ocm_repo: ocm.OcmRepository=None,
     recursion_depth: int=-1,
+    db_session: sqlasync.session.AsyncSession=None,
 ) -> collections.abc.AsyncGenerator[cnudie.iter.ComponentNode, None, None]:
-    component_descriptor = await util.retrieve_component_descriptor(
-        ocm.ComponentIdentity(
-            name=component_name,
-            version=component_version,
-        ),
-        component_descriptor_lookup=component_descriptor_lookup,
-        ocm_repo=ocm_repo,
+    component_id = ocm.ComponentIdentity(
+        name=component_name,
+        version=component_version,
     )
 
     try:
-        return cnudie.iter_async.iter(
-            component=component_descriptor,
-            lookup=component_descriptor_lookup,
-            recursion_depth=recursion_depth,
-            prune_unique=False,
-            node_filter=cnudie.iter.Filter.components,
+        graph = await component_graph.dependency_graph_store.graph(
+            component_id=component_id,
+            component_descriptor_lookup=component_descriptor_lookup,
+            ocm_repo=ocm_repo,
+            db_session=db_session,
         )
     except om.OciImageNotFoundException:
         err_str = 'Error occurred during retrieval of component dependencies of ' \
-        f'{component_descriptor.component.name=} in {component_descriptor.component.version=}'
+        f'{component_name=} in {component_version=}'
         logger.warning(err_str)
         raise aiohttp.web.HTTPUnprocessableEntity(
             reason='Error occurred during retrieval of component dependencies',
             text=err_str,
         )
 
+    return component_graph.iter_component_nodes(
+        graph=graph,
+        component_descriptor_lookup=component_descriptor_lookup,
+        ocm_repo=ocm_repo,
+        recursion_depth=recursion_depth,
+    )
+
 
 class ComplianceSummary(aiohttp.web.View):
     required_features = (features.FeatureDeliveryDB,)
@@ -1314,17 +1286,21 @@ class ComplianceSummary(aiohttp.web.View):
                 db_session=db_session,
             )
 
-        components_dependencies = resolve_component_dependencies(
-            component_name=component_name,
-            component_version=version,
+        # only the identities of the dependencies are required, hence there is no need to retrieve
+        # the component descriptors
+        dependency_graph = await component_graph.dependency_graph_store.graph(
+            component_id=ocm.ComponentIdentity(
+                name=component_name,
+                version=version,
+            ),
             component_descriptor_lookup=component_descriptor_lookup,
             ocm_repo=ocm_repo,
-            recursion_depth=recursion_depth,
+            db_session=db_session,
         )
 
         components = [
-            component_node.component_id
-            async for component_node in components_dependencies
+            path[-1][0]
+            for path in dependency_graph.iter_paths(recursion_depth=recursion_depth)
         ]
 
         finding_cfgs = self.request.app[consts.APP_FINDING_CFGS]
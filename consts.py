@@ -4,9 +4,7 @@ are dict-like objects, so the constants can be used to retrieve the desired vari
 globally available.
 '''
 
-APP_ADDRESSBOOK_ENTRIES = 'addressbook_entries'
-APP_ADDRESSBOOK_GITHUB_MAPPINGS = 'addressbook_github_mappings'
-APP_ADDRESSBOOK_SOURCE = 'addressbook_source'
+APP_ADDRESSBOOK = 'addressbook'
 APP_BASE_URL = 'base_url'
 APP_COMPONENT_DESCRIPTOR_LOOKUP = 'component_descriptor_lookup'
 APP_COMPONENT_WITH_TESTS_CALLBACK = 'component_with_tests_callback'
@@ -20,12 +18,15 @@ APP_KUBERNETES_API_CALLBACK = 'kubernetes_api_callback'
 APP_NAMESPACE_CALLBACK = 'namespace_callback'
 APP_OCI_CLIENT = 'oci_client'
 APP_PROFILES_CALLBACK = 'profiles_callback'
+APP_RESPONSIBLES_RESOLVER = 'responsibles_resolver'
 APP_SECRET_FACTORY = 'secret_factory'
 APP_SPECIAL_COMPONENT_CALLBACK = 'special_component_callback'
 APP_SPRINTS = 'sprints'
 APP_SPRINTS_METADATA = 'sprints_metadata'
 APP_VERSION_FILTER_CALLBACK = 'version_filter_callback'
 APP_VERSION_LOOKUP = 'version_lookup'
+# index of the worker process serving the app (`None` if not running in multi-process mode)
+APP_WORKER_ID = 'worker_id'
 
 # `db_session` is intended to be used for tasks which have to be finished in a timely manner
 REQUEST_DB_SESSION = 'db_session'
@@ -8,6 +8,7 @@ import cnudie.retrieve
 import delivery.client
 import oci.client
 
+import blobcache
 import crypto_extension.cbom
 import crypto_extension.model
 import crypto_extension.validate
@@ -89,6 +90,7 @@ def scan(
     delivery_client: delivery.client.DeliveryServiceClient,
     oci_client: oci.client.Client,
     secret_factory: secret_mgmt.SecretFactory,
+    blob_cache: blobcache.BlobCache | None=None,
     **kwargs,
 ):
     logger.info(f'scanning {artefact}')
@@ -133,6 +135,7 @@ def scan(
         mapping=mapping,
         oci_client=oci_client,
         secret_factory=secret_factory,
+        blob_cache=blob_cache,
     )
 
     logger.info('successfully created CBOM document')
@@ -167,15 +170,14 @@ def scan(
         ) if raw['meta']['datasource'] == odg.model.Datasource.CRYPTO
     )
 
-    stale_artefact_metadata = []
-    for existing_artefact_metadatum in existing_artefact_metadata:
-        for asset in crypto_assets + findings:
-            if existing_artefact_metadatum.data.key == asset.key:
-                # finding still appeared in current scan result -> keep it
-                break
-        else:
-            # finding did not appear in current scan result -> delete it
-            stale_artefact_metadata.append(existing_artefact_metadatum)
+    keys = {asset.key for asset in crypto_assets + findings}
+
+    # findings which did not appear in the current scan result anymore are deleted
+    stale_artefact_metadata = [
+        existing_artefact_metadatum
+        for existing_artefact_metadatum in existing_artefact_metadata
+        if existing_artefact_metadatum.data.key not in keys
+    ]
 
     if stale_artefact_metadata:
         delivery_client.delete_metadata(data=stale_artefact_metadata)
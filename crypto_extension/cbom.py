@@ -1,6 +1,7 @@
 import json
 import logging
 import os
+import shutil
 import subprocess
 import tarfile
 import tempfile
@@ -8,6 +9,7 @@ import tempfile
 import oci.client
 import ocm
 
+import blobcache
 import crypto_extension.sbom
 import dockerutil
 import odg.extensions_cfg
@@ -67,6 +69,7 @@ def find_cbom_or_create(
     mapping: odg.extensions_cfg.CryptoMapping,
     oci_client: oci.client.Client,
     secret_factory: secret_mgmt.SecretFactory,
+    blob_cache: blobcache.BlobCache | None=None,
 ) -> dict:
     '''
     Looks up an existing CBOM document (to be implemented once it is aligned on target picture) or
@@ -144,19 +147,34 @@ def find_cbom_or_create(
             )
             digest = access.localReference
 
-        blob = oci_client.blob(
-            image_reference=image_reference,
-            digest=digest,
-            stream=True,
-        )
-
         with tempfile.TemporaryDirectory(dir=own_dir) as tmp_dir:
             sbom_path = os.path.join(tmp_dir, 'sbom')
             local_blob_path = os.path.join(tmp_dir, 'local_blob')
 
-            with open(local_blob_path, 'wb') as file:
-                for chunk in blob.iter_content(chunk_size=4096):
-                    file.write(chunk)
+            if blob_cache:
+                with blob_cache.open_oci_blob(
+                    oci_client=oci_client,
+                    image_reference=image_reference,
+                    digest=digest,
+                    size=access.globalAccess.size if access.globalAccess else access.size,
+                ) as blob_file:
+                    try:
+                        # cached blobs are immutable, hence a hardlink is sufficient
+                        os.link(blob_cache.path(digest), local_blob_path)
+                    except OSError:
+                        # different filesystems or blob was not cached (e.g. too large)
+                        with open(local_blob_path, 'wb') as file:
+                            shutil.copyfileobj(blob_file, file)
+            else:
+                blob = oci_client.blob(
+                    image_reference=image_reference,
+                    digest=digest,
+                    stream=True,
+                )
+
+                with open(local_blob_path, 'wb') as file:
+                    for chunk in blob.iter_content(chunk_size=4096):
+                        file.write(chunk)
 
             crypto_extension.sbom.derive_sbom_for_source(
                 source=local_blob_path,
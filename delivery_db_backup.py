@@ -1,11 +1,20 @@
 import atexit
 import collections.abc
+import contextlib
+import dataclasses
 import datetime
 import hashlib
+import io
 import logging
 import os
+import queue
 import subprocess
 import tarfile
+import tempfile
+import threading
+import urllib.parse
+
+import requests
 
 import ci.log
 import cnudie.iter
@@ -15,6 +24,7 @@ import cnudie.util
 import delivery.client
 import oci.auth
 import oci.client
+import oci.model as om
 import ocm
 import ocm.upload
 import version
@@ -22,6 +32,7 @@ import version
 import ctx_util
 import k8s.logging
 import lookups
+import oci_util
 import odg.extensions_cfg
 import odg.util
 import paths
@@ -30,50 +41,198 @@ import secret_mgmt.oci_registry
 
 
 logger = logging.getLogger(__name__)
-ci.log.configure_default_logging()
-k8s.logging.configure_kubernetes_logging()
 
 
 BACKUP_BLOB_MEDIA_TYPE = 'application/data+tar'
+PG_DUMP_CUSTOM_MEDIA_TYPE = 'application/data+pg-dump'
+BACKUP_FORMAT_LABEL_NAME = 'cloud.gardener/delivery-db-backup/format'
+# relations of the delivery-db cache (see `deliverydb.model.DBCache`), their content is re-computed
+# on demand and thus not required to restore a working delivery-db
+CACHE_RELATIONS = ('cache', 'cache_chunk')
 
 
-def create_local_backup(
-    outfile: str,
-    connection_url: str,
-    additional_args: list[str] = [],
-):
-    outfile_path = os.path.abspath(outfile)
+def media_type(
+    backup_format: odg.extensions_cfg.DeliveryDBBackupFormat,
+) -> str:
+    if backup_format is odg.extensions_cfg.DeliveryDBBackupFormat.CUSTOM:
+        return PG_DUMP_CUSTOM_MEDIA_TYPE
+
+    # directory dumps are uploaded as tar archive as well
+    return BACKUP_BLOB_MEDIA_TYPE
 
-    pg_dump_argv = [
+
+def pg_dump_argv(
+    connection_url: str,
+    backup_format: odg.extensions_cfg.DeliveryDBBackupFormat,
+    outdir: str | None=None,
+    jobs: int=1,
+    compression: str | None=None,
+    exclude_cache_data: bool=False,
+    additional_args: collections.abc.Sequence[str]=(),
+) -> list[str]:
+    '''
+    returns the arguments to run `pg_dump` with. Unless `outdir` is specified (required for the
+    `directory` format), the dump is written to stdout.
+    '''
+    argv = [
         'pg_dump',
         connection_url,
-        '--file',
-        outfile_path,
         '--format',
-        'tar',
+        backup_format,
         '--verbose',
-    ] + additional_args
+    ]
+
+    if outdir:
+        argv.extend(('--file', outdir))
+
+    if backup_format is odg.extensions_cfg.DeliveryDBBackupFormat.DIRECTORY and jobs > 1:
+        argv.extend(('--jobs', str(jobs)))
+
+    if compression:
+        argv.extend(('--compress', compression))
+
+    if exclude_cache_data:
+        argv.extend(
+            f'--exclude-table-data={relation}'
+            for relation in CACHE_RELATIONS
+        )
+
+    return argv + list(additional_args)
+
+
+def _log_lines(stream: io.TextIOBase):
+    for line in iter(stream.readline, ''):
+        logger.info(line.rstrip())
 
-    logger.info(f'{pg_dump_argv=}')
+
+@contextlib.contextmanager
+def pg_dump(
+    argv: list[str],
+) -> collections.abc.Generator[subprocess.Popen, None, None]:
+    '''
+    runs `pg_dump` and yields the process, the dump may be read from its stdout. The (verbose)
+    output on stderr is logged concurrently so that the process is never blocked by a full pipe.
+
+    @raises RuntimeError: if `pg_dump` exits with a non-zero return code
+    '''
+    pg_dump_args = argv[2:] # omit connection url as it contains credentials
+    logger.info(f'{pg_dump_args=}')
 
     process = subprocess.Popen(
-        pg_dump_argv,
+        argv,
         stdout=subprocess.PIPE,
-        universal_newlines=True,
-        stderr=subprocess.STDOUT,
+        stderr=subprocess.PIPE,
     )
-    for line in iter(process.stdout.readline, ''):
-        logger.info(line)
-
-    process.stdout.close()
-    return_code = process.wait()
+    log_thread = threading.Thread(
+        target=_log_lines,
+        kwargs=dict(stream=io.TextIOWrapper(process.stderr)),
+        daemon=True,
+    )
+    log_thread.start()
+
+    try:
+        yield process
+    except BaseException:
+        process.kill()
+        raise
+    finally:
+        process.stdout.close()
+        return_code = process.wait()
+        log_thread.join()
 
     if return_code != 0:
-        logger.error('error occurred creating local backup')
-        exit(1)
-
-    logger.info('successfully created local backup')
-    return
+        raise RuntimeError(f'error occurred creating backup, pg_dump exited with {return_code=}')
+
+    logger.info('successfully created backup')
+
+
+def iter_chunks(
+    stream: io.BufferedIOBase,
+    chunk_size: int,
+) -> collections.abc.Generator[bytes, None, None]:
+    while chunk := stream.read(chunk_size):
+        yield chunk
+
+
+def iter_tar_chunks(
+    directory: str,
+    chunk_size: int,
+) -> collections.abc.Generator[bytes, None, None]:
+    '''
+    yields a tar archive of the contents of `directory`, which is created on the fly (i.e. without
+    requiring further disk space)
+    '''
+    read_fd, write_fd = os.pipe()
+    errors = []
+
+    def write_tar():
+        try:
+            with (
+                open(write_fd, 'wb') as stream,
+                tarfile.open(fileobj=stream, mode='w|') as tf,
+            ):
+                tf.add(directory, arcname='.')
+        except BaseException as e:
+            errors.append(e)
+
+    write_thread = threading.Thread(target=write_tar, daemon=True)
+    write_thread.start()
+
+    with open(read_fd, 'rb') as stream:
+        yield from iter_chunks(stream=stream, chunk_size=chunk_size)
+
+    write_thread.join()
+    if errors:
+        raise errors[0]
+
+
+def iter_prefetched[T](
+    items: collections.abc.Iterable[T],
+    max_prefetched: int=1,
+) -> collections.abc.Generator[T, None, None]:
+    '''
+    consumes `items` in a separate thread, so that producing the next item (e.g. reading the dump)
+    overlaps with processing the current one (e.g. uploading it)
+    '''
+    prefetched = queue.Queue(maxsize=max_prefetched)
+    done = object()
+    cancelled = threading.Event()
+
+    def put(item, error: BaseException | None=None) -> bool:
+        # does not block forever if the consumer has stopped
+        while not cancelled.is_set():
+            try:
+                prefetched.put((item, error), timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def prefetch():
+        try:
+            for item in items:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(None, error=e)
+            return
+
+        put(done)
+
+    prefetch_thread = threading.Thread(target=prefetch, daemon=True)
+    prefetch_thread.start()
+
+    try:
+        while True:
+            item, error = prefetched.get()
+            if error:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        cancelled.set()
+        prefetch_thread.join()
 
 
 def create_ocm_descriptor(
@@ -82,6 +241,7 @@ def create_ocm_descriptor(
     ocm_repo: str,
     backup_digest: str,
     size: int,
+    backup_format: odg.extensions_cfg.DeliveryDBBackupFormat,
 ) -> ocm.ComponentDescriptor:
     return ocm.ComponentDescriptor(
       meta=ocm.Metadata(schemaVersion=ocm.SchemaVersion.V2),
@@ -104,9 +264,15 @@ def create_ocm_descriptor(
                 type=ocm.ArtefactType.BLOB,
                 access=ocm.LocalBlobAccess(
                     localReference=backup_digest,
-                    mediaType=BACKUP_BLOB_MEDIA_TYPE,
+                    mediaType=media_type(backup_format=backup_format),
                     size=size,
                 ),
+                labels=[
+                    ocm.Label(
+                        name=BACKUP_FORMAT_LABEL_NAME,
+                        value=backup_format,
+                    ),
+                ],
             )
         ],
         labels=[
@@ -119,37 +285,385 @@ def create_ocm_descriptor(
     )
 
 
-def calculate_sha256(tar_file_path):
-    sha256_hash = hashlib.sha256()
+@dataclasses.dataclass(frozen=True)
+class UploadedBlob:
+    digest: str
+    size: int
+
+
+@dataclasses.dataclass
+class PendingUpload:
+    '''
+    blob which was transferred to (or buffered for) the OCI registry, but is not committed yet. This
+    allows to check that the blob is complete (i.e. `pg_dump` succeeded) before it becomes available
+    in the registry. Uncommitted uploads are discarded by the registry eventually, local resources
+    are released once the pending upload is closed (it may be used as context manager).
+    '''
+    digest: str
+    size: int
+    commit: collections.abc.Callable[[], None]
+    close: collections.abc.Callable[[], None] = lambda: None
 
-    with open(tar_file_path, 'rb') as file:
-        while chunk := file.read(8192):
-            sha256_hash.update(chunk)
+    def finalise(self) -> UploadedBlob:
+        self.commit()
+
+        return UploadedBlob(
+            digest=self.digest,
+            size=self.size,
+        )
+
+    def __enter__(self) -> 'PendingUpload':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
-    return sha256_hash.hexdigest()
 
+def _absolute_url(
+    url: str,
+    res: requests.Response,
+) -> str:
+    # returned url _may_ be relative
+    return urllib.parse.urljoin(res.url, url)
 
-def upload_from_file(
-    outfile: str,
+
+@oci.client.initialise_repository_if_required
+def _start_upload(
     oci_client: oci.client.Client,
-    target_ref: str,
-    size: int,
-) -> tuple[str, str]:
-    with tarfile.open(outfile) as tf:
-        data = tf.fileobj
-        cd_digest_with_alg = f'sha256:{calculate_sha256(outfile)}'
-        data.seek(0)
+    image_reference: om.OciImageReference,
+) -> str:
+    res = oci_util.request(
+        oci_client=oci_client,
+        image_reference=image_reference,
+        action='push,pull',
+        url=oci_client.routes.uploads_url(image_reference=image_reference),
+        method='POST',
+        headers={'content-length': '0'},
+    )
+    res.raise_for_status()
+
+    return _absolute_url(url=res.headers['Location'], res=res)
+
+
+def _uploaded_octets_count(
+    oci_client: oci.client.Client,
+    image_reference: om.OciImageReference,
+    upload_url: str,
+) -> tuple[str, int]:
+    '''
+    returns the (possibly updated) upload url and the number of octets received by the registry,
+    according to the `Range` header of the upload status
+    '''
+    res = oci_util.request(
+        oci_client=oci_client,
+        image_reference=image_reference,
+        action='push,pull',
+        url=upload_url,
+        method='GET',
+    )
+    res.raise_for_status()
+
+    upload_url = _absolute_url(url=res.headers.get('Location', upload_url), res=res)
+
+    if not (octets_range := res.headers.get('Range')):
+        return upload_url, 0
+
+    return upload_url, int(octets_range.rpartition('-')[2]) + 1
+
+
+def _upload_chunk(
+    oci_client: oci.client.Client,
+    image_reference: om.OciImageReference,
+    upload_url: str,
+    chunk: bytes,
+    offset: int,
+    max_resume_attempts: int,
+) -> str:
+    '''
+    uploads `chunk` (starting at `offset` of the blob) and returns the url to continue the upload
+    with. If the transfer fails, it is resumed from the last octet acknowledged by the registry.
+    '''
+    sent_octets_count = 0
+
+    for attempt in range(max_resume_attempts + 1):
+        data = chunk[sent_octets_count:] if sent_octets_count else chunk
+        start = offset + sent_octets_count
+
+        try:
+            res = oci_util.request(
+                oci_client=oci_client,
+                image_reference=image_reference,
+                action='push,pull',
+                url=upload_url,
+                method='PATCH',
+                headers={
+                    'content-type': 'application/octet-stream',
+                    'content-length': str(len(data)),
+                    'content-range': f'{start}-{start + len(data) - 1}',
+                },
+                data=data,
+                # retrying the same request is not sufficient if the registry received parts of it
+                remaining_retries=0,
+            )
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if attempt == max_resume_attempts:
+                raise
+            logger.warning(f'uploading chunk failed ({e}), going to resume {upload_url=}')
+        else:
+            if res.ok:
+                return _absolute_url(url=res.headers.get('Location', upload_url), res=res)
+
+            if (
+                attempt == max_resume_attempts
+                or res.status_code < 500 and res.status_code != 416 # range not satisfiable
+            ):
+                res.raise_for_status()
+            logger.warning(f'uploading chunk failed ({res.status_code=}), going to resume')
+
+        upload_url, uploaded_octets_count = _uploaded_octets_count(
+            oci_client=oci_client,
+            image_reference=image_reference,
+            upload_url=upload_url,
+        )
+        if not offset <= uploaded_octets_count <= offset + len(chunk):
+            raise RuntimeError(
+                f'cannot resume upload, registry has {uploaded_octets_count=} but chunk starts at '
+                f'{offset=} (length: {len(chunk)})'
+            )
+
+        sent_octets_count = uploaded_octets_count - offset
+        if sent_octets_count == len(chunk):
+            return upload_url
+
+
+def transfer_chunked(
+    oci_client: oci.client.Client,
+    image_reference: str | om.OciImageReference,
+    chunks: collections.abc.Iterable[bytes],
+    max_resume_attempts: int=5,
+) -> PendingUpload:
+    '''
+    transfers the blob consisting of `chunks` using the chunked upload of the OCI distribution spec,
+    hence neither the size nor the digest of the blob have to be known upfront. The digest is
+    calculated while uploading and verified by the registry once the upload is committed (see
+    `PendingUpload.finalise`). If the chunked upload cannot be started, `transfer_at_once` is used
+    as fallback.
+    '''
+    image_reference = om.OciImageReference(image_reference)
+    sha256 = hashlib.sha256()
+    size = 0
+
+    try:
+        upload_url = _start_upload(oci_client, image_reference=image_reference)
+    except (NotImplementedError, requests.exceptions.HTTPError) as e:
+        # no chunk was consumed yet, hence the blob may still be transferred at once
+        logger.warning(f'cannot start chunked upload ({e}), falling back to uploading at once')
+        return transfer_at_once(
+            oci_client=oci_client,
+            image_reference=image_reference,
+            chunks=chunks,
+        )
 
-        logger.info(f'uploading blob {cd_digest_with_alg} to {target_ref}')
+    for chunk in chunks:
+        upload_url = _upload_chunk(
+            oci_client=oci_client,
+            image_reference=image_reference,
+            upload_url=upload_url,
+            chunk=chunk,
+            offset=size,
+            max_resume_attempts=max_resume_attempts,
+        )
+        sha256.update(chunk)
+        size += len(chunk)
+        logger.info(f'uploaded {size / 1024 / 1024:.1f} MiB')
+
+    digest = f'sha256:{sha256.hexdigest()}'
+    separator = '&' if '?' in upload_url else '?'
+
+    def commit():
+        res = oci_util.request(
+            oci_client=oci_client,
+            image_reference=image_reference,
+            action='push,pull',
+            url=upload_url + separator + urllib.parse.urlencode({'digest': digest}),
+            method='PUT',
+            headers={'content-length': '0'},
+        )
+        res.raise_for_status()
+
+    return PendingUpload(
+        digest=digest,
+        size=size,
+        commit=commit,
+    )
+
+
+def upload_chunked(
+    oci_client: oci.client.Client,
+    image_reference: str | om.OciImageReference,
+    chunks: collections.abc.Iterable[bytes],
+    max_resume_attempts: int=5,
+) -> UploadedBlob:
+    '''
+    like `transfer_chunked`, but commits the upload right away
+    '''
+    with transfer_chunked(
+        oci_client=oci_client,
+        image_reference=image_reference,
+        chunks=chunks,
+        max_resume_attempts=max_resume_attempts,
+    ) as pending_upload:
+        return pending_upload.finalise()
+
+
+def transfer_at_once(
+    oci_client: oci.client.Client,
+    image_reference: str | om.OciImageReference,
+    chunks: collections.abc.Iterable[bytes],
+) -> PendingUpload:
+    '''
+    fallback for OCI registries which do not support chunked uploads: the blob is written to a
+    temporary file (calculating its digest on the fly), which is uploaded using a single request
+    once the upload is committed (see `PendingUpload.finalise`)
+    '''
+    sha256 = hashlib.sha256()
+    size = 0
+
+    tf = tempfile.TemporaryFile()
+    try:
+        for chunk in chunks:
+            tf.write(chunk)
+            sha256.update(chunk)
+            size += len(chunk)
+        tf.seek(0)
+    except BaseException:
+        tf.close()
+        raise
+
+    digest = f'sha256:{sha256.hexdigest()}'
+
+    def commit():
+        logger.info(f'uploading blob {digest} to {image_reference}')
 
         oci_client.put_blob(
-            image_reference=target_ref,
-            digest=cd_digest_with_alg,
+            image_reference=image_reference,
+            digest=digest,
             octets_count=size,
-            data=data,
+            data=tf,
         )
 
-    return cd_digest_with_alg
+    return PendingUpload(
+        digest=digest,
+        size=size,
+        commit=commit,
+        close=tf.close,
+    )
+
+
+def upload_at_once(
+    oci_client: oci.client.Client,
+    image_reference: str | om.OciImageReference,
+    chunks: collections.abc.Iterable[bytes],
+) -> UploadedBlob:
+    '''
+    like `transfer_at_once`, but commits the upload right away
+    '''
+    with transfer_at_once(
+        oci_client=oci_client,
+        image_reference=image_reference,
+        chunks=chunks,
+    ) as pending_upload:
+        return pending_upload.finalise()
+
+
+def verify_uploaded_blob(
+    oci_client: oci.client.Client,
+    image_reference: str | om.OciImageReference,
+    uploaded_blob: UploadedBlob,
+):
+    res = oci_client.head_blob(
+        image_reference=image_reference,
+        digest=uploaded_blob.digest,
+    )
+    if not res.ok:
+        raise RuntimeError(f'{uploaded_blob=} was not found after uploading it')
+
+    if (
+        (content_length := res.headers.get('Content-Length'))
+        and int(content_length) != uploaded_blob.size
+    ):
+        raise RuntimeError(f'{uploaded_blob=} was uploaded with unexpected size {content_length=}')
+
+    logger.info(f'verified {uploaded_blob=}')
+
+
+def create_and_upload_backup(
+    oci_client: oci.client.Client,
+    image_reference: str,
+    connection_url: str,
+    backup_cfg: odg.extensions_cfg.DeliveryDBBackup,
+) -> UploadedBlob:
+    '''
+    streams the output of `pg_dump` to the OCI registry while it is still created, i.e. neither a
+    local copy nor a separate pass to calculate the digest is required (except for the `directory`
+    format, which is dumped locally using parallel jobs first). The upload is only committed once
+    `pg_dump` exited successfully, so that incomplete dumps never become available as backup.
+    '''
+    chunk_size = backup_cfg.upload_chunk_size_octets or 1024 * 1024
+
+    def transfer(chunks: collections.abc.Iterable[bytes]) -> PendingUpload:
+        chunks = iter_prefetched(chunks)
+
+        if not backup_cfg.upload_chunk_size_octets:
+            return transfer_at_once(
+                oci_client=oci_client,
+                image_reference=image_reference,
+                chunks=chunks,
+            )
+
+        return transfer_chunked(
+            oci_client=oci_client,
+            image_reference=image_reference,
+            chunks=chunks,
+        )
+
+    argv_kwargs = dict(
+        connection_url=connection_url,
+        backup_format=backup_cfg.backup_format,
+        jobs=backup_cfg.jobs,
+        compression=backup_cfg.compression,
+        exclude_cache_data=backup_cfg.exclude_cache_data,
+        additional_args=backup_cfg.extra_pg_dump_args,
+    )
+
+    with contextlib.ExitStack() as stack:
+        if backup_cfg.backup_format is odg.extensions_cfg.DeliveryDBBackupFormat.DIRECTORY:
+            tmp_dir = stack.enter_context(tempfile.TemporaryDirectory())
+            outdir = os.path.join(tmp_dir, 'delivery-db-backup')
+
+            with pg_dump(argv=pg_dump_argv(outdir=outdir, **argv_kwargs)):
+                pass
+
+            pending_upload = stack.enter_context(transfer(
+                iter_tar_chunks(directory=outdir, chunk_size=chunk_size),
+            ))
+
+        else:
+            # raises if `pg_dump` exits with a non-zero return code, i.e. before committing
+            with pg_dump(argv=pg_dump_argv(**argv_kwargs)) as process:
+                pending_upload = stack.enter_context(transfer(
+                    iter_chunks(stream=process.stdout, chunk_size=chunk_size),
+                ))
+
+        uploaded_blob = pending_upload.finalise()
+
+    verify_uploaded_blob(
+        oci_client=oci_client,
+        image_reference=image_reference,
+        uploaded_blob=uploaded_blob,
+    )
+
+    return uploaded_blob
 
 
 def iter_components_to_purge(
@@ -298,7 +812,6 @@ def main():
 
     component_name = delivery_db_backup_cfg.component_name
     ocm_repo = delivery_db_backup_cfg.ocm_repo_url
-    additional_args = delivery_db_backup_cfg.extra_pg_dump_args
     delivery_service_url = delivery_db_backup_cfg.delivery_service_url
     backup_retention_count = delivery_db_backup_cfg.backup_retention_count
     initial_version = delivery_db_backup_cfg.initial_version
@@ -324,21 +837,6 @@ def main():
     else:
         component_version = initial_version
 
-    outfile = os.path.abspath('./delivery-db-backup.tar')
-
-    if os.path.exists(outfile):
-        logger.info('local backup present already, skipping creation')
-
-    else:
-        create_local_backup(
-            outfile=outfile,
-            connection_url=delivery_db_cfg.connection_url(
-                namespace=namespace,
-                schema='postgres',
-            ),
-            additional_args=additional_args,
-        )
-
     target_ref = cnudie.util.oci_artefact_reference(
         component=f'{component_name}:{component_version}',
         ocm_repository=ocm_repo,
@@ -348,21 +846,23 @@ def main():
         secret_factory=secret_factory,
     )
 
-    size = os.path.getsize(outfile)
-
-    backup_digest = upload_from_file(
-        outfile=outfile,
+    uploaded_blob = create_and_upload_backup(
         oci_client=oci_client,
-        target_ref=target_ref,
-        size=size,
+        image_reference=target_ref,
+        connection_url=delivery_db_cfg.connection_url(
+            namespace=namespace,
+            schema='postgres',
+        ),
+        backup_cfg=delivery_db_backup_cfg,
     )
 
     component_descriptor = create_ocm_descriptor(
         component_name=component_name,
         component_version=component_version,
         ocm_repo=ocm_repo,
-        backup_digest=backup_digest,
-        size=size,
+        backup_digest=uploaded_blob.digest,
+        size=uploaded_blob.size,
+        backup_format=delivery_db_backup_cfg.backup_format,
     )
     component = component_descriptor.component
 
@@ -387,4 +887,8 @@ def main():
 
 
 if __name__ == '__main__':
+    # configured here (rather than upon import) to not create log files when imported, e.g. by tests
+    ci.log.configure_default_logging()
+    k8s.logging.configure_kubernetes_logging()
+
     main()
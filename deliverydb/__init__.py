@@ -1,7 +1,17 @@
+import asyncio
+import dataclasses
+import enum
+import time
+
+import prometheus_client
+import sqlalchemy
 import sqlalchemy.dialects.postgresql as sap
+import sqlalchemy.exc
 import sqlalchemy.ext.asyncio as sqlasync
+import sqlalchemy.pool
 
 import deliverydb.model as dm
+import deliverydb.util as du
 
 
 def do_raise(self):
@@ -11,55 +21,424 @@ def do_raise(self):
 # prevent usage of postgresql exclusive `JSONB`
 sap.JSONB.__init__ = do_raise
 
-sessionmakers: dict[tuple[int, int, int], sqlasync.async_sessionmaker[sqlasync.session.AsyncSession]] = {} # noqa: E501
 
+class PoolLane(enum.StrEnum):
+    DEFAULT = 'default'
+    REQUEST = 'request'
+    LOW_PRIO = 'low-prio'
+
+
+@dataclasses.dataclass(frozen=True)
+class PoolCfg:
+    '''
+    Configuration of the connection pool of a "lane". Each lane uses a separate engine (i.e. a
+    separately bounded connection pool), so that e.g. long-running low-priority work cannot exhaust
+    the connections required to serve regular requests.
+    '''
+    lane: str
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30
+
+
+pool_cfgs: dict[str, PoolCfg] = {
+    PoolLane.DEFAULT: PoolCfg(lane=PoolLane.DEFAULT),
+    PoolLane.REQUEST: PoolCfg(lane=PoolLane.REQUEST, pool_timeout=5),
+    PoolLane.LOW_PRIO: PoolCfg(
+        lane=PoolLane.LOW_PRIO,
+        pool_size=2,
+        max_overflow=1,
+        pool_timeout=300,
+    ),
+}
+
+POOL_CHECKOUT_WAIT_SECONDS = prometheus_client.Histogram(
+    name='delivery_db_pool_checkout_wait_seconds',
+    documentation='Time spent waiting for a delivery-db connection (seconds)',
+    labelnames=['lane'],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30, 300),
+)
+POOL_CHECKOUT_TIMEOUTS_TOTAL = prometheus_client.Counter(
+    name='delivery_db_pool_checkout_timeouts_total',
+    documentation='Delivery-db connection checkouts which timed out',
+    labelnames=['lane'],
+)
+POOL_CONNECTIONS_IN_USE = prometheus_client.Gauge(
+    name='delivery_db_pool_connections_in_use',
+    documentation='Delivery-db connections currently checked out',
+    labelnames=['lane'],
+    multiprocess_mode='livesum',
+)
+POOL_CONNECTIONS_MAX = prometheus_client.Gauge(
+    name='delivery_db_pool_connections_max',
+    documentation='Maximum number of delivery-db connections (pool size and overflow)',
+    labelnames=['lane'],
+    multiprocess_mode='livesum',
+)
+
+sessionmakers: dict[tuple[str, PoolCfg], sqlasync.async_sessionmaker[sqlasync.session.AsyncSession]] = {} # noqa: E501
+_sessionmakers_lock = asyncio.Lock()
+_initialised_db_urls: set[str] = set()
+
+
+def configure_pool_lanes(*lane_pool_cfgs: PoolCfg):
+    '''
+    overwrites the pool configuration of the respective lanes; must be called before the first
+    session of a lane is created, as existing engines are not re-created
+    '''
+    for pool_cfg in lane_pool_cfgs:
+        pool_cfgs[pool_cfg.lane] = pool_cfg
+
+
+# key of the (session-level) postgres advisory lock which serialises migrations across processes
+MIGRATIONS_ADVISORY_LOCK_KEY = int.from_bytes(b'odg-mgrt', byteorder='big', signed=True)
+# data migrations use a separate lock so that they do not delay the schema migrations on startup
+DATA_MIGRATIONS_ADVISORY_LOCK_KEY = int.from_bytes(b'odg-dmgr', byteorder='big', signed=True)
+MIGRATIONS_ADVISORY_LOCK_POLL_INTERVAL_SECONDS = 1
+
+
+def add_missing_columns(connection: sqlalchemy.Connection):
+    '''
+    `create_all` only creates missing relations but does not alter existing ones, hence columns which
+    were added to existing models later on are added here. Such columns must be nullable.
+    '''
+    inspector = sqlalchemy.inspect(connection)
+    preparer = connection.dialect.identifier_preparer
+    # sqlite does not support `IF NOT EXISTS` for columns, it relies on the inspection only
+    if_not_exists = 'IF NOT EXISTS ' if connection.dialect.name == 'postgresql' else ''
+
+    for table in dm.Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing_column_names = {column['name'] for column in inspector.get_columns(table.name)}
+
+        for column in table.columns:
+            if column.name in existing_column_names:
+                continue
+
+            column_type = column.type.compile(dialect=connection.dialect)
+            connection.execute(sqlalchemy.text(
+                f'ALTER TABLE {preparer.quote(table.name)} '
+                f'ADD COLUMN {if_not_exists}{preparer.quote(column.name)} {column_type}'
+            ))
+
+
+def _invalid_index_names(connection: sqlalchemy.Connection) -> set[str]:
+    '''
+    a failed (or interrupted) concurrent index creation leaves an invalid index behind in postgres,
+    which would be skipped by `CREATE INDEX IF NOT EXISTS` otherwise
+    '''
+    if connection.dialect.name != 'postgresql':
+        return set()
+
+    return set(connection.scalars(sqlalchemy.text(
+        'SELECT c.relname FROM pg_index AS i '
+        'JOIN pg_class AS c ON c.oid = i.indexrelid '
+        'WHERE NOT i.indisvalid'
+    )))
+
+
+def add_missing_indexes(connection: sqlalchemy.Connection):
+    '''
+    Similar to columns (see `add_missing_columns`), `create_all` only creates the indexes of newly
+    created relations, hence indexes which were added to existing models later on are created here.
+    In postgres, indexes are created concurrently so that writes to (large) existing relations are
+    not blocked, this requires the connection not to be in a transaction (i.e. "AUTOCOMMIT").
+    '''
+    inspector = sqlalchemy.inspect(connection)
+    preparer = connection.dialect.identifier_preparer
+    invalid_index_names = _invalid_index_names(connection)
+
+    if connection.dialect.name == 'postgresql':
+        create_index = 'CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS'
+        drop_index = 'DROP INDEX CONCURRENTLY IF EXISTS'
+    else:
+        create_index = 'CREATE {unique}INDEX IF NOT EXISTS'
+        drop_index = 'DROP INDEX IF EXISTS'
+
+    for table in dm.Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing_index_names = {
+            index['name'] for index in inspector.get_indexes(table.name)
+        } - invalid_index_names
+
+        for index in table.indexes:
+            if index.name in existing_index_names:
+                continue
+
+            if index.name in invalid_index_names:
+                connection.execute(sqlalchemy.text(f'{drop_index} {preparer.quote(index.name)}'))
+
+            column_names = ', '.join(preparer.quote(column.name) for column in index.columns)
+            connection.execute(sqlalchemy.text(
+                f'{create_index.format(unique="UNIQUE " if index.unique else "")} '
+                f'{preparer.quote(index.name)} ON {preparer.quote(table.name)} ({column_names})'
+            ))
+
+
+def backfill_artefact_keys(
+    connection: sqlalchemy.Connection,
+    chunk_size: int=1000,
+):
+    '''
+    fills the `artefact_key` of artefact metadata entries which were created before the key was
+    stored (see `deliverydb.util.artefact_key`). Each chunk is committed separately, so that neither
+    a long-running transaction nor locks on the whole relation are held. As only entries without key
+    are selected, an interrupted backfill resumes where it stopped.
+    '''
+    table = dm.ArtefactMetaData.__table__
+
+    while True:
+        rows = connection.execute(
+            sqlalchemy.select(
+                table.c.id,
+                table.c.component_name,
+                table.c.component_version,
+                table.c.artefact_kind,
+                table.c.artefact_name,
+                table.c.artefact_version,
+                table.c.artefact_type,
+                table.c.artefact_extra_id,
+            ).where(
+                table.c.artefact_key == None,
+            ).limit(chunk_size)
+        ).all()
+
+        if not rows:
+            return
+
+        connection.execute(
+            sqlalchemy.update(table).where(
+                table.c.id == sqlalchemy.bindparam('row_id'),
+            ).values(
+                artefact_key=sqlalchemy.bindparam('key'),
+            ),
+            [
+                {
+                    'row_id': row.id,
+                    'key': du.db_artefact_key(artefact_metadata=row),
+                } for row in rows
+            ],
+        )
+        connection.commit()
+
+
+# schema migrations are idempotent and cheap if there is nothing to migrate, hence they are checked
+# (in order) whenever a delivery-db is initialised
+schema_migrations = (
+    add_missing_columns,
+    add_missing_indexes,
+)
 
-async def _sqlalchemy_sessionmaker(
+# data migrations are executed (in order) only once per delivery-db, applied data migrations are
+# recorded in the `migration` relation (see `deliverydb.model.Migration`). As they might take long,
+# they are not part of the initialisation of a delivery-db but are applied in the background by the
+# delivery-service (see `migrate_data`).
+data_migrations = (
+    backfill_artefact_keys,
+)
+
+
+def migrate(connection: sqlalchemy.Connection):
+    '''
+    creates missing relations and applies the schema migrations. The connection must not be in a
+    transaction (i.e. "AUTOCOMMIT"), so that indexes can be created concurrently. Callers are
+    responsible for serialising concurrent migrations (see `migrate_db`).
+    '''
+    dm.Base.metadata.create_all(connection)
+    connection.commit()
+
+    for migration in schema_migrations:
+        migration(connection)
+
+
+def apply_data_migrations(connection: sqlalchemy.Connection):
+    '''
+    applies pending data migrations. The connection must not be in a transaction (i.e.
+    "AUTOCOMMIT"), so that data migrations can commit their progress in chunks. Callers are
+    responsible for serialising concurrent data migrations (see `migrate_data`).
+    '''
+    applied_migration_names = set(connection.scalars(sqlalchemy.select(dm.Migration.name)))
+
+    for migration in data_migrations:
+        if migration.__name__ in applied_migration_names:
+            continue
+
+        migration(connection)
+
+        connection.execute(sqlalchemy.insert(dm.Migration).values(name=migration.__name__))
+        connection.commit()
+
+
+async def _acquire_advisory_lock(
+    connection: sqlasync.AsyncConnection,
+    key: int,
+    poll_interval_seconds: float=MIGRATIONS_ADVISORY_LOCK_POLL_INTERVAL_SECONDS,
+):
+    '''
+    acquires the (session-level) advisory lock by polling instead of blocking in `pg_advisory_lock`.
+    A blocked `pg_advisory_lock` keeps its transaction (and snapshot) open while waiting, which
+    `CREATE INDEX CONCURRENTLY` of the lock holder would in turn wait for (i.e. a deadlock). As the
+    connection is in "AUTOCOMMIT" mode, no transaction is open in between two attempts.
+    '''
+    while not await connection.scalar(
+        sqlalchemy.select(sqlalchemy.func.pg_try_advisory_lock(key))
+    ):
+        await asyncio.sleep(poll_interval_seconds)
+
+
+async def _release_advisory_lock(
+    connection: sqlasync.AsyncConnection,
+    key: int,
+):
+    await connection.scalar(sqlalchemy.select(sqlalchemy.func.pg_advisory_unlock(key)))
+
+
+async def migrate_db(engine: sqlasync.AsyncEngine):
+    '''
+    runs `migrate` using a dedicated "AUTOCOMMIT" connection. In postgres, migrations of multiple
+    processes (e.g. service replicas and extensions) are serialised using an advisory lock, so that
+    subsequent processes only check that there is nothing left to migrate.
+    '''
+    async with engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level='AUTOCOMMIT')
+        use_advisory_lock = connection.dialect.name == 'postgresql'
+
+        if use_advisory_lock:
+            await _acquire_advisory_lock(connection=connection, key=MIGRATIONS_ADVISORY_LOCK_KEY)
+
+        try:
+            await connection.run_sync(migrate)
+        finally:
+            if use_advisory_lock:
+                await _release_advisory_lock(
+                    connection=connection,
+                    key=MIGRATIONS_ADVISORY_LOCK_KEY,
+                )
+
+
+async def migrate_data(engine: sqlasync.AsyncEngine) -> bool:
+    '''
+    runs `apply_data_migrations` using a dedicated "AUTOCOMMIT" connection. In postgres, the
+    respective advisory lock is only tried once, i.e. if another process is already applying the
+    data migrations, this function returns immediately. Returns whether migrations were applied.
+    '''
+    async with engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level='AUTOCOMMIT')
+        use_advisory_lock = connection.dialect.name == 'postgresql'
+
+        if use_advisory_lock and not await connection.scalar(
+            sqlalchemy.select(sqlalchemy.func.pg_try_advisory_lock(
+                DATA_MIGRATIONS_ADVISORY_LOCK_KEY,
+            ))
+        ):
+            return False
+
+        try:
+            await connection.run_sync(apply_data_migrations)
+        finally:
+            if use_advisory_lock:
+                await _release_advisory_lock(
+                    connection=connection,
+                    key=DATA_MIGRATIONS_ADVISORY_LOCK_KEY,
+                )
+
+    return True
+
+
+def _instrumented_pool_class(lane: str) -> type[sqlalchemy.pool.AsyncAdaptedQueuePool]:
+    # lane is stored as class attribute as the pool might be re-created by sqlalchemy (e.g. upon
+    # disposal), which does not preserve instance attributes
+    class InstrumentedAsyncAdaptedQueuePool(sqlalchemy.pool.AsyncAdaptedQueuePool):
+        def _do_get(self):
+            start = time.monotonic()
+            try:
+                connection_record = super()._do_get()
+            except sqlalchemy.exc.TimeoutError:
+                POOL_CHECKOUT_TIMEOUTS_TOTAL.labels(lane).inc()
+                raise
+            finally:
+                POOL_CHECKOUT_WAIT_SECONDS.labels(lane).observe(time.monotonic() - start)
+
+            # not using `set_function` as it is not supported by prometheus' multiprocess mode
+            POOL_CONNECTIONS_IN_USE.labels(lane).inc()
+            return connection_record
+
+        def _do_return_conn(self, record):
+            POOL_CONNECTIONS_IN_USE.labels(lane).dec()
+            return super()._do_return_conn(record)
+
+    return InstrumentedAsyncAdaptedQueuePool
+
+
+async def sqlalchemy_sessionmaker(
     db_url: str,
-    pool_size: int=5,
-    max_overflow: int=10,
-    pool_timeout: int=30,
+    lane: str=PoolLane.DEFAULT,
 ) -> sqlasync.async_sessionmaker[sqlasync.session.AsyncSession]:
+    pool_cfg = pool_cfgs[lane]
+
     # don't use regular caching here to prevent issues with coroutines as return type
-    if sessionmaker := sessionmakers.get((pool_size, max_overflow, pool_timeout)):
+    if sessionmaker := sessionmakers.get((db_url, pool_cfg)):
         return sessionmaker
 
-    engine = sqlasync.create_async_engine(
-        db_url,
-        echo=False,
-        future=True,
-        pool_pre_ping=True,
-        pool_size=pool_size,
-        max_overflow=max_overflow,
-        pool_timeout=pool_timeout,
-    )
+    async with _sessionmakers_lock:
+        if sessionmaker := sessionmakers.get((db_url, pool_cfg)):
+            return sessionmaker
+
+        engine = sqlasync.create_async_engine(
+            db_url,
+            echo=False,
+            future=True,
+            pool_pre_ping=True,
+            poolclass=_instrumented_pool_class(lane=pool_cfg.lane),
+            pool_size=pool_cfg.pool_size,
+            max_overflow=pool_cfg.max_overflow,
+            pool_timeout=pool_cfg.pool_timeout,
+        )
+
+        if db_url not in _initialised_db_urls:
+            await migrate_db(engine)
+            _initialised_db_urls.add(db_url)
 
-    async with engine.begin() as conn:
-        await conn.run_sync(dm.Base.metadata.create_all)
+        POOL_CONNECTIONS_MAX.labels(pool_cfg.lane).inc(pool_cfg.pool_size + pool_cfg.max_overflow)
 
-    sessionmaker = sqlasync.async_sessionmaker(bind=engine)
-    sessionmakers[(pool_size, max_overflow, pool_timeout)] = sessionmaker
+        sessionmaker = sqlasync.async_sessionmaker(bind=engine)
+        sessionmakers[(db_url, pool_cfg)] = sessionmaker
 
     return sessionmaker
 
 
+async def dispose_sessionmakers():
+    '''
+    closes all connections of all known engines, e.g. upon (graceful) shutdown of the application
+    '''
+    async with _sessionmakers_lock:
+        for (_, pool_cfg), sessionmaker in sessionmakers.items():
+            await sessionmaker.kw['bind'].dispose()
+            POOL_CONNECTIONS_MAX.labels(pool_cfg.lane).dec(
+                pool_cfg.pool_size + pool_cfg.max_overflow,
+            )
+
+        sessionmakers.clear()
+
+
 async def sqlalchemy_session(
     db_url: str,
-    pool_size: int=5,
-    max_overflow: int=10,
-    pool_timeout: int=30,
+    lane: str=PoolLane.DEFAULT,
 ) -> sqlasync.session.AsyncSession:
     '''
-    Caller must close database-session.
+    Caller must close database-session. The session only checks out a connection from the pool of
+    the requested `lane` once it is used.
 
     Using session object managed by `middleware.db_session_middleware` middleware is the preferred
     way to obtain a database-session.
     '''
-    sessionmaker = await _sqlalchemy_sessionmaker(
+    sessionmaker = await sqlalchemy_sessionmaker(
         db_url=db_url,
-        pool_size=pool_size,
-        max_overflow=max_overflow,
-        pool_timeout=pool_timeout,
+        lane=lane,
     )
 
     return sessionmaker()
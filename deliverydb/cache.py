@@ -1,16 +1,21 @@
 import asyncio
 import collections.abc
+import contextlib
 import dataclasses
 import datetime
+import functools
 import http
 import logging
+import time
 import traceback
 
 import aiohttp.web
 import dacite
+import sqlalchemy
 import sqlalchemy.exc
 import sqlalchemy.ext.asyncio as sqlasync
 
+import cache_metrics
 import consts
 import deliverydb.model as dm
 import deliverydb_cache.model as dcm
@@ -22,10 +27,102 @@ import util
 logger = logging.getLogger(__name__)
 
 
+@dataclasses.dataclass(frozen=True)
+class ValueStorageCfg:
+    '''
+    Cache values of at least `compression_min_size_octets` are compressed using `compression_format`
+    (unless compression does not reduce their size). Values which still exceed `chunk_size_octets`
+    are split into chunks (stored in `deliverydb.model.DBCacheChunk`) which can be read separately.
+    '''
+    compression_min_size_octets: int = 4 * 1024
+    chunk_size_octets: int = 1024 * 1024
+    compression_format: dcm.CompressionFormat = dataclasses.field(
+        default_factory=dcu.default_compression_format,
+    )
+
+
+value_storage_cfg = ValueStorageCfg()
+
+
+@dataclasses.dataclass(frozen=True)
+class SingleFlightCfg:
+    '''
+    Concurrent calls of cached functions or routes which miss the same cache entry are coalesced
+    within a process, i.e. only the first call computes the value while the others await it. If
+    `advisory_locks` is set, computations are additionally coordinated across processes (e.g.
+    service replicas) using postgres advisory locks (ignored for other databases). Callers which do
+    not acquire the lock within `advisory_lock_timeout_seconds` compute the value on their own.
+    '''
+    advisory_locks: bool = False
+    advisory_lock_poll_interval_seconds: float = 0.5
+    advisory_lock_timeout_seconds: float = 300
+
+
+single_flight_cfg = SingleFlightCfg()
+
+# cache-entry-id -> serialised value (or `None` if the value must not be shared)
+_in_flight_computations: dict[str, asyncio.Future[bytes | None]] = {}
+
+
+def encode_cache_entry(
+    cache_entry: dm.DBCache,
+    storage_cfg: ValueStorageCfg | None=None,
+) -> list[dm.DBCacheChunk]:
+    '''
+    compresses the (raw) value of the passed-in `cache_entry` and splits it into chunks if required
+    (see `ValueStorageCfg`). The sizes of the entry are updated accordingly. Returns the chunks which
+    must be stored alongside the cache entry.
+    '''
+    if not storage_cfg:
+        storage_cfg = value_storage_cfg
+
+    value = cache_entry.value
+    cache_entry.uncompressed_size = len(value)
+    cache_entry.compression = None
+
+    if len(value) >= storage_cfg.compression_min_size_octets:
+        compressed_value = dcu.compress_cache_value(
+            value=value,
+            compression_format=storage_cfg.compression_format,
+        )
+
+        if len(compressed_value) < len(value):
+            value = compressed_value
+            cache_entry.compression = storage_cfg.compression_format
+
+    cache_entry.size = len(value)
+
+    if len(value) <= storage_cfg.chunk_size_octets:
+        cache_entry.value = value
+        cache_entry.chunk_count = None
+        return []
+
+    chunks = [
+        dm.DBCacheChunk(
+            cache_id=cache_entry.id,
+            idx=idx,
+            value=value[offset:offset + storage_cfg.chunk_size_octets],
+        ) for idx, offset in enumerate(range(0, len(value), storage_cfg.chunk_size_octets))
+    ]
+    cache_entry.value = None
+    cache_entry.chunk_count = len(chunks)
+
+    return chunks
+
+
 async def update_cache_entry(
     db_session: sqlasync.session.AsyncSession,
     cache_entry: dm.DBCache,
+    chunks: collections.abc.Sequence[dm.DBCacheChunk] | None=None,
 ) -> bool:
+    '''
+    @param chunks:
+        chunks of the already encoded `cache_entry` (see `encode_cache_entry`); if `None`, the
+        raw value of `cache_entry` is encoded first
+    '''
+    if chunks is None:
+        chunks = encode_cache_entry(cache_entry)
+
     if not (existing_cache_entry := await db_session.get(dm.DBCache, cache_entry.id)):
         # cache entry does not exist yet, hence we cannot _update_ it
         return False
@@ -38,6 +135,14 @@ async def update_cache_entry(
         existing_cache_entry.costs = cache_entry.costs
         existing_cache_entry.size = cache_entry.size
         existing_cache_entry.value = cache_entry.value
+        existing_cache_entry.uncompressed_size = cache_entry.uncompressed_size
+        existing_cache_entry.compression = cache_entry.compression
+        existing_cache_entry.chunk_count = cache_entry.chunk_count
+
+        await db_session.execute(
+            sqlalchemy.delete(dm.DBCacheChunk).where(dm.DBCacheChunk.cache_id == cache_entry.id)
+        )
+        db_session.add_all(chunks)
 
         await db_session.commit()
         return True
@@ -53,9 +158,30 @@ async def update_cache_entry(
 async def add_or_update_cache_entry(
     db_session: sqlasync.session.AsyncSession,
     cache_entry: dm.DBCache,
+    max_size_octets: int=0,
 ) -> bool:
+    '''
+    stores the passed-in `cache_entry`, its (raw) value is transparently compressed and chunked
+    (see `encode_cache_entry`)
+
+    @param max_size_octets:
+        the maximum stored (i.e. compressed) size of the entry, if it exceeds this limit, it is not
+        persisted in the database cache. `0` disables the limit.
+    '''
+    chunks = encode_cache_entry(cache_entry)
+
+    if max_size_octets > 0 and cache_entry.size > max_size_octets:
+        logger.debug(
+            f'not caching {cache_entry.id=} as its stored size ({cache_entry.size} octets) '
+            f'exceeds {max_size_octets=}'
+        )
+        return False
+
     try:
         db_session.add(cache_entry)
+        # cache entry must exist before its chunks can be referenced
+        await db_session.flush()
+        db_session.add_all(chunks)
         await db_session.commit()
         return True
 
@@ -68,6 +194,7 @@ async def add_or_update_cache_entry(
         if await update_cache_entry(
             db_session=db_session,
             cache_entry=cache_entry,
+            chunks=chunks,
         ):
             return True
 
@@ -83,10 +210,19 @@ async def add_or_update_cache_entry(
     return False
 
 
-async def find_cached_value(
+async def iter_cached_value(
     db_session: sqlasync.session.AsyncSession,
     id: str,
-) -> bytes | None:
+) -> collections.abc.AsyncGenerator[bytes, None, None] | None:
+    '''
+    returns an async generator yielding the (decompressed) value of the cache entry with the given
+    `id` piecewise, so that chunked values do not have to be held in memory as a whole. Returns
+    `None` if there is no (valid) cache entry.
+
+    @raises KeyError: (upon iteration) if chunks of the value are missing, e.g. because the cache
+                      entry was updated concurrently
+    @raises RuntimeError: (upon iteration) if the value's compression format is not available
+    '''
     if not (cache_entry := await db_session.get(dm.DBCache, id)):
         return None
 
@@ -103,7 +239,10 @@ async def find_cached_value(
         # update client once new value is available
         return None
 
+    # read attributes before committing, as those are expired afterwards
     value = cache_entry.value
+    compression = cache_entry.compression
+    chunk_count = cache_entry.chunk_count
 
     try:
         cache_entry.last_read = now
@@ -115,7 +254,179 @@ async def find_cached_value(
 
         await db_session.rollback()
 
-    return value
+    async def iter_stored_chunks() -> collections.abc.AsyncGenerator[bytes, None, None]:
+        if not chunk_count:
+            yield value
+            return
+
+        for idx in range(chunk_count):
+            chunk = await db_session.scalar(
+                sqlalchemy.select(dm.DBCacheChunk.value).where(
+                    dm.DBCacheChunk.cache_id == id,
+                    dm.DBCacheChunk.idx == idx,
+                )
+            )
+
+            if chunk is None:
+                raise KeyError(f'chunk {idx} of cache entry {id} is missing')
+
+            yield chunk
+
+    async def iter_value() -> collections.abc.AsyncGenerator[bytes, None, None]:
+        decompressor = dcu.cache_value_decompressor(compression)
+
+        async for chunk in iter_stored_chunks():
+            if decompressed_chunk := decompressor.decompress(chunk):
+                yield decompressed_chunk
+
+        if remainder := decompressor.flush():
+            yield remainder
+
+    return iter_value()
+
+
+async def find_cached_value(
+    db_session: sqlasync.session.AsyncSession,
+    id: str,
+) -> bytes | None:
+    if not (value := await iter_cached_value(
+        db_session=db_session,
+        id=id,
+    )):
+        return None
+
+    try:
+        return b''.join([chunk async for chunk in value])
+    except (KeyError, RuntimeError) as e:
+        # `RuntimeError` is raised if the value's compression format is not supported in this
+        # environment (e.g. `zstandard` is not installed)
+        logger.warning(f'{e}, treating it as cache miss')
+        return None
+
+
+async def _find_cached_value(
+    db_session: sqlasync.session.AsyncSession,
+    id: str,
+    name: str,
+) -> bytes | None:
+    '''
+    wraps `find_cached_value` so that hits, misses, errors, latencies and served bytes are recorded
+    using `name` (i.e. the cached function or route template) as label (see `cache_metrics`)
+    '''
+    start = time.monotonic()
+    result = cache_metrics.CacheResult.ERROR
+    value = None
+
+    try:
+        value = await find_cached_value(
+            db_session=db_session,
+            id=id,
+        )
+        result = cache_metrics.CacheResult.HIT if value else cache_metrics.CacheResult.MISS
+        return value
+    finally:
+        cache_metrics.record(
+            tier=cache_metrics.CacheTier.DELIVERY_DB,
+            name=name,
+            result=result,
+            latency_seconds=time.monotonic() - start,
+            served_bytes=len(value) if value else 0,
+        )
+
+
+def advisory_lock_key(id: str) -> int:
+    '''
+    derives a (signed) 64-bit key suitable for postgres advisory locks from a cache entry id
+    '''
+    key = int(id[:16], 16)
+    return key - 2**64 if key >= 2**63 else key
+
+
+@contextlib.asynccontextmanager
+async def advisory_lock(
+    db_session: sqlasync.session.AsyncSession,
+    id: str,
+) -> collections.abc.AsyncGenerator[bool, None]:
+    '''
+    holds a postgres (session-level) advisory lock for the cache entry `id` using a dedicated
+    connection, so that the lock is neither released by commits of `db_session` nor leaked into the
+    connection pool. Yields whether the lock was held by another process before (in that case, the
+    cache entry might have been written in the meantime). If advisory locks are disabled or not
+    supported by the database, this is a no-op.
+    '''
+    engine: sqlasync.AsyncEngine = db_session.bind
+    if not single_flight_cfg.advisory_locks or engine.dialect.name != 'postgresql':
+        yield False
+        return
+
+    key = advisory_lock_key(id)
+    deadline = time.monotonic() + single_flight_cfg.advisory_lock_timeout_seconds
+
+    async with engine.connect() as connection:
+        waited = False
+
+        while not (locked := await connection.scalar(
+            sqlalchemy.select(sqlalchemy.func.pg_try_advisory_lock(key))
+        )):
+            waited = True
+            if time.monotonic() > deadline:
+                logger.warning(f'could not acquire advisory lock for cache entry {id=} in time')
+                break
+
+            await asyncio.sleep(single_flight_cfg.advisory_lock_poll_interval_seconds)
+
+        try:
+            yield waited
+        finally:
+            if locked:
+                await connection.scalar(sqlalchemy.select(sqlalchemy.func.pg_advisory_unlock(key)))
+
+
+async def single_flight(
+    db_session: sqlasync.session.AsyncSession,
+    id: str,
+    compute: collections.abc.Callable[[], collections.abc.Awaitable[tuple[object, bytes | None]]],
+) -> tuple[object, bytes | None, bool]:
+    '''
+    coalesces concurrent computations of the cache entry `id` (see `SingleFlightCfg`). `compute`
+    must return the result alongside its serialised value, the latter is shared with concurrent
+    callers (`None` if the result must not be shared, e.g. error responses). Returns the result
+    (only if computed by this caller), the serialised value and whether this caller computed it.
+    '''
+    if (in_flight_computation := _in_flight_computations.get(id)):
+        # shield the shared computation from cancellation of the awaiting caller
+        if (value := await asyncio.shield(in_flight_computation)) is not None:
+            return None, value, False
+
+        result, value = await compute()
+        return result, value, True
+
+    in_flight_computation = asyncio.get_running_loop().create_future()
+    _in_flight_computations[id] = in_flight_computation
+    value = None
+
+    try:
+        async with advisory_lock(db_session=db_session, id=id) as waited:
+            if waited and (value := await find_cached_value(
+                db_session=db_session,
+                id=id,
+            )):
+                # computed by another process while waiting for the lock
+                return None, value, False
+
+            result, value = await compute()
+            return result, value, True
+
+    except Exception as e:
+        in_flight_computation.set_exception(e)
+        in_flight_computation.exception() # prevent warning if there are no awaiting callers
+        raise
+
+    finally:
+        if not in_flight_computation.done():
+            # also reached if cancelled, awaiting callers compute the value on their own then
+            in_flight_computation.set_result(value)
+        del _in_flight_computations[id]
 
 
 def dbcached_function(
@@ -133,8 +444,9 @@ def dbcached_function(
         )
 
     def decorator(func):
+        @functools.wraps(func)
         async def wrapper(*args, **kwargs):
-            function_name = f'{func.__module__}.{func.__qualname__}'
+            function_name = cache_metrics.function_name(func)
 
             cachable_args = tuple(
                 arg
@@ -161,45 +473,63 @@ def dbcached_function(
                 kwargs=dcu.normalise_and_serialise_object(cachable_kwargs),
             )
 
-            if not shortcut_cache and (value := await find_cached_value(
+            if not shortcut_cache and (value := await _find_cached_value(
                 db_session=db_session,
                 id=descriptor.id,
+                name=function_name,
             )):
                 return dcu.deserialise_cache_value(
                     value=value,
                     encoding_format=encoding_format,
                 )
 
-            start = datetime.datetime.now()
-            result = await func(*args, **kwargs)
-            duration = datetime.datetime.now() - start
+            async def compute() -> tuple[object, bytes]:
+                start = datetime.datetime.now()
+                result = await func(*args, **kwargs)
+                duration = datetime.datetime.now() - start
 
-            value = dcu.serialise_cache_value(
-                value=result,
-                encoding_format=encoding_format,
-            )
+                value = dcu.serialise_cache_value(
+                    value=result,
+                    encoding_format=encoding_format,
+                )
+
+                now = datetime.datetime.now(datetime.timezone.utc)
+                cache_entry = dm.DBCache(
+                    id=descriptor.id,
+                    descriptor=util.dict_serialisation(dataclasses.asdict(descriptor)),
+                    delete_after=now + datetime.timedelta(seconds=ttl_seconds) if ttl_seconds else None, # noqa: E501
+                    keep_until=now + datetime.timedelta(seconds=keep_at_least_seconds),
+                    costs=int(duration.total_seconds() * 1000),
+                    size=len(value),
+                    value=value,
+                )
+
+                # entries exceeding the max size (after compression) are not stored
+                await add_or_update_cache_entry(
+                    db_session=db_session,
+                    cache_entry=cache_entry,
+                    max_size_octets=max_size_octets,
+                )
 
-            if max_size_octets > 0 and len(value) > max_size_octets:
-                # don't store result in cache if it exceeds max size for an individual cache entry
+                return result, value
+
+            if shortcut_cache:
+                result, _ = await compute()
                 return result
 
-            now = datetime.datetime.now(datetime.timezone.utc)
-            cache_entry = dm.DBCache(
+            result, value, computed = await single_flight(
+                db_session=db_session,
                 id=descriptor.id,
-                descriptor=util.dict_serialisation(dataclasses.asdict(descriptor)),
-                delete_after=now + datetime.timedelta(seconds=ttl_seconds) if ttl_seconds else None,
-                keep_until=now + datetime.timedelta(seconds=keep_at_least_seconds),
-                costs=int(duration.total_seconds() * 1000),
-                size=len(value),
-                value=value,
+                compute=compute,
             )
 
-            await add_or_update_cache_entry(
-                db_session=db_session,
-                cache_entry=cache_entry,
-            )
+            if computed:
+                return result
 
-            return result
+            return dcu.deserialise_cache_value(
+                value=value,
+                encoding_format=encoding_format,
+            )
 
         return wrapper
 
@@ -260,49 +590,71 @@ def dbcached_route(
 
             shortcut_cache = parse_shortcut_cache(request)
 
-            if not shortcut_cache and (value := await find_cached_value(
+            if not shortcut_cache and (value := await _find_cached_value(
                 db_session=db_session,
                 id=descriptor.id,
+                name=util.route_template(
+                    request=request,
+                    default=cache_metrics.function_name(func),
+                ),
             )):
                 return dcu.deserialise_cache_value(
                     value=value,
                     encoding_format=encoding_format,
                 )
 
-            start = datetime.datetime.now()
-            result: aiohttp.web.Response = await func(*args, **kwargs)
-            duration = datetime.datetime.now() - start
+            async def compute() -> tuple[aiohttp.web.Response, bytes | None]:
+                start = datetime.datetime.now()
+                result: aiohttp.web.Response = await func(*args, **kwargs)
+                duration = datetime.datetime.now() - start
 
-            if result.status >= 400 or result.status in skip_http_status:
-                # don't cache error responses -> those might only be temporarily
-                return result
+                if result.status >= 400 or result.status in skip_http_status:
+                    # don't cache (nor share) error responses -> those might only be temporarily
+                    return result, None
 
-            value = dcu.serialise_cache_value(
-                value=result,
-                encoding_format=encoding_format,
-            )
+                value = dcu.serialise_cache_value(
+                    value=result,
+                    encoding_format=encoding_format,
+                )
+
+                now = datetime.datetime.now(datetime.timezone.utc)
+                cache_entry = dm.DBCache(
+                    id=descriptor.id,
+                    descriptor=util.dict_serialisation(dataclasses.asdict(descriptor)),
+                    delete_after=now + datetime.timedelta(seconds=ttl_seconds) if ttl_seconds else None, # noqa: E501
+                    keep_until=now + datetime.timedelta(seconds=keep_at_least_seconds),
+                    costs=int(duration.total_seconds() * 1000),
+                    size=len(value),
+                    value=value,
+                )
+
+                # entries exceeding the max size (after compression) are not stored
+                await add_or_update_cache_entry(
+                    db_session=db_session,
+                    cache_entry=cache_entry,
+                    max_size_octets=max_size_octets,
+                )
 
-            if max_size_octets > 0 and len(value) > max_size_octets:
-                # don't store result in cache if it exceeds max size for an individual cache entry
+                return result, value
+
+            if shortcut_cache:
+                result, _ = await compute()
                 return result
 
-            now = datetime.datetime.now(datetime.timezone.utc)
-            cache_entry = dm.DBCache(
+            # responses can only be sent once, hence other callers receive a deserialised copy
+            result, value, computed = await single_flight(
+                db_session=db_session,
                 id=descriptor.id,
-                descriptor=util.dict_serialisation(dataclasses.asdict(descriptor)),
-                delete_after=now + datetime.timedelta(seconds=ttl_seconds) if ttl_seconds else None,
-                keep_until=now + datetime.timedelta(seconds=keep_at_least_seconds),
-                costs=int(duration.total_seconds() * 1000),
-                size=len(value),
-                value=value,
+                compute=compute,
             )
 
-            await add_or_update_cache_entry(
-                db_session=db_session,
-                cache_entry=cache_entry,
-            )
+            if computed:
+                return result
 
-            return result
+            return dcu.deserialise_cache_value(
+                value=value,
+                encoding_format=encoding_format,
+            )
 
         wrapper.__doc__ = func.__doc__
         return wrapper
@@ -440,6 +792,7 @@ class DeliveryDBCache(aiohttp.web.View):
                 dcm.CacheValueType.COMPONENT_DESCRIPTOR: dcm.CachedComponentDescriptor,
                 dcm.CacheValueType.PYTHON_FUNCTION: dcm.CachedPythonFunction,
                 dcm.CacheValueType.HTTP_ROUTE: dcm.CachedHTTPRoute,
+                dcm.CacheValueType.COMPONENT_DEPENDENCY_GRAPH: dcm.CachedComponentDependencyGraph,
             }
 
             body = await self.request.json()
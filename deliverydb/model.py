@@ -30,6 +30,7 @@ class ArtefactMetaData(Base):
     '''
     __tablename__ = 'artefact_metadata'
 
+    # digest of the key of the artefact metadata entry (see `odg.model.ArtefactMetadata.id`)
     id = sa.Column(sa.CHAR(length=32), primary_key=True)
     creation_date = sa.Column(
         sa.DateTime(timezone=True),
@@ -38,6 +39,9 @@ class ArtefactMetaData(Base):
 
     type = sa.Column(sa.String(length=64)) # e.g. finding/vulnerability, malware, ...
 
+    # digest of the key of the artefact (see `deliverydb.util.artefact_key`)
+    artefact_key = sa.Column(sa.CHAR(length=32))
+
     # component-id
     component_name = sa.Column(sa.String(length=256))
     component_version = sa.Column(sa.String(length=64))
@@ -70,6 +74,45 @@ sa.Index(
     ArtefactMetaData.type,
     ArtefactMetaData.artefact_type,
 )
+# findings of a certain type and datasource for a component (e.g. compliance summaries)
+sa.Index(
+    'ix_artefact_metadata_type_datasource_component',
+    ArtefactMetaData.type,
+    ArtefactMetaData.datasource,
+    ArtefactMetaData.component_name,
+    ArtefactMetaData.component_version,
+)
+# rescorings for a certain finding type (component name and version might be `NULL` depending on
+# the scope of the rescoring)
+sa.Index(
+    'ix_artefact_metadata_type_referenced_type_component',
+    ArtefactMetaData.type,
+    ArtefactMetaData.referenced_type,
+    ArtefactMetaData.component_name,
+    ArtefactMetaData.component_version,
+)
+# entries of exactly one artefact
+sa.Index(
+    'ix_artefact_metadata_artefact_key_type',
+    ArtefactMetaData.artefact_key,
+    ArtefactMetaData.type,
+)
+# entries of an artefact regardless of the component version (e.g. deduplicated BDBA results)
+sa.Index(
+    'ix_artefact_metadata_artefact',
+    ArtefactMetaData.artefact_name,
+    ArtefactMetaData.artefact_version,
+    ArtefactMetaData.artefact_type,
+    ArtefactMetaData.artefact_kind,
+)
+# existing entries which are updated upon upload of new artefact metadata
+sa.Index(
+    'ix_artefact_metadata_component_artefact_name_type',
+    ArtefactMetaData.component_name,
+    ArtefactMetaData.artefact_name,
+    ArtefactMetaData.type,
+    ArtefactMetaData.datasource,
+)
 
 
 class DBCache(Base):
@@ -88,7 +131,26 @@ class DBCache(Base):
     revision = sa.Column(sa.Integer, default=0)
     costs = sa.Column(sa.Integer)
 
-    size = sa.Column(sa.Integer)
+    size = sa.Column(sa.Integer) # actually stored size (i.e. after compression)
+    value = sa.Column(sa.LargeBinary) # `None` if value is stored in chunks
+
+    uncompressed_size = sa.Column(sa.Integer)
+    compression = sa.Column(sa.String(length=16)) # `None` if value is not compressed
+    chunk_count = sa.Column(sa.Integer) # `None` if value is stored inline
+
+
+class DBCacheChunk(Base):
+    '''
+    chunk of a (compressed) cache value which exceeds the chunk size, chunks are ordered by `idx`
+    '''
+    __tablename__ = 'cache_chunk'
+
+    cache_id = sa.Column(
+        sa.CHAR(length=32),
+        sa.ForeignKey(DBCache.id, ondelete='CASCADE'),
+        primary_key=True,
+    )
+    idx = sa.Column(sa.Integer, primary_key=True)
     value = sa.Column(sa.LargeBinary)
 
 
@@ -235,3 +297,14 @@ class UserIdentifiers(Base):
                 data_class=UserIdentifier,
                 data=self.identifier,
             )
+
+
+class Migration(Base):
+    '''
+    one-time (data) migrations which were already applied to the delivery-db, see
+    `deliverydb.data_migrations`
+    '''
+    __tablename__ = 'migration'
+
+    name = sa.Column(sa.String(length=128), primary_key=True)
+    applied_at = sa.Column(sa.DateTime(timezone=True), server_default=sa.sql.func.now())
@@ -4,6 +4,7 @@ import hashlib
 
 import sqlalchemy as sa
 import sqlalchemy.ext.asyncio as sqlasync
+import sqlalchemy.ext.compiler
 import sqlalchemy.sql.elements as sqle
 
 import cnudie.iter
@@ -17,6 +18,40 @@ import odg.model
 import util
 
 
+def artefact_key(
+    artefact: odg.model.ComponentArtefactId,
+) -> str:
+    '''
+    Digest of the key of `artefact` which is stored for each artefact metadata entry, so that the
+    entries of an artefact can be looked up using a single (indexed) equality predicate. As
+    references are not stored in the delivery-db, they are not considered.
+    '''
+    if artefact.references:
+        artefact = dataclasses.replace(artefact, references=[])
+
+    return odg.model.key_digest(artefact.key)
+
+
+def db_artefact_key(
+    artefact_metadata: dm.ArtefactMetaData,
+) -> str:
+    '''
+    Calculates the `artefact_key` of an artefact metadata entry based on its stored artefact
+    properties, e.g. to backfill entries which were created before the key was stored.
+    '''
+    return artefact_key(odg.model.ComponentArtefactId(
+        component_name=artefact_metadata.component_name,
+        component_version=artefact_metadata.component_version,
+        artefact=odg.model.LocalArtefactId(
+            artefact_name=artefact_metadata.artefact_name,
+            artefact_version=artefact_metadata.artefact_version,
+            artefact_type=artefact_metadata.artefact_type,
+            artefact_extra_id=artefact_metadata.artefact_extra_id or {},
+        ),
+        artefact_kind=artefact_metadata.artefact_kind,
+    ))
+
+
 def to_db_artefact_metadata(
     artefact_metadata: odg.model.ArtefactMetadata,
 ) -> dm.ArtefactMetaData:
@@ -42,6 +77,7 @@ def to_db_artefact_metadata(
 
     return dm.ArtefactMetaData(
         id=artefact_metadata.id,
+        artefact_key=artefact_key(artefact_ref),
         type=meta.type,
         component_name=artefact_ref.component_name,
         component_version=artefact_ref.component_version,
@@ -102,6 +138,47 @@ def db_artefact_metadata_row_to_dso(
     )
 
 
+class RowsIn(sqle.ColumnElement[bool]):
+    '''
+    SQL expression which checks the tuple of `columns` to be one of `rows`. For PostgreSQL, the rows
+    are passed as `VALUES` relation (i.e. `(a, b) IN (SELECT * FROM (VALUES ...))`), which allows
+    the planner to use a (hashed) semi-join instead of evaluating one predicate per row as it is the
+    case for large `OR` chains. Other dialects (i.e. SQLite) fall back to a regular `IN` expression.
+    '''
+    inherit_cache = False
+    type = sa.Boolean()
+
+    def __init__(
+        self,
+        columns: collections.abc.Sequence[sa.Column],
+        rows: collections.abc.Iterable[tuple],
+    ):
+        self.columns = tuple(columns)
+        # deduplicate rows but keep order for deterministic statements
+        self.rows = list(dict.fromkeys(tuple(row) for row in rows))
+
+
+@sqlalchemy.ext.compiler.compiles(RowsIn)
+def _compile_rows_in(element: RowsIn, compiler, **kwargs) -> str:
+    if not element.rows:
+        return compiler.process(sa.false(), **kwargs)
+
+    return compiler.process(sa.tuple_(*element.columns).in_(element.rows), **kwargs)
+
+
+@sqlalchemy.ext.compiler.compiles(RowsIn, 'postgresql')
+def _compile_rows_in_postgresql(element: RowsIn, compiler, **kwargs) -> str:
+    if not element.rows:
+        return compiler.process(sa.false(), **kwargs)
+
+    rows = sa.values(
+        *(sa.column(column.name, column.type) for column in element.columns),
+        name='rows',
+    ).data(element.rows)
+
+    return compiler.process(sa.tuple_(*element.columns).in_(sa.select(rows)), **kwargs)
+
+
 class ArtefactMetadataFilters:
     @staticmethod
     def by_name_and_type(
@@ -128,6 +205,65 @@ class ArtefactMetadataFilters:
 
 
 class ArtefactMetadataQueries:
+    @staticmethod
+    async def artefacts_query(
+        artefacts: collections.abc.Iterable[ocm.Resource | ocm.Source]=None,
+        component: ocm.Component | ocm.ComponentIdentity=None,
+        component_descriptor_lookup: cnudie.retrieve_async.ComponentDescriptorLookupById=None,
+    ) -> sqle.ColumnElement[bool] | bool:
+        '''
+        Single SQL expression which checks a database entry to be one of `artefacts` (by name,
+        version, type and extra-id). If `artefacts` is not specified, `component` _must_ be specified
+        to retrieve all artefacts of the given `component` (see `artefact_queries`).
+
+        Semantically equivalent to an `OR` concatenation of `artefact_queries` (with `none_ok` not
+        being set), but the artefacts are passed as rows (see `RowsIn`) which can be evaluated much
+        more efficiently for components with many artefacts.
+        '''
+        if not (artefacts or component):
+            raise ValueError('either `artefacts` or `component` must be specified')
+
+        if not artefacts:
+            if not component.version:
+                # if no component version is specified, artefact specific querying must be
+                # taken care of by the caller
+                return True
+
+            if isinstance(component, ocm.ComponentIdentity):
+                try:
+                    component_descriptor = await component_descriptor_lookup(component)
+                except oci.model.OciImageNotFoundException:
+                    return False
+
+                component: ocm.Component = component_descriptor.component
+
+            artefacts = [
+                artefact_node.artefact async for artefact_node in cnudie.iter_async.iter(
+                    component=component,
+                    node_filter=cnudie.iter.Filter.artefacts,
+                    recursion_depth=0,
+                )
+            ]
+
+        return RowsIn(
+            columns=(
+                dm.ArtefactMetaData.artefact_name,
+                dm.ArtefactMetaData.artefact_version,
+                dm.ArtefactMetaData.artefact_type,
+                dm.ArtefactMetaData.artefact_extra_id_normalised,
+            ),
+            rows=(
+                (
+                    artefact.name,
+                    artefact.version,
+                    artefact.type,
+                    odg.model.normalise_artefact_extra_id(
+                        artefact_extra_id=artefact.extraIdentity,
+                    ),
+                ) for artefact in artefacts
+            ),
+        )
+
     @staticmethod
     async def artefact_queries(
         artefacts: collections.abc.Iterable[ocm.Resource | ocm.Source]=None,
@@ -250,13 +386,10 @@ class ArtefactMetadataQueries:
                     ),
                     sa.and_(
                         dm.ArtefactMetaData.component_version == None,
-                        sa.or_(*[
-                            query async for query
-                            in ArtefactMetadataQueries.artefact_queries(
-                                component=component,
-                                component_descriptor_lookup=component_descriptor_lookup,
-                            )
-                        ]),
+                        await ArtefactMetadataQueries.artefacts_query(
+                            component=component,
+                            component_descriptor_lookup=component_descriptor_lookup,
+                        ),
                     ),
                 ),
             )
@@ -275,11 +408,8 @@ async def findings_for_component(
             dm.ArtefactMetaData.component_version == component.version,
             sa.and_(
                 dm.ArtefactMetaData.component_version == None,
-                sa.or_(*[ # check if component versions contains the referenced artefact version
-                    query async for query in ArtefactMetadataQueries.artefact_queries(
-                        component=component,
-                    )
-                ]),
+                # check if component versions contains the referenced artefact version
+                await ArtefactMetadataQueries.artefacts_query(component=component),
             ),
         ),
         dm.ArtefactMetaData.type == finding_type,
@@ -19,10 +19,16 @@ class EncodingFormat(enum.StrEnum):
         return int(float(pickle_version))
 
 
+class CompressionFormat(enum.StrEnum):
+    ZLIB = 'zlib'
+    ZSTD = 'zstd'
+
+
 class CacheValueType(enum.StrEnum):
     COMPONENT_DESCRIPTOR = 'component-descriptor'
     PYTHON_FUNCTION = 'python-function'
     HTTP_ROUTE = 'http-route'
+    COMPONENT_DEPENDENCY_GRAPH = 'component-dependency-graph'
 
 
 @dataclasses.dataclass
@@ -82,3 +88,19 @@ class CachedHTTPRoute(CacheDescriptorBase):
     @property
     def key(self) -> str:
         return f'{self.type}|{self.encoding_format}|{self.route}|{self.params}|{self.body}'
+
+
+@dataclasses.dataclass(kw_only=True)
+class CachedComponentDependencyGraph(CacheDescriptorBase):
+    type: CacheValueType = CacheValueType.COMPONENT_DEPENDENCY_GRAPH
+    component_name: str
+    component_version: str
+    ocm_repository: str | None = None
+    graph_format_version: int
+
+    @property
+    def key(self) -> str:
+        return (
+            f'{self.type}|{self.encoding_format}|{self.graph_format_version}|'
+            f'{self.component_name}|{self.component_version}|{self.ocm_repository}'
+        )
@@ -4,6 +4,7 @@ import datetime
 import enum
 import json
 import pickle
+import zlib
 
 import yaml
 
@@ -120,3 +121,66 @@ def deserialise_cache_value(
 
     else:
         raise ValueError(f'Unsupported encoding format {encoding_format}')
+
+
+def _zstandard():
+    # zstandard is an optional dependency, zlib is used as fallback
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        return None
+
+
+def default_compression_format() -> dcm.CompressionFormat:
+    if _zstandard():
+        return dcm.CompressionFormat.ZSTD
+
+    return dcm.CompressionFormat.ZLIB
+
+
+def compress_cache_value(
+    value: bytes,
+    compression_format: dcm.CompressionFormat | str,
+) -> bytes:
+    if compression_format is dcm.CompressionFormat.ZLIB:
+        return zlib.compress(value)
+
+    elif compression_format is dcm.CompressionFormat.ZSTD:
+        if not (zstandard := _zstandard()):
+            raise RuntimeError('zstandard must be installed to use zstd compression')
+        return zstandard.ZstdCompressor().compress(value)
+
+    else:
+        raise ValueError(f'Unsupported compression format {compression_format}')
+
+
+class _IdentityDecompressor:
+    def decompress(self, chunk: bytes) -> bytes:
+        return chunk
+
+    def flush(self) -> bytes:
+        return b''
+
+
+def cache_value_decompressor(
+    compression_format: dcm.CompressionFormat | str | None,
+):
+    '''
+    returns a decompressor object (offering `decompress(chunk)` and `flush()`) which allows to
+    decompress chunks of a (compressed) cache value incrementally
+    '''
+    if not compression_format:
+        return _IdentityDecompressor()
+
+    compression_format = dcm.CompressionFormat(compression_format)
+
+    if compression_format is dcm.CompressionFormat.ZLIB:
+        return zlib.decompressobj()
+
+    elif compression_format is dcm.CompressionFormat.ZSTD:
+        if not (zstandard := _zstandard()):
+            raise RuntimeError('zstandard must be installed to read zstd compressed values')
+        return zstandard.ZstdDecompressor().decompressobj()
+
+    raise ValueError(f'Unsupported compression format {compression_format}')
@@ -1,36 +1,48 @@
+import asyncio
 import collections
 import collections.abc
-import concurrent.futures
 import dataclasses
 import datetime
 import enum
 import functools
+import hashlib
 import http
 import logging
 import statistics
+import traceback
 import typing
 import urllib.parse
 
 import aiohttp.web
+import cachetools
 import cachetools.keys
 import dateutil.parser
 import github3
+import sqlalchemy.ext.asyncio as sqlasync
 
-import cnudie.iter
-import cnudie.iter_async
 import cnudie.retrieve_async
 import cnudie.util
 import ocm
 import version as versionutil
 
+import cache_metrics
 import caching
+import component_graph
 import components
 import consts
+import deliverydb
+import deliverydb.cache
+import deliverydb_cache.model as dcm
+import deliverydb_cache.util as dcu
+import executors
+import features
 import util
 
 
 logger = logging.getLogger(__name__)
-changes_by_dependencies_cache = dict()
+
+# maximum number of concurrent component descriptor lookups and GitHub requests per calculation
+default_max_concurrency = 8
 
 
 @dataclasses.dataclass(frozen=True)
@@ -126,6 +138,28 @@ class DoraResponse:
     dependencies: dict[str, DoraDependencyResponse]
 
 
+@dataclasses.dataclass
+class DoraJob:
+    '''
+    Background calculation of the DORA metrics for a specific set of target component versions (see
+    `DoraJobs`). The progress is reported as the number of already resolved dependency changes.
+    '''
+    key: str
+    task: asyncio.Task | None = None
+    started_at: datetime.datetime = dataclasses.field(
+        default_factory=lambda: datetime.datetime.now(datetime.UTC),
+    )
+    total_changes: int | None = None
+    resolved_changes: int = 0
+
+    def progress(self) -> dict:
+        return {
+            'started_at': self.started_at.isoformat(),
+            'total_changes': self.total_changes,
+            'resolved_changes': self.resolved_changes,
+        }
+
+
 async def versions_descriptors_newer_than(
     component_name: str,
     date: datetime.datetime,
@@ -133,12 +167,16 @@ async def versions_descriptors_newer_than(
     version_lookup: cnudie.retrieve_async.VersionLookupByComponent,
     only_releases: bool = True,
     invalid_semver_ok: bool = False,
-    sorting_direction: typing.Literal['asc', 'desc'] = 'desc'
+    sorting_direction: typing.Literal['asc', 'desc'] = 'desc',
+    max_concurrency: int = default_max_concurrency,
 ):
     '''
     This function retrieves the component descriptors for the versions
     of a specific Component, which are newer then the given date.
 
+    Descriptors are retrieved concurrently in windows of `max_concurrency` versions (from new to
+    old), i.e. at most `max_concurrency - 1` descriptors older than `date` are retrieved needlessly.
+
     asc-sorting means old to new => [0.102.0 ... 0.321.2]
 
     desc-sorting means new to old => [0.321.2 ... 0.102.0]
@@ -161,8 +199,15 @@ async def versions_descriptors_newer_than(
 
     descriptors: list[ocm.ComponentDescriptor] = []
 
-    for version in versions:
-        descriptor = await component_descriptor_lookup((component_name, version))
+    async def iter_descriptors() -> collections.abc.AsyncGenerator[ocm.ComponentDescriptor, None]:
+        for idx in range(0, len(versions), max(max_concurrency, 1)):
+            for descriptor in await asyncio.gather(*(
+                component_descriptor_lookup((component_name, version))
+                for version in versions[idx:idx + max(max_concurrency, 1)]
+            )):
+                yield descriptor
+
+    async for descriptor in iter_descriptors():
         try:
             if not _filter_component_newer_than_date(descriptor, date):
                 break
@@ -323,21 +368,46 @@ def commits_for_component_change(
 
 def _cache_key_changes_by_dependencies(
     target_descriptors_with_updates: tuple[ComponentWithDependencyChanges],
-):
-    return cachetools.keys.hashkey(''.join([(
-        f'{target_descriptor_with_updates.component_descriptor.component.name}'
-        f'{target_descriptor_with_updates.component_descriptor.component.version}'
-    ) for target_descriptor_with_updates in target_descriptors_with_updates]))
+    time_span_days: int,
+) -> str:
+    '''
+    returns a stable key for the DORA metrics of the passed-in target component versions and their
+    (filtered) dependency changes. As the metrics are calculated relative to the current date, the
+    date is part of the key as well.
+    '''
+    key = hashlib.sha256(usedforsecurity=False)
+
+    for key_part in (
+        str(time_span_days),
+        datetime.date.today().isoformat(),
+        *(
+            f'{target_descriptor_with_updates.component_descriptor.component.name}:'
+            f'{target_descriptor_with_updates.component_descriptor.component.version}'
+            + ''.join(
+                f'|{dependency_change.start.name}:{dependency_change.start.version}'
+                f'->{dependency_change.end.version}'
+                for dependency_change in target_descriptor_with_updates.dependency_changes
+            )
+            for target_descriptor_with_updates in target_descriptors_with_updates
+        ),
+    ):
+        key.update(key_part.encode('utf-8'))
+        key.update(b'\n')
+
+    return key.hexdigest()
 
 
-def categorize_by_changed_component(
+async def categorize_by_changed_component(
     target_descriptors_with_updates: tuple[ComponentWithDependencyChanges],
     github_api_lookup,
+    max_concurrency: int = default_max_concurrency,
+    job: DoraJob | None = None,
 ) -> dict[str, list[ComponentDependencyChangeWithCommits]]:
-    dependencies: dict[str, list[ComponentDependencyChangeWithCommits]] = (
-        collections.defaultdict(list[ComponentDependencyChangeWithCommits])
-    )
-
+    '''
+    resolves the commits of all dependency changes and groups them by the changed dependency. The
+    (blocking) GitHub requests are issued from the default executor, at most `max_concurrency` at a
+    time. If a `job` is passed, its progress is updated once a dependency change is resolved.
+    '''
     _github_api = functools.cache(github_api_lookup)
 
     @functools.cache
@@ -347,70 +417,99 @@ def categorize_by_changed_component(
 
         return github.repository(org, repo)
 
-    def resolve_changes(
-        target_descriptor_with_updates: ComponentWithDependencyChanges,
-    ):
-        for dependency_update in target_descriptor_with_updates.dependency_changes:
-            target_component = target_descriptor_with_updates.component_descriptor.component
-            dependency_component_name = dependency_update.end.name
+    def resolve_change(
+        target_component: ocm.Component,
+        dependency_update: components.ComponentVector,
+    ) -> ComponentDependencyChangeWithCommits | None:
+        left_component = dependency_update.start
+        right_component = dependency_update.end
 
-            left_component = dependency_update.start
-            right_component = dependency_update.end
+        left_src = cnudie.util.main_source(
+            left_component,
+            absent_ok=True,
+        )
+        right_src = cnudie.util.main_source(
+            right_component,
+            absent_ok=True,
+        )
 
-            left_src = cnudie.util.main_source(
-                left_component,
-                absent_ok=True,
-            )
-            right_src = cnudie.util.main_source(
-                right_component,
-                absent_ok=True,
-            )
+        if not left_src or not right_src:
+            return None
 
-            if not left_src or not right_src:
-                continue
+        left_access = left_src.access
+        right_access = right_src.access
 
-            left_access = left_src.access
-            right_access = right_src.access
+        if not left_access.type is ocm.AccessType.GITHUB:
+            return None
+        if not right_access.type is ocm.AccessType.GITHUB:
+            return None
 
-            if not left_access.type is ocm.AccessType.GITHUB:
-                continue
-            if not right_access.type is ocm.AccessType.GITHUB:
-                continue
+        left_repo_url = util.urlparse(left_access.repoUrl)
+        right_repo_url = util.urlparse(right_access.repoUrl)
 
-            left_repo_url = util.urlparse(left_access.repoUrl)
-            right_repo_url = util.urlparse(right_access.repoUrl)
+        if not left_repo_url == right_repo_url:
+            return None # ensure there was no repository-change between component-versions
 
-            if not left_repo_url == right_repo_url:
-                continue # ensure there was no repository-change between component-versions
+        left_commit = left_access.commit or left_access.ref
+        right_commit = right_access.commit or right_access.ref
 
-            left_commit = left_access.commit or left_access.ref
-            right_commit = right_access.commit or right_access.ref
+        github_repo = _github_repo(
+            repo_url=left_repo_url, # already checked for equality; choose either
+        )
 
-            github_repo = _github_repo(
-                repo_url=left_repo_url, # already checked for equality; choose either
-            )
+        return ComponentDependencyChangeWithCommits(
+            component=target_component,
+            dependency_component_vector=dependency_update,
+            commits=commits_for_component_change(
+                left_commit=left_commit,
+                right_commit=right_commit,
+                github_repo=github_repo,
+            ),
+        )
 
-            dependencies[dependency_component_name].append(
-                ComponentDependencyChangeWithCommits(
-                    component=target_component,
-                    dependency_component_vector=dependency_update,
-                    commits=commits_for_component_change(
-                        left_commit=left_commit,
-                        right_commit=right_commit,
-                        github_repo=github_repo,
-                    ),
-                )
+    changes = [
+        (target_descriptor_with_updates.component_descriptor.component, dependency_update)
+        for target_descriptor_with_updates in target_descriptors_with_updates
+        for dependency_update in target_descriptor_with_updates.dependency_changes
+    ]
+
+    if job:
+        job.total_changes = len(changes)
+
+    semaphore = asyncio.Semaphore(max(max_concurrency, 1))
+
+    async def resolve_change_bounded(
+        target_component: ocm.Component,
+        dependency_update: components.ComponentVector,
+    ) -> ComponentDependencyChangeWithCommits | None:
+        async with semaphore:
+            change = await executors.run_in_lane(
+                executors.ExecutorLane.GITHUB,
+                resolve_change,
+                target_component,
+                dependency_update,
             )
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as tpe:
-        futures = {
-            tpe.submit(resolve_changes, target_descriptor_with_updates)
-            for target_descriptor_with_updates in target_descriptors_with_updates
-        }
-        concurrent.futures.wait(futures)
+        if job:
+            job.resolved_changes += 1
 
-    key = _cache_key_changes_by_dependencies(target_descriptors_with_updates)
-    changes_by_dependencies_cache[key] = dependencies
+        return change
+
+    resolved_changes = await asyncio.gather(*(
+        resolve_change_bounded(target_component, dependency_update)
+        for target_component, dependency_update in changes
+    ))
+
+    dependencies: dict[str, list[ComponentDependencyChangeWithCommits]] = (
+        collections.defaultdict(list[ComponentDependencyChangeWithCommits])
+    )
+
+    # results of `asyncio.gather` retain the order of the changes, hence the grouping is stable
+    for (_, dependency_update), change in zip(changes, resolved_changes):
+        if not change:
+            continue
+
+        dependencies[dependency_update.end.name].append(change)
 
     return dependencies
 
@@ -751,6 +850,199 @@ def create_response_object(
     )
 
 
+@deliverydb.cache.dbcached_function(
+    ttl_seconds=60 * 60 * 24, # 1 day (key changes daily anyways)
+    exclude_kwargs=(
+        'time_span_days',
+        'target_descriptors_with_updates',
+        'github_api_lookup',
+        'max_concurrency',
+        'job',
+    ),
+)
+async def dora_response(
+    key: str,
+    time_span_days: int,
+    target_descriptors_with_updates: tuple[ComponentWithDependencyChanges],
+    github_api_lookup,
+    max_concurrency: int = default_max_concurrency,
+    job: DoraJob | None = None,
+    db_session: sqlasync.session.AsyncSession = None, # required for db-cache
+    shortcut_cache: bool = False,
+) -> DoraResponse:
+    '''
+    calculates the DORA metrics for the passed-in target component versions. The `key` (see
+    `_cache_key_changes_by_dependencies`) must identify all other parameters as it is the only one
+    which is considered for the db-cache.
+    '''
+    updates_by_dependency = await categorize_by_changed_component(
+        target_descriptors_with_updates=target_descriptors_with_updates,
+        github_api_lookup=github_api_lookup,
+        max_concurrency=max_concurrency,
+        job=job,
+    )
+
+    return await executors.run_in_lane(
+        executors.ExecutorLane.CPU,
+        create_response_object,
+        target_updates_by_dependency=updates_by_dependency,
+        time_span_days=time_span_days,
+    )
+
+
+async def cached_dora_response(
+    key: str,
+    db_session: sqlasync.session.AsyncSession,
+) -> DoraResponse | None:
+    '''
+    looks up the result of `dora_response` for the given `key` in the db-cache without calculating
+    it in case it is missing
+    '''
+    descriptor = dcm.CachedPythonFunction(
+        encoding_format=dcm.EncodingFormat.PICKLE,
+        # must match the name used by `dbcached_function` when storing the result
+        function_name=cache_metrics.function_name(dora_response),
+        args=dcu.normalise_and_serialise_object(tuple()),
+        kwargs=dcu.normalise_and_serialise_object({'key': key}),
+    )
+
+    if not (value := await deliverydb.cache.find_cached_value(
+        db_session=db_session,
+        id=descriptor.id,
+    )):
+        return None
+
+    return dcu.deserialise_cache_value(
+        value=value,
+        encoding_format=dcm.EncodingFormat.PICKLE,
+    )
+
+
+class DoraJobs:
+    '''
+    Manages the background calculations of DORA metrics. Jobs are deduplicated by their key, i.e.
+    concurrent requests for the same target component versions share one calculation. Results are
+    kept in a size-bounded TTL cache and, if the delivery-db is available, persisted in the db-cache
+    so that they are shared across replicas and survive restarts.
+
+    @param max_results:
+        the maximum number of results kept in memory
+    @param result_ttl_seconds:
+        the duration after which results are removed from memory
+    @param max_concurrency:
+        the maximum number of concurrent GitHub requests per job
+    '''
+    def __init__(
+        self,
+        max_results: int = 32,
+        result_ttl_seconds: int = 60 * 60, # 1 hour
+        max_concurrency: int = default_max_concurrency,
+    ):
+        self.max_concurrency = max_concurrency
+
+        self._results = cachetools.TTLCache(
+            maxsize=max_results,
+            ttl=result_ttl_seconds,
+        )
+        self._jobs: dict[str, DoraJob] = {}
+
+    def job(
+        self,
+        key: str,
+    ) -> DoraJob | None:
+        return self._jobs.get(key)
+
+    async def result(
+        self,
+        key: str,
+        db_session: sqlasync.session.AsyncSession | None = None,
+    ) -> DoraResponse | None:
+        if (result := self._results.get(key)) is not None:
+            return result
+
+        if not db_session:
+            return None
+
+        if (result := await cached_dora_response(
+            key=key,
+            db_session=db_session,
+        )) is not None:
+            self._results[key] = result
+
+        return result
+
+    def submit(
+        self,
+        key: str,
+        time_span_days: int,
+        target_descriptors_with_updates: tuple[ComponentWithDependencyChanges],
+        github_api_lookup,
+    ) -> DoraJob:
+        '''
+        starts a background calculation for `key` unless there is already one running
+        '''
+        if job := self._jobs.get(key):
+            return job
+
+        job = self._jobs[key] = DoraJob(key=key)
+        job.task = asyncio.create_task(self._run(
+            job=job,
+            time_span_days=time_span_days,
+            target_descriptors_with_updates=target_descriptors_with_updates,
+            github_api_lookup=github_api_lookup,
+        ))
+
+        return job
+
+    async def _run(
+        self,
+        job: DoraJob,
+        time_span_days: int,
+        target_descriptors_with_updates: tuple[ComponentWithDependencyChanges],
+        github_api_lookup,
+    ):
+        db_session = None
+
+        try:
+            delivery_db_feature = features.get_feature(features.FeatureDeliveryDB)
+            if (
+                delivery_db_feature
+                and delivery_db_feature.state is features.FeatureStates.AVAILABLE
+            ):
+                delivery_db_feature: features.FeatureDeliveryDB
+                db_session = await deliverydb.sqlalchemy_session(
+                    db_url=delivery_db_feature.get_db_url(),
+                    lane=deliverydb.PoolLane.LOW_PRIO,
+                )
+
+            self._results[job.key] = await dora_response(
+                key=job.key,
+                time_span_days=time_span_days,
+                target_descriptors_with_updates=target_descriptors_with_updates,
+                github_api_lookup=github_api_lookup,
+                max_concurrency=self.max_concurrency,
+                job=job,
+                db_session=db_session,
+                shortcut_cache=True, # the db-cache was already checked before submitting the job
+            )
+
+            logger.info(
+                f'finished dora calculation {job.key=} after '
+                f'{datetime.datetime.now(datetime.UTC) - job.started_at}'
+            )
+        except Exception:
+            # don't keep failed jobs so that the calculation is retried upon the next request
+            logger.error(f'dora calculation {job.key=} failed: {traceback.format_exc()}')
+        finally:
+            if db_session:
+                await db_session.close()
+
+            self._jobs.pop(job.key, None)
+
+
+dora_jobs = DoraJobs()
+
+
 class DoraMetrics(aiohttp.web.View):
     async def get(self):
         '''
@@ -794,6 +1086,16 @@ class DoraMetrics(aiohttp.web.View):
                   type: object
           "202":
             description: Dora metric calculation pending, client should retry.
+            schema:
+              type: object
+              properties:
+                started_at:
+                  type: string
+                total_changes:
+                  type: integer
+                  description: Number of dependency changes to resolve (if already known).
+                resolved_changes:
+                  type: integer
         '''
         params = self.request.rel_url.query
 
@@ -841,15 +1143,19 @@ class DoraMetrics(aiohttp.web.View):
             target_descriptors_in_time_span.insert(0, next_older_descriptor)
 
         # calculate the changes which where introduced for every component version
-        target_descriptors_with_updates: list[ComponentWithDependencyChanges] = []
-        for index in range(1, len(target_descriptors_in_time_span)):
-            component_diff = await _diff_components(
-                component_vector=components.ComponentVector(
-                    start=target_descriptors_in_time_span[index-1].component,
-                    end=target_descriptors_in_time_span[index].component,
-                ),
-                component_descriptor_lookup=component_descriptor_lookup,
-            )
+        semaphore = asyncio.Semaphore(dora_jobs.max_concurrency)
+
+        async def target_descriptor_with_updates(
+            index: int,
+        ) -> ComponentWithDependencyChanges:
+            async with semaphore:
+                component_diff = await _diff_components(
+                    component_vector=components.ComponentVector(
+                        start=target_descriptors_in_time_span[index-1].component,
+                        end=target_descriptors_in_time_span[index].component,
+                    ),
+                    component_descriptor_lookup=component_descriptor_lookup,
+                )
 
             if component_diff:
                 dependency_changes = dependency_changes_between_versions(
@@ -860,38 +1166,41 @@ class DoraMetrics(aiohttp.web.View):
             else:
                 dependency_changes = []
 
-            target_descriptors_with_updates.append(
-                ComponentWithDependencyChanges(
-                    component_descriptor=target_descriptors_in_time_span[index],
-                    dependency_changes=dependency_changes,
-                )
+            return ComponentWithDependencyChanges(
+                component_descriptor=target_descriptors_in_time_span[index],
+                dependency_changes=dependency_changes,
             )
 
-        target_descriptors_with_updates = tuple(target_descriptors_with_updates)
+        target_descriptors_with_updates = tuple(await asyncio.gather(*(
+            target_descriptor_with_updates(index)
+            for index in range(1, len(target_descriptors_in_time_span))
+        )))
 
-        key = _cache_key_changes_by_dependencies(target_descriptors_with_updates)
+        key = _cache_key_changes_by_dependencies(
+            target_descriptors_with_updates=target_descriptors_with_updates,
+            time_span_days=time_span_days,
+        )
 
-        # categorize changes by changed dependency
-        # and add commits to the dependency changes
-        if (updates_by_dependency := changes_by_dependencies_cache.get(key)) is None:
-            if key not in changes_by_dependencies_cache:
-                changes_by_dependencies_cache[key] = None
-                tpe = concurrent.futures.ThreadPoolExecutor(max_workers=1)
-                tpe.submit(
-                    categorize_by_changed_component,
-                    target_descriptors_with_updates,
-                    self.request.app[consts.APP_GITHUB_API_LOOKUP],
-                )
+        # categorize changes by changed dependency and add commits to the dependency changes, this
+        # is done in the background as it requires many (slow) GitHub requests
+        if (response := await dora_jobs.result(
+            key=key,
+            db_session=self.request.get(consts.REQUEST_DB_SESSION),
+        )) is None:
+            job = dora_jobs.submit(
+                key=key,
+                time_span_days=time_span_days,
+                target_descriptors_with_updates=target_descriptors_with_updates,
+                github_api_lookup=self.request.app[consts.APP_GITHUB_API_LOOKUP],
+            )
 
-            return aiohttp.web.Response(
+            return aiohttp.web.json_response(
+                data=job.progress(),
                 status=http.HTTPStatus.ACCEPTED,
             )
 
         return aiohttp.web.json_response(
-            data=create_response_object(
-                target_updates_by_dependency=updates_by_dependency,
-                time_span_days=time_span_days,
-            ),
+            data=response,
             dumps=util.dict_to_json_factory,
         )
 
@@ -923,21 +1232,25 @@ async def _diff_components(
     in that it will merge multiple component-versions (of the same component) into just one
     component-version, choosing greatest/smallest versions.
     '''
-    old_components = [
-        c.component async for c in cnudie.iter_async.iter(
-            component=component_vector.start,
-            lookup=component_descriptor_lookup,
-            node_filter=cnudie.iter.Filter.components,
+    async def dependencies(component: ocm.Component) -> list[ocm.Component]:
+        # consecutive component versions usually share most of their dependencies, hence the
+        # dependency graphs of unchanged dependencies are reused
+        dependency_graph = await component_graph.dependency_graph_store.graph(
+            component_id=component.identity(),
+            component_descriptor_lookup=component_descriptor_lookup,
         )
-    ]
 
-    new_components = [
-        c.component async for c in cnudie.iter_async.iter(
-            component=component_vector.end,
-            lookup=component_descriptor_lookup,
-            node_filter=cnudie.iter.Filter.components,
-        )
-    ]
+        return [
+            component_node.component
+            async for component_node in component_graph.iter_component_nodes(
+                graph=dependency_graph,
+                component_descriptor_lookup=component_descriptor_lookup,
+                prune_unique=True,
+            )
+        ]
+
+    old_components = await dependencies(component_vector.start)
+    new_components = await dependencies(component_vector.end)
 
     def only_greatest_versions(components: list[ocm.Component]):
         components_by_name: collections.defaultdict[
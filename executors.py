@@ -0,0 +1,324 @@
+'''
+Named executor lanes for blocking work of the delivery-service. Each lane has its own thread pool
+and (optionally) a bound for the number of queued tasks, so that a slow dependency (e.g. GitHub) or
+CPU-heavy requests (e.g. compliance summaries) cannot starve unrelated work which is executed in
+other lanes. Queue wait and utilisation of each lane are exposed as prometheus metrics.
+'''
+import asyncio
+import collections.abc
+import concurrent.futures
+import contextlib
+import contextvars
+import dataclasses
+import enum
+import functools
+import os
+import threading
+import time
+
+import prometheus_client
+
+
+class ExecutorLane(enum.StrEnum):
+    # used as default executor of the event loop, i.e. for `run_in_executor(None, ...)` and
+    # `asyncio.to_thread`
+    DEFAULT = 'default'
+    # CPU-bound work, e.g. rescoring or (de-)serialisation of large objects
+    CPU = 'cpu'
+    # blocking calls towards GitHub
+    GITHUB = 'github'
+    # blocking calls towards the kubernetes api
+    K8S = 'k8s'
+    # blocking work adjacent to the delivery-db, e.g. processing of large query results
+    DB = 'db'
+
+
+@dataclasses.dataclass(frozen=True)
+class ExecutorLaneCfg:
+    '''
+    `max_queue_depth` is the maximum number of tasks waiting for a worker thread of the lane,
+    further tasks are rejected (see `ExecutorLaneSaturated`). `0` disables the bound.
+    '''
+    lane: ExecutorLane
+    max_workers: int = 4
+    max_queue_depth: int = 0
+
+
+lane_cfgs: dict[str, ExecutorLaneCfg] = {
+    ExecutorLane.DEFAULT: ExecutorLaneCfg(lane=ExecutorLane.DEFAULT),
+    ExecutorLane.CPU: ExecutorLaneCfg(
+        lane=ExecutorLane.CPU,
+        max_workers=os.cpu_count() or 2,
+        max_queue_depth=1024,
+    ),
+    ExecutorLane.GITHUB: ExecutorLaneCfg(
+        lane=ExecutorLane.GITHUB,
+        max_workers=8,
+        max_queue_depth=256,
+    ),
+    ExecutorLane.K8S: ExecutorLaneCfg(
+        lane=ExecutorLane.K8S,
+        max_workers=4,
+        max_queue_depth=64,
+    ),
+    ExecutorLane.DB: ExecutorLaneCfg(
+        lane=ExecutorLane.DB,
+        max_workers=4,
+        max_queue_depth=256,
+    ),
+}
+
+EXECUTOR_QUEUE_WAIT_SECONDS = prometheus_client.Histogram(
+    name='executor_queue_wait_seconds',
+    documentation='Time tasks spent waiting for a worker thread of the executor lane (seconds)',
+    labelnames=['lane'],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+EXECUTOR_TASKS_QUEUED = prometheus_client.Gauge(
+    name='executor_tasks_queued',
+    documentation='Tasks waiting for a worker thread of the executor lane',
+    labelnames=['lane'],
+    multiprocess_mode='livesum',
+)
+EXECUTOR_TASKS_RUNNING = prometheus_client.Gauge(
+    name='executor_tasks_running',
+    documentation='Tasks currently executed by the executor lane (utilisation if related to max)',
+    labelnames=['lane'],
+    multiprocess_mode='livesum',
+)
+EXECUTOR_MAX_WORKERS = prometheus_client.Gauge(
+    name='executor_max_workers',
+    documentation='Maximum number of worker threads of the executor lane',
+    labelnames=['lane'],
+    multiprocess_mode='livesum',
+)
+EXECUTOR_TASKS_REJECTED_TOTAL = prometheus_client.Counter(
+    name='executor_tasks_rejected_total',
+    documentation='Tasks rejected because the queue of the executor lane was full',
+    labelnames=['lane'],
+)
+
+
+class ExecutorLaneSaturated(RuntimeError):
+    pass
+
+
+# lanes a slot was reserved in by the current context (see `reserved`)
+_reserved_lanes: contextvars.ContextVar[frozenset[str]] = contextvars.ContextVar(
+    'reserved_lanes',
+    default=frozenset(),
+)
+
+
+class LaneExecutor(concurrent.futures.ThreadPoolExecutor):
+    def __init__(
+        self,
+        cfg: ExecutorLaneCfg,
+    ):
+        super().__init__(
+            max_workers=cfg.max_workers,
+            thread_name_prefix=f'executor-{cfg.lane}',
+        )
+        self.cfg = cfg
+
+        self._queued_tasks = 0
+        self._reserved_slots = 0
+        self._queued_tasks_lock = threading.Lock()
+
+        EXECUTOR_MAX_WORKERS.labels(cfg.lane).inc(cfg.max_workers)
+
+    def _is_saturated(self) -> bool:
+        # caller must hold `self._queued_tasks_lock`
+        return bool(
+            self.cfg.max_queue_depth
+            and self._queued_tasks + self._reserved_slots >= self.cfg.max_queue_depth
+        )
+
+    def reserve(self):
+        '''
+        reserves a slot in the queue, see `reserved`
+
+        @raises ExecutorLaneSaturated: if the queue of the lane is full
+        '''
+        lane = self.cfg.lane
+
+        with self._queued_tasks_lock:
+            if self._is_saturated():
+                EXECUTOR_TASKS_REJECTED_TOTAL.labels(lane).inc()
+                raise ExecutorLaneSaturated(f'queue of executor {lane=} is full')
+            self._reserved_slots += 1
+
+    def release(self):
+        with self._queued_tasks_lock:
+            self._reserved_slots -= 1
+
+    def submit(self, fn, /, *args, **kwargs) -> concurrent.futures.Future:
+        lane = self.cfg.lane
+
+        with self._queued_tasks_lock:
+            # tasks submitted by the holder of a reservation are never rejected
+            if lane not in _reserved_lanes.get() and self._is_saturated():
+                EXECUTOR_TASKS_REJECTED_TOTAL.labels(lane).inc()
+                raise ExecutorLaneSaturated(f'queue of executor {lane=} is full')
+            self._queued_tasks += 1
+
+        EXECUTOR_TASKS_QUEUED.labels(lane).inc()
+        queued_at = time.monotonic()
+        started = threading.Event()
+
+        def dequeue():
+            with self._queued_tasks_lock:
+                self._queued_tasks -= 1
+            EXECUTOR_TASKS_QUEUED.labels(lane).dec()
+
+        def run():
+            started.set()
+            dequeue()
+            EXECUTOR_QUEUE_WAIT_SECONDS.labels(lane).observe(time.monotonic() - queued_at)
+
+            EXECUTOR_TASKS_RUNNING.labels(lane).inc()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                EXECUTOR_TASKS_RUNNING.labels(lane).dec()
+
+        def dequeue_if_not_started(future: concurrent.futures.Future):
+            # task was cancelled before it was picked up by a worker thread
+            if not started.is_set():
+                dequeue()
+
+        try:
+            future = super().submit(run)
+        except BaseException:
+            dequeue()
+            raise
+
+        future.add_done_callback(dequeue_if_not_started)
+        return future
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        super().shutdown(wait=wait, cancel_futures=cancel_futures)
+        EXECUTOR_MAX_WORKERS.labels(self.cfg.lane).dec(self.cfg.max_workers)
+
+
+_executors: dict[str, LaneExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def configure_lanes(*cfgs: ExecutorLaneCfg):
+    '''
+    overwrites the configuration of the respective lanes; must be called before the executor of a
+    lane is used for the first time, as existing executors are not re-created
+    '''
+    for cfg in cfgs:
+        lane_cfgs[cfg.lane] = cfg
+
+
+def parse_lane_cfg(value: str) -> ExecutorLaneCfg:
+    '''
+    parses a lane configuration of the form `<lane>=<max-workers>[/<max-queue-depth>]`, e.g.
+    `github=16/512`
+    '''
+    lane, sep, sizes = value.partition('=')
+    if not sep:
+        raise ValueError(f'invalid executor lane cfg {value=}')
+
+    max_workers, sep, max_queue_depth = sizes.partition('/')
+
+    return dataclasses.replace(
+        lane_cfgs[ExecutorLane(lane.strip())],
+        max_workers=int(max_workers),
+        **({'max_queue_depth': int(max_queue_depth)} if sep else {}),
+    )
+
+
+def executor(lane: ExecutorLane=ExecutorLane.DEFAULT) -> LaneExecutor:
+    if (lane_executor := _executors.get(lane)):
+        return lane_executor
+
+    with _executors_lock:
+        if not (lane_executor := _executors.get(lane)):
+            lane_executor = _executors[lane] = LaneExecutor(cfg=lane_cfgs[lane])
+
+    return lane_executor
+
+
+async def run_in_lane[T](
+    lane: ExecutorLane,
+    func: collections.abc.Callable[..., T],
+    /,
+    *args,
+    **kwargs,
+) -> T:
+    '''
+    runs `func` in a worker thread of the executor `lane` (similar to `asyncio.to_thread`, the
+    current context is propagated)
+
+    @raises ExecutorLaneSaturated: if the queue of the lane is full (unless a slot in the lane was
+                                   reserved by the current context, see `reserved`)
+    '''
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+
+    return await loop.run_in_executor(
+        executor(lane=lane),
+        functools.partial(context.run, func, *args, **kwargs),
+    )
+
+
+@contextlib.contextmanager
+def reserved(
+    lane: ExecutorLane,
+) -> collections.abc.Generator[None, None, None]:
+    '''
+    reserves a slot in the queue of the executor `lane` for the duration of the context. Tasks which
+    are submitted to the lane within the context are not rejected, even if the queue is full in the
+    meantime. This allows to fail before a response is started (i.e. headers were sent) rather than
+    in the middle of streaming it.
+
+    @raises ExecutorLaneSaturated: if the queue of the lane is full upon entering the context
+    '''
+    if lane in (reserved_lanes := _reserved_lanes.get()):
+        yield
+        return
+
+    lane_executor = executor(lane=lane)
+    lane_executor.reserve()
+    token = _reserved_lanes.set(reserved_lanes | {lane})
+
+    try:
+        yield
+    finally:
+        _reserved_lanes.reset(token)
+        lane_executor.release()
+
+
+async def map_chunks_in_lane[T, R](
+    lane: ExecutorLane,
+    func: collections.abc.Callable[[collections.abc.Sequence[T]], collections.abc.Iterable[R]],
+    items: collections.abc.Sequence[T],
+    chunk_size: int=512,
+) -> list[R]:
+    '''
+    applies `func` to chunks of up to `chunk_size` `items` (one task per chunk instead of one per
+    item to reduce the overhead of thread hops) in the executor `lane`. The chunks are processed
+    concurrently, the results are concatenated preserving the order of `items`.
+    '''
+    chunk_results = await asyncio.gather(*[
+        run_in_lane(lane, func, items[idx:idx + chunk_size])
+        for idx in range(0, len(items), chunk_size)
+    ])
+
+    return [
+        result
+        for chunk_result in chunk_results
+        for result in chunk_result
+    ]
+
+
+def shutdown(wait: bool=True):
+    with _executors_lock:
+        for lane_executor in _executors.values():
+            lane_executor.shutdown(wait=wait)
+
+        _executors.clear()
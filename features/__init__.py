@@ -3,9 +3,11 @@ import dataclasses
 import datetime
 import enum
 import functools
+import hashlib
 import logging
 import math
 import os
+import threading
 import watchdog.events
 import watchdog.observers.polling
 
@@ -20,6 +22,7 @@ import ocm
 
 import consts
 import ctx_util
+import deliverydb
 import k8s.util
 import lookups
 import middleware.auth
@@ -376,15 +379,16 @@ class FeatureProfiles(FeatureBase):
     name: str = 'profiles'
     profiles: list[Profile] = dataclasses.field(default_factory=list)
 
+    @functools.cached_property
+    def _profiles_by_name(self) -> dict[str, Profile]:
+        # reversed so that the first profile wins in case of duplicate names
+        return {profile.name: profile for profile in reversed(self.profiles)}
+
     def find_profile(self, name: str | None) -> Profile | None:
         if not name and self.profiles:
             return self.profiles[0] # if no specific profile is requested, use default one (-> first)
 
-        for profile in self.profiles:
-            if profile.name == name:
-                return profile
-
-        return None
+        return self._profiles_by_name.get(name)
 
 
 @dataclasses.dataclass(frozen=True)
@@ -889,66 +893,189 @@ def deserialise_cfg(raw: dict) -> collections.abc.Generator[FeatureBase, None, N
         yield FeatureVersionFilter(state=FeatureStates.AVAILABLE)
 
 
-def apply_raw_cfg():
-    global feature_cfgs
-    raw = util.parse_yaml_file(paths.features_cfg_path())
-    for cfg in deserialise_cfg(raw):
-        # remove previous feature cfg of the type and instead add new one as it might have changed
-        feature_cfgs = [f for f in feature_cfgs if type(f) is not type(cfg)]
-        feature_cfgs.append(cfg)
+def deserialise_extensions_cfg(
+    extensions_cfg_path: str | None,
+) -> FeatureExtensionsConfiguration:
+    if not extensions_cfg_path:
+        return FeatureExtensionsConfiguration(FeatureStates.UNAVAILABLE)
 
-    if extensions_cfg_path := paths.extensions_cfg_path(absent_ok=True):
-        extensions_cfg = odg.extensions_cfg.ExtensionsConfiguration.from_file(extensions_cfg_path)
-        extensions_cfg_feature = FeatureExtensionsConfiguration(
-            state=FeatureStates.AVAILABLE,
-            extensions_cfg=extensions_cfg,
-        )
-    else:
-        extensions_cfg_feature = FeatureExtensionsConfiguration(FeatureStates.UNAVAILABLE)
+    return FeatureExtensionsConfiguration(
+        state=FeatureStates.AVAILABLE,
+        extensions_cfg=odg.extensions_cfg.ExtensionsConfiguration.from_file(extensions_cfg_path),
+    )
 
-    feature_cfgs = [f for f in feature_cfgs if not isinstance(f, FeatureExtensionsConfiguration)]
-    feature_cfgs.append(extensions_cfg_feature)
 
-    if findings_cfg_path := paths.findings_cfg_path(absent_ok=True):
-        finding_cfgs = odg.findings.Finding.from_file(findings_cfg_path)
-        finding_cfgs_feature = FeatureFindingConfigurations(
-            state=FeatureStates.AVAILABLE,
-            finding_cfgs=finding_cfgs,
-        )
-    else:
-        finding_cfgs_feature = FeatureFindingConfigurations(FeatureStates.UNAVAILABLE)
+def deserialise_finding_cfgs(
+    findings_cfg_path: str | None,
+) -> FeatureFindingConfigurations:
+    if not findings_cfg_path:
+        return FeatureFindingConfigurations(FeatureStates.UNAVAILABLE)
 
-    feature_cfgs = [f for f in feature_cfgs if not isinstance(f, FeatureFindingConfigurations)]
-    feature_cfgs.append(finding_cfgs_feature)
+    return FeatureFindingConfigurations(
+        state=FeatureStates.AVAILABLE,
+        finding_cfgs=odg.findings.Finding.from_file(findings_cfg_path),
+    )
 
-    if (
-        (ocm_repo_mappings_path := paths.ocm_repo_mappings_path(absent_ok=True))
-        and (ocm_repo_mappings_raw := util.parse_yaml_file(ocm_repo_mappings_path))
-    ):
-        ocm_repo_mappings_feature = deserialise_repo_contexts(
-            ocm_repo_mappings_raw=ocm_repo_mappings_raw,
-        )
-    else:
-        ocm_repo_mappings_feature = FeatureRepoContexts(FeatureStates.UNAVAILABLE)
 
-    feature_cfgs = [f for f in feature_cfgs if not isinstance(f, FeatureRepoContexts)]
-    feature_cfgs.append(ocm_repo_mappings_feature)
+@dataclasses.dataclass(frozen=True)
+class CfgSource:
+    '''
+    A cfg file and the features derived from it. The features are only derived again once the
+    content digest of the file changed.
+    '''
+    name: str
+    path: str | None
+    deserialise: collections.abc.Callable[[str | None], collections.abc.Iterable[FeatureBase]]
+
+
+@dataclasses.dataclass(frozen=True)
+class _LoadedCfgSource:
+    path: str | None
+    digest: str | None
+    features: tuple[FeatureBase, ...]
+
+
+_loaded_cfg_sources: dict[str, _LoadedCfgSource] = {}
+_apply_raw_cfg_lock = threading.Lock()
+
+
+def _file_digest(path: str | None) -> str | None:
+    if not path:
+        return None
+
+    with open(path, 'rb') as file:
+        return hashlib.file_digest(file, 'sha256').hexdigest()
+
+
+def _optional_raw_cfg(path: str | None) -> dict | list | None:
+    if not path:
+        return None
+
+    return util.parse_yaml_file(path)
+
+
+def cfg_sources() -> tuple[CfgSource, ...]:
+    def repo_contexts(ocm_repo_mappings_path: str | None) -> tuple[FeatureBase]:
+        if ocm_repo_mappings_raw := _optional_raw_cfg(ocm_repo_mappings_path):
+            return (deserialise_repo_contexts(ocm_repo_mappings_raw=ocm_repo_mappings_raw),)
+        return (FeatureRepoContexts(FeatureStates.UNAVAILABLE),)
+
+    def profiles(profiles_path: str | None) -> tuple[FeatureBase]:
+        if profiles_raw := _optional_raw_cfg(profiles_path):
+            return (deserialise_profiles(profiles_raw=profiles_raw),)
+        return (FeatureProfiles(FeatureStates.UNAVAILABLE),)
+
+    return (
+        CfgSource(
+            name='features',
+            path=paths.features_cfg_path(),
+            deserialise=lambda path: deserialise_cfg(util.parse_yaml_file(path)),
+        ),
+        CfgSource(
+            name='extensions',
+            path=paths.extensions_cfg_path(absent_ok=True),
+            deserialise=lambda path: (deserialise_extensions_cfg(path),),
+        ),
+        CfgSource(
+            name='findings',
+            path=paths.findings_cfg_path(absent_ok=True),
+            deserialise=lambda path: (deserialise_finding_cfgs(path),),
+        ),
+        CfgSource(
+            name='ocm-repo-mappings',
+            path=paths.ocm_repo_mappings_path(absent_ok=True),
+            deserialise=repo_contexts,
+        ),
+        CfgSource(
+            name='profiles',
+            path=paths.profiles_path(absent_ok=True),
+            deserialise=profiles,
+        ),
+    )
+
+
+def load_cfg_source(
+    cfg_source: CfgSource,
+) -> tuple[FeatureBase, ...]:
+    '''
+    returns the features derived from the passed-in `cfg_source`, the features are only derived
+    again if the cfg file (or its path) changed since the last invocation
+    '''
+    digest = _file_digest(cfg_source.path)
 
     if (
-        (profiles_path := paths.profiles_path(absent_ok=True))
-        and (profiles_raw := util.parse_yaml_file(profiles_path))
+        (loaded_cfg_source := _loaded_cfg_sources.get(cfg_source.name))
+        and loaded_cfg_source.path == cfg_source.path
+        and loaded_cfg_source.digest == digest
     ):
-        profiles_feature = deserialise_profiles(profiles_raw=profiles_raw)
-    else:
-        profiles_feature = FeatureProfiles(FeatureStates.UNAVAILABLE)
+        return loaded_cfg_source.features
+
+    features = tuple(cfg_source.deserialise(cfg_source.path))
+    _loaded_cfg_sources[cfg_source.name] = _LoadedCfgSource(
+        path=cfg_source.path,
+        digest=digest,
+        features=features,
+    )
+    logger.info(f'loaded {cfg_source.name} cfg from {cfg_source.path=}')
 
-    feature_cfgs = [f for f in feature_cfgs if not isinstance(f, FeatureProfiles)]
-    feature_cfgs.append(profiles_feature)
+    return features
+
+
+def apply_raw_cfg():
+    '''
+    (re-)loads the features derived from cfg files. Only changed cfg files are parsed again and the
+    resulting features are swapped in at once, so that concurrent readers of `feature_cfgs` either
+    see the previous or the new features but never a partially updated state. Features which are
+    not derived from cfg files (e.g. authentication or delivery-db) are kept.
+    '''
+    global feature_cfgs
+
+    with _apply_raw_cfg_lock:
+        cfg_features = [
+            feature
+            for cfg_source in cfg_sources()
+            for feature in load_cfg_source(cfg_source=cfg_source)
+        ]
+        cfg_feature_types = {type(feature) for feature in cfg_features}
+
+        feature_cfgs = [
+            feature for feature in feature_cfgs
+            if type(feature) not in cfg_feature_types
+        ] + cfg_features
 
 
 class CfgFileChangeEventHandler(watchdog.events.FileSystemEventHandler):
+    '''
+    Re-applies the cfg files once no further filesystem events were dispatched for
+    `debounce_seconds`, i.e. a burst of events (e.g. caused by a config-map update touching several
+    files) only results in a single reload. If the reload fails, the previous cfg is kept.
+    '''
+    def __init__(
+        self,
+        debounce_seconds: float=2,
+    ):
+        super().__init__()
+        self.debounce_seconds = debounce_seconds
+        self._timer: threading.Timer | None = None
+        self._lock = threading.Lock()
+
     def dispatch(self, event):
-        apply_raw_cfg()
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+
+            self._timer = threading.Timer(
+                interval=self.debounce_seconds,
+                function=self._apply_raw_cfg,
+            )
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _apply_raw_cfg(self):
+        try:
+            apply_raw_cfg()
+        except Exception as e:
+            logger.error(f'failed to apply changed cfg, will keep previous cfg: {e}')
 
 
 def watch_for_file_changes(
@@ -1036,6 +1163,17 @@ async def init_features(
         middlewares.append(await middleware.db_session.db_session_middleware(
             db_url=db_url,
             verify_db_session=False,
+            pool_cfgs=(
+                dataclasses.replace(
+                    deliverydb.pool_cfgs[deliverydb.PoolLane.REQUEST],
+                    pool_size=parsed_arguments.delivery_db_pool_size,
+                    max_overflow=parsed_arguments.delivery_db_max_overflow,
+                ),
+                dataclasses.replace(
+                    deliverydb.pool_cfgs[deliverydb.PoolLane.LOW_PRIO],
+                    pool_size=parsed_arguments.delivery_db_low_prio_pool_size,
+                ),
+            ),
         ))
 
     feature_cfgs.append(FeatureDeliveryDB(delivery_db_feature_state, db_url=db_url))
@@ -0,0 +1,201 @@
+import collections.abc
+import concurrent.futures
+import datetime
+import logging
+import threading
+import time
+
+import github3
+
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    '''
+    Thread-safe token bucket which allows bursts of up to `capacity` requests and refills with
+    `rate` tokens per second afterwards. Callers of `acquire` are blocked until a token is available.
+    '''
+    def __init__(
+        self,
+        rate: float,
+        capacity: int,
+    ):
+        self.rate = rate
+        self.capacity = capacity
+
+        self._tokens = float(capacity)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(
+        self,
+        tokens: int=1,
+    ):
+        while True:
+            with self._lock:
+                self._refill()
+
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+
+                wait_seconds = (tokens - self._tokens) / self.rate
+
+            time.sleep(wait_seconds)
+
+
+class RequestScheduler:
+    '''
+    Executes GitHub requests concurrently while respecting GitHub's rate limits. The primary rate
+    limit (i.e. the remaining quota of the used credentials) is periodically refreshed and locally
+    estimated in between. If the remaining quota drops below `relative_quota_minimum`, requests are
+    deferred until the quota is reset. Secondary rate limits (which especially apply to requests
+    creating content, e.g. issues or comments) are respected by limiting the request rate to
+    `requests_per_minute` using a token bucket.
+
+    @param gh_api:
+        the GitHub api the scheduled requests are issued against (used to determine the quota)
+    @param max_workers:
+        the maximum number of requests being issued concurrently
+    @param requests_per_minute:
+        the sustained request rate, GitHub recommends at most 80 content-creating requests/minute
+    @param relative_quota_minimum:
+        the relative amount of the quota which must not be consumed
+    @param quota_refresh_interval_seconds:
+        the interval after which the remaining quota is retrieved from GitHub again
+    '''
+    def __init__(
+        self,
+        gh_api: github3.GitHub,
+        max_workers: int=4,
+        requests_per_minute: int=60,
+        relative_quota_minimum: float=0.2,
+        quota_refresh_interval_seconds: int=60,
+    ):
+        self.gh_api = gh_api
+        self.max_workers = max_workers
+        self.relative_quota_minimum = relative_quota_minimum
+        self.quota_refresh_interval_seconds = quota_refresh_interval_seconds
+
+        self._token_bucket = TokenBucket(
+            rate=requests_per_minute / 60,
+            capacity=max(1, max_workers),
+        )
+
+        self._quota_lock = threading.Lock()
+        self._quota_limit: int | None = None
+        self._quota_remaining: int | None = None
+        self._quota_reset: datetime.datetime | None = None
+        self._quota_refreshed_at: float | None = None
+
+    def _refresh_quota(self):
+        core = self.gh_api.rate_limit().get('resources', dict()).get('core', dict())
+
+        self._quota_limit = core.get('limit', -1)
+        self._quota_remaining = core.get('remaining', -1)
+        if reset_timestamp := core.get('reset'):
+            self._quota_reset = datetime.datetime.fromtimestamp(
+                reset_timestamp,
+                tz=datetime.timezone.utc,
+            )
+        else:
+            self._quota_reset = None
+        self._quota_refreshed_at = time.monotonic()
+
+        logger.info(f'github quota: remaining={self._quota_remaining} limit={self._quota_limit}')
+
+    @property
+    def quota_remaining(self) -> int | None:
+        return self._quota_remaining
+
+    def _is_quota_outdated(self) -> bool:
+        return (
+            self._quota_refreshed_at is None
+            or time.monotonic() - self._quota_refreshed_at > self.quota_refresh_interval_seconds
+        )
+
+    def _is_quota_sufficient(self) -> bool:
+        if self._quota_limit is None or self._quota_limit < 0 or self._quota_remaining < 0:
+            # quota is not known (e.g. rate limits are disabled), it is retrieved again once the
+            # refresh interval elapsed
+            return True
+
+        return self._quota_remaining >= self.relative_quota_minimum * self._quota_limit
+
+    def wait_for_quota(self):
+        '''
+        blocks until enough quota is available to issue another request, the quota is only
+        retrieved from GitHub if the local estimate is outdated or too low
+        '''
+        with self._quota_lock:
+            is_refreshed = False
+
+            while True:
+                if not is_refreshed and (
+                    self._is_quota_outdated()
+                    or not self._is_quota_sufficient()
+                ):
+                    self._refresh_quota()
+                    is_refreshed = True
+
+                if self._is_quota_sufficient():
+                    if self._quota_remaining is not None and self._quota_remaining > 0:
+                        self._quota_remaining -= 1 # local estimate until next refresh
+                    return
+
+                if not self._quota_reset:
+                    return
+
+                time_until_reset = self._quota_reset - datetime.datetime.now(
+                    tz=datetime.timezone.utc,
+                )
+                logger.warning(
+                    f'github quota too low, will defer requests for {time_until_reset} until '
+                    f'{self._quota_reset}'
+                )
+                # hold the lock while sleeping so that other workers are deferred as well
+                time.sleep(max(time_until_reset.total_seconds(), 1))
+                # quota was reset in the meantime, hence it must be retrieved again
+                is_refreshed = False
+
+    def call[T](
+        self,
+        func: collections.abc.Callable[..., T],
+        /,
+        *args,
+        **kwargs,
+    ) -> T:
+        '''
+        issues a single request synchronously once quota and request rate allow it
+        '''
+        self.wait_for_quota()
+        self._token_bucket.acquire()
+
+        return func(*args, **kwargs)
+
+    def execute[T](
+        self,
+        requests: collections.abc.Iterable[collections.abc.Callable[[], T]],
+    ) -> list[T]:
+        '''
+        issues the passed-in (independent) `requests` concurrently and returns their results in the
+        same order. If any of the requests fails, the first exception is re-raised once all requests
+        have finished.
+        '''
+        requests = list(requests)
+
+        if len(requests) <= 1 or self.max_workers <= 1:
+            return [self.call(request) for request in requests]
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(requests)),
+        ) as executor:
+            futures = [executor.submit(self.call, request) for request in requests]
+
+        return [future.result() for future in futures]
@@ -1,3 +1,4 @@
+import collections
 import collections.abc
 import dataclasses
 import datetime
@@ -13,7 +14,9 @@ import delivery.client
 import delivery.model
 import github.user
 
+import github_util
 import issue_replicator.github
+import issue_replicator.rendering
 import k8s.logging
 import odg.extensions_cfg
 import odg.findings
@@ -51,7 +54,7 @@ def _iter_findings_for_artefact(
     artefacts: collections.abc.Iterable[odg.model.ComponentArtefactId],
     finding_type: odg.model.Datatype,
     finding_source: odg.model.Datasource,
-    chunk_size: int=10,
+    chunk_size: int=100,
 ) -> collections.abc.Generator[issue_replicator.github.AggregatedFinding, None, None]:
     findings: list[odg.model.ArtefactMetadata] = []
     rescorings: list[odg.model.ArtefactMetadata] = []
@@ -59,22 +62,25 @@ def _iter_findings_for_artefact(
     for idx in range(0, len(artefacts), chunk_size):
         chunked_artefacts = artefacts[idx:min(idx + chunk_size, len(artefacts))]
 
-        findings.extend([
-            odg.model.ArtefactMetadata.from_dict(raw)
-            for raw in delivery_client.query_metadata(
-                artefacts=chunked_artefacts,
-                type=[odg.model.Datatype.ARTEFACT_SCAN_INFO, finding_type],
-            )
-        ])
-
-        rescorings.extend([
-            odg.model.ArtefactMetadata.from_dict(raw)
-            for raw in delivery_client.query_metadata(
-                artefacts=chunked_artefacts,
-                type=odg.model.Datatype.RESCORING,
-                referenced_type=finding_type,
-            )
-        ])
+        # scan infos, findings and their rescorings are retrieved using a single query per chunk (the
+        # referenced type only filters the rescorings)
+        for raw in delivery_client.query_metadata(
+            artefacts=chunked_artefacts,
+            type=[
+                odg.model.Datatype.ARTEFACT_SCAN_INFO,
+                finding_type,
+                odg.model.Datatype.RESCORING,
+            ],
+            referenced_type=finding_type,
+        ):
+            artefact_metadata = odg.model.ArtefactMetadata.from_dict(raw)
+
+            if artefact_metadata.meta.type == odg.model.Datatype.RESCORING:
+                rescorings.append(artefact_metadata)
+            else:
+                findings.append(artefact_metadata)
+
+    rescoring_index = rescore.utility.RescoringIndex(rescorings=rescorings)
 
     for finding in findings:
         if finding.meta.type == odg.model.Datatype.ARTEFACT_SCAN_INFO:
@@ -82,10 +88,7 @@ def _iter_findings_for_artefact(
                 yield issue_replicator.github.AggregatedFinding(finding)
             continue
 
-        filtered_rescorings = rescore.utility.rescorings_for_finding_by_specificity(
-            finding=finding,
-            rescorings=rescorings,
-        )
+        filtered_rescorings = rescoring_index.rescorings_for_finding(finding=finding)
 
         yield issue_replicator.github.AggregatedFinding(
             finding=finding,
@@ -308,7 +311,12 @@ def replicate_issue_for_finding_type(
     mapping: odg.extensions_cfg.IssueReplicatorMapping,
     delivery_dashboard_url: str,
     due_dates: collections.abc.Iterable[datetime.date],
-):
+    issue_index: issue_replicator.github.IssueIndex,
+) -> list[issue_replicator.github.IssueMutation]:
+    '''
+    Plans the issue mutations required for the given `artefact` and `finding_cfg`. The returned
+    mutations are independent of each other and have to be applied by the caller.
+    '''
     finding_type = finding_cfg.type
     finding_source = finding_type.datasource()
 
@@ -415,17 +423,20 @@ def replicate_issue_for_finding_type(
         assignee_mode = finding_cfg.issues.default_assignee_mode
         statuses = None
 
+    mutations = []
+
     for findings, due_date in findings_by_due_date:
         issue_id = finding_cfg.issues.issue_id(
             artefact=artefact,
             due_date=due_date,
         )
 
-        issue_replicator.github.create_or_update_or_close_issue(
+        mutations.extend(issue_replicator.github.plan_issue_mutations(
             mapping=mapping,
             finding_cfg=finding_cfg,
             component_descriptor_lookup=component_descriptor_lookup,
             delivery_client=delivery_client,
+            issue_index=issue_index,
             artefacts=artefacts,
             findings=findings,
             issue_id=issue_id,
@@ -436,8 +447,29 @@ def replicate_issue_for_finding_type(
             assignees=github_assignees,
             assignees_statuses=statuses,
             assignee_mode=assignee_mode,
+        ))
+
+    return mutations
+
+
+_request_schedulers: dict[str, github_util.RequestScheduler] = {}
+
+
+def request_scheduler(
+    mapping: odg.extensions_cfg.IssueReplicatorMapping,
+) -> github_util.RequestScheduler:
+    gh_api = odg.extensions_cfg.github_api(mapping.github_repository)
+
+    if not (scheduler := _request_schedulers.get(mapping.github_repository)):
+        scheduler = _request_schedulers[mapping.github_repository] = github_util.RequestScheduler(
+            gh_api=gh_api,
         )
 
+    # github api is re-created once its token expired
+    scheduler.gh_api = gh_api
+
+    return scheduler
+
 
 def replicate_issue(
     artefact: odg.model.ComponentArtefactId,
@@ -449,21 +481,25 @@ def replicate_issue(
 ):
     logger.info(f'starting issue replication of {artefact}')
 
-    due_dates = sprint_dates(delivery_client=delivery_client)
-
     if not (due_dates := sprint_dates(delivery_client=delivery_client)):
         logger.warning('did not find any sprints, exiting...')
         return
 
-    # cache clear is necessary to prevent creating duplicated issues
-    issue_replicator.github._all_issues.cache_clear()
+    # rendered fragments are only shared while processing a single backlog item so that changes of
+    # e.g. component descriptors or sprints are eventually reflected
+    issue_replicator.rendering.fragment_cache.clear()
 
     mapping = extension_cfg.mapping(artefact.component_name)
-    gh_api = odg.extensions_cfg.github_api(mapping.github_repository)
-    issue_replicator.github.wait_for_quota_if_required(gh_api=gh_api)
+    scheduler = request_scheduler(mapping)
+    scheduler.wait_for_quota()
+
+    # the index is refreshed incrementally to include issues created or updated in the meantime,
+    # which is required to prevent creating duplicated issues
+    issue_index = issue_replicator.github.issue_index(mapping)
 
+    mutations = []
     for finding_cfg in finding_cfgs:
-        replicate_issue_for_finding_type(
+        mutations.extend(replicate_issue_for_finding_type(
             artefact=artefact,
             finding_cfg=finding_cfg,
             component_descriptor_lookup=component_descriptor_lookup,
@@ -471,7 +507,26 @@ def replicate_issue(
             mapping=mapping,
             delivery_dashboard_url=extension_cfg.delivery_dashboard_url,
             due_dates=due_dates,
-        )
+            issue_index=issue_index,
+        ))
+
+    # mutations of the same issue must not be applied concurrently
+    mutations = issue_replicator.github.merge_issue_mutations(mutations)
+
+    mutation_counts = collections.Counter(mutation.type.value for mutation in mutations)
+    logger.info(f'applying {len(mutations)} issue mutations {dict(mutation_counts)}')
+
+    results = scheduler.execute(
+        functools.partial(
+            issue_replicator.github.apply_issue_mutation,
+            mutation=mutation,
+            mapping=mapping,
+        ) for mutation in mutations
+    )
+
+    for mutation, result in zip(mutations, results):
+        if mutation.type is issue_replicator.github.IssueMutationType.CREATE and result:
+            issue_index.upsert(result)
 
     logger.info(f'finished issue replication of {artefact}')
 
@@ -3,13 +3,11 @@ import collections.abc
 import dataclasses
 import enum
 import datetime
-import functools
 import hashlib
 import json
 import logging
 import re
 import textwrap
-import time
 import urllib.parse
 
 import github3
@@ -27,6 +25,7 @@ import github.retry
 import github.util
 import ocm.util
 
+import issue_replicator.rendering
 import k8s.util
 import odg.extensions_cfg
 import odg.findings
@@ -74,7 +73,32 @@ class FindingGroup:
         delivery_dashboard_url: str | None=None,
         sprint_name: str | None=None,
     ) -> str:
-        ocm_node = k8s.util.get_ocm_node(
+        # the summary only depends on the artefact (and not on the actual findings), hence it can be
+        # shared across issues of different due dates and, in case of per-finding issues, findings
+        return issue_replicator.rendering.fragment_cache.get(
+            key=(
+                'finding-group-summary',
+                finding_cfg.type,
+                self.artefact,
+                delivery_dashboard_url,
+                sprint_name,
+            ),
+            render=lambda: self._render_summary(
+                component_descriptor_lookup=component_descriptor_lookup,
+                finding_cfg=finding_cfg,
+                delivery_dashboard_url=delivery_dashboard_url,
+                sprint_name=sprint_name,
+            ),
+        )
+
+    def _render_summary(
+        self,
+        component_descriptor_lookup: cnudie.retrieve.ComponentDescriptorLookupById,
+        finding_cfg: odg.findings.Finding,
+        delivery_dashboard_url: str | None=None,
+        sprint_name: str | None=None,
+    ) -> str:
+        ocm_node = _ocm_node(
             component_descriptor_lookup=component_descriptor_lookup,
             artefact=self.artefact,
             absent_ok=True,
@@ -103,46 +127,140 @@ class FindingGroup:
         return summary
 
 
-def is_remaining_quota_too_low(
-    gh_api: github3.GitHub,
-    relative_gh_quota_minimum: float=0.2,
-) -> bool:
-    rate_limit = gh_api.rate_limit().get('resources', dict()).get('core', dict()).get('limit', -1)
-    rate_limit_remaining = gh_api.ratelimit_remaining
-    logger.info(f'{rate_limit_remaining=} {rate_limit=}')
-    if rate_limit_remaining < relative_gh_quota_minimum * rate_limit:
-        return True
-    return False
+class IssueIndex:
+    '''
+    Index of the issues of a single GitHub repository keyed by their labels. In contrast to listing
+    all issues for each processed backlog item, the index is kept for the lifetime of the process
+    and refreshed incrementally, i.e. only issues which were updated since the last refresh are
+    retrieved (using the `since` parameter). Issues are stored in their raw (JSON) representation
+    and are instantiated using the session of the currently used repository object upon retrieval,
+    so that expiring GitHub tokens do not affect issues which have been indexed earlier.
+
+    @param number_included_closed_issues:
+        number of (most recently created) closed issues to consider during the initial refresh
+    @param full_refresh_interval:
+        interval after which the index is re-built from scratch (e.g. to drop deleted issues)
+    '''
+    # tolerate clock skew between GitHub and local clock
+    since_skew = datetime.timedelta(minutes=5)
 
+    def __init__(
+        self,
+        number_included_closed_issues: int,
+        full_refresh_interval: datetime.timedelta=datetime.timedelta(hours=24),
+    ):
+        self.number_included_closed_issues = number_included_closed_issues
+        self.full_refresh_interval = full_refresh_interval
 
-def wait_for_quota_if_required(
-    gh_api: github3.GitHub,
-    relative_gh_quota_minimum: float=0.2,
-):
-    if not is_remaining_quota_too_low(
-        gh_api=gh_api,
-        relative_gh_quota_minimum=relative_gh_quota_minimum,
+        self._issues_by_number: dict[int, dict] = {}
+        self._numbers_by_label: dict[str, set[int]] = collections.defaultdict(set)
+        self._last_refresh: datetime.datetime | None = None
+        self._last_full_refresh: datetime.datetime | None = None
+
+    def _remove(self, number: int):
+        if not (issue_raw := self._issues_by_number.pop(number, None)):
+            return
+
+        for label in issue_raw.get('labels', []):
+            self._numbers_by_label[label['name']].discard(number)
+
+    def upsert(
+        self,
+        issue: github3.issues.issue.ShortIssue | dict,
     ):
-        return
+        issue_raw = issue if isinstance(issue, dict) else issue.as_dict()
 
-    reset_timestamp = gh_api.rate_limit().get('resources', dict()).get('core', dict()).get('reset')
-    if not reset_timestamp:
-        return
+        if issue_raw.get('pull_request'):
+            return # pull requests are listed as issues as well
 
-    reset_datetime = datetime.datetime.fromtimestamp(reset_timestamp, tz=datetime.timezone.utc)
-    time_until_reset = reset_datetime - datetime.datetime.now(tz=datetime.timezone.utc)
-    logger.warning(f'github quota too low, will sleep {time_until_reset} until {reset_datetime}')
-    time.sleep(time_until_reset.total_seconds())
+        number = issue_raw['number']
+        self._remove(number)
 
+        self._issues_by_number[number] = issue_raw
+        for label in issue_raw.get('labels', []):
+            self._numbers_by_label[label['name']].add(number)
 
-@functools.cache
-@github.retry.retry_and_throttle
-def _all_issues(
-    repository,
-    state: str='all',
-    number: int=-1, # -1 means all issues
-):
-    return set(repository.issues(state=state, number=number))
+    @github.retry.retry_and_throttle
+    def refresh(
+        self,
+        repository: github3.repos.Repository,
+    ):
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+
+        if (
+            not self._last_refresh
+            or now - self._last_full_refresh > self.full_refresh_interval
+        ):
+            logger.info(f'building issue index for {repository.full_name}')
+            self._issues_by_number.clear()
+            self._numbers_by_label.clear()
+
+            for issue in repository.issues(state='open', number=-1):
+                self.upsert(issue)
+            for issue in repository.issues(
+                state='closed',
+                number=self.number_included_closed_issues,
+            ):
+                self.upsert(issue)
+
+            self._last_full_refresh = now
+
+        else:
+            updated_issues_count = 0
+            for issue in repository.issues(
+                state='all',
+                sort='updated',
+                direction='asc',
+                since=self._last_refresh - self.since_skew,
+            ):
+                self.upsert(issue)
+                updated_issues_count += 1
+
+            logger.info(f'refreshed issue index for {repository.full_name} {updated_issues_count=}')
+
+        self._last_refresh = now
+
+    def issues_for_labels(
+        self,
+        labels: collections.abc.Iterable[str],
+        repository: github3.repos.Repository,
+    ) -> tuple[github3.issues.issue.ShortIssue]:
+        '''
+        returns all indexed issues which have _all_ of the specified `labels`, bound to the session
+        of the passed-in `repository`
+        '''
+        numbers = None
+        for label in labels:
+            label_numbers = self._numbers_by_label.get(label, set())
+            numbers = label_numbers if numbers is None else numbers & label_numbers
+
+            if not numbers:
+                return tuple()
+
+        return tuple(
+            github3.issues.issue.ShortIssue(self._issues_by_number[number], repository.session)
+            for number in sorted(numbers or ())
+        )
+
+
+_issue_indexes: dict[str, IssueIndex] = {}
+
+
+def issue_index(
+    mapping: odg.extensions_cfg.IssueReplicatorMapping,
+    refresh: bool=True,
+) -> IssueIndex:
+    repository = odg.extensions_cfg.github_repository(mapping.github_repository)
+
+    if not (index := _issue_indexes.get(mapping.github_repository)):
+        index = _issue_indexes[mapping.github_repository] = IssueIndex(
+            number_included_closed_issues=mapping.number_included_closed_issues,
+        )
+
+    if refresh:
+        index.refresh(repository=repository)
+
+    return index
 
 
 def filter_issues_for_labels(
@@ -181,6 +299,21 @@ def _issue_milestone(
     )
 
 
+def _ocm_node(
+    component_descriptor_lookup: cnudie.retrieve.ComponentDescriptorLookupById,
+    artefact: odg.model.ComponentArtefactId,
+    absent_ok: bool=False,
+) -> cnudie.iter.ResourceNode | cnudie.iter.SourceNode | None:
+    return issue_replicator.rendering.fragment_cache.get(
+        key=('ocm-node', artefact, absent_ok),
+        render=lambda: k8s.util.get_ocm_node(
+            component_descriptor_lookup=component_descriptor_lookup,
+            artefact=artefact,
+            absent_ok=absent_ok,
+        ),
+    )
+
+
 def _artefact_to_str(
     artefact: odg.model.ComponentArtefactId,
 ) -> str:
@@ -346,12 +479,15 @@ def _vulnerability_template_vars(
         report_urls_str = '\n'.join(sorted(report_urls))
         summary += f'{report_urls_str}\n'
 
-        ocm_node = k8s.util.get_ocm_node(
+        ocm_node = _ocm_node(
             component_descriptor_lookup=component_descriptor_lookup,
             artefact=finding_group.artefact,
         )
 
-        cve_categorisation = rescore.utility.find_cve_categorisation(ocm_node)
+        cve_categorisation = issue_replicator.rendering.fragment_cache.get(
+            key=('cve-categorisation', finding_group.artefact),
+            render=lambda: rescore.utility.find_cve_categorisation(ocm_node),
+        )
 
         summary += (
             '\n| Affected Package | CVE | CVE Score | Severity | Rescoring Suggestion | Package Version(s) |' # noqa: E501
@@ -1030,26 +1166,10 @@ def _markdown_collapsible_section(
     )
 
 
-def _template_vars(
-    finding_cfg: odg.findings.Finding,
-    artefacts: collections.abc.Iterable[odg.model.ComponentArtefactId],
-    artefacts_without_scan: collections.abc.Iterable[odg.model.ComponentArtefactId],
-    findings: collections.abc.Sequence[AggregatedFinding],
-    due_date: datetime.date,
-    delivery_dashboard_url: str,
-    component_descriptor_lookup: cnudie.retrieve.ComponentDescriptorLookupById,
-    sprint_name: str | None=None,
-) -> dict:
-    '''
-    Fills a dictionary with template variables intended to be used to fill a template for a GitHub
-    issue. The most prominent template variable is called `summary`. It contains a table showing
-    information on the artefact the issue is opened for as well as more detailed information on the
-    actual findings per artefact. The summary table first depicts the properties which are used to
-    group the artefacts (so the properties which all artefacts have in common) and then the remaining
-    properties per artefact. Also, artefacts which were not scanned yet are reported (if there are
-    any).
-    '''
-    artefact_sorting_key = lambda artefact: (
+def _artefact_sorting_key(
+    artefact: odg.model.ComponentArtefactId,
+) -> tuple:
+    return (
         artefact.component_name,
         artefact.component_version,
         artefact.artefact_kind,
@@ -1059,18 +1179,33 @@ def _template_vars(
         artefact.artefact.normalised_artefact_extra_id,
     )
 
-    sorted_artefacts = sorted(artefacts, key=artefact_sorting_key)
-    sorted_artefacts_without_scan = sorted(artefacts_without_scan, key=artefact_sorting_key)
-
-    artefact = sorted_artefacts[0]
 
-    rescoring_url = _delivery_dashboard_url(
-        base_url=delivery_dashboard_url,
-        component_artefact_id=artefact,
-        finding_type=finding_cfg.type,
-        sprint_name=sprint_name,
+def _artefact_matching_key(
+    artefact: odg.model.ComponentArtefactId,
+) -> tuple:
+    '''
+    key to match findings against artefacts, the component version is not part of the key as it
+    might be missing for findings (i.e. for BDBA findings)
+    '''
+    return (
+        artefact.component_name,
+        artefact.artefact_kind,
+        artefact.artefact.artefact_name,
+        artefact.artefact.artefact_version,
+        artefact.artefact.artefact_type,
+        artefact.artefact.normalised_artefact_extra_id,
     )
 
+
+def _summary_header(
+    finding_cfg: odg.findings.Finding,
+    artefact: odg.model.ComponentArtefactId,
+    due_date: datetime.date,
+) -> tuple[str, dict]:
+    '''
+    returns the beginning of the summary table (containing the artefact properties which are used
+    for grouping) as well as the template variables derived from these properties
+    '''
     summary = textwrap.dedent('''\
         # Compliance Status Summary
 
@@ -1078,7 +1213,6 @@ def _template_vars(
         | -- | -- |
     ''')
 
-    # first of all, display the artefact properties which are used for grouping in the summary table
     artefact_group_properties = finding_cfg.issues.strip_artefact(
         artefact=artefact,
         keep_group_attributes=True,
@@ -1102,26 +1236,88 @@ def _template_vars(
 
     summary += f'| Due Date | {due_date} |\n'
 
+    template_variables = {
+        'component_name': component_name,
+        'component_version': component_version,
+        'artefact_kind': artefact_kind,
+        'artefact_name': artefact_name,
+        'artefact_version': artefact_version,
+        'artefact_type': artefact_type,
+        'resource_type': artefact_type, # TODO deprecated -> remove once all templates are adjusted
+    }
+
+    return summary, template_variables
+
+
+def _artefacts_without_scan_row(
+    artefacts_without_scan: collections.abc.Iterable[odg.model.ComponentArtefactId],
+) -> str:
+    sorted_artefacts_without_scan = sorted(artefacts_without_scan, key=_artefact_sorting_key)
+
+    artefacts_without_scan_str = ''.join(
+        _artefact_to_str(artefact=artefact_without_scan)
+        for artefact_without_scan in sorted_artefacts_without_scan
+    )
+
+    return f'| {util.pluralise('Artefact', len(sorted_artefacts_without_scan))} without Scan | {artefacts_without_scan_str} |\n\n' # noqa: E501
+
+
+def _template_vars(
+    finding_cfg: odg.findings.Finding,
+    artefacts: collections.abc.Iterable[odg.model.ComponentArtefactId],
+    artefacts_without_scan: collections.abc.Iterable[odg.model.ComponentArtefactId],
+    findings: collections.abc.Sequence[AggregatedFinding],
+    due_date: datetime.date,
+    delivery_dashboard_url: str,
+    component_descriptor_lookup: cnudie.retrieve.ComponentDescriptorLookupById,
+    sprint_name: str | None=None,
+) -> dict:
+    '''
+    Fills a dictionary with template variables intended to be used to fill a template for a GitHub
+    issue. The most prominent template variable is called `summary`. It contains a table showing
+    information on the artefact the issue is opened for as well as more detailed information on the
+    actual findings per artefact. The summary table first depicts the properties which are used to
+    group the artefacts (so the properties which all artefacts have in common) and then the remaining
+    properties per artefact. Also, artefacts which were not scanned yet are reported (if there are
+    any).
+    '''
+    sorted_artefacts = sorted(artefacts, key=_artefact_sorting_key)
+
+    artefact = sorted_artefacts[0]
+
+    # first of all, display the artefact properties which are used for grouping in the summary table
+    # (this table is equal for all issues of an artefact group and due date)
+    summary, template_variables = issue_replicator.rendering.fragment_cache.get(
+        key=('summary-header', finding_cfg.type, artefact, due_date),
+        render=lambda: _summary_header(
+            finding_cfg=finding_cfg,
+            artefact=artefact,
+            due_date=due_date,
+        ),
+    )
+    # don't modify memoised template variables in-place
+    template_variables = dict(template_variables)
+
+    template_variables['rescoring_url'] = _delivery_dashboard_url(
+        base_url=delivery_dashboard_url,
+        component_artefact_id=artefact,
+        finding_type=finding_cfg.type,
+        sprint_name=sprint_name,
+    )
+
     # assign the findings to the artefact of the group they belong to
+    findings_by_artefact = collections.defaultdict(list)
+    for finding in findings:
+        findings_by_artefact[_artefact_matching_key(finding.finding.artefact)].append(finding)
+
     finding_groups: list[FindingGroup] = []
     for artefact in sorted_artefacts:
         findings_for_artefact = tuple(
-            finding for finding in findings
+            finding for finding in findings_by_artefact.get(_artefact_matching_key(artefact), ())
             if (
-                finding.finding.artefact.component_name == artefact.component_name
-                and (
-                    # finding's component version might be `None`, i.e. for BDBA findings
-                    not finding.finding.artefact.component_version
-                    or finding.finding.artefact.component_version == artefact.component_version
-                ) and finding.finding.artefact.artefact_kind is artefact.artefact_kind
-                and finding.finding.artefact.artefact.artefact_name
-                    == artefact.artefact.artefact_name
-                and finding.finding.artefact.artefact.artefact_version
-                    == artefact.artefact.artefact_version
-                and finding.finding.artefact.artefact.artefact_type
-                    == artefact.artefact.artefact_type
-                and finding.finding.artefact.artefact.normalised_artefact_extra_id
-                    == artefact.artefact.normalised_artefact_extra_id
+                # finding's component version might be `None`, i.e. for BDBA findings
+                not finding.finding.artefact.component_version
+                or finding.finding.artefact.component_version == artefact.component_version
             )
         )
 
@@ -1150,24 +1346,12 @@ def _template_vars(
         summary += f'| {util.pluralise('ID', len(artefacts_non_group_properties))} | {artefacts_non_group_properties_str} |\n\n' # noqa: E501
 
     # lastly, display the artefacts which were not scanned yet
-    artefacts_without_scan_str = ''.join(
-        _artefact_to_str(artefact=artefact_without_scan)
-        for artefact_without_scan in sorted_artefacts_without_scan
-    )
-
-    if sorted_artefacts_without_scan:
-        summary += f'| {util.pluralise('Artefact', len(sorted_artefacts_without_scan))} without Scan | {artefacts_without_scan_str} |\n\n' # noqa: E501
-
-    template_variables = {
-        'component_name': component_name,
-        'component_version': component_version,
-        'artefact_kind': artefact_kind,
-        'artefact_name': artefact_name,
-        'artefact_version': artefact_version,
-        'artefact_type': artefact_type,
-        'resource_type': artefact_type, # TODO deprecated -> remove once all templates are adjusted
-        'rescoring_url': rescoring_url,
-    }
+    if artefacts_without_scan:
+        artefacts_without_scan = frozenset(artefacts_without_scan)
+        summary += issue_replicator.rendering.fragment_cache.get(
+            key=('artefacts-without-scan', artefacts_without_scan),
+            render=lambda: _artefacts_without_scan_row(artefacts_without_scan),
+        )
 
     if not findings:
         summary += (
@@ -1286,16 +1470,14 @@ def close_issue_if_present(
         logger.warning(f'failed to close {issue.id=} with {mapping.github_repository=}')
 
 
-@github.retry.retry_and_throttle
-def update_issue(
+def _issue_update_kwargs(
     issue: github3.issues.issue.ShortIssue,
-    body: str,
     title: str,
     labels: set[str],
     assignees: set[str],
     assignee_mode: odg.model.ResponsibleAssigneeModes,
     milestone: github3.issues.milestone.Milestone,
-):
+) -> dict:
     kwargs = {
         'state': 'open',
         'labels': sorted(labels),
@@ -1305,20 +1487,87 @@ def update_issue(
         kwargs['title'] = title
 
     if assignee_mode is odg.model.ResponsibleAssigneeModes.EXTEND:
-        assignees |= set(issue.assignees)
+        # don't modify passed-in assignees in-place as they might be shared across issues
+        assignees = assignees | {assignee.login for assignee in issue.assignees}
         # conversion to tuple required for issue update (JSON serialisation)
-        kwargs['assignees'] = tuple(assignees)
+        kwargs['assignees'] = tuple(sorted(assignees))
     elif assignee_mode is odg.model.ResponsibleAssigneeModes.OVERWRITE:
-        kwargs['assignees'] = tuple(assignees)
+        kwargs['assignees'] = tuple(sorted(assignees))
     elif assignee_mode is odg.model.ResponsibleAssigneeModes.SKIP:
         if not issue.assignees:
-            kwargs['assignees'] = tuple(assignees)
+            kwargs['assignees'] = tuple(sorted(assignees))
     else:
         raise ValueError(f'unknown {assignee_mode=}')
 
     if milestone and (not issue.milestone or issue.state == 'closed'):
         kwargs['milestone'] = milestone.number
 
+    return kwargs
+
+
+def is_update_required(
+    issue: github3.issues.issue.ShortIssue,
+    body: str,
+    title: str,
+    labels: set[str],
+    assignees: set[str],
+    assignee_mode: odg.model.ResponsibleAssigneeModes,
+    milestone: github3.issues.milestone.Milestone,
+) -> bool:
+    '''
+    Checks whether updating the `issue` with the passed-in properties would actually change it. This
+    is the case if the rendered body differs from the existing one, or if any of the other properties
+    (state, title, labels, assignees or milestone) would be changed.
+    '''
+    if issue.state != 'open':
+        return True
+
+    if (body or '') != (issue.body or ''):
+        return True
+
+    kwargs = _issue_update_kwargs(
+        issue=issue,
+        title=title,
+        labels=labels,
+        assignees=assignees,
+        assignee_mode=assignee_mode,
+        milestone=milestone,
+    )
+
+    if (title := kwargs.get('title')) and title != issue.title:
+        return True
+
+    if set(kwargs['labels']) != {label.name for label in issue.original_labels}:
+        return True
+
+    if (
+        'assignees' in kwargs
+        and set(kwargs['assignees']) != {assignee.login for assignee in issue.assignees}
+    ):
+        return True
+
+    return 'milestone' in kwargs
+
+
+@github.retry.retry_and_throttle
+def update_issue(
+    issue: github3.issues.issue.ShortIssue,
+    body: str,
+    title: str,
+    labels: set[str],
+    assignees: set[str],
+    assignee_mode: odg.model.ResponsibleAssigneeModes,
+    milestone: github3.issues.milestone.Milestone,
+):
+    kwargs = _issue_update_kwargs(
+        issue=issue,
+        title=title,
+        labels=labels,
+        assignees=assignees,
+        assignee_mode=assignee_mode,
+        milestone=milestone,
+    )
+
     issue.edit(
         body=body,
         **kwargs,
@@ -1376,7 +1625,137 @@ def create_issue(
         raise ghe
 
 
-def _create_or_update_issue(
+class IssueMutationType(enum.StrEnum):
+    CREATE = 'create'
+    UPDATE = 'update'
+    CLOSE = 'close'
+
+
+@dataclasses.dataclass
+class IssueMutation:
+    '''
+    Change of a single GitHub issue, determined by diffing the desired state (derived from the
+    findings) against the indexed issues. Planned mutations are independent of each other and can
+    thus be applied concurrently, see `apply_issue_mutation`.
+    '''
+    type: IssueMutationType
+    issue: github3.issues.issue.ShortIssue | None = None
+    title: str | None = None
+    body: str | None = None
+    labels: set[str] = dataclasses.field(default_factory=set)
+    milestone: github3.issues.milestone.Milestone | None = None
+    failed_milestones: list[github3.issues.milestone.Milestone] = dataclasses.field(
+        default_factory=list,
+    )
+    assignees: set[str] = dataclasses.field(default_factory=set)
+    assignees_statuses: set[delivery.model.Status] | None = None
+    assignee_mode: odg.model.ResponsibleAssigneeModes | None = None
+    closing_reason: IssueComments | None = None
+
+
+def _issue_mutation_key(mutation: IssueMutation) -> tuple:
+    if mutation.issue:
+        return ('issue', mutation.issue.number)
+
+    # issues which are yet to be created are identified by their labels (which contain the issue id)
+    return ('labels', frozenset(mutation.labels))
+
+
+def _merge_issue_mutation(
+    previous: IssueMutation,
+    mutation: IssueMutation,
+) -> IssueMutation:
+    if mutation.type is IssueMutationType.CLOSE:
+        # updates take precedence over closing the issue, as the issue still has findings
+        return previous if previous.type is not IssueMutationType.CLOSE else mutation
+
+    if previous.type is IssueMutationType.CLOSE:
+        return mutation
+
+    if previous.assignees_statuses is None:
+        assignees_statuses = mutation.assignees_statuses
+    elif mutation.assignees_statuses is None:
+        assignees_statuses = previous.assignees_statuses
+    else:
+        assignees_statuses = previous.assignees_statuses | mutation.assignees_statuses
+
+    return dataclasses.replace(
+        mutation,
+        title=mutation.title if mutation.title is not None else previous.title,
+        body=mutation.body if mutation.body is not None else previous.body,
+        labels=previous.labels | mutation.labels,
+        milestone=mutation.milestone or previous.milestone,
+        failed_milestones=mutation.failed_milestones or previous.failed_milestones,
+        assignees=previous.assignees | mutation.assignees,
+        assignees_statuses=assignees_statuses,
+    )
+
+
+def merge_issue_mutations(
+    mutations: collections.abc.Iterable[IssueMutation],
+) -> list[IssueMutation]:
+    '''
+    Merges mutations of the same issue into a single one, so that each issue is only changed once
+    and concurrently applied mutations cannot overwrite each other. Labels and assignees of the
+    mutations are combined, for all other properties later mutations take precedence (unless they
+    leave them unspecified). Closing an issue is dropped if it is also updated.
+    '''
+    merged_mutations: dict[tuple, IssueMutation] = {}
+
+    for mutation in mutations:
+        key = _issue_mutation_key(mutation)
+
+        if previous := merged_mutations.get(key):
+            mutation = _merge_issue_mutation(previous=previous, mutation=mutation)
+
+        merged_mutations[key] = mutation
+
+    return list(merged_mutations.values())
+
+
+def apply_issue_mutation(
+    mutation: IssueMutation,
+    mapping: odg.extensions_cfg.IssueReplicatorMapping,
+) -> github3.issues.issue.ShortIssue | None:
+    '''
+    applies the planned `mutation` and returns the created issue (if any)
+    '''
+    if mutation.type is IssueMutationType.CLOSE:
+        return close_issue_if_present(
+            mapping=mapping,
+            issue=mutation.issue,
+            closing_reason=mutation.closing_reason,
+        )
+
+    if mutation.type is IssueMutationType.UPDATE:
+        return update_issue(
+            issue=mutation.issue,
+            body=mutation.body,
+            title=mutation.title,
+            labels=mutation.labels,
+            assignees=mutation.assignees,
+            assignee_mode=mutation.assignee_mode,
+            milestone=mutation.milestone,
+        )
+
+    if mutation.type is IssueMutationType.CREATE:
+        repository = odg.extensions_cfg.github_repository(mapping.github_repository)
+
+        return create_issue(
+            repository=repository,
+            body=mutation.body,
+            title=mutation.title,
+            milestone=mutation.milestone,
+            failed_milestones=mutation.failed_milestones,
+            assignees=mutation.assignees,
+            assignees_statuses=mutation.assignees_statuses,
+            labels=mutation.labels,
+        )
+
+    raise ValueError(f'unknown {mutation.type=}')
+
+
+def _plan_create_or_update_issue(
     mapping: odg.extensions_cfg.IssueReplicatorMapping,
     finding_cfg: odg.findings.Finding,
     component_descriptor_lookup: cnudie.retrieve.ComponentDescriptorLookupById,
@@ -1394,7 +1773,7 @@ def _create_or_update_issue(
     assignees_statuses: set[delivery.model.Status] | None,
     assignee_mode: odg.model.ResponsibleAssigneeModes,
     labels: set[str],
-) -> github3.issues.issue.ShortIssue | None:
+) -> IssueMutation | None:
     def labels_to_preserve(
         issue: github3.issues.issue.ShortIssue,
     ) -> collections.abc.Generator[str, None, None]:
@@ -1410,13 +1789,17 @@ def _create_or_update_issue(
         open_issues = tuple(issue for issue in issues if issue.state == 'open')
         if len(open_issues) > 1:
             logger.warning(f'more than one open issue found for {labels=}')
-            return
+            return None
         issue = sorted(issues, key=lambda issue: issue.id, reverse=True)[0]
     elif issues_count == 1:
         issue = issues[0]
     else:
         issue = None
 
+    if not is_scanned and not issue:
+        # not scanned yet but no issue found either -> nothing to do
+        return None
+
     if issue:
         labels = labels | set(labels_to_preserve(issue=issue))
 
@@ -1441,7 +1824,9 @@ def _create_or_update_issue(
         sprint_name='Overdue' if is_overdue else sprint_name,
     )
 
-    body = finding_cfg.issues.template.format(**template_variables)
+    body = issue_replicator.rendering.compile_template(
+        finding_cfg.issues.template,
+    ).render(**template_variables)
 
     if is_overdue:
         labels.add(IssueLabels.OVERDUE)
@@ -1449,32 +1834,33 @@ def _create_or_update_issue(
     if not is_scanned:
         labels.add(IssueLabels.SCAN_PENDING)
 
-    if not is_scanned or issue:
-        return update_issue(
-            issue=issue,
-            body=body,
-            title=title,
-            labels=labels,
-            assignees=assignees,
-            assignee_mode=assignee_mode,
-            milestone=milestone,
-        )
-
-    repository = odg.extensions_cfg.github_repository(mapping.github_repository)
-
-    return create_issue(
-        repository=repository,
+    if issue and not is_update_required(
+        issue=issue,
         body=body,
         title=title,
+        labels=labels,
+        assignees=assignees,
+        assignee_mode=assignee_mode,
+        milestone=milestone,
+    ):
+        logger.debug(f'{issue.html_url} is already up-to-date, skipping update')
+        return None
+
+    return IssueMutation(
+        type=IssueMutationType.UPDATE if issue else IssueMutationType.CREATE,
+        issue=issue,
+        title=title,
+        body=body,
+        labels=labels,
         milestone=milestone,
         failed_milestones=failed_milestones,
         assignees=assignees,
         assignees_statuses=assignees_statuses,
-        labels=labels,
+        assignee_mode=assignee_mode,
     )
 
 
-def _create_or_update_or_close_issue_per_finding(
+def _plan_issue_mutations_per_finding(
     mapping: odg.extensions_cfg.IssueReplicatorMapping,
     finding_cfg: odg.findings.Finding,
     component_descriptor_lookup: cnudie.retrieve.ComponentDescriptorLookupById,
@@ -1493,9 +1879,9 @@ def _create_or_update_or_close_issue_per_finding(
     assignees_statuses: set[delivery.model.Status] | None,
     assignee_mode: odg.model.ResponsibleAssigneeModes,
     labels: set[str],
-):
+) -> list[IssueMutation]:
     processed_issues = set()
-    created_issues = set()
+    mutations = []
 
     for finding in findings:
         data = finding.finding.data
@@ -1510,12 +1896,12 @@ def _create_or_update_or_close_issue_per_finding(
         labels_for_filtering = (issue_id, finding_cfg.type, data_digest)
 
         finding_issues = filter_issues_for_labels(
-            issues=set(issues) | created_issues,
+            issues=issues,
             labels=labels_for_filtering,
         )
         processed_issues.update(finding_issues)
 
-        if created_issue := _create_or_update_issue(
+        if mutation := _plan_create_or_update_issue(
             mapping=mapping,
             finding_cfg=finding_cfg,
             component_descriptor_lookup=component_descriptor_lookup,
@@ -1534,22 +1920,28 @@ def _create_or_update_or_close_issue_per_finding(
             assignee_mode=assignee_mode,
             labels=finding_labels,
         ):
-            created_issues.add(created_issue)
+            mutations.append(mutation)
+
+    # findings with the same key share the same issue, hence their mutations must be merged
+    mutations = merge_issue_mutations(mutations)
 
     for issue in set(issues):
         if issue not in processed_issues and issue.state == 'open':
-            close_issue_if_present(
-                mapping=mapping,
+            mutations.append(IssueMutation(
+                type=IssueMutationType.CLOSE,
                 issue=issue,
                 closing_reason=IssueComments.NO_FINDINGS,
-            )
+            ))
+
+    return mutations
 
 
-def create_or_update_or_close_issue(
+def plan_issue_mutations(
     mapping: odg.extensions_cfg.IssueReplicatorMapping,
     finding_cfg: odg.findings.Finding,
     component_descriptor_lookup: cnudie.retrieve.ComponentDescriptorLookupById,
     delivery_client: delivery.client.DeliveryServiceClient,
+    issue_index: IssueIndex,
     artefacts: collections.abc.Iterable[odg.model.ComponentArtefactId],
     findings: tuple[AggregatedFinding],
     issue_id: str,
@@ -1560,7 +1952,12 @@ def create_or_update_or_close_issue(
     assignees: set[str],
     assignees_statuses: set[delivery.model.Status] | None,
     assignee_mode: odg.model.ResponsibleAssigneeModes,
-):
+) -> list[IssueMutation]:
+    '''
+    Determines which issues have to be created, updated or closed for the given `issue_id` so that
+    they reflect the passed-in `findings`. The returned mutations are not applied yet, see
+    `apply_issue_mutation`.
+    '''
     is_scanned = len(artefacts_without_scan) == 0
 
     labels = set(finding_cfg.issues.labels) | {
@@ -1570,37 +1967,30 @@ def create_or_update_or_close_issue(
 
     repository = odg.extensions_cfg.github_repository(mapping.github_repository)
 
-    known_issues = _all_issues(
-        repository=repository,
-        state='open',
-    ) | _all_issues(
-        repository=repository,
-        state='closed',
-        number=mapping.number_included_closed_issues,
-    )
-
-    issues = filter_issues_for_labels(
-        issues=known_issues,
+    issues = issue_index.issues_for_labels(
         labels=(issue_id, finding_cfg.type),
+        repository=repository,
     )
 
     if not is_in_bom:
-        for issue in issues:
-            close_issue_if_present(
-                mapping=mapping,
+        return [
+            IssueMutation(
+                type=IssueMutationType.CLOSE,
                 issue=issue,
                 closing_reason=IssueComments.NOT_IN_BOM,
-            )
-        return
+            ) for issue in issues
+            if issue.state == 'open'
+        ]
 
     if is_scanned and not findings:
-        for issue in issues:
-            close_issue_if_present(
-                mapping=mapping,
+        return [
+            IssueMutation(
+                type=IssueMutationType.CLOSE,
                 issue=issue,
                 closing_reason=IssueComments.NO_FINDINGS,
-            )
-        return
+            ) for issue in issues
+            if issue.state == 'open'
+        ]
 
     if not is_scanned:
         for issue in issues:
@@ -1608,7 +1998,7 @@ def create_or_update_or_close_issue(
                 break
         else:
             # not scanned yet but no open issue found either -> nothing to do
-            return
+            return []
 
     milestone, failed_milestones = _issue_milestone(
         mapping=mapping,
@@ -1622,7 +2012,7 @@ def create_or_update_or_close_issue(
         sprint_name = None
 
     if finding_cfg.issues.enable_per_finding:
-        return _create_or_update_or_close_issue_per_finding(
+        return _plan_issue_mutations_per_finding(
             mapping=mapping,
             finding_cfg=finding_cfg,
             component_descriptor_lookup=component_descriptor_lookup,
@@ -1643,7 +2033,7 @@ def create_or_update_or_close_issue(
             labels=labels,
         )
 
-    return _create_or_update_issue(
+    if mutation := _plan_create_or_update_issue(
         mapping=mapping,
         finding_cfg=finding_cfg,
         component_descriptor_lookup=component_descriptor_lookup,
@@ -1661,4 +2051,7 @@ def create_or_update_or_close_issue(
         assignees_statuses=assignees_statuses,
         assignee_mode=assignee_mode,
         labels=labels,
-    )
+    ):
+        return [mutation]
+
+    return []
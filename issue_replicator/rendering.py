@@ -0,0 +1,77 @@
+'''
+Rendering helpers for GitHub issues created by the issue replicator. Issue templates are bound
+("compiled") only once per template string, and markdown fragments which are shared across findings
+and issues (e.g. the summary table of an artefact group or the OCM lookup of an artefact) are
+memoised for the duration of a single backlog item using a `FragmentCache`.
+'''
+import collections.abc
+import functools
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class CompiledTemplate:
+    '''
+    `str.format` compatible template whose `format` method is bound only once. Rendering is
+    delegated to `str.format` (implemented in C), which is faster than any pure-python evaluation of
+    a pre-parsed template.
+    '''
+    def __init__(
+        self,
+        template: str,
+    ):
+        self.template = template
+        self.render = template.format
+
+
+@functools.cache
+def compile_template(
+    template: str,
+) -> CompiledTemplate:
+    return CompiledTemplate(template=template)
+
+
+class FragmentCache:
+    '''
+    Memoises rendered fragments by an arbitrary (hashable) key. The cache is not bounded, hence it
+    is intended to be cleared once a backlog item has been processed (e.g. to make sure changed
+    sprints or component descriptors are eventually reflected).
+    '''
+    def __init__(self):
+        self._fragments = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get[T](
+        self,
+        key: collections.abc.Hashable,
+        render: collections.abc.Callable[[], T],
+    ) -> T:
+        try:
+            fragment = self._fragments[key]
+            self.hits += 1
+            return fragment
+        except KeyError:
+            pass
+
+        self.misses += 1
+        fragment = self._fragments[key] = render()
+        return fragment
+
+    def __len__(self) -> int:
+        return len(self._fragments)
+
+    def clear(self):
+        if self._fragments:
+            logger.debug(
+                f'clearing {len(self._fragments)} rendered fragments ({self.hits=}, {self.misses=})'
+            )
+
+        self._fragments.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+fragment_cache = FragmentCache()
@@ -4,6 +4,7 @@ import dataclasses
 import datetime
 import functools
 import logging
+import time
 import urllib.parse
 
 import aiohttp
@@ -19,8 +20,10 @@ import cnudie.util
 import delivery.client
 import oci.client
 import oci.client_async
+import oci.model as om
 import ocm
 
+import cache_metrics
 import ctx_util
 import deliverydb_cache.model as dcm
 import deliverydb_cache.util as dcu
@@ -179,10 +182,6 @@ def db_cache_component_descriptor_lookup_async(
             encoding_format=encoding_format,
         )
 
-        if max_size_octets > 0 and len(value) > max_size_octets:
-            # don't store result in cache if it exceeds max size for an individual cache entry
-            return
-
         now = datetime.datetime.now(datetime.timezone.utc)
         cache_entry = deliverydb.model.DBCache(
             id=descriptor.id,
@@ -199,6 +198,7 @@ def db_cache_component_descriptor_lookup_async(
             await deliverydb.cache.add_or_update_cache_entry(
                 db_session=db_session,
                 cache_entry=cache_entry,
+                max_size_octets=max_size_octets,
             )
         except Exception:
             raise
@@ -256,6 +256,76 @@ def db_cache_component_descriptor_lookup_async(
     return lookup
 
 
+COMPONENT_DESCRIPTOR_CACHE_NAME = 'component-descriptor'
+
+
+def _lookup_result(res) -> cache_metrics.CacheResult:
+    if isinstance(res, ocm.ComponentDescriptor):
+        return cache_metrics.CacheResult.HIT
+
+    # `None` or `WriteBack` (i.e. the lookup would store the descriptor in case it is found later on)
+    return cache_metrics.CacheResult.MISS
+
+
+def instrumented_component_descriptor_lookup(
+    lookup: cnudie.retrieve.ComponentDescriptorLookupById,
+    tier: cache_metrics.CacheTier,
+) -> cnudie.retrieve.ComponentDescriptorLookupById:
+    '''
+    wraps a single tier of a composite component descriptor lookup so that hits, misses, errors and
+    latencies are recorded (see `cache_metrics`)
+    '''
+    def instrumented_lookup(component_id, /, **kwargs):
+        start = time.monotonic()
+        result = cache_metrics.CacheResult.ERROR
+
+        try:
+            res = lookup(component_id, **kwargs)
+            result = _lookup_result(res)
+            return res
+        except om.OciImageNotFoundException:
+            result = cache_metrics.CacheResult.MISS
+            raise
+        finally:
+            cache_metrics.record(
+                tier=tier,
+                name=COMPONENT_DESCRIPTOR_CACHE_NAME,
+                result=result,
+                latency_seconds=time.monotonic() - start,
+            )
+
+    return instrumented_lookup
+
+
+def instrumented_component_descriptor_lookup_async(
+    lookup: cnudie.retrieve_async.ComponentDescriptorLookupById,
+    tier: cache_metrics.CacheTier,
+) -> cnudie.retrieve_async.ComponentDescriptorLookupById:
+    '''
+    async variant of `instrumented_component_descriptor_lookup`
+    '''
+    async def instrumented_lookup(component_id, /, **kwargs):
+        start = time.monotonic()
+        result = cache_metrics.CacheResult.ERROR
+
+        try:
+            res = await lookup(component_id, **kwargs)
+            result = _lookup_result(res)
+            return res
+        except om.OciImageNotFoundException:
+            result = cache_metrics.CacheResult.MISS
+            raise
+        finally:
+            cache_metrics.record(
+                tier=tier,
+                name=COMPONENT_DESCRIPTOR_CACHE_NAME,
+                result=result,
+                latency_seconds=time.monotonic() - start,
+            )
+
+    return instrumented_lookup
+
+
 def init_component_descriptor_lookup(
     ocm_repository_lookup: cnudie.retrieve.OcmRepositoryLookup=None,
     cache_dir: str=None,
@@ -276,29 +346,46 @@ def init_component_descriptor_lookup(
     if not oci_client:
         oci_client = semver_sanitising_oci_client()
 
-    lookups = [cnudie.retrieve.in_memory_cache_component_descriptor_lookup(
-        ocm_repository_lookup=ocm_repository_lookup,
+    lookups = [(
+        cnudie.retrieve.in_memory_cache_component_descriptor_lookup(
+            ocm_repository_lookup=ocm_repository_lookup,
+        ),
+        cache_metrics.CacheTier.IN_MEMORY,
     )]
 
     if cache_dir:
-        lookups.append(cnudie.retrieve.file_system_cache_component_descriptor_lookup(
-            ocm_repository_lookup=ocm_repository_lookup,
-            cache_dir=cache_dir,
+        lookups.append((
+            cnudie.retrieve.file_system_cache_component_descriptor_lookup(
+                ocm_repository_lookup=ocm_repository_lookup,
+                cache_dir=cache_dir,
+            ),
+            cache_metrics.CacheTier.FILESYSTEM,
         ))
 
     if delivery_client:
-        lookups.append(cnudie.retrieve.delivery_service_component_descriptor_lookup(
-            ocm_repository_lookup=ocm_repository_lookup,
-            delivery_client=delivery_client,
+        lookups.append((
+            cnudie.retrieve.delivery_service_component_descriptor_lookup(
+                ocm_repository_lookup=ocm_repository_lookup,
+                delivery_client=delivery_client,
+            ),
+            cache_metrics.CacheTier.DELIVERY_SERVICE,
         ))
 
-    lookups.append(cnudie.retrieve.oci_component_descriptor_lookup(
-        ocm_repository_lookup=ocm_repository_lookup,
-        oci_client=oci_client,
+    lookups.append((
+        cnudie.retrieve.oci_component_descriptor_lookup(
+            ocm_repository_lookup=ocm_repository_lookup,
+            oci_client=oci_client,
+        ),
+        cache_metrics.CacheTier.OCI,
     ))
 
     return cnudie.retrieve.composite_component_descriptor_lookup(
-        lookups=lookups,
+        lookups=tuple(
+            instrumented_component_descriptor_lookup(
+                lookup=lookup,
+                tier=tier,
+            ) for lookup, tier in lookups
+        ),
         ocm_repository_lookup=ocm_repository_lookup,
         default_absent_ok=default_absent_ok,
     )
@@ -326,35 +413,55 @@ def init_component_descriptor_lookup_async(
     if not oci_client:
         oci_client = semver_sanitising_oci_client_async()
 
-    lookups = [cnudie.retrieve_async.in_memory_cache_component_descriptor_lookup(
-        ocm_repository_lookup=ocm_repository_lookup,
+    lookups = [(
+        cnudie.retrieve_async.in_memory_cache_component_descriptor_lookup(
+            ocm_repository_lookup=ocm_repository_lookup,
+        ),
+        cache_metrics.CacheTier.IN_MEMORY,
     )]
 
     if cache_dir:
-        lookups.append(cnudie.retrieve_async.file_system_cache_component_descriptor_lookup(
-            ocm_repository_lookup=ocm_repository_lookup,
-            cache_dir=cache_dir,
+        lookups.append((
+            cnudie.retrieve_async.file_system_cache_component_descriptor_lookup(
+                ocm_repository_lookup=ocm_repository_lookup,
+                cache_dir=cache_dir,
+            ),
+            cache_metrics.CacheTier.FILESYSTEM,
         ))
 
     if db_url:
-        lookups.append(db_cache_component_descriptor_lookup_async(
-            db_url=db_url,
-            ocm_repository_lookup=ocm_repository_lookup,
+        lookups.append((
+            db_cache_component_descriptor_lookup_async(
+                db_url=db_url,
+                ocm_repository_lookup=ocm_repository_lookup,
+            ),
+            cache_metrics.CacheTier.DELIVERY_DB,
         ))
 
     if delivery_client:
-        lookups.append(cnudie.retrieve_async.delivery_service_component_descriptor_lookup(
-            ocm_repository_lookup=ocm_repository_lookup,
-            delivery_client=delivery_client,
+        lookups.append((
+            cnudie.retrieve_async.delivery_service_component_descriptor_lookup(
+                ocm_repository_lookup=ocm_repository_lookup,
+                delivery_client=delivery_client,
+            ),
+            cache_metrics.CacheTier.DELIVERY_SERVICE,
         ))
 
-    lookups.append(cnudie.retrieve_async.oci_component_descriptor_lookup(
-        ocm_repository_lookup=ocm_repository_lookup,
-        oci_client=oci_client,
+    lookups.append((
+        cnudie.retrieve_async.oci_component_descriptor_lookup(
+            ocm_repository_lookup=ocm_repository_lookup,
+            oci_client=oci_client,
+        ),
+        cache_metrics.CacheTier.OCI,
     ))
 
     return cnudie.retrieve_async.composite_component_descriptor_lookup(
-        lookups=lookups,
+        lookups=tuple(
+            instrumented_component_descriptor_lookup_async(
+                lookup=lookup,
+                tier=tier,
+            ) for lookup, tier in lookups
+        ),
         ocm_repository_lookup=ocm_repository_lookup,
         default_absent_ok=default_absent_ok,
     )
@@ -412,7 +519,7 @@ def github_api_lookup(
         absent_ok: bool=False,
     ) -> github3.github.GitHub | None:
         '''
-        returns an initialised and authenticated apiclient object suitable for
+        returns an initialised and authenticated (process-wide shared) apiclient object suitable for
         the passed repository URL
 
         raises ValueError if no configuration (credentials) is found for the given repository url
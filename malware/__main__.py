@@ -12,6 +12,7 @@ import oci.client
 import oci.model
 import ocm
 
+import blobcache
 import k8s.logging
 import k8s.util
 import malware.scan
@@ -35,6 +36,7 @@ def scan_resource(
     oci_client: oci.client.Client,
     aws_secret_name: str | None,
     secret_factory: secret_mgmt.SecretFactory,
+    blob_cache: blobcache.BlobCache | None=None,
 ) -> collections.abc.Generator[odg.model.ClamAVMalwareFinding, None, None]:
     resource: ocm.Resource = resource_node.resource
 
@@ -43,6 +45,7 @@ def scan_resource(
             image_reference=resource.access.imageReference,
             oci_client=oci_client,
             malware_cfg=malware_cfg,
+            blob_cache=blob_cache,
         )
 
     elif resource.access.type is ocm.AccessType.S3:
@@ -90,6 +93,7 @@ def scan_resource(
             image_reference=image_reference,
             oci_client=oci_client,
             malware_cfg=malware_cfg,
+            blob_cache=blob_cache,
         )
 
     else:
@@ -138,6 +142,7 @@ def scan_and_upload(
     delivery_client: delivery.client.DeliveryServiceClient,
     oci_client: oci.client.Client,
     secret_factory: secret_mgmt.SecretFactory,
+    blob_cache: blobcache.BlobCache | None=None,
     **kwargs,
 ):
     logger.info(f'scanning {artefact}')
@@ -182,6 +187,7 @@ def scan_and_upload(
         oci_client=oci_client,
         aws_secret_name=mapping.aws_secret_name,
         secret_factory=secret_factory,
+        blob_cache=blob_cache,
     )
 
     scan_info = odg.model.artefact_scan_info(
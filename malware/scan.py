@@ -4,11 +4,13 @@ import functools
 import logging
 import tarfile
 import tempfile
+import typing
 
 import ci.log
 import oci.client
 import oci.model
 
+import blobcache
 import malware.clamav
 import odg.findings
 import odg.model
@@ -80,6 +82,7 @@ def scan_oci_image(
     image_reference: str | oci.model.OciImageReference,
     oci_client: oci.client.Client,
     malware_cfg: odg.findings.Finding,
+    blob_cache: blobcache.BlobCache | None=None,
 ) -> collections.abc.Generator[odg.model.ClamAVMalwareFinding, None, None]:
     layer_blobs = tuple(_iter_layers(image_reference=image_reference, oci_client=oci_client))
     logger.info(f'will scan {len(layer_blobs)} layer blobs')
@@ -89,6 +92,7 @@ def scan_oci_image(
         image_reference=image_reference,
         oci_client=oci_client,
         malware_cfg=malware_cfg,
+        blob_cache=blob_cache,
     )
 
     if len(layer_blobs) > 1:
@@ -105,6 +109,7 @@ def scan_oci_blob(
     image_reference: str | oci.model.OciImageReference,
     oci_client: oci.client.Client,
     malware_cfg: odg.findings.Finding,
+    blob_cache: blobcache.BlobCache | None=None,
 ) -> collections.abc.Generator[odg.model.ClamAVMalwareFinding, None, None]:
     logger.info(f'scanning {blob_reference=}')
     try:
@@ -113,6 +118,7 @@ def scan_oci_blob(
             blob_reference=blob_reference,
             image_reference=image_reference,
             oci_client=oci_client,
+            blob_cache=blob_cache,
         )
     except tarfile.TarError as te:
         logger.warning(f'{image_reference=} {te=} - falling back to layerwise scan')
@@ -122,30 +128,60 @@ def scan_oci_blob(
             blob_reference=blob_reference,
             image_reference=image_reference,
             oci_client=oci_client,
+            blob_cache=blob_cache,
         )
 
 
-def scan_oci_blob_filewise(
-    malware_cfg: odg.findings.Finding,
+def _open_oci_blob(
     blob_reference: oci.model.OciBlobRef,
     image_reference: str | oci.model.OciImageReference,
     oci_client: oci.client.Client,
+    blob_cache: blobcache.BlobCache | None=None,
     chunk_size=8096,
-) -> collections.abc.Generator[odg.model.ClamAVMalwareFinding, None, None]:
+) -> typing.BinaryIO:
+    '''
+    returns a seekable filelike-obj for the given blob (required for retries), either backed by the
+    (shared) blob cache or, if no cache is passed, by a tempfile
+    '''
+    if blob_cache:
+        return blob_cache.open_oci_blob(
+            oci_client=oci_client,
+            image_reference=image_reference,
+            digest=blob_reference.digest,
+            size=blob_reference.size,
+            chunk_size=chunk_size,
+        )
+
     blob = oci_client.blob(
         image_reference=image_reference,
         digest=blob_reference.digest,
     )
 
-    # unfortunately, we need a backing tempfile, because we need a seekable filelike-obj for retry
-    with tempfile.TemporaryFile() as tmpfh:
-        for chunk in blob.iter_content(chunk_size=chunk_size):
-            tmpfh.write(chunk)
+    tmpfh = tempfile.TemporaryFile()
+    for chunk in blob.iter_content(chunk_size=chunk_size):
+        tmpfh.write(chunk)
 
-        tmpfh.seek(0)
+    tmpfh.seek(0)
+    return tmpfh
 
+
+def scan_oci_blob_filewise(
+    malware_cfg: odg.findings.Finding,
+    blob_reference: oci.model.OciBlobRef,
+    image_reference: str | oci.model.OciImageReference,
+    oci_client: oci.client.Client,
+    blob_cache: blobcache.BlobCache | None=None,
+    chunk_size=8096,
+) -> collections.abc.Generator[odg.model.ClamAVMalwareFinding, None, None]:
+    with _open_oci_blob(
+        blob_reference=blob_reference,
+        image_reference=image_reference,
+        oci_client=oci_client,
+        blob_cache=blob_cache,
+        chunk_size=chunk_size,
+    ) as blobfh:
         with tarfile.open(
-            fileobj=tmpfh,
+            fileobj=blobfh,
             mode='r',
         ) as tf:
             for tar_info in tf:
@@ -168,15 +204,24 @@ def scan_oci_blob_layerwise(
     blob_reference: oci.model.OciBlobRef,
     image_reference: str | oci.model.OciImageReference,
     oci_client: oci.client.Client,
+    blob_cache: blobcache.BlobCache | None=None,
 ) -> collections.abc.Generator[odg.model.ClamAVMalwareFinding, None, None]:
-    blob = oci_client.blob(
-        image_reference=image_reference,
-        digest=blob_reference.digest,
-    )
+    if blob_cache:
+        content = blob_cache.iter_oci_blob(
+            oci_client=oci_client,
+            image_reference=image_reference,
+            digest=blob_reference.digest,
+            size=blob_reference.size,
+        )
+    else:
+        content = oci_client.blob(
+            image_reference=image_reference,
+            digest=blob_reference.digest,
+        ).iter_content(chunk_size=tarfile.RECORDSIZE)
 
     if (scan_result := malware.clamav.scan(
         malware_cfg=malware_cfg,
-        data=blob.iter_content(chunk_size=tarfile.RECORDSIZE),
+        data=content,
         filename=blob_reference.digest,
     )):
         yield scan_result
@@ -1,6 +1,7 @@
 import collections.abc
 import datetime
 import http
+import itertools
 
 import aiohttp.web
 import dacite
@@ -14,6 +15,7 @@ import deliverydb.cache as dc
 import deliverydb.model as dm
 import deliverydb.util as du
 import deliverydb_cache.model as dcm
+import executors
 import features
 import middleware.cors
 import odg.findings
@@ -60,10 +62,10 @@ class ArtefactMetadataQuery(aiohttp.web.View):
             $ref: '#/definitions/Datatype'
           required: false
           description:
-            The referenced types to retrieve (only applicable for metadata of type
-            `rescorings`). Can be given multiple times. If no referenced type is given, all relevant
-            metadata will be returned. Check odg/model.py `Datatype` model class for a list of
-            possible values.
+            The referenced types to retrieve (only applicable for metadata which references
+            another type, e.g. `rescorings`; other metadata is not filtered). Can be given multiple
+            times. If no referenced type is given, all relevant metadata will be returned. Check
+            odg/model.py `Datatype` model class for a list of possible values.
         - in: body
           name: body
           required: false
@@ -104,8 +106,13 @@ class ArtefactMetadataQuery(aiohttp.web.View):
         async def artefact_queries(artefact_ref: odg.model.ComponentArtefactId):
             # when filtering for metadata of type `rescorings`, entries without a component
             # name or version should also be considered a "match" (caused by different rescoring
-            # scopes)
-            none_ok = not type_filter or odg.model.Datatype.RESCORING in type_filter
+            # scopes); if other types are queried as well, this only applies to the rescorings
+            if not type_filter or set(type_filter) == {odg.model.Datatype.RESCORING}:
+                none_ok = True
+            elif odg.model.Datatype.RESCORING in type_filter:
+                none_ok = dm.ArtefactMetaData.type == odg.model.Datatype.RESCORING
+            else:
+                none_ok = False
 
             async for query in du.ArtefactMetadataQueries.component_queries(
                 components=[ocm.ComponentIdentity(
@@ -175,7 +182,11 @@ class ArtefactMetadataQuery(aiohttp.web.View):
 
         if referenced_type_filter:
             db_statement = db_statement.where(
-                dm.ArtefactMetaData.referenced_type.in_(referenced_type_filter),
+                sa.or_(
+                    # metadata which does not reference another type (e.g. findings) is not filtered
+                    dm.ArtefactMetaData.referenced_type == None,
+                    dm.ArtefactMetaData.referenced_type.in_(referenced_type_filter),
+                ),
             )
 
         if artefact_refs:
@@ -186,7 +197,7 @@ class ArtefactMetadataQuery(aiohttp.web.View):
                 ]),
             )
 
-        async def serialise_and_enrich_finding(
+        def serialise_and_enrich_finding(
             finding: odg.model.ArtefactMetadata,
         ) -> dict:
             def result_dict(
@@ -207,8 +218,9 @@ class ArtefactMetadataQuery(aiohttp.web.View):
 
         finding_cfgs = self.request.app[consts.APP_FINDING_CFGS]
 
-        artefact_metadata = []
-        async for partition in db_stream.partitions(size=50):
+        def serialise_partition(partition) -> list[dict]:
+            artefact_metadata = []
+
             for row in partition:
                 artefact_metadatum = du.db_artefact_metadata_row_to_dso(row)
 
@@ -222,9 +234,23 @@ class ArtefactMetadataQuery(aiohttp.web.View):
                         break
                 else:
                     # artefact metadatum was not explicitly filtered-out by central finding-cfg
-                    artefact_metadata.append(await serialise_and_enrich_finding(artefact_metadatum))
+                    artefact_metadata.append(serialise_and_enrich_finding(artefact_metadatum))
 
-        data = util.dict_to_json_factory(artefact_metadata)
+            return artefact_metadata
+
+        artefact_metadata = []
+        async for partition in db_stream.partitions(size=50):
+            artefact_metadata.extend(await executors.run_in_lane(
+                executors.ExecutorLane.DB,
+                serialise_partition,
+                partition,
+            ))
+
+        data = await executors.run_in_lane(
+            executors.ExecutorLane.DB,
+            util.dict_to_json_factory,
+            artefact_metadata,
+        )
 
         response = aiohttp.web.StreamResponse(
             headers={
@@ -276,9 +302,17 @@ class ArtefactMetadata(aiohttp.web.View):
             for entry in entries
         ]
 
+        # existing entries are looked up by their id (i.e. the digest of their key) via the primary
+        # key; entries of the same artefact but other versions are only required to re-use
+        # discovery dates, hence they are only queried for respective types
+        ids = {artefact_metadatum.id for artefact_metadatum in artefact_metadata}
+
         # determine all artefact/type combinations to query them at once afterwards
         artefacts = dict()
         for artefact_metadatum in artefact_metadata:
+            if artefact_metadatum.meta.type not in types_with_reusable_discovery_dates:
+                continue
+
             key = (artefact_metadatum.artefact, artefact_metadatum.meta.type)
             if key not in artefacts:
                 artefacts[key] = artefact_metadatum
@@ -298,11 +332,14 @@ class ArtefactMetadata(aiohttp.web.View):
 
         db_session: sqlasync.session.AsyncSession = self.request[consts.REQUEST_DB_SESSION]
         db_statement = sa.select(dm.ArtefactMetaData).where(
-            sa.or_(artefact_queries(artefacts=artefacts)),
+            sa.or_(
+                dm.ArtefactMetaData.id.in_(ids),
+                *artefact_queries(artefacts=artefacts),
+            ),
         )
         db_stream = await db_session.stream(db_statement)
 
-        # order entries to increase chances to find matching existing entry as soon as possible
+        # order entries to increase chances to find a reusable discovery date as soon as possible
         existing_entries = sorted(
             [
                 entry[0]
@@ -315,20 +352,21 @@ class ArtefactMetadata(aiohttp.web.View):
             ),
             reverse=True,
         )
-
-        existing_artefact_versions = {
-            existing_entry.artefact_version for existing_entry in existing_entries
+        existing_entries_by_id = {
+            existing_entry.id: existing_entry
+            for existing_entry in existing_entries
         }
 
         created_artefacts: list[dm.ArtefactMetaData] = []
+        created_artefacts_by_id: dict[str, dm.ArtefactMetaData] = {}
 
         finding_cfgs = self.request.app[consts.APP_FINDING_CFGS]
 
-        def find_entry_and_discovery_date(
+        def reusable_discovery_date(
             existing_entry: dm.ArtefactMetaData,
             new_entry: dm.ArtefactMetaData,
             reuse_discovery_date: odg.findings.ReuseDiscoveryDate,
-        ) -> tuple[dm.ArtefactMetaData | None, datetime.date | None]:
+        ) -> datetime.date | None:
             if (
                 existing_entry.type != new_entry.type
                 or existing_entry.component_name != new_entry.component_name
@@ -336,19 +374,14 @@ class ArtefactMetadata(aiohttp.web.View):
                 or existing_entry.artefact_name != new_entry.artefact_name
                 or existing_entry.artefact_type != new_entry.artefact_type
             ):
-                return None, None
+                return None
 
-            reusable_discovery_date = reuse_discovery_date_if_possible(
+            return reuse_discovery_date_if_possible(
                 old_metadata=existing_entry,
-                new_metadata=metadata_entry,
+                new_metadata=new_entry,
                 reuse_discovery_date=reuse_discovery_date,
             )
 
-            if existing_entry.id != metadata_entry.id:
-                return None, reusable_discovery_date
-
-            return existing_entry, reusable_discovery_date
-
         try:
             for artefact_metadatum in artefact_metadata:
                 metadata_entry = du.to_db_artefact_metadata(
@@ -362,45 +395,19 @@ class ArtefactMetadata(aiohttp.web.View):
                 else:
                     reuse_discovery_date = odg.findings.ReuseDiscoveryDate()
 
-                found = None
+                found = (
+                    created_artefacts_by_id.get(metadata_entry.id)
+                    or existing_entries_by_id.get(metadata_entry.id)
+                )
                 discovery_date = None
 
-                for existing_entry in created_artefacts:
-                    found, reusable_discovery_date = find_entry_and_discovery_date(
-                        existing_entry=existing_entry,
-                        new_entry=metadata_entry,
-                        reuse_discovery_date=reuse_discovery_date,
-                    )
-
-                    if not discovery_date:
-                        discovery_date = reusable_discovery_date
-
-                    if found:
-                        break
-
-                if not found:
-                    for existing_entry in existing_entries:
-                        if (
-                            (
-                                metadata_entry.type not in types_with_reusable_discovery_dates
-                                or discovery_date
-                            ) and metadata_entry.artefact_version not in existing_artefact_versions
-                        ):
-                            # there is no need to search any further -> we won't find any existing
-                            # entry with the same artefact version and we don't have to find any
-                            # reusable discovery date (anymore)
-                            break
-
-                        found, reusable_discovery_date = find_entry_and_discovery_date(
+                if not found and metadata_entry.type in types_with_reusable_discovery_dates:
+                    for existing_entry in itertools.chain(created_artefacts, existing_entries):
+                        if discovery_date := reusable_discovery_date(
                             existing_entry=existing_entry,
                             new_entry=metadata_entry,
                             reuse_discovery_date=reuse_discovery_date,
-                        )
-
-                        if not discovery_date:
-                            discovery_date = reusable_discovery_date
-
-                        if found:
+                        ):
                             break
 
                 await _mark_compliance_summary_cache_for_deletion(
@@ -416,9 +423,11 @@ class ArtefactMetadata(aiohttp.web.View):
 
                     db_session.add(metadata_entry)
                     created_artefacts.append(metadata_entry)
+                    created_artefacts_by_id[metadata_entry.id] = metadata_entry
                     continue
 
                 # update actual payload
+                existing_entry = found
                 existing_entry.data = metadata_entry.data
 
                 # create new dict instead of patching it, otherwise it won't be updated in the db
@@ -470,20 +479,24 @@ class ArtefactMetadata(aiohttp.web.View):
         db_session: sqlasync.session.AsyncSession = self.request[consts.REQUEST_DB_SESSION]
 
         try:
-            for entry in entries:
-                entry = _fill_default_values(entry)
-
-                artefact_metadata = du.to_db_artefact_metadata(
-                    artefact_metadata=odg.model.ArtefactMetadata.from_dict(entry),
-                )
+            artefact_metadata = [
+                du.to_db_artefact_metadata(
+                    artefact_metadata=odg.model.ArtefactMetadata.from_dict(
+                        _fill_default_values(entry),
+                    ),
+                ) for entry in entries
+            ]
 
-                await db_session.execute(sa.delete(dm.ArtefactMetaData).where(
-                    dm.ArtefactMetaData.id == artefact_metadata.id,
-                ))
+            await db_session.execute(sa.delete(dm.ArtefactMetaData).where(
+                dm.ArtefactMetaData.id.in_([
+                    artefact_metadatum.id for artefact_metadatum in artefact_metadata
+                ]),
+            ))
 
+            for artefact_metadatum in artefact_metadata:
                 await _mark_compliance_summary_cache_for_deletion(
                     db_session=db_session,
-                    artefact_metadata=artefact_metadata,
+                    artefact_metadata=artefact_metadatum,
                 )
 
             await db_session.commit()
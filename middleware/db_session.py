@@ -1,3 +1,5 @@
+import collections.abc
+
 import aiohttp.typedefs
 import aiohttp.web
 import sqlalchemy
@@ -11,6 +13,7 @@ import deliverydb.model as dm
 async def db_session_middleware(
     db_url: str,
     verify_db_session: bool=True,
+    pool_cfgs: collections.abc.Iterable[deliverydb.PoolCfg]=(),
 ) -> aiohttp.typedefs.Middleware:
     '''
     Used to centrally manage database-session lifecycle.
@@ -19,25 +22,32 @@ async def db_session_middleware(
     Close session object at response post-processing.
     Optionally test database session.
 
+    Sessions use separate connection pools for regular and low-priority work (see
+    `deliverydb.PoolLane`), which may be configured using `pool_cfgs`. A session only checks out a
+    connection once it is used, hence requests which do not access the database do not occupy
+    any connection.
+
     Using database-session from request-context is the preferred way.
     Consumers must still commit / rollback transactions.
     '''
+    deliverydb.configure_pool_lanes(*pool_cfgs)
+
+    sessionmaker = await deliverydb.sqlalchemy_sessionmaker(
+        db_url=db_url,
+        lane=deliverydb.PoolLane.REQUEST,
+    )
+    sessionmaker_low_prio = await deliverydb.sqlalchemy_sessionmaker(
+        db_url=db_url,
+        lane=deliverydb.PoolLane.LOW_PRIO,
+    )
 
     @aiohttp.web.middleware
     async def middleware(
         request: aiohttp.web.Request,
         handler: aiohttp.typedefs.Handler,
     ) -> aiohttp.web.StreamResponse:
-        request[consts.REQUEST_DB_SESSION] = await deliverydb.sqlalchemy_session(
-            db_url=db_url,
-            pool_timeout=5,
-        )
-        request[consts.REQUEST_DB_SESSION_LOW_PRIO] = await deliverydb.sqlalchemy_session(
-            db_url=db_url,
-            pool_size=2,
-            max_overflow=1,
-            pool_timeout=300,
-        )
+        request[consts.REQUEST_DB_SESSION] = sessionmaker()
+        request[consts.REQUEST_DB_SESSION_LOW_PRIO] = sessionmaker_low_prio()
 
         try:
             response = await handler(request)
@@ -47,15 +57,18 @@ async def db_session_middleware(
         except Exception:
             raise
         finally:
-            if db_session := request.get(consts.REQUEST_DB_SESSION):
-                await db_session.close()
-            if db_session_low_prio := request.get(consts.REQUEST_DB_SESSION_LOW_PRIO):
-                await db_session_low_prio.close()
+            for db_session in (
+                request.get(consts.REQUEST_DB_SESSION),
+                request.get(consts.REQUEST_DB_SESSION_LOW_PRIO),
+            ):
+                # unused sessions did not check out a connection, so there is nothing to release
+                if db_session and db_session.in_transaction():
+                    await db_session.close()
 
         return response
 
     async def test_db_session():
-        session = await deliverydb.sqlalchemy_session(db_url)
+        session = sessionmaker()
         # execute query to validate monkey-patched attributes
         await session.execute(sqlalchemy.select(dm.ArtefactMetaData).limit(1))
         await session.close()
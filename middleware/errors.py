@@ -5,6 +5,8 @@ import aiohttp.typedefs
 import aiohttp.web
 import aiohttp.web_exceptions
 
+import executors
+
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +23,13 @@ def errors_middleware() -> aiohttp.typedefs.Middleware:
         except aiohttp.web_exceptions.HTTPException as e:
             error = e
             stacktrace = traceback.format_exc()
+        except executors.ExecutorLaneSaturated as e:
+            # shed load instead of queueing more blocking work
+            logger.warning(f'{e}, rejecting request')
+            raise aiohttp.web.HTTPServiceUnavailable(
+                text=str(e),
+                headers={'Retry-After': '5'},
+            )
         except Exception:
             # only raise internal server error in case error was not already handled properly
             error = aiohttp.web.HTTPInternalServerError
@@ -1,15 +1,140 @@
-import datetime
+import enum
+import functools
+import os
+import time
 
+import aiohttp.hdrs
 import aiohttp.typedefs
 import aiohttp.web
 import prometheus_client
+import prometheus_client.exposition
+import prometheus_client.multiprocess
+import prometheus_client.registry
 
+import cache_metrics
 import middleware.auth
+import secret_mgmt.github
+import util
 
 
 APP_REQUEST_LATENCY_SECONDS = 'request_latency_seconds'
 APP_REQUESTS_CONCURRENCY = 'requests_concurrency'
+APP_REQUESTS_IN_FLIGHT = 'requests_in_flight'
 APP_REQUESTS_TOTAL = 'requests_total'
+APP_RESPONSE_SIZE_BYTES = 'response_size_bytes'
+
+# if set, metrics of all worker processes are aggregated (see `prometheus_client.multiprocess`)
+MULTIPROC_DIR_ENV_VAR = 'PROMETHEUS_MULTIPROC_DIR'
+
+# requests which did not match any route (e.g. 404) share a single label value
+UNMATCHED_ROUTE = '<unmatched>'
+OTHER_METHOD = 'OTHER'
+
+# requests taking longer are attached as exemplar to the latency histogram (only exposed if the
+# OpenMetrics format is requested by the scraper)
+SLOW_REQUEST_THRESHOLD_SECONDS = 1
+EXEMPLAR_PATH_MAX_LENGTH = 96
+
+RESPONSE_SIZE_BUCKETS_BYTES = (
+    256, 1024, 4 * 1024, 16 * 1024, 64 * 1024, 256 * 1024, 1024 * 1024, 4 * 1024 * 1024,
+    16 * 1024 * 1024, float('inf'),
+)
+IN_FLIGHT_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, float('inf'))
+
+
+class UserAgentClass(enum.StrEnum):
+    NONE = 'none'
+    BROWSER = 'browser'
+    KUBE_PROBE = 'kube-probe'
+    PROMETHEUS = 'prometheus'
+    CURL = 'curl'
+    PYTHON = 'python'
+    GO = 'go'
+    JAVA = 'java'
+    OTHER = 'other'
+
+
+# ordered by precedence, matched against the lower-cased user-agent
+_user_agent_prefixes = (
+    ('kube-probe/', UserAgentClass.KUBE_PROBE),
+    ('prometheus/', UserAgentClass.PROMETHEUS),
+    ('curl/', UserAgentClass.CURL),
+    ('python', UserAgentClass.PYTHON), # python-requests, python-urllib3, python/x aiohttp/y
+    ('aiohttp/', UserAgentClass.PYTHON),
+    ('go-http-client/', UserAgentClass.GO),
+    ('java/', UserAgentClass.JAVA),
+    ('apache-httpclient/', UserAgentClass.JAVA),
+    ('mozilla/', UserAgentClass.BROWSER),
+)
+
+
+@functools.lru_cache(maxsize=1024)
+def user_agent_class(user_agent: str | None) -> UserAgentClass:
+    '''
+    classifies the (unbounded) user-agent header into a small, fixed set of classes which are
+    suitable to be used as metric label
+    '''
+    if not user_agent or not (user_agent := user_agent.strip().lower()):
+        return UserAgentClass.NONE
+
+    for prefix, user_agent_cls in _user_agent_prefixes:
+        if user_agent.startswith(prefix):
+            return user_agent_cls
+
+    return UserAgentClass.OTHER
+
+
+def normalised_method(method: str) -> str:
+    if method in aiohttp.hdrs.METH_ALL:
+        return method
+
+    return OTHER_METHOD
+
+
+def route_label(request: aiohttp.web.Request) -> str:
+    return util.route_template(
+        request=request,
+        default=UNMATCHED_ROUTE,
+    )
+
+
+def response_size(response: aiohttp.web.StreamResponse) -> int | None:
+    '''
+    returns the size of the response body if it is known without consuming the body, i.e. for
+    already sent (streamed) responses and for responses with an in-memory body
+    '''
+    if response.prepared:
+        return response.body_length
+
+    if isinstance(response, aiohttp.web.Response) and isinstance(response.body, bytes | bytearray):
+        return len(response.body)
+
+    return response.content_length
+
+
+def multiprocess_mode() -> bool:
+    return bool(os.environ.get(MULTIPROC_DIR_ENV_VAR))
+
+
+def mark_worker_dead(pid: int):
+    '''
+    must be called (by the supervising process) once a worker process has exited so that its live
+    gauges are no longer aggregated
+    '''
+    if multiprocess_mode():
+        prometheus_client.multiprocess.mark_process_dead(pid)
+
+
+def metrics_registry(
+    app: aiohttp.web.Application,
+) -> prometheus_client.registry.CollectorRegistry:
+    if not multiprocess_mode():
+        return prometheus_client.REGISTRY
+
+    registry = prometheus_client.registry.CollectorRegistry()
+    prometheus_client.multiprocess.MultiProcessCollector(registry)
+
+    return registry
 
 
 @middleware.auth.noauth
@@ -25,32 +150,193 @@ class Metrics(aiohttp.web.View):
           "200":
             description: Successful operation.
         '''
+        # exemplars are only supported by the OpenMetrics format
+        encoder, content_type = prometheus_client.exposition.choose_encoder(
+            self.request.headers.get(aiohttp.hdrs.ACCEPT),
+        )
+
         return aiohttp.web.Response(
-            body=prometheus_client.generate_latest(),
-            content_type='text/plain',
+            body=encoder(metrics_registry(app=self.request.app)),
+            headers={
+                aiohttp.hdrs.CONTENT_TYPE: content_type,
+            },
         )
 
 
+GITHUB_API_REQUESTS_TOTAL = prometheus_client.Counter(
+    name='github_api_requests',
+    documentation='GitHub api requests',
+    labelnames=['hostname', 'installation', 'status'],
+)
+GITHUB_API_REQUEST_LATENCY_SECONDS = prometheus_client.Summary(
+    name='github_api_request_latency_seconds',
+    documentation='GitHub api request latency (seconds)',
+    labelnames=['hostname', 'installation'],
+)
+GITHUB_API_TOKEN_EXCHANGES_TOTAL = prometheus_client.Counter(
+    name='github_api_token_exchanges',
+    documentation='GitHub App installation token exchanges',
+    labelnames=['hostname', 'installation'],
+)
+GITHUB_API_QUOTA_REMAINING = prometheus_client.Gauge(
+    name='github_api_quota_remaining',
+    documentation='Remaining GitHub api quota as reported by the most recent response',
+    labelnames=['hostname', 'installation'],
+    multiprocess_mode='livemostrecent',
+)
+GITHUB_API_QUOTA_LIMIT = prometheus_client.Gauge(
+    name='github_api_quota_limit',
+    documentation='GitHub api quota limit as reported by the most recent response',
+    labelnames=['hostname', 'installation'],
+    multiprocess_mode='livemostrecent',
+)
+
+CACHE_LOOKUPS_TOTAL = prometheus_client.Counter(
+    name='cache_lookups',
+    documentation='Cache lookups by result (hit, miss, error)',
+    labelnames=['tier', 'name', 'result'],
+)
+CACHE_LOOKUP_LATENCY_SECONDS = prometheus_client.Histogram(
+    name='cache_lookup_latency_seconds',
+    documentation='Cache lookup latency (seconds)',
+    labelnames=['tier', 'name'],
+    buckets=cache_metrics.LATENCY_BUCKETS_SECONDS,
+)
+CACHE_SERVED_BYTES_TOTAL = prometheus_client.Counter(
+    name='cache_served_bytes',
+    documentation='Bytes served from cache',
+    labelnames=['tier', 'name'],
+)
+CACHE_EVICTIONS_TOTAL = prometheus_client.Counter(
+    name='cache_evictions',
+    documentation='Cache entries evicted to free up space',
+    labelnames=['tier', 'name'],
+)
+
+
+class PrometheusGitHubClientObserver(secret_mgmt.github.GitHubClientObserver):
+    '''
+    records the requests of the process-wide GitHub api clients (see
+    `secret_mgmt.github.GitHubClientRegistry`) as prometheus metrics, which are aggregated across
+    worker processes in multi-process mode
+    '''
+    def record_response(
+        self,
+        hostname: str,
+        installation: int | str,
+        status: int,
+        latency_seconds: float,
+        quota_remaining: int | None,
+        quota_limit: int | None,
+    ):
+        installation = str(installation)
+
+        GITHUB_API_REQUESTS_TOTAL.labels(hostname, installation, str(status)).inc()
+        GITHUB_API_REQUEST_LATENCY_SECONDS.labels(hostname, installation).observe(latency_seconds)
+
+        if quota_remaining is not None:
+            GITHUB_API_QUOTA_REMAINING.labels(hostname, installation).set(quota_remaining)
+        if quota_limit is not None:
+            GITHUB_API_QUOTA_LIMIT.labels(hostname, installation).set(quota_limit)
+
+    def record_token_exchange(
+        self,
+        hostname: str,
+        installation: int | str,
+    ):
+        GITHUB_API_TOKEN_EXCHANGES_TOTAL.labels(hostname, str(installation)).inc()
+
+
+class PrometheusCacheMetricsObserver(cache_metrics.CacheMetricsObserver):
+    '''
+    records the statistics of caches and lookup chains (see `cache_metrics`) as prometheus metrics,
+    which are aggregated across worker processes in multi-process mode
+    '''
+    def record(
+        self,
+        tier: str,
+        name: str,
+        result: cache_metrics.CacheResult,
+        latency_seconds: float | None,
+        served_bytes: int,
+    ):
+        CACHE_LOOKUPS_TOTAL.labels(tier, name, str(result)).inc()
+
+        if latency_seconds is not None:
+            CACHE_LOOKUP_LATENCY_SECONDS.labels(tier, name).observe(latency_seconds)
+        if served_bytes:
+            CACHE_SERVED_BYTES_TOTAL.labels(tier, name).inc(served_bytes)
+
+    def record_eviction(
+        self,
+        tier: str,
+        name: str,
+        count: int,
+    ):
+        CACHE_EVICTIONS_TOTAL.labels(tier, name).inc(count)
+
+
+github_client_observer = PrometheusGitHubClientObserver()
+cache_metrics_observer = PrometheusCacheMetricsObserver()
+
+
 def add_prometheus_middleware(
     app: aiohttp.web.Application,
 ) -> aiohttp.typedefs.Middleware:
+    '''
+    adds a middleware which records latency, response size and concurrency of HTTP requests. To keep
+    the number of series bounded, requests are labelled by route template (rather than path),
+    normalised method and user-agent class (see `user_agent_class`).
+    '''
+    in_flight_per_route: dict[str, int] = {}
 
     @aiohttp.web.middleware
     async def middleware(
         request: aiohttp.web.Request,
         handler: aiohttp.typedefs.Handler,
     ) -> aiohttp.web.StreamResponse:
-        start_time = datetime.datetime.now()
-        request.app[APP_REQUESTS_CONCURRENCY].labels(request.path, request.method).inc()
+        start = time.perf_counter()
+        endpoint = route_label(request)
+        method = normalised_method(request.method)
+
+        in_flight = in_flight_per_route.get(endpoint, 0) + 1
+        in_flight_per_route[endpoint] = in_flight
+        request.app[APP_REQUESTS_IN_FLIGHT].labels(endpoint).observe(in_flight)
 
-        response = await handler(request)
+        concurrency = request.app[APP_REQUESTS_CONCURRENCY].labels(endpoint, method)
+        concurrency.inc()
 
-        latency = datetime.datetime.now() - start_time
-        request.app[APP_REQUEST_LATENCY_SECONDS].labels(request.path, request.method).observe(latency.total_seconds()) # noqa: E501
-        request.app[APP_REQUESTS_CONCURRENCY].labels(request.path, request.method).dec()
-        request.app[APP_REQUESTS_TOTAL].labels(request.path, request.headers.get('User-Agent'), request.method, response.status).inc() # noqa: E501
+        response = None
+        status = 500
+        try:
+            response = await handler(request)
+            status = response.status
+            return response
+        except aiohttp.web.HTTPException as e:
+            status = e.status
+            raise
+        finally:
+            concurrency.dec()
+            in_flight_per_route[endpoint] -= 1
 
-        return response
+            latency_seconds = time.perf_counter() - start
+            exemplar = None
+            if latency_seconds >= SLOW_REQUEST_THRESHOLD_SECONDS:
+                exemplar = {'path': request.path[:EXEMPLAR_PATH_MAX_LENGTH]}
+
+            request.app[APP_REQUEST_LATENCY_SECONDS].labels(endpoint, method).observe(
+                latency_seconds,
+                exemplar=exemplar,
+            )
+            request.app[APP_REQUESTS_TOTAL].labels(
+                endpoint,
+                user_agent_class(request.headers.get(aiohttp.hdrs.USER_AGENT)),
+                method,
+                status,
+            ).inc()
+
+            if response is not None and (size := response_size(response)) is not None:
+                request.app[APP_RESPONSE_SIZE_BYTES].labels(endpoint, method).observe(size)
 
     app[APP_REQUEST_LATENCY_SECONDS] = prometheus_client.Histogram(
         name=APP_REQUEST_LATENCY_SECONDS,
@@ -61,12 +347,28 @@ def add_prometheus_middleware(
         name=APP_REQUESTS_CONCURRENCY,
         documentation='Requests currently in progress',
         labelnames=['endpoint', 'method'],
+        multiprocess_mode='livesum',
+    )
+    app[APP_REQUESTS_IN_FLIGHT] = prometheus_client.Histogram(
+        name=APP_REQUESTS_IN_FLIGHT,
+        documentation='Requests in progress for the same route upon arrival of a request',
+        labelnames=['endpoint'],
+        buckets=IN_FLIGHT_BUCKETS,
     )
     app[APP_REQUESTS_TOTAL] = prometheus_client.Counter(
         name=APP_REQUESTS_TOTAL,
         documentation='Requests total',
         labelnames=['endpoint', 'user_agent', 'method', 'status'],
     )
+    app[APP_RESPONSE_SIZE_BYTES] = prometheus_client.Histogram(
+        name=APP_RESPONSE_SIZE_BYTES,
+        documentation='Response body size (bytes), if known without consuming the body',
+        labelnames=['endpoint', 'method'],
+        buckets=RESPONSE_SIZE_BUCKETS_BYTES,
+    )
+
+    secret_mgmt.github.github_client_registry.add_observer(github_client_observer)
+    cache_metrics.cache_metrics_registry.add_observer(cache_metrics_observer)
 
     app.middlewares.insert(0, middleware)
 
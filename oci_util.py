@@ -0,0 +1,78 @@
+'''
+`oci.client.Client` (and `oci.client_async.Client`) do not offer a public api for requests beyond
+their high-level operations (e.g. chunked blob uploads or ranged blob retrievals). This module is
+the only place which relies on their private request helpers (token scope and authentication) and
+thus must be adjusted if those change. In case the helpers are not available (anymore),
+`NotImplementedError` is raised so that callers may fall back to the respective high-level
+operation.
+'''
+import collections.abc
+
+import aiohttp
+import requests
+
+import oci.client
+import oci.client_async
+import oci.model as om
+
+
+def _private_request_helpers(
+    oci_client: oci.client.Client | oci.client_async.Client,
+) -> tuple[collections.abc.Callable, collections.abc.Callable]:
+    request = getattr(oci_client, '_request', None)
+    scope = getattr(oci.client, '_scope', None)
+
+    if not callable(request) or not callable(scope):
+        raise NotImplementedError(f'{type(oci_client)} does not offer private request helpers')
+
+    return request, scope
+
+
+def request(
+    oci_client: oci.client.Client,
+    image_reference: str | om.OciImageReference,
+    url: str,
+    method: str,
+    action: str,
+    **kwargs,
+) -> requests.Response:
+    '''
+    sends an (authenticated) request for `image_reference` using a token with the given `action`
+    scope (e.g. `pull` or `push,pull`). The status of the response is not checked, additional
+    `kwargs` are passed to `oci.client.Client._request`.
+    '''
+    request, scope = _private_request_helpers(oci_client=oci_client)
+    image_reference = om.OciImageReference(image_reference)
+
+    return request(
+        url=url,
+        image_reference=image_reference,
+        scope=scope(image_reference=image_reference, action=action),
+        method=method,
+        raise_for_status=False,
+        **kwargs,
+    )
+
+
+async def request_async(
+    oci_client: oci.client_async.Client,
+    image_reference: str | om.OciImageReference,
+    url: str,
+    method: str,
+    action: str,
+    **kwargs,
+) -> aiohttp.ClientResponse:
+    '''
+    async variant of `request`, additional `kwargs` are passed to `oci.client_async.Client._request`
+    '''
+    request, scope = _private_request_helpers(oci_client=oci_client)
+    image_reference = om.OciImageReference(image_reference)
+
+    return await request(
+        url=url,
+        image_reference=image_reference,
+        scope=scope(image_reference=image_reference, action=action),
+        method=method,
+        raise_for_status=False,
+        **kwargs,
+    )
@@ -8,6 +8,7 @@ import oci.client
 import oci.model
 import ocm
 
+import blobcache
 import odg.model
 
 
@@ -18,6 +19,7 @@ def local_blob_access_as_blob_descriptor(
     access: ocm.LocalBlobAccess,
     oci_client: oci.client.Client,
     image_reference: str=None,
+    blob_cache: blobcache.BlobCache | None=None,
 ) -> ioutil.BlobDescriptor:
     if access.globalAccess:
         image_reference = access.globalAccess.ref
@@ -31,12 +33,6 @@ def local_blob_access_as_blob_descriptor(
         digest = access.localReference.lower()
         size = access.size
 
-    blob = oci_client.blob(
-        image_reference=image_reference,
-        digest=digest,
-        stream=True,
-    )
-
     if not size:
         manifest = oci_client.manifest(
             image_reference=image_reference,
@@ -53,8 +49,23 @@ def local_blob_access_as_blob_descriptor(
         else:
             raise ValueError('`size` must not be empty to stream local blob')
 
+    if blob_cache:
+        content = blob_cache.iter_oci_blob(
+            oci_client=oci_client,
+            image_reference=image_reference,
+            digest=digest,
+            size=size,
+        )
+    else:
+        blob = oci_client.blob(
+            image_reference=image_reference,
+            digest=digest,
+            stream=True,
+        )
+        content = blob.iter_content(chunk_size=4096)
+
     return ioutil.BlobDescriptor(
-        content=blob.iter_content(chunk_size=4096),
+        content=content,
         size=size,
         name=access.referenceName,
     )
@@ -560,6 +560,16 @@ class CryptoConfig(BacklogItemMixins):
         return is_supported
 
 
+class DeliveryDBBackupFormat(enum.StrEnum):
+    '''
+    `custom` and `tar` dumps are streamed from `pg_dump` to the OCI registry, `directory` dumps are
+    created locally using parallel jobs and afterwards streamed as tar archive
+    '''
+    CUSTOM = 'custom'
+    DIRECTORY = 'directory'
+    TAR = 'tar'
+
+
 @dataclasses.dataclass(kw_only=True)
 class DeliveryDBBackup(ExtensionCfgMixins):
     '''
@@ -576,6 +586,20 @@ class DeliveryDBBackup(ExtensionCfgMixins):
         initial version if the backup component does not exist yet.
     :param list[str] extra_pg_dump_args:
         List of arguments that is passed to the `pg_dump` command as-is.
+    :param DeliveryDBBackupFormat backup_format:
+        The output format of `pg_dump`, see `DeliveryDBBackupFormat`. Defaults to `tar`, which is
+        the format existing backups were created with (i.e. restore procedures expect).
+    :param int jobs:
+        The number of tables dumped in parallel, only applicable for the `directory` format.
+    :param str compression:
+        Passed as `--compress` to `pg_dump` (e.g. `zstd:3`), defaults to the compression of the
+        respective format. Not supported by the `tar` format.
+    :param bool exclude_cache_data:
+        If set, only the schema of the cache relations is dumped, as their content is re-computed on
+        demand anyways.
+    :param int upload_chunk_size_octets:
+        The size of the chunks the backup is uploaded in. If the OCI registry does not support
+        chunked uploads, set to `None` to upload the backup at once (requires local disk space).
     :param str schedule
     :param int successful_jobs_history_limit
     :param int failed_jobs_history_limit
@@ -587,10 +611,23 @@ class DeliveryDBBackup(ExtensionCfgMixins):
     backup_retention_count: int | None
     initial_version: str = '0.1.0'
     extra_pg_dump_args: list[str] = dataclasses.field(default_factory=list)
+    backup_format: DeliveryDBBackupFormat = DeliveryDBBackupFormat.TAR
+    jobs: int = 4
+    compression: str | None = None
+    exclude_cache_data: bool = False
+    upload_chunk_size_octets: int | None = 64 * 1024 * 1024 # 64 MiB
     schedule: str = '0 0 * * *' # every day at 12:00 AM
     successful_jobs_history_limit: int = 1
     failed_jobs_history_limit: int = 1
 
+    def __post_init__(self):
+        if self.compression and self.backup_format is DeliveryDBBackupFormat.TAR:
+            # `pg_dump` refuses to compress archives of the `tar` format
+            raise ValueError(
+                f'{self.compression=} is not supported by {self.backup_format=}, use either the '
+                f'{DeliveryDBBackupFormat.CUSTOM} or {DeliveryDBBackupFormat.DIRECTORY} format'
+            )
+
 
 @dataclasses.dataclass
 class GitHubInstance:
@@ -782,11 +819,18 @@ class ResponsiblesConfig(BacklogItemMixins):
         using `filters`. The first matching rule "wins". In case no rule matches, the responsibles
         extension will not determine any responsibles and instead the default lookup will take
         precedence (i.e. lookup responsibles in findings and as fallback via delivery-service api).
+    :param int team_members_cache_ttl:
+        Time after which the members of GitHub teams are retrieved again. Team members are shared
+        across artefacts (and backlog items) until then.
+    :param int max_workers:
+        The maximum number of strategies evaluated (and GitHub teams resolved) concurrently.
     '''
     service: Services = Services.RESPONSIBLES
     delivery_service_url: str
     interval: int = 60 * 60 * 12 # 12h
     rules: list[ResponsibleConfigRule] = dataclasses.field(default_factory=list)
+    team_members_cache_ttl: int = 60 * 60 # 1h
+    max_workers: int = 4
 
 
 @dataclasses.dataclass(kw_only=True)
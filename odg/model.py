@@ -19,6 +19,17 @@ def _as_key(
     return separator.join(absent_indicator if arg is None else arg for arg in args)
 
 
+def key_digest(key: str) -> str:
+    '''
+    digest of a key (see `_as_key`) which is suitable to be stored as (indexed) fixed-length column
+    '''
+    return hashlib.blake2s(
+        key.encode('utf-8'),
+        digest_size=16,
+        usedforsecurity=False,
+    ).hexdigest()
+
+
 class Datatype(enum.StrEnum):
     # finding independent datatypes/"meta"-types
     ARTEFACT_SCAN_INFO = 'meta/artefact_scan_info'
@@ -1081,11 +1092,7 @@ class ArtefactMetadata:
 
     @property
     def id(self) -> str:
-        return hashlib.blake2s(
-            self.key.encode('utf-8'),
-            digest_size=16,
-            usedforsecurity=False,
-        ).hexdigest()
+        return key_digest(self.key)
 
 
 def artefact_scan_info(
@@ -12,6 +12,7 @@ import cnudie.retrieve
 import delivery.client
 import oci.client
 
+import blobcache
 import consts
 import ctx_util
 import k8s.backlog
@@ -68,6 +69,18 @@ class Arguments:
         'name': '--cache-dir',
         'default': default_cache_dir,
     }
+    BLOB_CACHE_DIR = {
+        'name': '--blob-cache-dir',
+        'help': 'directory to cache (oci) blobs in, may be a node-local volume shared by multiple '
+                'extensions; if not set, blobs are not cached',
+        'default': os.environ.get('BLOB_CACHE_DIR'),
+    }
+    BLOB_CACHE_MAX_SIZE_MIB = {
+        'name': '--blob-cache-max-size-mib',
+        'help': 'maximum total size of the blob cache in MiB, least recently used blobs are evicted',
+        'type': int,
+        'default': int(os.environ.get('BLOB_CACHE_MAX_SIZE_MIB', 10 * 1024)),
+    }
     INVALID_SEMVER_OK = {
         'name': '--invalid-semver-ok',
         'action': 'store_true',
@@ -84,6 +97,8 @@ scan_extension_arguments = [
     Arguments.FINDINGS_CFG_PATH,
     Arguments.DELIVERY_SERVICE_URL,
     Arguments.CACHE_DIR,
+    Arguments.BLOB_CACHE_DIR,
+    Arguments.BLOB_CACHE_MAX_SIZE_MIB,
 ]
 
 
@@ -138,6 +153,7 @@ def process_backlog_items(
         delivery.client.DeliveryServiceClient | None,
         oci.client.Client,
         secret_mgmt.SecretFactory,
+        blobcache.BlobCache | None,
     ], None],
     local_debug_artefact: odg.model.ComponentArtefactId | dict | None=None,
 ):
@@ -152,6 +168,7 @@ def process_backlog_items(
         - `delivery_client`: delivery.client.DeliveryServiceClient
         - `oci_client`: oci.client.Client
         - `secret_factory`: secret_mgmt.SecretFactory
+        - `blob_cache`: blobcache.BlobCache | None (only if a blob cache directory is configured)
 
     Make sure the passed-in `callback` accepts all these arguments, even if they are not required for
     the specific use-case, for example by allowing `**kwargs`.
@@ -218,6 +235,14 @@ def process_backlog_items(
         oci_client=oci_client,
     )
 
+    if parsed_arguments.blob_cache_dir:
+        blob_cache = blobcache.BlobCache(
+            cache_dir=parsed_arguments.blob_cache_dir,
+            max_total_size_mib=parsed_arguments.blob_cache_max_size_mib,
+        )
+    else:
+        blob_cache = None
+
     global ready_to_terminate
     while not wants_to_terminate:
         ready_to_terminate = False
@@ -265,6 +290,7 @@ def process_backlog_items(
             delivery_client=delivery_client,
             oci_client=oci_client,
             secret_factory=secret_factory,
+            blob_cache=blob_cache,
         )
 
         if local_debug_artefact:
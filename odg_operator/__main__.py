@@ -2,12 +2,12 @@ import argparse
 import base64
 import collections
 import collections.abc
+import concurrent.futures
 import enum
 import http
 import io
 import logging
 import os
-import subprocess
 import tarfile
 import tempfile
 import textwrap
@@ -28,6 +28,7 @@ import ctx_util
 import k8s.util
 import lookups
 import ocm_util
+import odg_operator.helm as odgh
 import odg_operator.odg_model as odgm
 import odg_operator.odg_util as odgu
 import odg.extensions_cfg
@@ -45,6 +46,7 @@ ODG_NAME_LABEL = 'open-delivery-gear.ocm.software/odg-name'
 ODG_COMPONENT_NAME = 'ocm.software/ocm-gear'
 HELM_CHART_MEDIA_TYPE = 'application/vnd.cncf.helm.chart.content.v1.tar+gzip'
 ODG_EXTENSION_ARTEFACT_TYPE = 'odg-extension'
+ODG_FIELD_MANAGER = 'odg-operator'
 
 
 class ODGException(Exception):
@@ -120,40 +122,7 @@ def outputs_as_jsonpath(
     return dict(output_lookup)
 
 
-def _helm_template(
-    helm_path: str,
-    values: dict,
-) -> collections.abc.Generator[dict, None, None]:
-    values_path = os.path.join(helm_path, 'values-merged.yaml')
-    with open (values_path, 'w') as f:
-        f.write(yaml.safe_dump(values))
-
-    argv = [
-        'helm',
-        'template',
-        '--include-crds',
-        helm_path,
-        '-f',
-        values_path,
-    ]
-
-    completed_process = subprocess.run(
-        args=argv,
-        capture_output=True,
-        text=True,
-        check=True,
-    )
-
-    for manifest in yaml.safe_load_all(completed_process.stdout):
-        if manifest is None:
-            # gardener-resource-manager cannot process empty manifests
-            continue
-
-        yield manifest
-
-
-def create_or_update_resource(
-    create_namespaced_resource: collections.abc.Callable,
+def apply_resource(
     patch_namespaced_resource: collections.abc.Callable,
     data: dict,
     name: str,
@@ -162,9 +131,17 @@ def create_or_update_resource(
     version: str=None,
     plural: str=None,
 ) -> None:
+    '''
+    creates or updates the resource using server-side apply, i.e. with a single request and without
+    retaining fields which are no longer part of `data`
+    '''
     kwargs = {
+        'name': name,
         'namespace': namespace,
         'body': data,
+        'field_manager': ODG_FIELD_MANAGER,
+        'force': True,
+        '_content_type': 'application/apply-patch+yaml',
     }
     if group:
         kwargs['group'] = group
@@ -173,15 +150,195 @@ def create_or_update_resource(
     if plural:
         kwargs['plural'] = plural
 
-    try:
-        create_namespaced_resource(**kwargs)
-    except kubernetes.client.rest.ApiException as e:
-        kwargs['name'] = name
-        if e.status == 409:
-            # secret already exists, update instead
-            patch_namespaced_resource(**kwargs)
+    patch_namespaced_resource(**kwargs)
+
+
+def _fetch_helm_charts(
+    artefact: ocm.Resource,
+    oci_client: oci.client.Client,
+) -> tuple[
+    str, # digest of helm charts blob
+    collections.abc.Callable[[], collections.abc.Iterable[bytes]], # fetches helm charts blob
+]:
+    if artefact.access.type is ocm.AccessType.LOCAL_BLOB:
+        def fetch_local_blob() -> collections.abc.Iterable[bytes]:
+            return ocm_util.local_blob_access_as_blob_descriptor(
+                access=artefact.access,
+                oci_client=oci_client,
+                image_reference=artefact.access.imageReference,
+            ).content
+
+        return artefact.access.localReference, fetch_local_blob
+
+    elif artefact.access.type is ocm.AccessType.OCI_REGISTRY:
+        manifest = oci_client.manifest(
+            image_reference=artefact.access.imageReference,
+        )
+
+        for layer in manifest.layers:
+            if layer.mediaType == HELM_CHART_MEDIA_TYPE:
+                helm_chart_layer = layer
+                break
         else:
-            raise
+            raise ODGException(f'no helm chart layer found in {artefact.access.imageReference}')
+
+        return helm_chart_layer.digest, lambda: oci_client.blob(
+            image_reference=artefact.access.imageReference,
+            digest=helm_chart_layer.digest,
+            stream=True,
+        ).iter_content(chunk_size=tarfile.RECORDSIZE)
+
+    raise ODGException(f'unsupported artefact access type {artefact.access.type}')
+
+
+def _create_or_update_extension(
+    odg: odgm.ODG,
+    extension_definition: odgm.ExtensionDefinition,
+    outputs_jsonpath: dict,
+    component_descriptor_lookup,
+    oci_client: oci.client.Client,
+    kubernetes_api: k8s.util.KubernetesApi,
+    chart_cache: odgh.ChartCache,
+) -> list[str]: # errors
+    extension_instance = odgm.ExtensionInstance.from_definition(
+        extension_definition=extension_definition,
+        component_descriptor_lookup=component_descriptor_lookup,
+        oci_client=oci_client,
+        templated_values=[
+            odgm.ExtensionInstanceValue(
+                helm_chart_name=value_template.helm_chart_name,
+                helm_attribute=value_template.helm_attribute,
+                value=odgu.template_and_resolve_jsonpath(
+                    value=value_template.value,
+                    jsonpaths=outputs_jsonpath,
+                    substitution_context=odg.context,
+                    value_type=value_template.value_type,
+                    default_value=value_template.default,
+                )
+            )
+            for value_template in extension_definition.installation.value_templates
+        ],
+    )
+
+    errors = []
+
+    for installation_artefact in extension_instance.installation_artefacts:
+        artefact = installation_artefact.artefact
+
+        extension_artefact_name = _managed_resource_name(
+            odg_name=odg.name,
+            extension_name=extension_instance.name,
+            artefact_name=artefact.name,
+        )
+
+        try:
+            charts_digest, fetch_helm_charts = _fetch_helm_charts(
+                artefact=artefact,
+                oci_client=oci_client,
+            )
+        except ODGException as e:
+            logger.error(str(e))
+            errors.append(str(e))
+            continue
+
+        charts_path = chart_cache.charts_path(
+            digest=charts_digest,
+            fetch=fetch_helm_charts,
+        )
+
+        default_values_path = os.path.join(
+            charts_path,
+            installation_artefact.helm_chart_name,
+            'values.yaml',
+        )
+        with open(default_values_path) as f:
+            default_values = yaml.safe_load(f)
+
+        installation_values_for_artefact = [
+            iv
+            for iv in extension_instance.values
+            if iv.helm_chart_name == artefact.name
+        ]
+
+        merged_installation_values = {}
+        for installation_value in installation_values_for_artefact:
+            odgu.patch_jsonpath_into_dict(
+                input_dict=merged_installation_values,
+                jsonpath_expr=installation_value.helm_attribute,
+                value=installation_value.value
+            )
+
+        manifests = chart_cache.template(
+            charts_digest=charts_digest,
+            charts_path=charts_path,
+            helm_chart_name=installation_artefact.helm_chart_name,
+            values=util.merge_dicts(
+                default_values,
+                merged_installation_values,
+            ),
+        )
+
+        data = {
+            'apiVersion': odgm.ManagedResourceMeta.apiVersion,
+            'kind': odgm.ManagedResourceMeta.kind,
+            'metadata': {
+                'name': extension_artefact_name,
+                'namespace': odg.namespace,
+                'labels': {
+                    ODG_NAME_LABEL: odg.name, # we need to find them again
+                },
+            },
+            'spec': {
+                'class': odgm.ManagedResourceClasses.EXTERNAL,
+                'keepObjects': False,
+                'secretRefs': [
+                    {
+                        'name': extension_artefact_name,
+                    }
+                ],
+            }
+        }
+
+        secret_body = kubernetes.client.V1Secret(
+            api_version='v1',
+            kind='Secret',
+            metadata=kubernetes.client.V1ObjectMeta(
+                name=extension_artefact_name,
+                namespace=odg.namespace,
+                labels={
+                    ODG_NAME_LABEL: odg.name, # we need to find them again
+                }
+            ),
+            data={
+                'data.yaml': base64.b64encode(
+                    yaml.dump_all(manifests).encode()
+                ).decode(),
+            },
+        )
+        secret_data = kubernetes.client.ApiClient().sanitize_for_serialization(secret_body)
+
+        # managed-resources are always applied (even if the rendered manifests did not change), so
+        # that changes or deletions in the cluster are reverted; server-side-apply is idempotent
+        custom_api = kubernetes_api.custom_kubernetes_api
+        apply_resource(
+            patch_namespaced_resource=custom_api.patch_namespaced_custom_object,
+            data=data,
+            name=extension_artefact_name,
+            namespace=odg.namespace,
+            group=odgm.ManagedResourceMeta.group,
+            version=odgm.ManagedResourceMeta.version,
+            plural=odgm.ManagedResourceMeta.plural,
+        )
+
+        core_api = kubernetes_api.core_kubernetes_api
+        apply_resource(
+            patch_namespaced_resource=core_api.patch_namespaced_secret,
+            data=secret_data,
+            name=extension_artefact_name,
+            namespace=odg.namespace,
+        )
+
+    return errors
 
 
 def create_or_update_odg(
@@ -190,6 +347,8 @@ def create_or_update_odg(
     component_descriptor_lookup,
     oci_client: oci.client.Client,
     kubernetes_api: k8s.util.KubernetesApi,
+    chart_cache: odgh.ChartCache,
+    max_workers: int=4,
 ) -> tuple[
     dict[str, list[str]], # status details for extensions
     bool, # indicates whether an error occurred
@@ -199,22 +358,14 @@ def create_or_update_odg(
     all "known" extension definitions, templates helm charts for each extension, and triggers
     deployments to target cluster using managed-resources (gardener-resource-manager).
 
+    extensions are independent of each other (their dependencies are only expressed via templated
+    outputs), hence they are rendered and applied concurrently using up to `max_workers` threads.
+
     the first return value (dict) contains the status tracked for each extension, whereas the second
     return value (bool) indicates whether any error was encountered during the process.
     an odg is considered successfully installed if the second return value is False.
     '''
     status_for_extension = collections.defaultdict(list)
-    encountered_error = False
-
-    def handle_error(
-        extension_name: str,
-        error_msg: str,
-    ):
-        global encountered_error
-
-        logger.error(error_msg)
-        status_for_extension[extension_name].append(error_msg)
-        encountered_error = True
 
     outputs_for_extension = dict([
         (
@@ -225,178 +376,29 @@ def create_or_update_odg(
     ])
     outputs_jsonpath = outputs_as_jsonpath(outputs_for_extension)
 
-    extension_instances = [
-        odgm.ExtensionInstance.from_definition(
-            extension_definition=extension_definition,
-            component_descriptor_lookup=component_descriptor_lookup,
-            oci_client=oci_client,
-            templated_values=[
-                odgm.ExtensionInstanceValue(
-                    helm_chart_name=value_template.helm_chart_name,
-                    helm_attribute=value_template.helm_attribute,
-                    value=odgu.template_and_resolve_jsonpath(
-                        value=value_template.value,
-                        jsonpaths=outputs_jsonpath,
-                        substitution_context=odg.context,
-                        value_type=value_template.value_type,
-                        default_value=value_template.default,
-                    )
-                )
-                for value_template in extension_definition.installation.value_templates
-            ],
-        )
-        for extension_definition in extension_definitions
-    ]
-
-    for extension_instance in extension_instances:
-        status_for_extension[extension_instance.name].append('requested')
-        for installation_artefact in extension_instance.installation_artefacts:
-            artefact = installation_artefact.artefact
-
-            extension_artefact_name = _managed_resource_name(
-                odg_name=odg.name,
-                extension_name=extension_instance.name,
-                artefact_name=artefact.name,
-            )
-
-            if artefact.access.type is ocm.AccessType.LOCAL_BLOB:
-                content_iterator = ocm_util.local_blob_access_as_blob_descriptor(
-                    access=artefact.access,
-                    oci_client=oci_client,
-                    image_reference=artefact.access.imageReference,
-                ).content
-
-            elif artefact.access.type is ocm.AccessType.OCI_REGISTRY:
-                manifest = oci_client.manifest(
-                    image_reference=artefact.access.imageReference,
-                )
-
-                helm_chart_layer = None
-                for layer in manifest.layers:
-                    if layer.mediaType == HELM_CHART_MEDIA_TYPE:
-                        helm_chart_layer = layer
-                        break
-                else:
-                    handle_error(
-                        extension_name=extension_instance.name,
-                        error_msg=f'no helm chart layer found in {artefact.access.imageReference}',
-                    )
-                    continue
-
-                content_iterator = oci_client.blob(
-                    image_reference=artefact.access.imageReference,
-                    digest=helm_chart_layer.digest,
-                    stream=True,
-                ).iter_content(chunk_size=tarfile.RECORDSIZE)
-
-            else:
-                handle_error(
-                    extension_name=extension_instance.name,
-                    error_msg=f'unsupported artefact access type {artefact.access.type}'
-                )
-                continue
-
-            helm_charts_path = tempfile.TemporaryDirectory()
-
-            with tarfile.open(
-                fileobj=io.BytesIO(b''.join(content_iterator)),
-                mode='r:gz',
-                bufsize=tarfile.RECORDSIZE,
-            ) as tf:
-                tf.extractall(
-                    path=helm_charts_path.name,
-                    filter='tar',
-                )
-
-            helm_chart_path = os.path.join(
-                helm_charts_path.name,
-                installation_artefact.helm_chart_name,
-            )
-
-            default_values_path = os.path.join(helm_chart_path, 'values.yaml')
-            with open(default_values_path) as f:
-                default_values = yaml.safe_load(f)
-
-            installation_values_for_artefact = [
-                iv
-                for iv in extension_instance.values
-                if iv.helm_chart_name == artefact.name
-            ]
-
-            merged_installation_values = {}
-            for installation_value in installation_values_for_artefact:
-                odgu.patch_jsonpath_into_dict(
-                    input_dict=merged_installation_values,
-                    jsonpath_expr=installation_value.helm_attribute,
-                    value=installation_value.value
-                )
-
-            manifests = _helm_template(
-                values=util.merge_dicts(
-                    default_values,
-                    merged_installation_values,
-                ),
-                helm_path=helm_chart_path,
-            )
-
-            data = {
-                'apiVersion': odgm.ManagedResourceMeta.apiVersion,
-                'kind': odgm.ManagedResourceMeta.kind,
-                'metadata': {
-                    'name': extension_artefact_name,
-                    'namespace': odg.namespace,
-                    'labels': {
-                        ODG_NAME_LABEL: odg.name, # we need to find them again
-                    },
-                },
-                'spec': {
-                    'class': odgm.ManagedResourceClasses.EXTERNAL,
-                    'keepObjects': False,
-                    'secretRefs': [
-                        {
-                            'name': extension_artefact_name,
-                        }
-                    ],
-                }
-            }
-            custom_api = kubernetes_api.custom_kubernetes_api
-            create_or_update_resource(
-                create_namespaced_resource=custom_api.create_namespaced_custom_object,
-                patch_namespaced_resource=custom_api.patch_namespaced_custom_object,
-                data=data,
-                name=extension_artefact_name,
-                namespace=odg.namespace,
-                group=odgm.ManagedResourceMeta.group,
-                version=odgm.ManagedResourceMeta.version,
-                plural=odgm.ManagedResourceMeta.plural,
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        errors_for_extension = {
+            extension_definition.name: executor.submit(
+                _create_or_update_extension,
+                odg=odg,
+                extension_definition=extension_definition,
+                outputs_jsonpath=outputs_jsonpath,
+                component_descriptor_lookup=component_descriptor_lookup,
+                oci_client=oci_client,
+                kubernetes_api=kubernetes_api,
+                chart_cache=chart_cache,
             )
+            for extension_definition in extension_definitions
+        }
 
-            secret_body = kubernetes.client.V1Secret(
-                api_version='v1',
-                kind='Secret',
-                metadata=kubernetes.client.V1ObjectMeta(
-                    name=extension_artefact_name,
-                    namespace=odg.namespace,
-                    labels={
-                        ODG_NAME_LABEL: odg.name, # we need to find them again
-                    }
-                ),
-                data={
-                    'data.yaml': base64.b64encode(
-                        yaml.dump_all(manifests).encode()
-                    ).decode(),
-                },
-            )
-            core_api = kubernetes_api.core_kubernetes_api
-            create_or_update_resource(
-                create_namespaced_resource=core_api.create_namespaced_secret,
-                patch_namespaced_resource=core_api.patch_namespaced_secret,
-                data=secret_body.to_dict(),
-                name=extension_artefact_name,
-                namespace=odg.namespace,
-            )
+    encountered_error = False
+    for extension_name, errors in errors_for_extension.items():
+        status_for_extension[extension_name].append('requested')
 
-            helm_charts_path.cleanup()
+        # re-raises unexpected errors, which are handled by the caller
+        if errors := errors.result():
+            status_for_extension[extension_name].extend(errors)
+            encountered_error = True
 
     return status_for_extension, encountered_error
 
@@ -491,6 +493,7 @@ def reconcile(
     component_descriptor_lookup,
     kubernetes_api: k8s.util.KubernetesApi,
     oci_client: oci.client.Client,
+    chart_cache: odgh.ChartCache,
     group: str= odgm.ODGMeta.group,
     plural: str = odgm.ODGMeta.plural,
     resource_version: str='',
@@ -656,6 +659,7 @@ def reconcile(
                         component_descriptor_lookup=component_descriptor_lookup,
                         oci_client=oci_client,
                         kubernetes_api=kubernetes_api,
+                        chart_cache=chart_cache,
                     )
 
                     desired_managed_resource_names = [
@@ -781,6 +785,7 @@ if __name__ == '__main__':
     parser.add_argument('--kubeconfig')
     parser.add_argument('--extension-definition-file')
     parser.add_argument('--ocm-cache-path', default='./cache/ocm')
+    parser.add_argument('--helm-chart-cache-path', default='./cache/helm-charts')
     parser.add_argument('--debug', default=False, action='store_true')
     parser.add_argument(
         '--extension',
@@ -877,6 +882,7 @@ if __name__ == '__main__':
 
     logger.info(f'known extension definitions: {[e.name for e in extension_definitions]}')
     kubernetes_api = k8s.util.kubernetes_api(kubeconfig_path=parsed.kubeconfig)
+    chart_cache = odgh.ChartCache(cache_dir=parsed.helm_chart_cache_path)
 
     while True:
         reconcile(
@@ -885,4 +891,5 @@ if __name__ == '__main__':
             component_descriptor_lookup=component_descriptor_lookup,
             oci_client=oci_client,
             kubernetes_api=kubernetes_api,
+            chart_cache=chart_cache,
         )
@@ -0,0 +1,166 @@
+'''
+Helm chart handling of the ODG operator. Helm charts are extracted only once per chart layer
+digest, and rendered manifests are memoised by (chart digest, chart name, values digest), so that
+unchanged extensions neither cause repeated downloads nor repeated `helm template` invocations.
+'''
+import collections
+import collections.abc
+import hashlib
+import io
+import json
+import logging
+import os
+import shutil
+import subprocess
+import tarfile
+import tempfile
+import threading
+
+import cachetools
+import yaml
+
+
+logger = logging.getLogger(__name__)
+
+
+def helm_template(
+    helm_path: str,
+    values: dict,
+) -> collections.abc.Generator[dict, None, None]:
+    # values are written to a separate file as charts are shared between (concurrent) renderings
+    with tempfile.NamedTemporaryFile(
+        mode='w',
+        prefix='values-merged-',
+        suffix='.yaml',
+    ) as values_file:
+        values_file.write(yaml.safe_dump(values))
+        values_file.flush()
+
+        argv = [
+            'helm',
+            'template',
+            '--include-crds',
+            helm_path,
+            '-f',
+            values_file.name,
+        ]
+
+        completed_process = subprocess.run(
+            args=argv,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+    for manifest in yaml.safe_load_all(completed_process.stdout):
+        if manifest is None:
+            # gardener-resource-manager cannot process empty manifests
+            continue
+
+        yield manifest
+
+
+def values_digest(values: dict) -> str:
+    return hashlib.sha256(json.dumps(values, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ChartCache:
+    '''
+    Caches extracted helm charts (i.e. the content of a helm chart layer) in `cache_dir` by the
+    digest of the layer, and keeps up to `max_rendered_entries` rendered manifests in memory.
+
+    Charts are extracted into a temporary directory which is renamed once the extraction succeeded,
+    hence a partially extracted chart is never used. Concurrent requests for the same digest are
+    serialised, so the layer is only retrieved once.
+    '''
+    def __init__(
+        self,
+        cache_dir: str,
+        max_rendered_entries: int=128,
+    ):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self._rendered_manifests = cachetools.LRUCache(maxsize=max_rendered_entries)
+        self._lock = threading.Lock()
+        self._digest_locks = collections.defaultdict(threading.Lock)
+
+        self.extractions = 0
+        self.renderings = 0
+
+    def _digest_lock(self, digest: str) -> threading.Lock:
+        with self._lock:
+            return self._digest_locks[digest]
+
+    def charts_path(
+        self,
+        digest: str,
+        fetch: collections.abc.Callable[[], collections.abc.Iterable[bytes]],
+    ) -> str:
+        '''
+        returns the path of the extracted (gzip compressed) tar archive with the passed-in `digest`.
+        `fetch` is only called if the archive is not cached yet.
+
+        @raises ValueError: if the retrieved content does not match the (sha256) `digest`
+        '''
+        algorithm, _, hexdigest = digest.rpartition(':')
+        path = os.path.join(self.cache_dir, f'{algorithm or "sha256"}-{hexdigest}')
+
+        with self._digest_lock(digest):
+            if os.path.isdir(path):
+                return path
+
+            content = b''.join(fetch())
+
+            if algorithm in ('', 'sha256'):
+                if (actual_hexdigest := hashlib.sha256(content).hexdigest()) != hexdigest:
+                    raise ValueError(f'digest mismatch: {digest=}, actual=sha256:{actual_hexdigest}')
+
+            extraction_path = tempfile.mkdtemp(dir=self.cache_dir, prefix='.extracting-')
+            try:
+                with tarfile.open(
+                    fileobj=io.BytesIO(content),
+                    mode='r:gz',
+                    bufsize=tarfile.RECORDSIZE,
+                ) as tf:
+                    tf.extractall(
+                        path=extraction_path,
+                        filter='tar',
+                    )
+                os.rename(extraction_path, path)
+            finally:
+                # only exists if extraction failed
+                shutil.rmtree(extraction_path, ignore_errors=True)
+
+            self.extractions += 1
+            logger.info(f'extracted helm charts with {digest=}')
+
+        return path
+
+    def template(
+        self,
+        charts_digest: str,
+        charts_path: str,
+        helm_chart_name: str,
+        values: dict,
+    ) -> tuple[dict, ...]:
+        '''
+        renders the helm chart `helm_chart_name` (located in `charts_path`) using the passed-in
+        `values`. Renderings are memoised by (charts-digest, chart name, values digest).
+        '''
+        key = (charts_digest, helm_chart_name, values_digest(values))
+
+        with self._lock:
+            if (manifests := self._rendered_manifests.get(key)) is not None:
+                return manifests
+
+        manifests = tuple(helm_template(
+            helm_path=os.path.join(charts_path, helm_chart_name),
+            values=values,
+        ))
+
+        with self._lock:
+            self._rendered_manifests[key] = manifests
+            self.renderings += 1
+
+        return manifests
@@ -14,6 +14,7 @@ import oci.model
 import ocm
 import tarutil
 
+import blobcache
 import cnudie.retrieve
 import eol
 import k8s.logging
@@ -90,6 +91,7 @@ def determine_os_status(
 def determine_osid(
     resource: ocm.Resource,
     oci_client: oci.client.Client,
+    blob_cache: blobcache.BlobCache | None=None,
 ) -> odg.model.OperatingSystemId | None:
 
     if resource.type != ocm.ArtefactType.OCI_IMAGE:
@@ -104,12 +106,14 @@ def determine_osid(
     return base_image_osid(
         oci_client=oci_client,
         resource=resource,
+        blob_cache=blob_cache,
     )
 
 
 def base_image_osid(
     oci_client: oci.client.Client,
     resource: ocm.Resource,
+    blob_cache: blobcache.BlobCache | None=None,
 ) -> odg.model.OperatingSystemId:
     image_reference = resource.access.imageReference
 
@@ -128,13 +132,21 @@ def base_image_osid(
     last_os_info = None
 
     for layer in manifest.layers:
-        layer_blob = oci_client.blob(
-            image_reference=image_reference,
-            digest=layer.digest,
-        )
-        fileproxy = tarutil.FilelikeProxy(
-            layer_blob.iter_content(chunk_size=tarfile.BLOCKSIZE)
-        )
+        if blob_cache:
+            content = blob_cache.iter_oci_blob(
+                oci_client=oci_client,
+                image_reference=image_reference,
+                digest=layer.digest,
+                size=layer.size,
+                chunk_size=tarfile.BLOCKSIZE,
+            )
+        else:
+            content = oci_client.blob(
+                image_reference=image_reference,
+                digest=layer.digest,
+            ).iter_content(chunk_size=tarfile.BLOCKSIZE)
+
+        fileproxy = tarutil.FilelikeProxy(content)
         tf = tarfile.open(fileobj=fileproxy, mode='r|*')
         if (os_info := osidscan.determine_osinfo(tf)):
             last_os_info = os_info
@@ -235,6 +247,7 @@ def process_artefact(
     delivery_client: delivery.client.DeliveryServiceClient,
     oci_client: oci.client.Client,
     eol_client: eol.EolClient,
+    blob_cache: blobcache.BlobCache | None=None,
     **kwargs,
 ):
     if not osid_finding_config.matches(artefact):
@@ -257,6 +270,7 @@ def process_artefact(
     osid = determine_osid(
         resource=resource,
         oci_client=oci_client,
+        blob_cache=blob_cache,
     )
 
     logger.info(f'uploading os-info for {artefact}')
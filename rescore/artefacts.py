@@ -2,7 +2,6 @@ import asyncio
 import collections.abc
 import dataclasses
 import datetime
-import functools
 import http
 import json
 import logging
@@ -17,6 +16,7 @@ import consts
 import features
 import deliverydb.model as dm
 import deliverydb.util as du
+import executors
 import k8s.backlog
 import k8s.util
 import ocm_util
@@ -76,17 +76,11 @@ async def _find_artefact_metadata(
 ) -> list[odg.model.ArtefactMetadata]:
     db_statement = sa.select(dm.ArtefactMetaData).where(
         sa.and_(
-            dm.ArtefactMetaData.component_name == artefact.component_name,
-            sa.or_(
-                dm.ArtefactMetaData.component_version == sa.null(),
-                dm.ArtefactMetaData.component_version == artefact.component_version,
-            ),
-            dm.ArtefactMetaData.artefact_kind == artefact.artefact_kind,
-            dm.ArtefactMetaData.artefact_name == artefact.artefact.artefact_name,
-            dm.ArtefactMetaData.artefact_version == artefact.artefact.artefact_version,
-            dm.ArtefactMetaData.artefact_type == artefact.artefact.artefact_type,
-            dm.ArtefactMetaData.artefact_extra_id_normalised
-                == artefact.artefact.normalised_artefact_extra_id,
+            # entries might not specify the component version (e.g. deduplicated BDBA findings)
+            dm.ArtefactMetaData.artefact_key.in_((
+                du.artefact_key(artefact),
+                du.artefact_key(dataclasses.replace(artefact, component_version=None)),
+            )),
             dm.ArtefactMetaData.type != odg.model.Datatype.RESCORING,
             sa.or_(
                 not type_filter,
@@ -245,13 +239,21 @@ async def _iter_rescoring_proposals(
     '''
 
     seen_ids = set()
-    loop = asyncio.get_running_loop()
 
-    for am in artefact_metadata:
-        if (
-            am.meta.type == odg.model.Datatype.STRUCTURE_INFO
-            or am.id in seen_ids
-        ):
+    findings = [
+        am for am in artefact_metadata
+        if am.meta.type != odg.model.Datatype.STRUCTURE_INFO
+    ]
+    # the rescorings are indexed once and matched against the findings in chunks (instead of
+    # scheduling one executor task per finding)
+    rescorings_for_findings = await executors.map_chunks_in_lane(
+        executors.ExecutorLane.CPU,
+        rescore.utility.RescoringIndex(rescorings=rescorings).rescorings_for_findings,
+        findings,
+    )
+
+    for am, current_rescorings in zip(findings, rescorings_for_findings):
+        if am.id in seen_ids:
             continue
 
         for finding_cfg in finding_cfgs:
@@ -261,11 +263,6 @@ async def _iter_rescoring_proposals(
             # we checked this already earlier, all types must have a correspondig configuration
             raise RuntimeError('this is a bug, this line should never be reached')
 
-        current_rescorings = await loop.run_in_executor(None, functools.partial(
-            rescore.utility.rescorings_for_finding_by_specificity,
-            finding=am,
-            rescorings=rescorings,
-        ))
         severity = am.data.severity
 
         if current_rescorings:
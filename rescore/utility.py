@@ -1,3 +1,4 @@
+import collections
 import collections.abc
 import datetime
 import re
@@ -12,72 +13,62 @@ import odg.model
 import rescore.model
 
 
-def _iter_rescorings_for_finding(
-    finding: odg.model.ArtefactMetadata,
-    rescorings: collections.abc.Iterable[odg.model.ArtefactMetadata],
-) -> collections.abc.Generator[odg.model.ArtefactMetadata, None, None]:
-    for rescoring in rescorings:
-        if rescoring.data.referenced_type != finding.meta.type:
-            continue
+type RescoringIndexKey = tuple[str, str | None, str | None, collections.abc.Hashable]
 
-        if rescoring.artefact.artefact_kind != finding.artefact.artefact_kind:
-            continue
-
-        if rescoring.artefact.artefact.artefact_type != finding.artefact.artefact.artefact_type:
-            continue
 
-        if (
-            rescoring.artefact.component_name
-            and rescoring.artefact.component_name != finding.artefact.component_name
-        ):
-            continue
+def _finding_identity(
+    finding_type: str,
+    finding: object,
+) -> collections.abc.Hashable:
+    '''
+    Returns the attributes of the `finding` (either the data of a finding or the finding of a
+    rescoring) which must be equal for a rescoring to match a finding.
+    '''
+    if finding_type == odg.model.Datatype.VULNERABILITY_FINDING:
+        return finding.package_name, finding.cve
 
-        if (
-            rescoring.artefact.component_version
-            and finding.artefact.component_version
-            and rescoring.artefact.component_version != finding.artefact.component_version
-        ):
-            continue
+    if finding_type == odg.model.Datatype.LICENSE_FINDING:
+        return finding.package_name, finding.license.name
 
-        if (
-            rescoring.artefact.artefact.artefact_name
-            and rescoring.artefact.artefact.artefact_name != finding.artefact.artefact.artefact_name
-        ):
-            continue
+    return finding.key
 
-        if (
-            rescoring.artefact.artefact.artefact_version
-            and rescoring.artefact.artefact.artefact_version
-                != finding.artefact.artefact.artefact_version
-        ):
-            continue
 
-        if (
-            rescoring.artefact.artefact.artefact_extra_id
-            and rescoring.artefact.artefact.normalised_artefact_extra_id
-                != finding.artefact.artefact.normalised_artefact_extra_id
-        ):
-            continue
+def _rescoring_matches_scope(
+    rescoring: odg.model.ArtefactMetadata,
+    finding: odg.model.ArtefactMetadata,
+) -> bool:
+    '''
+    Checks those properties of the artefact of the `rescoring` which are optional, i.e. which are
+    only considered if they are set for the rescoring (depending on its scope).
+    '''
+    if (
+        rescoring.artefact.component_version
+        and finding.artefact.component_version
+        and rescoring.artefact.component_version != finding.artefact.component_version
+    ):
+        return False
 
-        if finding.meta.type == odg.model.Datatype.VULNERABILITY_FINDING:
-            if (
-                rescoring.data.finding.cve != finding.data.cve
-                or rescoring.data.finding.package_name != finding.data.package_name
-            ):
-                continue
+    if (
+        rescoring.artefact.artefact.artefact_name
+        and rescoring.artefact.artefact.artefact_name != finding.artefact.artefact.artefact_name
+    ):
+        return False
 
-        elif finding.meta.type == odg.model.Datatype.LICENSE_FINDING:
-            if (
-                rescoring.data.finding.license.name != finding.data.license.name
-                or rescoring.data.finding.package_name != finding.data.package_name
-            ):
-                continue
+    if (
+        rescoring.artefact.artefact.artefact_version
+        and rescoring.artefact.artefact.artefact_version
+            != finding.artefact.artefact.artefact_version
+    ):
+        return False
 
-        else:
-            if rescoring.data.finding.key != finding.data.key:
-                continue
+    if (
+        rescoring.artefact.artefact.artefact_extra_id
+        and rescoring.artefact.artefact.normalised_artefact_extra_id
+            != finding.artefact.artefact.normalised_artefact_extra_id
+    ):
+        return False
 
-        yield rescoring
+    return True
 
 
 def _specificity_of_rescoring(
@@ -105,6 +96,113 @@ def _specificity_of_rescoring(
     return odg.findings.RescoringSpecificity.SINGLE
 
 
+class RescoringIndex:
+    '''
+    Index of rescorings which is intended to be built once per set of artefacts and to be used to
+    retrieve the matching rescorings of many findings. Rescorings are indexed by the properties
+    which must match a finding exactly, i.e. finding type, artefact kind, artefact type and the
+    identity of the finding (e.g. package name and CVE for vulnerabilities, license name for
+    licenses or the finding key for other finding types). Each index entry is additionally split by
+    component name, so that only the rescorings of the finding's component and those of "global"
+    scope (no component name) must be checked for the remaining (optional) properties.
+    '''
+    def __init__(
+        self,
+        rescorings: collections.abc.Iterable[odg.model.ArtefactMetadata]=(),
+    ):
+        self._rescorings: dict[
+            RescoringIndexKey,
+            dict[str | None, list[odg.model.ArtefactMetadata]],
+        ] = collections.defaultdict(lambda: collections.defaultdict(list))
+        self._len = 0
+
+        for rescoring in rescorings:
+            self._rescorings[self._key(
+                artefact_metadata=rescoring,
+                finding_type=rescoring.data.referenced_type,
+                finding=rescoring.data.finding,
+            )][rescoring.artefact.component_name or None].append(rescoring)
+            self._len += 1
+
+        for rescorings_by_component_name in self._rescorings.values():
+            for rescorings_for_component_name in rescorings_by_component_name.values():
+                # most specific (and latest) rescoring first
+                rescorings_for_component_name.sort(
+                    key=lambda rescoring: (
+                        _specificity_of_rescoring(rescoring=rescoring),
+                        rescoring.meta.creation_date,
+                    ),
+                    reverse=True,
+                )
+
+    @staticmethod
+    def _key(
+        artefact_metadata: odg.model.ArtefactMetadata,
+        finding_type: str,
+        finding: object,
+    ) -> RescoringIndexKey:
+        return (
+            finding_type,
+            artefact_metadata.artefact.artefact_kind,
+            artefact_metadata.artefact.artefact.artefact_type,
+            _finding_identity(
+                finding_type=finding_type,
+                finding=finding,
+            ),
+        )
+
+    def __len__(self) -> int:
+        return self._len
+
+    def rescorings_for_finding(
+        self,
+        finding: odg.model.ArtefactMetadata,
+    ) -> tuple[odg.model.ArtefactMetadata]:
+        '''
+        Returns all rescorings which match the given `finding`, ordered by their specificity
+        (greatest specificity first and if the specificity is the same, the latest rescoring wins).
+        '''
+        if not self._len:
+            return ()
+
+        rescorings_by_component_name = self._rescorings.get(self._key(
+            artefact_metadata=finding,
+            finding_type=finding.meta.type,
+            finding=finding.data,
+        ))
+
+        if not rescorings_by_component_name:
+            return ()
+
+        component_name = finding.artefact.component_name
+        # rescorings with a component name are always more specific than "global" rescorings
+        candidates = (
+            *(rescorings_by_component_name.get(component_name, ()) if component_name else ()),
+            *rescorings_by_component_name.get(None, ()),
+        )
+
+        return tuple(
+            rescoring for rescoring in candidates
+            if _rescoring_matches_scope(
+                rescoring=rescoring,
+                finding=finding,
+            )
+        )
+
+    def rescorings_for_findings(
+        self,
+        findings: collections.abc.Iterable[odg.model.ArtefactMetadata],
+    ) -> list[tuple[odg.model.ArtefactMetadata]]:
+        '''
+        Batch variant of `rescorings_for_finding` which returns the matching rescorings for each of
+        the `findings` (in the same order).
+        '''
+        return [
+            self.rescorings_for_finding(finding=finding)
+            for finding in findings
+        ]
+
+
 def rescorings_for_finding_by_specificity(
     finding: odg.model.ArtefactMetadata,
     rescorings: collections.abc.Iterable[odg.model.ArtefactMetadata],
@@ -113,20 +211,11 @@ def rescorings_for_finding_by_specificity(
     Returns all rescorings of `rescorings` which match the given `finding`. If multiple
     rescorings match the finding, they are ordered based on their specificity (greatest
     specificity first and if the specificity is the same, the latest rescorings wins).
-    '''
-    rescorings_for_finding = _iter_rescorings_for_finding(
-        finding=finding,
-        rescorings=rescorings,
-    )
 
-    return tuple(sorted(
-        rescorings_for_finding,
-        key=lambda rescoring: (
-            _specificity_of_rescoring(rescoring=rescoring),
-            rescoring.meta.creation_date,
-        ),
-        reverse=True,
-    ))
+    If rescorings have to be retrieved for multiple findings, a `RescoringIndex` should be created
+    once instead.
+    '''
+    return RescoringIndex(rescorings=rescorings).rescorings_for_finding(finding=finding)
 
 
 def find_cve_categorisation(
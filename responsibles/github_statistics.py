@@ -1,7 +1,10 @@
 import collections.abc
 import dataclasses
 import enum
+import hashlib
 import logging
+import os
+import threading
 import time
 import urllib.parse
 
@@ -9,7 +12,9 @@ import cachetools
 import github3
 import github3.orgs
 import github3.repos.repo
+import github3.users
 
+import caching
 import ctx_util
 import odg.model
 import paths
@@ -20,6 +25,32 @@ import util
 
 logger = logging.getLogger(__name__)
 
+# contributor statistics are persisted on the filesystem so that they survive restarts of the
+# in-memory caches (retrieving them is expensive for GitHub, hence the first request for a large
+# repository is usually answered with "202 - accepted")
+_contributor_statistics_cache = caching.TTLFilesystemCache(
+    ttl=60 * 60 * 24, # 24h
+    max_total_size_mib=256,
+)
+# GitHub users (as raw json) are persisted likewise, users change rarely
+_github_users_cache = caching.TTLFilesystemCache(
+    ttl=60 * 60 * 24 * 3, # 3 days
+    max_total_size_mib=64,
+)
+_github_users_cache_lock = threading.Lock()
+
+
+def _cache_path(
+    cache_name: str,
+    *key_parts: str,
+) -> str:
+    # cache dir is looked up upon each call so that it can be changed after import (e.g. in tests)
+    return os.path.join(
+        os.path.dirname(caching.default_cache_dir),
+        cache_name,
+        hashlib.sha1('|'.join(key_parts).encode('utf-8'), usedforsecurity=False).hexdigest(),
+    )
+
 
 class ResponsibleDeterminationConfidence(enum.Enum):
     POOR = 'poor'
@@ -105,6 +136,8 @@ def weight(
     Returns biased weight based on age in range ]0;1[
     `method` can either be "linear" or "sigmoid".
     `bias` is added to each returned weight.
+    `days_delta` may also be a numpy array, in which case an array of weights is returned (this is
+    preferable over single invocations as the sigmoid function is only fitted once).
     '''
 
     if method == 'linear':
@@ -146,13 +179,21 @@ def n_percentile_with_member_count(
     '''
     import numpy
 
+    usernames = list(usernames_values.keys())
+    values = numpy.fromiter(usernames_values.values(), dtype=float, count=len(usernames))
+
+    # calculate all candidate percentiles at once and the respective member counts
+    ns = range(50, 100, 1)
+    n_percentiles = numpy.percentile(values, ns)
+    contributor_counts = (values[numpy.newaxis, :] >= n_percentiles[:, numpy.newaxis]).sum(axis=1)
+
+    def in_percentile(n_percentile: float) -> list[str]:
+        return [u for u, v in zip(usernames, values) if v >= n_percentile]
+
     first_match = True
     first_count = None
 
-    for n in range(50, 100, 1):
-        n_percentile = numpy.percentile([value for value in usernames_values.values()], n)
-        in_percentile = [u for u, v in usernames_values.items() if v >= n_percentile]
-        contributor_count = len(in_percentile)
+    for n, n_percentile, contributor_count in zip(ns, n_percentiles, contributor_counts):
         if contributor_count > member_count:
             continue
         # get greatest n-th percentile with same member count
@@ -163,11 +204,10 @@ def n_percentile_with_member_count(
         if first_count == contributor_count:
             last_n = n
             last_n_percentile = n_percentile
-            last_in_percentile = in_percentile
 
         else:
             if last_n >= percentile_minimum:
-                return last_n, last_n_percentile, last_in_percentile
+                return last_n, last_n_percentile, in_percentile(last_n_percentile)
 
             # count would become smaller than target, but percentile minimun not reached
             # reduce count to have a smaller, more accurate determination
@@ -177,7 +217,7 @@ def n_percentile_with_member_count(
                 percentile_minimum=percentile_minimum,
             )
     else:
-        return last_n, last_n_percentile, last_in_percentile
+        return last_n, last_n_percentile, in_percentile(last_n_percentile)
 
 
 def global_stats(
@@ -202,6 +242,8 @@ def global_stats(
         upper limit for amount of responsibles, algo will reduce responsibles until reached
 
     '''
+    import numpy
+
     if not repo_stats:
         raise ValueError('not enough commits')
 
@@ -211,58 +253,55 @@ def global_stats(
     then = int(first_week['w'])
     repo_age_in_days = int((now - then) / 60 / 60 / 24)
 
+    # flatten weekly statistics of all contributors into columns (the number of weeks might differ
+    # between contributors), so that weights and totals can be calculated without python loops
+    weeks_counts = [len(r['weeks']) for r in repo_stats]
+    contributor_idx = numpy.repeat(numpy.arange(len(repo_stats)), weeks_counts)
+    weeks = numpy.array(
+        [
+            (int(week['w']), week['c'], week['a'], week['d'])
+            for r in repo_stats
+            for week in r['weeks']
+        ],
+        dtype=numpy.int64,
+    ).reshape(-1, 4)
+
+    # only consider weeks with commits
+    active = weeks[:, 1] != 0
+    contributor_idx = contributor_idx[active]
+    weeks = weeks[active]
+
+    # epoch (s) to days
+    delta = (now - weeks[:, 0]) // (60 * 60 * 24)
+    weights = weight(
+        method=weight_function_identifier,
+        days_delta=delta,
+        repo_age_days=repo_age_in_days,
+    )
+
+    usernames = [r['author']['login'] for r in repo_stats]
+
     # commits
-    total_weighted_commits = []
-    for r in repo_stats:
-        weighted_commit_count = 0
-        for week in r['weeks']:
-            if week['c'] != 0:
-                then = int(week['w'])
-                # epoch (s) to days
-                delta = int((now - then) / 60 / 60 / 24)
-                weighted_commit_count += weight(
-                    method=weight_function_identifier,
-                    days_delta=delta,
-                    repo_age_days=repo_age_in_days,
-                ) * week['c']
-        total_weighted_commits.append({
-            'username': r['author']['login'],
-            'commits': weighted_commit_count,
-        })
+    weighted_commits = numpy.bincount(
+        contributor_idx,
+        weights=weights * weeks[:, 1],
+        minlength=len(repo_stats),
+    )
 
     commit_n, commit_n_percentile, authors_in_commit_n_percentile = n_percentile_with_member_count(
         member_count=max_responsibles,
-        usernames_values={
-            e['username']: e['commits']
-            for e in total_weighted_commits
-        },
+        usernames_values=dict(zip(usernames, weighted_commits.tolist())),
         percentile_minimum=percentile_min,
     )
 
     # loc
-    total_weighted_loc = []
-    for r in repo_stats:
-        weighted_loc_count = 0
-        for week in r['weeks']:
-            if week['c'] != 0:
-                then = int(week['w'])
-                # epoch (s) to days
-                delta = int((now - then) / 60 / 60 / 24)
-                loc = week['a'] + week['d']
-                weighted_loc_count += weight(
-                    method=weight_function_identifier,
-                    days_delta=delta,
-                    repo_age_days=repo_age_in_days,
-                ) * loc
-        total_weighted_loc.append({
-            'username': r['author']['login'],
-            'loc': weighted_loc_count,
-        })
-
-    usernames_values = {
-        e['username']: e['loc']
-        for e in total_weighted_loc
-    }
+    weighted_loc = numpy.bincount(
+        contributor_idx,
+        weights=weights * (weeks[:, 2] + weeks[:, 3]),
+        minlength=len(repo_stats),
+    )
+
+    usernames_values = dict(zip(usernames, weighted_loc.tolist()))
 
     if not sum(usernames_values.values()):
         # github does not provide LoC statistics for all repositories (e.g. cc-utils)
@@ -276,11 +315,11 @@ def global_stats(
 
     return RepoStats(
         authors=repo_stats,
-        commit_total=sum(w['commits'] for w in total_weighted_commits),
+        commit_total=float(weighted_commits.sum()),
         commit_n=commit_n,
         commit_n_percentile=commit_n_percentile,
         authors_in_commit_n_percentile=authors_in_commit_n_percentile,
-        loc_total=sum(w['loc'] for w in total_weighted_loc),
+        loc_total=float(weighted_loc.sum()),
         loc_n=loc_n,
         loc_n_percentile=loc_n_percentile,
         authors_in_loc_n_percentile=authors_in_loc_n_percentile,
@@ -319,7 +358,7 @@ def heuristically_determine_responsibles(
     return (), ResponsibleDeterminationConfidence.UNKNOWN
 
 
-@cachetools.cached(cachetools.TTLCache(maxsize=200, ttl=60 * 60 * 24))
+@cachetools.cached(cachetools.TTLCache(maxsize=1024, ttl=60 * 60 * 24))
 def _org_members_from_repo_url(
     gh_api: github3.GitHub,
     repo_url: str,
@@ -378,6 +417,43 @@ def is_candidate_stat(
     return True
 
 
+def _github_user(
+    gh_api: github3.GitHub,
+    username: str,
+) -> github3.users.User | None:
+    '''
+    GitHub users are required both to determine their suspension status and their additional user
+    identifiers, hence they are cached (per GitHub instance) to save one request per responsible.
+    Users change rarely, so a long time-to-live is acceptable. They are persisted on the filesystem
+    (as raw json, which is bound to the session of the passed-in `gh_api` upon retrieval) so that
+    they are not retrieved again after a restart.
+    '''
+    cache_path = _cache_path('github-users', gh_api._github_url, username.lower())
+
+    try:
+        return github3.users.User(_github_users_cache[cache_path], gh_api.session)
+    except KeyError:
+        pass
+
+    if not (user := gh_api.user(username)):
+        return None
+
+    with _github_users_cache_lock:
+        _github_users_cache[cache_path] = user.as_dict()
+
+    return user
+
+
+def is_suspended(
+    gh_api: github3.GitHub,
+    username: str,
+) -> bool:
+    if not (user := _github_user(gh_api=gh_api, username=username)):
+        return False
+
+    return bool(user.as_dict().get('suspended_at'))
+
+
 def user_identifiers_for_responsible(
     username: str,
     repo_url: str,
@@ -391,7 +467,7 @@ def user_identifiers_for_responsible(
         github_hostname=github_hostname,
     )
 
-    gh_user = gh_api.user(username)
+    gh_user = _github_user(gh_api=gh_api, username=username)
     if gh_user:
         yield from responsibles.iter_additional_gh_user_identifier(gh_user)
 
@@ -404,10 +480,17 @@ def _negative_list() -> list[str]:
     return util.parse_yaml_file(paths.responsibles_username_negative_list_path)['usernames']
 
 
-@cachetools.cached(cachetools.TTLCache(maxsize=200, ttl=60 * 60 * 24)) # 24h
+@cachetools.cached(cachetools.TTLCache(maxsize=2048, ttl=60 * 60 * 24)) # 24h
 def repo_contributor_statistics(
     repo_url: str,
 ) -> list | None:
+    cache_path = _cache_path('github-contributor-statistics', repo_url)
+
+    try:
+        return _contributor_statistics_cache[cache_path]
+    except KeyError:
+        pass
+
     gh_api = secret_mgmt.github.github_api(
         secret_factory=ctx_util.secret_factory(),
         repo_url=repo_url,
@@ -425,11 +508,14 @@ def repo_contributor_statistics(
 
     res = gh_api._get(repo_api_url)
     if res.status_code == 200:
-        return res.json()
+        repo_stats = res.json()
+        # only persist complete statistics (GitHub responds with 202 while still calculating them)
+        _contributor_statistics_cache[cache_path] = repo_stats
+        return repo_stats
 
 
 # (60 * 60s * 24) == 24h
-@cachetools.cached(cachetools.TTLCache(maxsize=200, ttl=60 * 60 * 24))
+@cachetools.cached(cachetools.TTLCache(maxsize=2048, ttl=60 * 60 * 24))
 def user_identities(
     repo_url: str,
     heuristic_parameters: ResponsiblesDetectionHeuristicsParameters,
@@ -487,18 +573,12 @@ def user_identities(
         max_responsibles=heuristic_parameters.max_responsibles,
     )
 
-    def is_suspended(username: str) -> bool:
-        user = gh_api.user(username)
-        if user.as_dict().get('suspended_at'):
-            return True
-        return False
-
     # suspension status for user(name) requires dedicated github-api call
     # therefore, only consider for responsibles yielded by heuristic
     determined_responsibles = tuple(
         responsible
         for responsible in determined_responsibles
-        if not is_suspended(responsible)
+        if not is_suspended(gh_api=gh_api, username=responsible)
     )
 
     return tuple(
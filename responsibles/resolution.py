@@ -0,0 +1,133 @@
+'''
+Background resolution of responsibles which are determined using GitHub contributor statistics.
+GitHub computes those statistics asynchronously (it responds with HTTP 202 until they are
+available), hence resolving them must be re-attempted. Instead of having each client retry (and
+re-trigger the resolution), resolutions are run as background jobs which poll until the statistics
+are available. Concurrent resolutions of the same repository share one job.
+'''
+import asyncio
+import collections.abc
+import logging
+import time
+
+import ocm
+
+import executors
+import odg.model
+import responsibles
+
+
+logger = logging.getLogger(__name__)
+
+
+class ResponsiblesResolver:
+    '''
+    @param github_api_lookup:
+        used to look up the GitHub api for a repository url
+    @param poll_interval_seconds:
+        initial interval to re-attempt the resolution if statistics are still pending, the interval
+        is doubled for each attempt (up to `max_poll_interval_seconds`)
+    @param timeout_seconds:
+        jobs are stopped if statistics are still pending after this time
+    @param keep_result_seconds:
+        results of finished jobs are kept for this time, so that clients which retry after a
+        pending resolution (HTTP 202) receive the result without re-triggering the resolution
+    '''
+    def __init__(
+        self,
+        github_api_lookup: collections.abc.Callable,
+        poll_interval_seconds: float=2,
+        max_poll_interval_seconds: float=30,
+        timeout_seconds: float=600,
+        keep_result_seconds: float=300,
+    ):
+        self.github_api_lookup = github_api_lookup
+        self.poll_interval_seconds = poll_interval_seconds
+        self.max_poll_interval_seconds = max_poll_interval_seconds
+        self.timeout_seconds = timeout_seconds
+        self.keep_result_seconds = keep_result_seconds
+
+        self._jobs: dict[str, asyncio.Task] = {}
+
+    async def _resolve(
+        self,
+        source: ocm.Source,
+    ) -> tuple[odg.model.UserIdentity, ...] | None:
+        deadline = time.monotonic() + self.timeout_seconds
+        poll_interval_seconds = self.poll_interval_seconds
+
+        while True:
+            # resolving responsibles involves blocking requests towards GitHub
+            user_identities = await executors.run_in_lane(
+                executors.ExecutorLane.GITHUB,
+                responsibles.user_identities_from_source,
+                source=source,
+                github_api_lookup=self.github_api_lookup,
+            )
+
+            if user_identities is not None:
+                return tuple(user_identities)
+
+            if time.monotonic() + poll_interval_seconds > deadline:
+                logger.warning(f'github statistics still pending for {source.access.repoUrl=}')
+                return None
+
+            await asyncio.sleep(poll_interval_seconds)
+            poll_interval_seconds = min(poll_interval_seconds * 2, self.max_poll_interval_seconds)
+
+    def _job_done(
+        self,
+        key: str,
+        job: asyncio.Task,
+    ):
+        if job.cancelled() or job.exception() or job.result() is None:
+            # failed (or timed-out) resolutions are re-attempted upon the next request
+            self._jobs.pop(key, None)
+            return
+
+        def remove_job():
+            if self._jobs.get(key) is job:
+                del self._jobs[key]
+
+        asyncio.get_running_loop().call_later(self.keep_result_seconds, remove_job)
+
+    def resolve(
+        self,
+        source: ocm.Source,
+    ) -> asyncio.Task:
+        '''
+        returns the (possibly already running or finished) job resolving the user identities of the
+        given (GitHub) `source`
+        '''
+        key = source.access.repoUrl
+
+        if (job := self._jobs.get(key)):
+            return job
+
+        job = self._jobs[key] = asyncio.create_task(self._resolve(source=source))
+        job.add_done_callback(lambda job: self._job_done(key=key, job=job))
+
+        return job
+
+    async def user_identities(
+        self,
+        source: ocm.Source | None,
+        wait_seconds: float=5,
+    ) -> tuple[odg.model.UserIdentity, ...] | None:
+        '''
+        Returns user identities retrieved via GitHub contributor statistics. If the resolution does
+        not finish within `wait_seconds`, `None` is returned (the resolution is continued in the
+        background) which means the caller should retry at a later point in time.
+
+        @raises ValueError: if statistics are incomplete (see `user_identities_from_source`)
+        '''
+        if not source or ocm.AccessType(source.access.type) is not ocm.AccessType.GITHUB:
+            return ()
+
+        job = self.resolve(source=source)
+
+        try:
+            # the job is shared, hence it must not be cancelled if the waiting caller is
+            return await asyncio.wait_for(asyncio.shield(job), timeout=wait_seconds)
+        except TimeoutError:
+            return None
@@ -1,4 +1,5 @@
 import collections.abc
+import concurrent.futures
 import functools
 import logging
 
@@ -12,6 +13,7 @@ import odg.model
 import odg.util
 import paths
 import responsibles_extension.filters
+import responsibles_extension.strategies
 import secret_mgmt
 
 
@@ -37,9 +39,10 @@ def update_responsibles(
     finding_cfgs: collections.abc.Iterable[odg.findings.Finding],
     delivery_client: delivery.client.DeliveryServiceClient,
     secret_factory: secret_mgmt.SecretFactory,
+    team_members_cache: responsibles_extension.strategies.TeamMembersCache,
     **kwargs,
 ):
-    responsibles_artefacts = []
+    matching_rules = []
 
     for finding_cfg in finding_cfgs:
         finding_type = finding_cfg.type
@@ -53,35 +56,56 @@ def update_responsibles(
                 continue
 
             logger.info(f'rule "{rule.name}" will process {artefact} for {finding_type=}')
-
-            responsibles = []
-            for strategy in rule.strategies:
-                responsibles.extend(strategy.iter_responsibles(
-                    artefact=artefact,
-                    datatype=finding_type,
-                    secret_factory=secret_factory,
-                    delivery_client=delivery_client,
-                ))
-
-            responsibles_artefacts.append(odg.model.ArtefactMetadata(
-                artefact=artefact,
-                meta=odg.model.Metadata(
-                    datasource=odg.model.Datasource.RESPONSIBLES,
-                    type=odg.model.Datatype.RESPONSIBLES,
-                    responsibles=responsibles,
-                    assignee_mode=rule.assignee_mode,
-                ),
-                data=odg.model.ResponsibleInfo(
-                    referenced_type=finding_type,
-                ),
-            ))
-
+            matching_rules.append((finding_type, rule))
             break
         else:
             logger.warning(
                 f'did not find a matching rule for {artefact} and {finding_type=}, skipping...'
             )
 
+    def iter_responsibles(
+        strategy: responsibles_extension.strategies.StrategyBase,
+        finding_type: odg.model.Datatype,
+    ) -> list[odg.model.UserIdentity]:
+        return list(strategy.iter_responsibles(
+            artefact=artefact,
+            datatype=finding_type,
+            secret_factory=secret_factory,
+            delivery_client=delivery_client,
+            team_members_cache=team_members_cache,
+        ))
+
+    # strategies are independent of each other, hence they are evaluated concurrently
+    with concurrent.futures.ThreadPoolExecutor(max_workers=extension_cfg.max_workers) as executor:
+        strategies_responsibles = [
+            [
+                executor.submit(iter_responsibles, strategy=strategy, finding_type=finding_type)
+                for strategy in rule.strategies
+            ] for finding_type, rule in matching_rules
+        ]
+
+    responsibles_artefacts = []
+    for (finding_type, rule), strategy_responsibles in zip(
+        matching_rules,
+        strategies_responsibles,
+    ):
+        responsibles_artefacts.append(odg.model.ArtefactMetadata(
+            artefact=artefact,
+            meta=odg.model.Metadata(
+                datasource=odg.model.Datasource.RESPONSIBLES,
+                type=odg.model.Datatype.RESPONSIBLES,
+                responsibles=[
+                    responsible
+                    for future in strategy_responsibles
+                    for responsible in future.result()
+                ],
+                assignee_mode=rule.assignee_mode,
+            ),
+            data=odg.model.ResponsibleInfo(
+                referenced_type=finding_type,
+            ),
+        ))
+
     delivery_client.update_metadata(
         data=responsibles_artefacts,
     )
@@ -95,9 +119,26 @@ def main():
 
     finding_cfgs = odg.findings.Finding.from_file(findings_cfg_path)
 
+    if not (extensions_cfg_path := parsed_arguments.extensions_cfg_path):
+        extensions_cfg_path = paths.extensions_cfg_path()
+
+    extensions_cfg = odg.extensions_cfg.ExtensionsConfiguration.from_file(extensions_cfg_path)
+    if not (responsibles_cfg := extensions_cfg.find_extension_cfg(
+        service=odg.extensions_cfg.Services.RESPONSIBLES,
+    )):
+        logger.warning('did not find extension-cfg for responsibles, exiting...')
+        return
+
+    # team members are shared across backlog items
+    team_members_cache = responsibles_extension.strategies.TeamMembersCache(
+        ttl_seconds=responsibles_cfg.team_members_cache_ttl,
+        max_workers=responsibles_cfg.max_workers,
+    )
+
     update_responsibles_callback = functools.partial(
         update_responsibles,
         finding_cfgs=finding_cfgs,
+        team_members_cache=team_members_cache,
     )
 
     odg.util.process_backlog_items(
@@ -1,12 +1,15 @@
 import collections.abc
+import concurrent.futures
 import dataclasses
 import enum
-import time
+import threading
 import typing
 
+import cachetools
 import delivery.client
 import github.codeowners
 
+import github_util
 import odg.model
 import secret_mgmt
 import secret_mgmt.github
@@ -42,6 +45,144 @@ class GitHubTeamResponsible(Responsible):
     type: ResponsibleTypes = ResponsibleTypes.GITHUB_TEAM
 
 
+class TeamMembersCache:
+    '''
+    Caches the members of GitHub teams so that they are shared across artefacts and backlog items, as
+    team memberships rarely change. Concurrent lookups of the same team are coalesced. Teams are
+    resolved using one thread pool which is shared by all callers, so that the number of concurrent
+    resolutions is bounded regardless of how many threads are requesting team members. Requests
+    towards GitHub are issued via one `github_util.RequestScheduler` per GitHub api client, which
+    limits the request rate to prevent secondary rate limits.
+
+    @param ttl_seconds:
+        time after which team members are retrieved from GitHub again
+    @param max_workers:
+        the maximum number of teams being resolved concurrently
+    @param requests_per_minute:
+        the sustained rate of team resolutions per GitHub api client
+    @param max_teams:
+        the maximum number of cached teams
+    '''
+    def __init__(
+        self,
+        ttl_seconds: int=60 * 60,
+        max_workers: int=4,
+        requests_per_minute: int=60,
+        max_teams: int=1024,
+    ):
+        self.max_workers = max_workers
+        self.requests_per_minute = requests_per_minute
+
+        self._team_members = cachetools.TTLCache(maxsize=max_teams, ttl=ttl_seconds)
+        # keyed by the id of the github api the scheduler was created for, a scheduler references
+        # its github api, hence the id cannot be re-used as long as the scheduler is cached
+        self._request_schedulers: cachetools.LRUCache[int, github_util.RequestScheduler] = (
+            cachetools.LRUCache(maxsize=64)
+        )
+        self._lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, max_workers),
+            thread_name_prefix='team-members',
+        )
+
+    def _request_scheduler(
+        self,
+        org_url: str,
+        secret_factory: secret_mgmt.SecretFactory,
+    ) -> github_util.RequestScheduler:
+        gh_api = secret_mgmt.github.github_api(
+            secret_factory=secret_factory,
+            repo_url=org_url,
+        )
+
+        # github api is re-created once its credentials changed, in this case a new scheduler is
+        # created as well (so that schedulers are never shared across different github apis)
+        with self._lock:
+            if not (scheduler := self._request_schedulers.get(id(gh_api))):
+                scheduler = self._request_schedulers[id(gh_api)] = github_util.RequestScheduler(
+                    gh_api=gh_api,
+                    max_workers=self.max_workers,
+                    requests_per_minute=self.requests_per_minute,
+                )
+
+        return scheduler
+
+    def _resolve_team_members(
+        self,
+        responsible: GitHubTeamResponsible,
+        secret_factory: secret_mgmt.SecretFactory,
+    ) -> tuple[str, ...]:
+        team = github.codeowners.Team(responsible.teamname)
+
+        scheduler = self._request_scheduler(
+            org_url=util.urljoin(responsible.github_hostname, team.org_name),
+            secret_factory=secret_factory,
+        )
+
+        return scheduler.call(lambda: tuple(github.codeowners.resolve_team_members(
+            team=team,
+            github_api=scheduler.gh_api,
+            absent_ok=False,
+        )))
+
+    def team_members(
+        self,
+        responsible: GitHubTeamResponsible,
+        secret_factory: secret_mgmt.SecretFactory,
+    ) -> tuple[str, ...]:
+        key = (responsible.github_hostname.lower(), responsible.teamname.lower())
+
+        with self._lock:
+            if (team_members := self._team_members.get(key)) is not None:
+                is_resolver = False
+            else:
+                team_members = self._team_members[key] = concurrent.futures.Future()
+                is_resolver = True
+
+        if not is_resolver:
+            # either already resolved or currently being resolved by another thread
+            return team_members.result()
+
+        try:
+            team_members.set_result(self._resolve_team_members(
+                responsible=responsible,
+                secret_factory=secret_factory,
+            ))
+        except Exception as e:
+            # failed resolutions must not be cached
+            with self._lock:
+                if self._team_members.get(key) is team_members:
+                    del self._team_members[key]
+            team_members.set_exception(e)
+
+        return team_members.result()
+
+    def members_of_teams(
+        self,
+        responsibles: collections.abc.Sequence[GitHubTeamResponsible],
+        secret_factory: secret_mgmt.SecretFactory,
+    ) -> list[tuple[str, ...]]:
+        '''
+        resolves the members of the passed-in teams concurrently (using the shared thread pool) and
+        returns them in the same order
+        '''
+        if len(responsibles) <= 1 or self.max_workers <= 1:
+            return [
+                self.team_members(responsible=responsible, secret_factory=secret_factory)
+                for responsible in responsibles
+            ]
+
+        futures = [
+            self._executor.submit(
+                self.team_members,
+                responsible=responsible,
+                secret_factory=secret_factory,
+            ) for responsible in responsibles
+        ]
+
+        return [future.result() for future in futures]
+
+
 @dataclasses.dataclass
 class StrategyBase:
     type: StrategyTypes
@@ -52,6 +193,7 @@ class StrategyBase:
         datatype: odg.model.Datatype,
         secret_factory: secret_mgmt.SecretFactory,
         delivery_client: delivery.client.DeliveryServiceClient,
+        team_members_cache: TeamMembersCache,
     ) -> collections.abc.Generator[odg.model.UserIdentity, None, None]:
         raise NotImplementedError('must be implemented by its subclasses')
 
@@ -66,6 +208,7 @@ class ComponentResponsibles(StrategyBase):
         datatype: odg.model.Datatype,
         secret_factory: secret_mgmt.SecretFactory,
         delivery_client: delivery.client.DeliveryServiceClient,
+        team_members_cache: TeamMembersCache,
     ) -> collections.abc.Generator[odg.model.UserIdentity, None, None]:
         user_identities, _ = delivery_client.component_responsibles(
             name=artefact.component_name,
@@ -105,7 +248,17 @@ class StaticResponsibles(StrategyBase):
         datatype: odg.model.Datatype,
         secret_factory: secret_mgmt.SecretFactory,
         delivery_client: delivery.client.DeliveryServiceClient,
+        team_members_cache: TeamMembersCache,
     ) -> collections.abc.Generator[odg.model.UserIdentity, None, None]:
+        team_responsibles = [
+            responsible for responsible in self.responsibles
+            if responsible.type is ResponsibleTypes.GITHUB_TEAM
+        ]
+        members_of_teams = iter(team_members_cache.members_of_teams(
+            responsibles=team_responsibles,
+            secret_factory=secret_factory,
+        ))
+
         for responsible in self.responsibles:
             if responsible.type is ResponsibleTypes.GITHUB_USER:
                 yield odg.model.UserIdentity(
@@ -117,18 +270,7 @@ class StaticResponsibles(StrategyBase):
                 )
 
             elif responsible.type is ResponsibleTypes.GITHUB_TEAM:
-                team = github.codeowners.Team(responsible.teamname)
-
-                github_api = secret_mgmt.github.github_api(
-                    secret_factory=secret_factory,
-                    repo_url=util.urljoin(responsible.github_hostname, team.org_name),
-                )
-
-                for username in github.codeowners.resolve_team_members(
-                    team=team,
-                    github_api=github_api,
-                    absent_ok=False,
-                ):
+                for username in next(members_of_teams):
                     yield odg.model.UserIdentity(
                         identifiers=[odg.model.GithubUser(
                             source=odg.model.Datasource.RESPONSIBLES,
@@ -136,7 +278,6 @@ class StaticResponsibles(StrategyBase):
                             github_hostname=responsible.github_hostname,
                         )],
                     )
-                time.sleep(3) # prevent GitHub secondary rate limits
 
             else:
                 raise ValueError(f'unknown {responsible.type=}')
@@ -1,9 +1,17 @@
+import collections
+import collections.abc
 import dataclasses
+import datetime
+import hashlib
 import logging
 import re
+import threading
+import time
 
 import github3.github
 import github3.session
+import requests
+import requests.adapters
 
 import http_requests
 
@@ -192,83 +200,394 @@ def legacy_github_api(
     return github_api
 
 
-def github_api(
-    secret_factory: secret_mgmt.SecretFactory,
-    repo_url: str,
-    absent_ok: bool=False,
-) -> github3.github.GitHub | None:
-    session = http_requests.mount_default_adapter(
-        session=github3.session.GitHubSession(),
-        flags=http_requests.AdapterFlag.RETRY,
-        max_pool_size=16, # increase with care, might cause github api "secondary-rate-limit"
-    )
+@dataclasses.dataclass
+class GitHubClientMetrics:
+    '''
+    request statistics of a single GitHub api client, collected from the responses of the client's
+    session. The quota reflects the rate-limit headers of the most recent response.
+    '''
+    requests_total: collections.Counter = dataclasses.field(default_factory=collections.Counter)
+    request_latency_seconds_sum: float = 0
+    token_exchanges_total: int = 0
+    quota_limit: int | None = None
+    quota_remaining: int | None = None
+
+
+class GitHubClientObserver:
+    '''
+    is notified about the responses and token exchanges of the clients of a `GitHubClientRegistry`,
+    e.g. to record them as prometheus metrics (see `middleware.prometheus`)
+    '''
+    def record_response(
+        self,
+        hostname: str,
+        installation: int | str,
+        status: int,
+        latency_seconds: float,
+        quota_remaining: int | None,
+        quota_limit: int | None,
+    ):
+        pass
+
+    def record_token_exchange(
+        self,
+        hostname: str,
+        installation: int | str,
+    ):
+        pass
 
-    github_app_cfg = find_app_cfg(
-        secret_factory=secret_factory,
-        repo_url=repo_url,
-        absent_ok=True,
-    )
 
-    if not github_app_cfg:
-        # XXX remove this case eventually when removing support for GitHub service accounts
-        return legacy_github_api(
+@dataclasses.dataclass
+class _CachedGitHubClient:
+    github_api: github3.github.GitHub
+    credentials_digest: str
+    metrics: GitHubClientMetrics
+    lock: threading.Lock = dataclasses.field(default_factory=threading.Lock)
+    installation_id: int | None = None
+    accessible_repos: frozenset[str] | None = None
+    accessible_repos_retrieved_at: float | None = None
+
+
+def _credentials_digest(*credentials) -> str:
+    return hashlib.sha256('\n'.join(str(c) for c in credentials).encode()).hexdigest()
+
+
+class GitHubClientRegistry:
+    '''
+    Process-wide registry of authenticated GitHub api clients, keyed by (hostname, installation-id)
+    for GitHub Apps and by (hostname, username) for (legacy) service accounts. Clients of the same
+    hostname share a single HTTP connection pool, installation tokens are re-used until shortly
+    before they expire, and the repositories accessible by an installation are cached for
+    `accessible_repos_ttl_seconds`. Changed credentials (e.g. a rotated private key) result in a
+    new client.
+
+    @param max_pool_size:
+        maximum number of connections per hostname, increase with care, might cause GitHub api
+        "secondary-rate-limit"
+    @param token_refresh_margin_seconds:
+        installation tokens are refreshed once they expire within this margin
+    @param accessible_repos_ttl_seconds:
+        interval after which the repositories accessible by an installation are retrieved again
+    '''
+    def __init__(
+        self,
+        max_pool_size: int=16,
+        token_refresh_margin_seconds: int=300,
+        accessible_repos_ttl_seconds: int=600,
+    ):
+        self.max_pool_size = max_pool_size
+        self.token_refresh_margin_seconds = token_refresh_margin_seconds
+        self.accessible_repos_ttl_seconds = accessible_repos_ttl_seconds
+
+        self._adapters: dict[str, requests.adapters.HTTPAdapter] = {}
+        self._clients: dict[tuple[str, int | str], _CachedGitHubClient] = {}
+        self._observers: list[GitHubClientObserver] = []
+        self._lock = threading.Lock()
+
+    def add_observer(
+        self,
+        observer: GitHubClientObserver,
+    ):
+        with self._lock:
+            if observer not in self._observers:
+                self._observers.append(observer)
+
+    def _adapter(
+        self,
+        hostname: str,
+    ) -> requests.adapters.HTTPAdapter:
+        with self._lock:
+            if not (adapter := self._adapters.get(hostname)):
+                session = http_requests.mount_default_adapter(
+                    session=requests.Session(),
+                    flags=http_requests.AdapterFlag.RETRY,
+                    max_pool_size=self.max_pool_size,
+                )
+                adapter = self._adapters[hostname] = session.get_adapter('https://')
+
+            return adapter
+
+    def _session(
+        self,
+        key: tuple[str, int | str],
+        metrics: GitHubClientMetrics,
+    ) -> github3.session.GitHubSession:
+        hostname, installation = key
+        session = github3.session.GitHubSession()
+
+        adapter = self._adapter(hostname=hostname)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        metrics_lock = threading.Lock()
+
+        def record_response(response: requests.Response, *args, **kwargs):
+            if (quota_remaining := response.headers.get('X-RateLimit-Remaining')) is not None:
+                quota_remaining = int(quota_remaining)
+            if (quota_limit := response.headers.get('X-RateLimit-Limit')) is not None:
+                quota_limit = int(quota_limit)
+            latency_seconds = response.elapsed.total_seconds()
+
+            with metrics_lock:
+                metrics.requests_total[response.status_code] += 1
+                metrics.request_latency_seconds_sum += latency_seconds
+
+                if quota_remaining is not None:
+                    metrics.quota_remaining = quota_remaining
+                if quota_limit is not None:
+                    metrics.quota_limit = quota_limit
+
+            with self._lock:
+                observers = tuple(self._observers)
+
+            for observer in observers:
+                observer.record_response(
+                    hostname=hostname,
+                    installation=installation,
+                    status=response.status_code,
+                    latency_seconds=latency_seconds,
+                    quota_remaining=quota_remaining,
+                    quota_limit=quota_limit,
+                )
+
+        session.hooks['response'].append(record_response)
+
+        return session
+
+    def _cached_client(
+        self,
+        key: tuple[str, int | str],
+        credentials_digest: str,
+        create_github_api: collections.abc.Callable[
+            [github3.session.GitHubSession],
+            github3.github.GitHub | None,
+        ],
+    ) -> _CachedGitHubClient | None:
+        with self._lock:
+            client = self._clients.get(key)
+
+        if client and client.credentials_digest == credentials_digest:
+            return client
+
+        metrics = client.metrics if client else GitHubClientMetrics()
+        github_api = create_github_api(self._session(
+            key=key,
+            metrics=metrics,
+        ))
+
+        if not github_api:
+            return None
+
+        client = _CachedGitHubClient(
+            github_api=github_api,
+            credentials_digest=credentials_digest,
+            metrics=metrics,
+        )
+
+        with self._lock:
+            # another thread might have created the client in the meantime, prefer that one to
+            # avoid needless token exchanges
+            if (
+                (existing_client := self._clients.get(key))
+                and existing_client.credentials_digest == credentials_digest
+            ):
+                return existing_client
+
+            self._clients[key] = client
+
+        return client
+
+    def _token_expires_soon(
+        self,
+        client: _CachedGitHubClient,
+    ) -> bool:
+        auth = client.github_api.session.auth
+
+        if not isinstance(auth, github3.session.AppInstallationTokenAuth):
+            return True
+
+        remaining = auth.expires_at - datetime.datetime.now(tz=datetime.timezone.utc)
+        return remaining.total_seconds() < self.token_refresh_margin_seconds
+
+    def _login_as_app_installation(
+        self,
+        client: _CachedGitHubClient,
+        github_app_cfg: GitHubApp,
+        installation_id: int,
+    ):
+        with client.lock:
+            if client.installation_id == installation_id and not self._token_expires_soon(client):
+                return
+
+            logger.debug(f'retrieving GitHub App installation token for {installation_id=}')
+            client.github_api.login_as_app_installation(
+                private_key_pem=github_app_cfg.private_key.encode('utf-8'),
+                app_id=str(github_app_cfg.app_id), # recent PyJWT versions require a str issuer
+                installation_id=installation_id,
+            )
+            client.installation_id = installation_id
+            client.metrics.token_exchanges_total += 1
+
+        with self._lock:
+            observers = tuple(self._observers)
+
+        for observer in observers:
+            observer.record_token_exchange(
+                hostname=github_app_cfg.hostname.lower(),
+                installation=installation_id,
+            )
+
+    def _accessible_repos(
+        self,
+        client: _CachedGitHubClient,
+    ) -> frozenset[str]:
+        with client.lock:
+            if (
+                client.accessible_repos is None
+                or time.monotonic() - client.accessible_repos_retrieved_at
+                    > self.accessible_repos_ttl_seconds
+            ):
+                client.accessible_repos = frozenset(
+                    repo.name
+                    for repo in client.github_api.app_installation_repos()
+                )
+                client.accessible_repos_retrieved_at = time.monotonic()
+
+            return client.accessible_repos
+
+    def github_api(
+        self,
+        secret_factory: secret_mgmt.SecretFactory,
+        repo_url: str,
+        absent_ok: bool=False,
+    ) -> github3.github.GitHub | None:
+        github_app_cfg = find_app_cfg(
             secret_factory=secret_factory,
             repo_url=repo_url,
-            session=session,
-            absent_ok=absent_ok,
+            absent_ok=True,
         )
 
-    if not github_app_cfg:
-        # this conditional branch will become effectively once above legacy lookup is removed
-        if absent_ok:
-            return None
-
-        raise ValueError(f'did not find a GitHub App cfg for {repo_url=}')
+        if not github_app_cfg:
+            # XXX remove this case eventually when removing support for GitHub service accounts
+            github_cfg = find_cfg(
+                secret_factory=secret_factory,
+                repo_url=repo_url,
+                absent_ok=absent_ok,
+            )
+
+            if not github_cfg:
+                return None
+
+            client = self._cached_client(
+                key=(github_cfg.hostname.lower(), github_cfg.username),
+                credentials_digest=_credentials_digest(
+                    github_cfg.api_url,
+                    github_cfg.auth_token,
+                    github_cfg.tls_verify,
+                ),
+                create_github_api=lambda session: legacy_github_api(
+                    secret_factory=secret_factory,
+                    repo_url=repo_url,
+                    session=session,
+                    absent_ok=absent_ok,
+                ),
+            )
+
+            if not client:
+                return None
+
+            return client.github_api
+
+        installation_id = github_app_cfg.find_installation_id(
+            repo_url=repo_url,
+            absent_ok=False,
+        )
 
-    if github_app_cfg.hostname.lower() == 'github.com':
-        github_api = github3.github.GitHub(
-            session=session,
+        def create_github_api(session: github3.session.GitHubSession) -> github3.github.GitHub:
+            if github_app_cfg.hostname.lower() == 'github.com':
+                return github3.github.GitHub(
+                    session=session,
+                )
+
+            github_api = github3.github.GitHubEnterprise(
+                url=github_app_cfg.http_url,
+                verify=github_app_cfg.tls_verify,
+                session=session,
+            )
+            github_api._github_url = github_app_cfg.api_url
+            # honour configured api-url (github3 derives it from the http-url otherwise)
+            github_api.session.base_url = github_app_cfg.api_url
+
+            return github_api
+
+        client = self._cached_client(
+            key=(github_app_cfg.hostname.lower(), installation_id),
+            credentials_digest=_credentials_digest(
+                github_app_cfg.api_url,
+                github_app_cfg.app_id,
+                github_app_cfg.private_key,
+                github_app_cfg.tls_verify,
+            ),
+            create_github_api=create_github_api,
         )
-    else:
-        github_api = github3.github.GitHubEnterprise(
-            url=github_app_cfg.http_url,
-            verify=github_app_cfg.tls_verify,
-            session=session,
+
+        self._login_as_app_installation(
+            client=client,
+            github_app_cfg=github_app_cfg,
+            installation_id=installation_id,
         )
-        github_api._github_url = github_app_cfg.api_url
 
-    private_key_pem = github_app_cfg.private_key.encode('utf-8')
-    installation_id = github_app_cfg.find_installation_id(
-        repo_url=repo_url,
-        absent_ok=False,
-    )
+        parsed_repo_url = util.urlparse(repo_url)
+        repo_path_parts = parsed_repo_url.path.strip('/').split('/')
 
-    github_api.login_as_app_installation(
-        private_key_pem=private_key_pem,
-        app_id=github_app_cfg.app_id,
-        installation_id=installation_id,
-    )
+        if len(repo_path_parts) <= 1:
+            # there is no specific repository requested, so we don't have to check for specific
+            # access
+            return client.github_api
 
-    parsed_repo_url = util.urlparse(repo_url)
-    repo_path_parts = parsed_repo_url.path.strip('/').split('/')
+        repo = repo_path_parts[1]
 
-    if len(repo_path_parts) <= 1:
-        # there is no specific repository requested, so we don't have to check for specific access
-        return github_api
+        if not repo in self._accessible_repos(client=client):
+            msg = f'GitHub app with {installation_id=} has no access for {repo_url=}'
 
-    repo = repo_path_parts[1]
-    accessible_repos = [
-        repo.name
-        for repo in github_api.app_installation_repos()
-    ]
+            if absent_ok:
+                logger.warning(msg)
+                return None
 
-    if not repo in accessible_repos:
-        msg = f'GitHub app with {installation_id=} has no access for {repo_url=}'
+            raise ValueError(msg)
 
-        if absent_ok:
-            logger.warning(msg)
-            return None
+        return client.github_api
 
-        raise ValueError(msg)
+    def metrics(self) -> dict[tuple[str, int | str], GitHubClientMetrics]:
+        '''
+        returns the metrics of all known clients by their (hostname, installation-id | username)
+        '''
+        with self._lock:
+            return {
+                key: client.metrics
+                for key, client in self._clients.items()
+            }
 
-    return github_api
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+            self._adapters.clear()
+
+
+github_client_registry = GitHubClientRegistry()
+
+
+def github_api(
+    secret_factory: secret_mgmt.SecretFactory,
+    repo_url: str,
+    absent_ok: bool=False,
+) -> github3.github.GitHub | None:
+    '''
+    returns an authenticated GitHub api client suitable for the passed `repo_url`. Clients are
+    shared process-wide (see `GitHubClientRegistry`), hence callers must not modify them.
+    '''
+    return github_client_registry.github_api(
+        secret_factory=secret_factory,
+        repo_url=repo_url,
+        absent_ok=absent_ok,
+    )
@@ -6,6 +6,7 @@ import aiohttp.web
 import dacite
 
 import consts
+import executors
 import features
 import k8s.backlog
 import k8s.model
@@ -69,12 +70,18 @@ class ContainerStatuses(aiohttp.web.View):
             default=list(extensions_cfg.enabled_extensions(convert_to_camel_case=True)),
         )
 
-        return aiohttp.web.json_response(
-            data=tuple(iter_container_statuses(
+        container_statuses = await executors.run_in_lane(
+            executors.ExecutorLane.K8S,
+            tuple,
+            iter_container_statuses(
                 service_filter=service_filter,
                 namespace=self.request.app[consts.APP_NAMESPACE_CALLBACK](),
                 kubernetes_api=self.request.app[consts.APP_KUBERNETES_API_CALLBACK](),
-            )),
+            ),
+        )
+
+        return aiohttp.web.json_response(
+            data=container_statuses,
             dumps=util.dict_to_json_factory,
         )
 
@@ -148,13 +155,19 @@ class LogCollections(aiohttp.web.View):
         log_level = util.param(params, 'log_level', required=True)
         log_level = logging._nameToLevel[log_level.upper()]
 
-        return aiohttp.web.json_response(
-            data=tuple(iter_log_collections(
+        log_collections = await executors.run_in_lane(
+            executors.ExecutorLane.K8S,
+            tuple,
+            iter_log_collections(
                 service_filter=service_filter,
                 log_level=log_level,
                 namespace=self.request.app[consts.APP_NAMESPACE_CALLBACK](),
                 kubernetes_api=self.request.app[consts.APP_KUBERNETES_API_CALLBACK](),
-            )),
+            ),
+        )
+
+        return aiohttp.web.json_response(
+            data=log_collections,
         )
 
 
@@ -242,12 +255,18 @@ class BacklogItems(aiohttp.web.View):
 
         service = util.param(params, 'service', required=True)
 
-        return aiohttp.web.json_response(
-            data=tuple(iter_backlog_items(
+        backlog_items = await executors.run_in_lane(
+            executors.ExecutorLane.K8S,
+            tuple,
+            iter_backlog_items(
                 service=service,
                 namespace=self.request.app[consts.APP_NAMESPACE_CALLBACK](),
                 kubernetes_api=self.request.app[consts.APP_KUBERNETES_API_CALLBACK](),
-            )),
+            ),
+        )
+
+        return aiohttp.web.json_response(
+            data=backlog_items,
         )
 
     async def put(self):
@@ -284,7 +303,9 @@ class BacklogItems(aiohttp.web.View):
         backlog_item_raw = (await self.request.json()).get('spec')
         backlog_item = k8s.backlog.BacklogItem.from_dict(backlog_item_raw)
 
-        k8s.backlog.update_backlog_crd(
+        await executors.run_in_lane(
+            executors.ExecutorLane.K8S,
+            k8s.backlog.update_backlog_crd,
             name=name,
             namespace=self.request.app[consts.APP_NAMESPACE_CALLBACK](),
             kubernetes_api=self.request.app[consts.APP_KUBERNETES_API_CALLBACK](),
@@ -353,7 +374,9 @@ class BacklogItems(aiohttp.web.View):
                 ),
             )
 
-            k8s.backlog.create_backlog_item(
+            await executors.run_in_lane(
+                executors.ExecutorLane.K8S,
+                k8s.backlog.create_backlog_item,
                 service=service,
                 namespace=self.request.app[consts.APP_NAMESPACE_CALLBACK](),
                 kubernetes_api=self.request.app[consts.APP_KUBERNETES_API_CALLBACK](),
@@ -387,7 +410,9 @@ class BacklogItems(aiohttp.web.View):
         names = params.getall('name')
 
         for name in names:
-            k8s.util.delete_custom_resource(
+            await executors.run_in_lane(
+                executors.ExecutorLane.K8S,
+                k8s.util.delete_custom_resource,
                 crd=k8s.model.BacklogItemCrd,
                 name=name,
                 namespace=self.request.app[consts.APP_NAMESPACE_CALLBACK](),
@@ -465,12 +490,18 @@ class RuntimeArtefacts(aiohttp.web.View):
             label_raw.split(':') for label_raw in labels_raw
         ])
 
-        return aiohttp.web.json_response(
-            data=tuple(iter_runtime_artefacts(
+        runtime_artefacts = await executors.run_in_lane(
+            executors.ExecutorLane.K8S,
+            tuple,
+            iter_runtime_artefacts(
                 namespace=self.request.app[consts.APP_NAMESPACE_CALLBACK](),
                 kubernetes_api=self.request.app[consts.APP_KUBERNETES_API_CALLBACK](),
                 labels=labels,
-            )),
+            ),
+        )
+
+        return aiohttp.web.json_response(
+            data=runtime_artefacts,
         )
 
     async def put(self):
@@ -519,7 +550,9 @@ class RuntimeArtefacts(aiohttp.web.View):
                 ),
             )
 
-            k8s.runtime_artefacts.create_unique_runtime_artefact(
+            await executors.run_in_lane(
+                executors.ExecutorLane.K8S,
+                k8s.runtime_artefacts.create_unique_runtime_artefact,
                 namespace=self.request.app[consts.APP_NAMESPACE_CALLBACK](),
                 kubernetes_api=self.request.app[consts.APP_KUBERNETES_API_CALLBACK](),
                 artefact=runtime_artefact,
@@ -553,7 +586,9 @@ class RuntimeArtefacts(aiohttp.web.View):
         names = params.getall('name')
 
         for name in names:
-            k8s.util.delete_custom_resource(
+            await executors.run_in_lane(
+                executors.ExecutorLane.K8S,
+                k8s.util.delete_custom_resource,
                 crd=k8s.model.RuntimeArtefactCrd,
                 name=name,
                 namespace=self.request.app[consts.APP_NAMESPACE_CALLBACK](),
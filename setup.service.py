@@ -27,14 +27,17 @@ def modules():
         'artefacts',
         'cache_manager',
         'compliance_tests',
+        'component_graph',
         'components',
         'dora',
+        'executors',
         'metadata',
         'metric',
         'service_extensions',
         'smoke_test',
         'special_component',
         'sprint',
+        'version_index',
         'yp',
     ]
 
@@ -20,13 +20,17 @@ def requirements():
 
 def modules():
     return [
+        'blobcache',
+        'cache_metrics',
         'caching',
         'consts',
         'crypto_extension.config',
         'ctx_util',
         'dockerutil',
         'eol',
+        'github_util',
         'lookups',
+        'oci_util',
         'ocm_util',
         'paths',
         'rescore.model',
@@ -0,0 +1,34 @@
+import asyncio
+
+import pytest_asyncio
+import sqlalchemy.ext.asyncio as sqlasync
+
+import deliverydb
+
+
+@pytest_asyncio.fixture
+async def db_url(tmp_path, monkeypatch) -> str:
+    '''
+    url of an (empty) sqlite delivery-db; the module state of `deliverydb` (i.e. known engines and
+    initialised delivery-dbs) is isolated per test and all created engines are disposed afterwards
+    '''
+    monkeypatch.setattr(deliverydb, 'sessionmakers', {})
+    monkeypatch.setattr(deliverydb, '_sessionmakers_lock', asyncio.Lock())
+    monkeypatch.setattr(deliverydb, '_initialised_db_urls', set())
+    monkeypatch.setattr(deliverydb, 'pool_cfgs', dict(deliverydb.pool_cfgs))
+
+    yield f'sqlite+aiosqlite:///{tmp_path / "delivery.db"}'
+
+    for sessionmaker in deliverydb.sessionmakers.values():
+        await sessionmaker.kw['bind'].dispose()
+
+
+@pytest_asyncio.fixture
+async def sessionmaker(db_url) -> sqlasync.async_sessionmaker[sqlasync.session.AsyncSession]:
+    return await deliverydb.sqlalchemy_sessionmaker(db_url=db_url)
+
+
+@pytest_asyncio.fixture
+async def db_session(sessionmaker) -> sqlasync.session.AsyncSession:
+    async with sessionmaker() as db_session:
+        yield db_session
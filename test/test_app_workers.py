@@ -0,0 +1,35 @@
+import logging
+import signal
+import sys
+
+import pytest
+
+import app
+import middleware.prometheus
+
+
+def test_crashing_workers_are_given_up(monkeypatch, tmp_path, caplog):
+    monkeypatch.setenv(middleware.prometheus.MULTIPROC_DIR_ENV_VAR, str(tmp_path))
+    monkeypatch.setattr(signal, 'signal', lambda signum, handler: None)
+    # workers exit right after they were spawned
+    monkeypatch.setattr(app, '_run_worker', sys.exit)
+    monkeypatch.setattr(app, 'WORKER_RESTART_BACKOFF_SECONDS', 0.05)
+    monkeypatch.setattr(app, 'WORKER_MAX_IMMEDIATE_FAILURES', 3)
+    monkeypatch.setattr(app, 'WORKER_SUPERVISION_INTERVAL_SECONDS', 0.05)
+
+    with caplog.at_level(logging.WARNING, logger=app.logger.name):
+        with pytest.raises(RuntimeError):
+            app.run_workers(
+                workers=1,
+                shutdown_timeout=0,
+            )
+
+    restart_messages = [
+        record.message
+        for record in caplog.records
+        if 'restarting in' in record.message
+    ]
+    # restarts are delayed with an exponential backoff until the supervisor gives up
+    assert len(restart_messages) == 2
+    assert restart_messages[0].endswith('restarting in 0.1 seconds')
+    assert restart_messages[1].endswith('restarting in 0.2 seconds')
@@ -0,0 +1,232 @@
+import gzip
+import hashlib
+import os
+
+import aiohttp
+import aiohttp.hdrs
+import aiohttp.test_utils
+import aiohttp.web
+import pytest
+import pytest_asyncio
+
+import oci.client
+import oci.client_async
+import ocm
+
+import artefacts
+import consts
+import executors
+import oci_util
+
+
+content = os.urandom(256 * 1024)
+digest = f'sha256:{hashlib.sha256(content).hexdigest()}'
+gzipped_content = gzip.compress(content)
+gzipped_digest = f'sha256:{hashlib.sha256(gzipped_content).hexdigest()}'
+missing_digest = f'sha256:{hashlib.sha256(b"missing").hexdigest()}'
+
+
+def fake_registry(
+    honour_ranges: bool,
+) -> aiohttp.web.Application:
+    blobs = {
+        digest: content,
+        gzipped_digest: gzipped_content,
+    }
+
+    async def blob(request: aiohttp.web.Request) -> aiohttp.web.Response:
+        if not (blob := blobs.get(request.match_info['digest'])):
+            raise aiohttp.web.HTTPNotFound()
+
+        if not honour_ranges or not request.headers.get(aiohttp.hdrs.RANGE):
+            return aiohttp.web.Response(body=blob)
+
+        start, stop, _ = request.http_range.indices(len(blob))
+        if start >= stop:
+            raise aiohttp.web.HTTPRequestRangeNotSatisfiable(
+                headers={aiohttp.hdrs.CONTENT_RANGE: f'bytes */{len(blob)}'},
+            )
+
+        return aiohttp.web.Response(
+            status=206,
+            body=blob[start:stop],
+            headers={aiohttp.hdrs.CONTENT_RANGE: f'bytes {start}-{stop - 1}/{len(blob)}'},
+        )
+
+    app = aiohttp.web.Application()
+    app.router.add_get('/v2/{name:.+}/blobs/{digest}', blob)
+    return app
+
+
+def _resource(
+    name: str,
+    digest: str,
+    media_type: str,
+) -> ocm.Resource:
+    return ocm.Resource(
+        name=name,
+        version='1.0.0',
+        type=ocm.ArtefactType.BLOB,
+        access=ocm.LocalBlobAccess(
+            localReference=digest,
+            mediaType=media_type,
+        ),
+    )
+
+
+@pytest_asyncio.fixture(params=(True, False), ids=('ranges-honoured', 'ranges-ignored'))
+async def client(request) -> aiohttp.test_utils.TestClient:
+    async with aiohttp.test_utils.TestServer(fake_registry(honour_ranges=request.param)) as registry:
+        ocm_repository = f'{registry.host}:{registry.port}/ocm'
+        component_descriptor = ocm.ComponentDescriptor(
+            meta=ocm.Metadata(),
+            component=ocm.Component(
+                name='acme.org/component',
+                version='1.0.0',
+                repositoryContexts=[ocm.OciOcmRepository(baseUrl=ocm_repository)],
+                provider='',
+                sources=[],
+                componentReferences=[],
+                resources=[
+                    _resource(name='blob', digest=digest, media_type='application/data'),
+                    _resource(name='gzip', digest=gzipped_digest, media_type='application/gzip'),
+                    _resource(name='missing', digest=missing_digest, media_type='application/data'),
+                ],
+                labels=[],
+            ),
+            signatures=[],
+        )
+
+        async def component_descriptor_lookup(component_id, ocm_repository=None):
+            return component_descriptor
+
+        oci_client = oci.client_async.Client(
+            routes=oci.client.OciRoutes(
+                base_api_url_lookup=lambda image_reference: f'{registry.make_url("/v2/")}',
+            ),
+        )
+        oci_client.token_cache.set_auth_method(
+            image_reference=ocm_repository,
+            auth_method=oci.client.AuthMethod.BASIC,
+        )
+
+        app = aiohttp.web.Application()
+        app[consts.APP_COMPONENT_DESCRIPTOR_LOOKUP] = component_descriptor_lookup
+        app[consts.APP_OCI_CLIENT] = oci_client
+        app.router.add_view('/ocm/artefacts/blob', artefacts.ArtefactBlob)
+
+        async with aiohttp.test_utils.TestClient(aiohttp.test_utils.TestServer(app)) as client:
+            yield client
+
+        await oci_client.session.close()
+
+
+async def _get(
+    client: aiohttp.test_utils.TestClient,
+    artefact: str='blob',
+    **headers,
+) -> tuple[aiohttp.ClientResponse, bytes]:
+    res = await client.get(
+        '/ocm/artefacts/blob',
+        params={
+            'component': 'acme.org/component:1.0.0',
+            'artefact': artefact,
+        },
+        headers={
+            name.replace('_', '-'): value
+            for name, value in headers.items()
+        },
+    )
+    return res, await res.read()
+
+
+@pytest.mark.asyncio
+async def test_blob_is_streamed(client):
+    res, body = await _get(client)
+
+    assert res.status == 200
+    assert body == content
+    assert res.headers[aiohttp.hdrs.ETAG] == f'"{digest}"'
+    assert res.headers[aiohttp.hdrs.ACCEPT_RANGES] == 'bytes'
+    assert res.content_length == len(content)
+
+    res, _ = await _get(client, If_None_Match=f'"{digest}"')
+    assert res.status == 304
+
+    # unavailable blobs must not be confirmed as unmodified
+    res, _ = await _get(client, artefact='missing', If_None_Match=f'"{missing_digest}"')
+    assert res.status == 404
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('range_header, octet_range', (
+    ('bytes=1000-', slice(1000, None)),
+    ('bytes=100-1099', slice(100, 1100)),
+    ('bytes=-100', slice(-100, None)),
+))
+async def test_ranges_are_returned(client, range_header, octet_range):
+    res, body = await _get(client, Range=range_header)
+
+    start, stop, _ = octet_range.indices(len(content))
+    assert res.status == 206
+    assert body == content[octet_range]
+    assert res.headers[aiohttp.hdrs.CONTENT_RANGE] == f'bytes {start}-{stop - 1}/{len(content)}'
+
+
+@pytest.mark.asyncio
+async def test_conditional_and_unsatisfiable_ranges(client):
+    # range refers to another version of the blob, hence the whole blob is returned
+    res, body = await _get(client, Range='bytes=1000-', If_Range='"sha256:other"')
+    assert res.status == 200
+    assert body == content
+
+    res, body = await _get(client, Range='bytes=1000-', If_Range=f'"{digest}"')
+    assert res.status == 206
+    assert body == content[1000:]
+
+    res, _ = await _get(client, Range=f'bytes={len(content)}-')
+    assert res.status == 416
+
+
+@pytest.mark.asyncio
+async def test_ranges_are_returned_without_ranged_requests(client, monkeypatch):
+    def private_request_helpers(oci_client):
+        raise NotImplementedError()
+
+    monkeypatch.setattr(oci_util, '_private_request_helpers', private_request_helpers)
+
+    # whole blob is retrieved instead, same as if the registry ignored the range
+    res, body = await _get(client, Range='bytes=1000-')
+    assert res.status == 206
+    assert body == content[1000:]
+
+
+@pytest.mark.asyncio
+async def test_gzipped_blob_is_unzipped(client):
+    res, body = await _get(client, artefact='gzip', Range='bytes=1000-')
+
+    # ranges are not supported for unzipped content
+    assert res.status == 200
+    assert body == content
+    assert res.headers[aiohttp.hdrs.ETAG] == f'"{gzipped_digest}+gunzip"'
+    assert res.headers[aiohttp.hdrs.ACCEPT_RANGES] == 'none'
+
+
+@pytest.mark.asyncio
+async def test_saturated_lane_is_detected_before_unzipping(client, monkeypatch):
+    lane_executor = executors.LaneExecutor(cfg=executors.ExecutorLaneCfg(
+        lane=executors.ExecutorLane.CPU,
+        max_queue_depth=1,
+    ))
+    monkeypatch.setattr(executors, '_executors', {executors.ExecutorLane.CPU: lane_executor})
+    lane_executor.reserve() # occupies the only slot of the lane
+
+    try:
+        res, _ = await _get(client, artefact='gzip')
+    finally:
+        lane_executor.release()
+        lane_executor.shutdown()
+
+    # rejected with an error status rather than aborting an already started response
+    assert res.status == 500
+    assert aiohttp.hdrs.ETAG not in res.headers
@@ -0,0 +1,198 @@
+import collections
+import concurrent.futures
+import hashlib
+import io
+import os
+import tarfile
+import threading
+import time
+
+import pytest
+
+import oci.model
+
+import blobcache
+
+
+def _digest(content: bytes) -> str:
+    return f'sha256:{hashlib.sha256(content).hexdigest()}'
+
+
+class FakeBlobResponse:
+    def __init__(self, content: bytes, delay_seconds: float=0):
+        self.content = content
+        self.delay_seconds = delay_seconds
+
+    def iter_content(self, chunk_size: int):
+        time.sleep(self.delay_seconds)
+        for idx in range(0, len(self.content), chunk_size):
+            yield self.content[idx:idx + chunk_size]
+
+
+class FakeRegistry:
+    '''
+    in-process stand-in for `oci.client.Client` serving blobs and manifests from memory
+    '''
+    def __init__(self, delay_seconds: float=0):
+        self.blobs: dict[str, bytes] = {}
+        self.manifests: dict[str, oci.model.OciImageManifest] = {}
+        self.blob_requests = collections.Counter()
+        self.delay_seconds = delay_seconds
+        self._lock = threading.Lock()
+
+    def add_blob(self, content: bytes) -> oci.model.OciBlobRef:
+        digest = _digest(content)
+        self.blobs[digest] = content
+        return oci.model.OciBlobRef(
+            digest=digest,
+            mediaType='application/vnd.oci.image.layer.v1.tar',
+            size=len(content),
+        )
+
+    def add_image(self, image_reference: str, layers: list[bytes]):
+        config = self.add_blob(b'{}')
+        self.manifests[image_reference] = oci.model.OciImageManifest(
+            config=config,
+            layers=[self.add_blob(layer) for layer in layers],
+        )
+
+    def manifest(self, image_reference, accept=None):
+        return self.manifests[str(image_reference)]
+
+    def blob(self, image_reference, digest: str, stream: bool=True):
+        with self._lock:
+            self.blob_requests[digest] += 1
+        return FakeBlobResponse(
+            content=self.blobs[digest],
+            delay_seconds=self.delay_seconds,
+        )
+
+
+def _tar_bytes(**files: bytes) -> bytes:
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode='w') as tf:
+        for name, content in files.items():
+            info = tarfile.TarInfo(name=name)
+            info.size = len(content)
+            tf.addfile(info, io.BytesIO(content))
+    return buf.getvalue()
+
+
+@pytest.fixture
+def blob_cache(tmp_path) -> blobcache.BlobCache:
+    return blobcache.BlobCache(cache_dir=str(tmp_path))
+
+
+def test_blob_is_retrieved_once(blob_cache):
+    registry = FakeRegistry()
+    blob_ref = registry.add_blob(b'layer-content')
+
+    for _ in range(3):
+        content = b''.join(blob_cache.iter_oci_blob(
+            oci_client=registry,
+            image_reference='registry.local/image:1.0.0',
+            digest=blob_ref.digest,
+            size=blob_ref.size,
+        ))
+        assert content == b'layer-content'
+
+    assert registry.blob_requests[blob_ref.digest] == 1
+    assert blob_cache.misses == 1
+    assert blob_cache.hits == 2
+    assert blob_ref.digest in blob_cache
+
+
+def test_digest_mismatch(blob_cache):
+    digest = _digest(b'expected')
+
+    with pytest.raises(blobcache.DigestMismatchError):
+        blob_cache.open(
+            digest=digest,
+            fetch=lambda: iter((b'tampered',)),
+        )
+
+    assert digest not in blob_cache
+    assert blob_cache.total_size() == 0
+
+
+def test_concurrent_retrievals_are_deduplicated(blob_cache):
+    registry = FakeRegistry(delay_seconds=0.1)
+    blob_ref = registry.add_blob(os.urandom(64 * 1024))
+
+    def read_blob(_):
+        with blob_cache.open_oci_blob(
+            oci_client=registry,
+            image_reference='registry.local/image:1.0.0',
+            digest=blob_ref.digest,
+            size=blob_ref.size,
+        ) as blob_file:
+            return blob_file.read()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(read_blob, range(8)))
+
+    assert all(result == registry.blobs[blob_ref.digest] for result in results)
+    assert registry.blob_requests[blob_ref.digest] == 1
+
+
+def test_least_recently_used_blobs_are_evicted(tmp_path):
+    blob_cache = blobcache.BlobCache(
+        cache_dir=str(tmp_path),
+        max_total_size_mib=1,
+    )
+    registry = FakeRegistry()
+    blob_refs = [registry.add_blob(os.urandom(400 * 1024)) for _ in range(3)]
+
+    def read_blob(blob_ref: oci.model.OciBlobRef) -> bytes:
+        return b''.join(blob_cache.iter_oci_blob(
+            oci_client=registry,
+            image_reference='registry.local/image:1.0.0',
+            digest=blob_ref.digest,
+            size=blob_ref.size,
+        ))
+
+    read_blob(blob_refs[0])
+    time.sleep(0.01)
+    read_blob(blob_refs[1])
+    time.sleep(0.01)
+    read_blob(blob_refs[0]) # mark first blob as recently used
+    time.sleep(0.01)
+    read_blob(blob_refs[2])
+
+    assert blob_refs[0].digest in blob_cache
+    assert blob_refs[1].digest not in blob_cache
+    assert blob_refs[2].digest in blob_cache
+    assert blob_cache.total_size() <= 1024 * 1024
+    # lock files of evicted blobs are removed as well
+    assert not os.path.exists(f'{blob_cache.path(blob_refs[1].digest)}.lock')
+    assert os.path.exists(f'{blob_cache.path(blob_refs[2].digest)}.lock')
+
+    # blobs exceeding the total cache size are still served, but not cached
+    too_large_ref = registry.add_blob(os.urandom(2 * 1024 * 1024))
+    assert read_blob(too_large_ref) == registry.blobs[too_large_ref.digest]
+    assert too_large_ref.digest not in blob_cache
+
+
+def test_image_layers_as_tarfile_generator(blob_cache):
+    registry = FakeRegistry()
+    layers = [
+        _tar_bytes(**{'etc/os-release': b'ID=alpine\n'}),
+        _tar_bytes(**{'bin/sh': b'#!/bin/sh\n'}),
+    ]
+    registry.add_image('registry.local/image:1.0.0', layers=layers)
+
+    for _ in range(2):
+        tarstream = b''.join(blob_cache.image_layers_as_tarfile_generator(
+            image_reference='registry.local/image:1.0.0',
+            oci_client=registry,
+            include_config_blob=False,
+        ))
+
+        with tarfile.open(fileobj=io.BytesIO(tarstream), mode='r') as tf:
+            members = tf.getmembers()
+            assert [member.name for member in members] == [
+                f'{_digest(layer)}.tar' for layer in layers
+            ]
+            assert [tf.extractfile(member).read() for member in members] == layers
+
+    assert all(count == 1 for count in registry.blob_requests.values())
@@ -0,0 +1,118 @@
+import pytest
+
+import cnudie.retrieve_async
+import ocm
+
+import cache_metrics
+import caching
+import lookups
+
+
+@pytest.fixture
+def registry(monkeypatch) -> cache_metrics.CacheMetricsRegistry:
+    registry = cache_metrics.CacheMetricsRegistry(max_names_per_tier=2)
+    monkeypatch.setattr(cache_metrics, 'cache_metrics_registry', registry)
+    return registry
+
+
+def test_label_cardinality_is_bounded(registry):
+    for name in ('a', 'b', 'c', 'd'):
+        registry.record(
+            tier=cache_metrics.CacheTier.DELIVERY_DB,
+            name=name,
+            result=cache_metrics.CacheResult.HIT,
+            latency_seconds=0.003,
+            served_bytes=10,
+        )
+
+    metrics = registry.metrics()
+    assert set(metrics) == {
+        ('delivery-db', 'a'),
+        ('delivery-db', 'b'),
+        ('delivery-db', cache_metrics.OTHER_NAME),
+    }
+
+    other_metrics = metrics[('delivery-db', cache_metrics.OTHER_NAME)]
+    assert other_metrics.results[cache_metrics.CacheResult.HIT] == 2
+    assert other_metrics.served_bytes == 20
+
+    buckets = dict(other_metrics.cumulative_latency_buckets())
+    assert buckets['0.0025'] == 0
+    assert buckets['0.005'] == 2
+    assert buckets['+Inf'] == 2
+
+
+@pytest.mark.asyncio
+async def test_lookup_tiers_are_instrumented(registry):
+    component_id = ocm.ComponentIdentity('component', '1.0.0')
+    component_descriptor = ocm.ComponentDescriptor(
+        meta=ocm.Metadata(),
+        component=ocm.Component(
+            name=component_id.name,
+            version=component_id.version,
+            repositoryContexts=[],
+            provider='',
+            sources=[],
+            componentReferences=[],
+            resources=[],
+            labels=[],
+        ),
+        signatures=[],
+    )
+    written_back = []
+
+    async def writeback(component_id, component_descriptor):
+        written_back.append(component_descriptor)
+
+    async def cache_lookup(component_id, ocm_repository_lookup=None):
+        return cnudie.retrieve_async.WriteBack(writeback)
+
+    async def oci_lookup(component_id, ocm_repository_lookup=None):
+        return component_descriptor
+
+    lookup = cnudie.retrieve_async.composite_component_descriptor_lookup(
+        lookups=(
+            lookups.instrumented_component_descriptor_lookup_async(
+                lookup=cache_lookup,
+                tier=cache_metrics.CacheTier.DELIVERY_DB,
+            ),
+            lookups.instrumented_component_descriptor_lookup_async(
+                lookup=oci_lookup,
+                tier=cache_metrics.CacheTier.OCI,
+            ),
+        ),
+    )
+
+    assert await lookup(component_id) is component_descriptor
+    assert written_back == [component_descriptor]
+
+    metrics = registry.metrics()
+    db_metrics = metrics[('delivery-db', lookups.COMPONENT_DESCRIPTOR_CACHE_NAME)]
+    oci_metrics = metrics[('oci', lookups.COMPONENT_DESCRIPTOR_CACHE_NAME)]
+
+    assert db_metrics.results == {cache_metrics.CacheResult.MISS: 1}
+    assert oci_metrics.results == {cache_metrics.CacheResult.HIT: 1}
+    assert sum(oci_metrics.latency_bucket_counts) == 1
+
+
+def test_filesystem_cache_is_instrumented(registry, tmp_path):
+    cache = caching.LFUFilesystemCache(max_total_size_mib=1)
+
+    @caching.cached(cache=cache, cache_dir=str(tmp_path))
+    def value(idx: int) -> bytes:
+        return bytes(400 * 1024)
+
+    value(0)
+    value(0)
+    value(1)
+    value(2) # exceeds total size -> evicts one entry
+
+    (key, metrics), = registry.metrics().items()
+    assert key == ('filesystem', cache.name)
+    assert cache.name.endswith('<locals>.value')
+    assert metrics.results == {
+        cache_metrics.CacheResult.HIT: 1,
+        cache_metrics.CacheResult.MISS: 3,
+    }
+    assert metrics.served_bytes > 400 * 1024
+    assert metrics.evictions == 1
@@ -1,12 +1,17 @@
+import datetime
 import logging
+import math
+
 import pytest
 
 import ci.log
 
 import compliance_summary as cs
+import executors
 import odg.findings
 import odg.model
 import paths
+import rescore.utility
 
 
 # surpress warnings due to unknown os-id
@@ -192,3 +197,123 @@ async def test_licenses(component_artefact_id):
         )],
         rescorings=[],
     )).categorisation == 'BLOCKER'
+
+
+def _vulnerability_finding(
+    artefact: odg.model.ComponentArtefactId,
+    package_name: str,
+    cve: str,
+    severity: str,
+) -> odg.model.ArtefactMetadata:
+    return odg.model.ArtefactMetadata(
+        artefact=artefact,
+        meta=odg.model.Metadata(
+            datasource=None,
+            type=odg.model.Datatype.VULNERABILITY_FINDING,
+        ),
+        data=odg.model.VulnerabilityFinding(
+            package_name=package_name,
+            package_version=None,
+            base_url=None,
+            report_url=None,
+            product_id=-1,
+            group_id=-1,
+            severity=severity,
+            cve=cve,
+            cvss_v3_score=-1,
+            cvss=dict(),
+            summary=None,
+        ),
+    )
+
+
+def _vulnerability_rescoring(
+    artefact: odg.model.ComponentArtefactId,
+    package_name: str,
+    cve: str,
+    severity: str,
+) -> odg.model.ArtefactMetadata:
+    return odg.model.ArtefactMetadata(
+        artefact=artefact,
+        meta=odg.model.Metadata(
+            datasource=odg.model.Datasource.DELIVERY_DASHBOARD,
+            type=odg.model.Datatype.RESCORING,
+            creation_date=datetime.datetime.now(),
+        ),
+        data=odg.model.CustomRescoring(
+            finding=odg.model.RescoringVulnerabilityFinding(
+                package_name=package_name,
+                cve=cve,
+            ),
+            referenced_type=odg.model.Datatype.VULNERABILITY_FINDING,
+            severity=severity,
+            user=odg.model.User(username='user'),
+        ),
+    )
+
+
+@pytest.mark.asyncio
+async def test_batched_severities(component_artefact_id, monkeypatch):
+    findings = [
+        _vulnerability_finding(
+            artefact=component_artefact_id,
+            package_name=f'package-{idx % 100}',
+            cve=f'CVE-{idx}',
+            severity='CRITICAL',
+        ) for idx in range(2000)
+    ]
+    # every 20th finding is rescored, other rescorings do not match any finding
+    rescorings = [
+        _vulnerability_rescoring(
+            artefact=component_artefact_id,
+            package_name=f'package-{idx % 100}',
+            cve=f'CVE-{idx}',
+            severity='NONE',
+        ) for idx in range(0, 4000, 20)
+    ]
+
+    per_finding_severities = [
+        cs.rescored_severity_if_any(
+            finding=finding,
+            rescorings=rescorings,
+        ) or finding.data.severity
+        for finding in findings
+    ]
+
+    built_indexes = []
+    submitted_tasks = []
+
+    class RecordingRescoringIndex(rescore.utility.RescoringIndex):
+        def __init__(self, *args, **kwargs):
+            built_indexes.append(self)
+            super().__init__(*args, **kwargs)
+
+    cpu_executor = executors.executor(executors.ExecutorLane.CPU)
+    submit = cpu_executor.submit
+
+    def recording_submit(fn, /, *args, **kwargs):
+        submitted_tasks.append(fn)
+        return submit(fn, *args, **kwargs)
+
+    monkeypatch.setattr(rescore.utility, 'RescoringIndex', RecordingRescoringIndex)
+    monkeypatch.setattr(cpu_executor, 'submit', recording_submit)
+
+    batched_severities = await cs.severities_for_findings(
+        findings=findings,
+        rescorings=rescorings,
+    )
+
+    assert batched_severities == per_finding_severities
+    assert batched_severities.count('NONE') == 100
+    # rescorings are indexed once for all findings, and findings are rescored in chunks (one
+    # executor task per chunk instead of one per finding)
+    assert len(built_indexes) == 1
+    assert len(submitted_tasks) == math.ceil(len(findings) / cs.SEVERITY_CHUNK_SIZE)
+
+    # cheap evaluations are done in-loop
+    assert await cs.severities_for_findings(
+        findings=findings[:1],
+        rescorings=rescorings[:1],
+    ) == ['NONE']
+    assert await cs.severities_for_findings(findings=findings[1:2]) == ['CRITICAL']
+    assert len(submitted_tasks) == math.ceil(len(findings) / cs.SEVERITY_CHUNK_SIZE)
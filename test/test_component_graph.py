@@ -0,0 +1,166 @@
+import asyncio
+import os
+
+import pytest
+import sqlalchemy
+
+import cnudie.iter
+import cnudie.iter_async
+import ocm
+
+import component_graph
+import deliverydb.model as dm
+import test.resources.lookup_mocks as lookup_mocks
+
+
+own_dir = os.path.dirname(__file__)
+res_dir = os.path.join(own_dir, 'resources')
+
+component_descriptor_lookup = lookup_mocks.component_descriptor_lookup_mockup_factory(
+    os.path.join(res_dir, 'component_descriptors_dependency_graph.yaml'),
+)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('recursion_depth', (-1, 0, 1))
+async def test_paths_match_component_iteration(recursion_depth):
+    store = component_graph.ComponentDependencyGraphStore()
+    component_id = ocm.ComponentIdentity('landscape', 'v1.0.0')
+
+    graph = await store.graph(
+        component_id=component_id,
+        component_descriptor_lookup=component_descriptor_lookup,
+    )
+
+    component_descriptor = await component_descriptor_lookup(component_id)
+    expected_paths = [
+        tuple((entry.component.identity(), entry.reftype) for entry in component_node.path)
+        async for component_node in cnudie.iter_async.iter(
+            component=component_descriptor,
+            lookup=component_descriptor_lookup,
+            recursion_depth=recursion_depth,
+            prune_unique=False,
+            node_filter=cnudie.iter.Filter.components,
+        )
+    ]
+
+    assert list(graph.iter_paths(recursion_depth=recursion_depth)) == expected_paths
+
+    component_nodes = [
+        component_node async for component_node in component_graph.iter_component_nodes(
+            graph=graph,
+            component_descriptor_lookup=component_descriptor_lookup,
+            recursion_depth=recursion_depth,
+        )
+    ]
+    assert [
+        tuple((entry.component.identity(), entry.reftype) for entry in component_node.path)
+        for component_node in component_nodes
+    ] == expected_paths
+
+
+@pytest.mark.asyncio
+async def test_dependency_graphs_are_shared():
+    store = component_graph.ComponentDependencyGraphStore()
+
+    graph = await store.graph(
+        component_id=ocm.ComponentIdentity('landscape', 'v1.0.0'),
+        component_descriptor_lookup=component_descriptor_lookup,
+    )
+
+    # each component version is only looked up once, despite `shared` being referenced twice
+    assert store.descriptor_lookups == len(graph.components) == 6
+    assert graph.immutable
+
+    await asyncio.gather(*[
+        store.graph(
+            component_id=ocm.ComponentIdentity('landscape', 'v1.1.0'),
+            component_descriptor_lookup=component_descriptor_lookup,
+        ) for _ in range(3)
+    ])
+
+    # only the changed component versions (`landscape` and `b`) are looked up
+    assert store.descriptor_lookups == 8
+
+
+@pytest.mark.asyncio
+async def test_dependency_graphs_are_persisted(db_session):
+    component_id = ocm.ComponentIdentity('landscape', 'v1.0.0')
+
+    graph = await component_graph.ComponentDependencyGraphStore().graph(
+        component_id=component_id,
+        component_descriptor_lookup=component_descriptor_lookup,
+        db_session=db_session,
+    )
+
+    store = component_graph.ComponentDependencyGraphStore()
+    assert await store.graph(
+        component_id=component_id,
+        component_descriptor_lookup=component_descriptor_lookup,
+        db_session=db_session,
+    ) == graph
+    assert store.descriptor_lookups == 0
+
+    dev_graph = await store.graph(
+        component_id=ocm.ComponentIdentity('landscape', 'v2.0.0-dev'),
+        component_descriptor_lookup=component_descriptor_lookup,
+        db_session=db_session,
+    )
+    assert not dev_graph.immutable
+
+    cache_entries = (await db_session.execute(sqlalchemy.select(dm.DBCache))).scalars().all()
+    delete_after_for_version = {
+        cache_entry.descriptor['component_version']: cache_entry.delete_after
+        for cache_entry in cache_entries
+    }
+
+    # released component versions are immutable, hence their graphs never expire
+    assert delete_after_for_version['v1.0.0'] is None
+    assert delete_after_for_version['v2.0.0-dev'] is not None
+
+
+@pytest.mark.asyncio
+async def test_reference_cycles_are_skipped():
+    references = {
+        'a': ('b',),
+        'b': ('c',),
+        'c': ('a', 'c'),
+    }
+
+    async def cyclic_component_descriptor_lookup(component_id, /, **kwargs):
+        await asyncio.sleep(0) # allow concurrent calculations to interleave
+        return ocm.ComponentDescriptor.from_dict({
+            'component': {
+                'name': component_id.name,
+                'version': component_id.version,
+                'repositoryContexts': [],
+                'provider': '',
+                'sources': [],
+                'componentReferences': [
+                    {
+                        'name': referenced_name,
+                        'componentName': referenced_name,
+                        'version': 'v1.0.0',
+                        'extraIdentity': {},
+                        'labels': [],
+                    } for referenced_name in references[component_id.name]
+                ],
+                'resources': [],
+                'labels': [],
+            },
+            'meta': {'schemaVersion': 'v2'},
+        })
+
+    store = component_graph.ComponentDependencyGraphStore()
+
+    # concurrent calculations must not wait for each other either
+    graph_a, graph_b = await asyncio.wait_for(asyncio.gather(*[
+        store.graph(
+            component_id=ocm.ComponentIdentity(name, 'v1.0.0'),
+            component_descriptor_lookup=cyclic_component_descriptor_lookup,
+        ) for name in ('a', 'b')
+    ]), timeout=5)
+
+    assert [component_id.name for component_id in graph_a.components] == ['a', 'b', 'c']
+    assert 'c' in [component_id.name for component_id in graph_b.components]
+    assert not store._awaited_graphs
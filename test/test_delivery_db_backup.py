@@ -0,0 +1,274 @@
+import collections.abc
+import hashlib
+import http.server
+import io
+import os
+import tarfile
+import threading
+import urllib.parse
+
+import pytest
+
+import oci.client
+
+import delivery_db_backup
+import oci_util
+import odg.extensions_cfg
+
+
+class FakeRegistry(http.server.BaseHTTPRequestHandler):
+    '''
+    minimal implementation of the (chunked) blob upload of the OCI distribution spec; the
+    `failing_patches`-th PATCH requests only persist half of the received octets and fail afterwards
+    '''
+    uploads: dict[str, bytearray] = {}
+    blobs: dict[str, bytes] = {}
+    failing_patches: set[int] = set()
+    patch_count = 0
+
+    def log_message(self, *args):
+        pass
+
+    def respond(self, status: int, headers: dict[str, str]={}):
+        self.send_response(status)
+        for name, value in ({'Content-Length': '0'} | headers).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def upload_headers(self, upload_id: str) -> dict[str, str]:
+        return {
+            'Location': f'/v2/backup/blobs/uploads/{upload_id}',
+            'Range': f'0-{max(len(self.uploads[upload_id]) - 1, 0)}',
+        }
+
+    def do_POST(self):
+        upload_id = str(len(self.uploads))
+        self.uploads[upload_id] = bytearray()
+        self.respond(202, headers=self.upload_headers(upload_id))
+
+    def do_PATCH(self):
+        upload_id = urllib.parse.urlparse(self.path).path.rpartition('/')[2]
+        data = self.rfile.read(int(self.headers['Content-Length']))
+        start = int(self.headers['Content-Range'].partition('-')[0])
+
+        if start != len(self.uploads[upload_id]):
+            return self.respond(416)
+
+        FakeRegistry.patch_count += 1
+        if self.patch_count in self.failing_patches:
+            self.uploads[upload_id].extend(data[:len(data) // 2])
+            return self.respond(500)
+
+        self.uploads[upload_id].extend(data)
+        self.respond(202, headers=self.upload_headers(upload_id))
+
+    def do_GET(self):
+        upload_id = urllib.parse.urlparse(self.path).path.rpartition('/')[2]
+        self.respond(204, headers=self.upload_headers(upload_id))
+
+    def do_PUT(self):
+        url = urllib.parse.urlparse(self.path)
+        upload_id = url.path.rpartition('/')[2]
+        digest, = urllib.parse.parse_qs(url.query)['digest']
+        # monolithic uploads send the (remaining) blob along with the PUT request
+        self.uploads[upload_id].extend(self.rfile.read(int(self.headers['Content-Length'])))
+        data = bytes(self.uploads.pop(upload_id))
+
+        if digest != f'sha256:{hashlib.sha256(data).hexdigest()}':
+            return self.respond(400)
+
+        self.blobs[digest] = data
+        self.respond(201)
+
+    def do_HEAD(self):
+        digest = self.path.rpartition('/')[2]
+
+        if not (blob := self.blobs.get(digest)):
+            return self.respond(404)
+
+        self.respond(200, headers={'Content-Length': str(len(blob))})
+
+
+@pytest.fixture
+def registry(monkeypatch) -> collections.abc.Generator[http.server.HTTPServer, None, None]:
+    monkeypatch.setattr(FakeRegistry, 'uploads', {})
+    monkeypatch.setattr(FakeRegistry, 'blobs', {})
+    monkeypatch.setattr(FakeRegistry, 'patch_count', 0)
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), FakeRegistry)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    thread.join()
+
+
+def _oci_client(registry: http.server.HTTPServer) -> tuple[oci.client.Client, str]:
+    host, port = registry.server_address
+    image_reference = f'{host}:{port}/backup:1.0.0'
+
+    oci_client = oci.client.Client(
+        routes=oci.client.OciRoutes(
+            base_api_url_lookup=lambda image_reference: f'http://{host}:{port}/v2/',
+        ),
+    )
+    oci_client.token_cache.set_auth_method(
+        image_reference=image_reference,
+        auth_method=oci.client.AuthMethod.BASIC,
+    )
+
+    return oci_client, image_reference
+
+
+def test_tar_is_default_backup_format():
+    backup_cfg = odg.extensions_cfg.DeliveryDBBackup(
+        delivery_service_url='http://delivery-service',
+        component_name='component',
+        ocm_repo_url='ocm-repo',
+        backup_retention_count=None,
+    )
+
+    assert backup_cfg.backup_format is odg.extensions_cfg.DeliveryDBBackupFormat.TAR
+    assert delivery_db_backup.media_type(
+        backup_format=backup_cfg.backup_format,
+    ) == delivery_db_backup.BACKUP_BLOB_MEDIA_TYPE
+
+
+def test_compression_is_rejected_for_tar_format():
+    with pytest.raises(ValueError):
+        odg.extensions_cfg.DeliveryDBBackup(
+            delivery_service_url='http://delivery-service',
+            component_name='component',
+            ocm_repo_url='ocm-repo',
+            backup_retention_count=None,
+            compression='zstd:3',
+        )
+
+    odg.extensions_cfg.DeliveryDBBackup(
+        delivery_service_url='http://delivery-service',
+        component_name='component',
+        ocm_repo_url='ocm-repo',
+        backup_retention_count=None,
+        backup_format=odg.extensions_cfg.DeliveryDBBackupFormat.CUSTOM,
+        compression='zstd:3',
+    )
+
+
+def test_pg_dump_argv():
+    argv = delivery_db_backup.pg_dump_argv(
+        connection_url='postgresql://localhost',
+        backup_format=odg.extensions_cfg.DeliveryDBBackupFormat.CUSTOM,
+        jobs=4,
+        exclude_cache_data=True,
+        additional_args=['--no-owner'],
+    )
+
+    assert '--file' not in argv # streamed to stdout
+    assert '--jobs' not in argv # only supported by directory format
+    assert '--exclude-table-data=cache' in argv
+    assert '--exclude-table-data=cache_chunk' in argv
+    assert argv[-1] == '--no-owner'
+
+    argv = delivery_db_backup.pg_dump_argv(
+        connection_url='postgresql://localhost',
+        backup_format=odg.extensions_cfg.DeliveryDBBackupFormat.DIRECTORY,
+        outdir='backup',
+        jobs=4,
+    )
+
+    assert argv[argv.index('--jobs') + 1] == '4'
+    assert argv[argv.index('--file') + 1] == 'backup'
+
+
+def test_chunked_upload_is_resumed(registry, monkeypatch):
+    monkeypatch.setattr(FakeRegistry, 'failing_patches', {2, 4})
+    oci_client, image_reference = _oci_client(registry)
+    data = os.urandom(10 * 1024)
+
+    uploaded_blob = delivery_db_backup.upload_chunked(
+        oci_client=oci_client,
+        image_reference=image_reference,
+        chunks=delivery_db_backup.iter_prefetched(
+            delivery_db_backup.iter_chunks(stream=io.BytesIO(data), chunk_size=4096),
+        ),
+    )
+
+    assert uploaded_blob.digest == f'sha256:{hashlib.sha256(data).hexdigest()}'
+    assert uploaded_blob.size == len(data)
+    assert FakeRegistry.blobs[uploaded_blob.digest] == data
+
+    delivery_db_backup.verify_uploaded_blob(
+        oci_client=oci_client,
+        image_reference=image_reference,
+        uploaded_blob=uploaded_blob,
+    )
+
+
+def test_chunked_upload_falls_back_to_upload_at_once(registry, monkeypatch):
+    def private_request_helpers(oci_client):
+        raise NotImplementedError()
+
+    monkeypatch.setattr(oci_util, '_private_request_helpers', private_request_helpers)
+    oci_client, image_reference = _oci_client(registry)
+    data = os.urandom(10 * 1024)
+
+    uploaded_blob = delivery_db_backup.upload_chunked(
+        oci_client=oci_client,
+        image_reference=image_reference,
+        chunks=delivery_db_backup.iter_chunks(stream=io.BytesIO(data), chunk_size=4096),
+    )
+
+    assert FakeRegistry.patch_count == 0
+    assert FakeRegistry.blobs == {uploaded_blob.digest: data}
+
+
+@pytest.mark.parametrize('exit_code', (0, 1))
+def test_upload_is_committed_after_pg_dump_succeeded(registry, monkeypatch, exit_code):
+    oci_client, image_reference = _oci_client(registry)
+    data = b'delivery-db-backup'
+
+    monkeypatch.setattr(delivery_db_backup, 'pg_dump_argv', lambda **kwargs: [
+        'sh', '-c', f'printf {data.decode()}; exit {exit_code}',
+    ])
+
+    def create_and_upload_backup() -> delivery_db_backup.UploadedBlob:
+        return delivery_db_backup.create_and_upload_backup(
+            oci_client=oci_client,
+            image_reference=image_reference,
+            connection_url='postgresql://localhost',
+            backup_cfg=odg.extensions_cfg.DeliveryDBBackup(
+                delivery_service_url='http://delivery-service',
+                component_name='component',
+                ocm_repo_url='ocm-repo',
+                backup_retention_count=None,
+                upload_chunk_size_octets=4,
+            ),
+        )
+
+    if exit_code:
+        with pytest.raises(RuntimeError):
+            create_and_upload_backup()
+
+        # dump was transferred while it was created, but the upload was never committed
+        assert list(FakeRegistry.uploads.values()) == [data]
+        assert not FakeRegistry.blobs
+        return
+
+    uploaded_blob = create_and_upload_backup()
+    assert FakeRegistry.blobs == {uploaded_blob.digest: data}
+
+
+def test_directory_is_streamed_as_tar(tmp_path):
+    for idx in range(3):
+        (tmp_path / f'{idx}.dat.gz').write_bytes(os.urandom(2048))
+
+    chunks = list(delivery_db_backup.iter_tar_chunks(directory=tmp_path, chunk_size=1024))
+    assert all(len(chunk) == 1024 for chunk in chunks[:-1])
+
+    with tarfile.open(fileobj=io.BytesIO(b''.join(chunks))) as tf:
+        for idx in range(3):
+            assert tf.extractfile(f'./{idx}.dat.gz').read() == (
+                tmp_path / f'{idx}.dat.gz'
+            ).read_bytes()
@@ -0,0 +1,232 @@
+import asyncio
+import os
+import random
+
+import pytest
+import sqlalchemy
+import sqlalchemy.ext.asyncio as sqlasync
+
+import deliverydb
+import deliverydb.cache
+import deliverydb.model as dm
+import deliverydb_cache.model as dcm
+import deliverydb_cache.util
+
+
+@pytest.fixture(autouse=True)
+def value_storage_cfg(monkeypatch):
+    monkeypatch.setattr(deliverydb.cache, 'value_storage_cfg', deliverydb.cache.ValueStorageCfg(
+        compression_min_size_octets=1024,
+        chunk_size_octets=4096,
+        compression_format=dcm.CompressionFormat.ZLIB,
+    ))
+
+
+async def _store(
+    db_session: sqlasync.session.AsyncSession,
+    id: str,
+    value: bytes,
+) -> dm.DBCache:
+    db_session.expunge_all()
+
+    assert await deliverydb.cache.add_or_update_cache_entry(
+        db_session=db_session,
+        cache_entry=dm.DBCache(
+            id=id,
+            descriptor={},
+            costs=0,
+            size=len(value),
+            value=value,
+        ),
+    )
+
+    db_session.expunge_all()
+    return await db_session.get(dm.DBCache, id)
+
+
+async def _chunk_count(db_session: sqlasync.session.AsyncSession, id: str) -> int:
+    return await db_session.scalar(
+        sqlalchemy.select(sqlalchemy.func.count()).where(dm.DBCacheChunk.cache_id == id)
+    )
+
+
+@pytest.mark.asyncio
+async def test_values_are_compressed_and_chunked(db_session):
+    small_value = b'small value'
+    cache_entry = await _store(db_session=db_session, id='small', value=small_value)
+    assert cache_entry.compression is None
+    assert cache_entry.value == small_value
+    assert cache_entry.size == cache_entry.uncompressed_size == len(small_value)
+
+    compressible_value = b'component-descriptor ' * 200
+    cache_entry = await _store(db_session=db_session, id='compressible', value=compressible_value)
+    assert cache_entry.compression == dcm.CompressionFormat.ZLIB
+    assert cache_entry.size < cache_entry.uncompressed_size == len(compressible_value)
+    assert cache_entry.chunk_count is None
+
+    # random bytes are not compressible, hence they are stored uncompressed (but chunked)
+    large_value = random.Random(42).randbytes(20 * 1024)
+    cache_entry = await _store(db_session=db_session, id='large', value=large_value)
+    assert cache_entry.compression is None
+    assert cache_entry.value is None
+    assert cache_entry.chunk_count == await _chunk_count(db_session=db_session, id='large') == 5
+
+    for id, value in (
+        ('small', small_value),
+        ('compressible', compressible_value),
+        ('large', large_value),
+    ):
+        assert await deliverydb.cache.find_cached_value(db_session=db_session, id=id) == value
+
+    value_chunks = await deliverydb.cache.iter_cached_value(db_session=db_session, id='large')
+    assert len([chunk async for chunk in value_chunks]) == 5
+
+    # updating a chunked value removes stale chunks
+    cache_entry = await _store(db_session=db_session, id='large', value=small_value)
+    assert cache_entry.chunk_count is None
+    assert await _chunk_count(db_session=db_session, id='large') == 0
+    assert await deliverydb.cache.find_cached_value(db_session=db_session, id='large') == small_value
+
+
+@pytest.mark.asyncio
+async def test_compressed_chunks_are_streamed(db_session):
+    value = os.urandom(8 * 1024).hex().encode() # compressible, but still exceeds chunk size
+
+    cache_entry = await _store(db_session=db_session, id='id', value=value)
+    assert cache_entry.compression == dcm.CompressionFormat.ZLIB
+    assert cache_entry.chunk_count > 1
+
+    value_chunks = await deliverydb.cache.iter_cached_value(db_session=db_session, id='id')
+    assert b''.join([chunk async for chunk in value_chunks]) == value
+
+    await db_session.execute(
+        sqlalchemy.delete(dm.DBCacheChunk).where(dm.DBCacheChunk.idx == 1)
+    )
+    await db_session.commit()
+
+    # incomplete values are treated as cache miss
+    assert await deliverydb.cache.find_cached_value(db_session=db_session, id='id') is None
+
+
+@pytest.mark.asyncio
+async def test_missing_columns_are_added(db_url):
+    # cache relation as it was created before values were compressed
+    engine = sqlasync.create_async_engine(db_url)
+    async with engine.begin() as conn:
+        await conn.execute(sqlalchemy.text(
+            'CREATE TABLE cache (id CHAR(32) PRIMARY KEY, descriptor JSON, creation_date DATETIME, '
+            'last_update DATETIME, delete_after DATETIME, keep_until DATETIME, last_read DATETIME, '
+            'read_count INTEGER, revision INTEGER, costs INTEGER, size INTEGER, value BLOB)'
+        ))
+        await conn.execute(sqlalchemy.text(
+            'INSERT INTO cache (id, read_count, size, value) '
+            "VALUES ('legacy', 0, 6, X'6c6567616379')"
+        ))
+    await engine.dispose()
+
+    sessionmaker = await deliverydb.sqlalchemy_sessionmaker(db_url=db_url)
+
+    async with sessionmaker() as db_session:
+        assert await deliverydb.cache.find_cached_value(
+            db_session=db_session,
+            id='legacy',
+        ) == b'legacy'
+
+
+@pytest.mark.asyncio
+async def test_concurrent_computations_are_coalesced(sessionmaker):
+    computations = []
+
+    @deliverydb.cache.dbcached_function()
+    async def expensive_function(key: str, db_session: sqlasync.session.AsyncSession):
+        computations.append(key)
+        await asyncio.sleep(0.05)
+        return {'key': key}
+
+    async def call(key: str) -> dict:
+        async with sessionmaker() as db_session:
+            return await expensive_function(key, db_session=db_session)
+
+    results = await asyncio.gather(*[
+        call(key) for key in ('a', 'a', 'a', 'b')
+    ])
+
+    assert sorted(computations) == ['a', 'b']
+    assert results == [{'key': 'a'}] * 3 + [{'key': 'b'}]
+    # callers which did not compute the value receive their own copy
+    assert results[0] is not results[1]
+    assert not deliverydb.cache._in_flight_computations
+
+    # subsequent calls are served from the cache
+    assert await call('a') == {'key': 'a'}
+    assert sorted(computations) == ['a', 'b']
+
+
+@pytest.mark.asyncio
+async def test_errors_are_propagated_to_coalesced_callers(sessionmaker):
+    computations = []
+
+    @deliverydb.cache.dbcached_function()
+    async def failing_function(db_session: sqlasync.session.AsyncSession):
+        computations.append(None)
+        await asyncio.sleep(0.05)
+        raise ValueError('failed')
+
+    async def call():
+        async with sessionmaker() as db_session:
+            return await failing_function(db_session=db_session)
+
+    results = await asyncio.gather(*[call() for _ in range(3)], return_exceptions=True)
+
+    assert len(computations) == 1
+    assert all(isinstance(result, ValueError) for result in results)
+    assert not deliverydb.cache._in_flight_computations
+
+
+def test_advisory_lock_keys_are_signed_64_bit_integers():
+    assert deliverydb.cache.advisory_lock_key('0' * 32) == 0
+    assert deliverydb.cache.advisory_lock_key('f' * 32) == -1
+    assert deliverydb.cache.advisory_lock_key('7fffffffffffffff' + '0' * 16) == 2**63 - 1
+
+
+@pytest.mark.asyncio
+async def test_max_size_is_checked_against_stored_size(db_session):
+    value = b'component-descriptor ' * 200 # compresses well below the limit
+
+    assert await deliverydb.cache.add_or_update_cache_entry(
+        db_session=db_session,
+        cache_entry=dm.DBCache(id='compressible', descriptor={}, costs=0, value=value),
+        max_size_octets=len(value) // 2,
+    )
+    assert await deliverydb.cache.find_cached_value(
+        db_session=db_session,
+        id='compressible',
+    ) == value
+
+    incompressible_value = random.Random(42).randbytes(2 * 1024)
+    assert not await deliverydb.cache.add_or_update_cache_entry(
+        db_session=db_session,
+        cache_entry=dm.DBCache(
+            id='incompressible',
+            descriptor={},
+            costs=0,
+            value=incompressible_value,
+        ),
+        max_size_octets=len(incompressible_value) // 2,
+    )
+    assert await deliverydb.cache.find_cached_value(
+        db_session=db_session,
+        id='incompressible',
+    ) is None
+
+
+@pytest.mark.asyncio
+async def test_unsupported_compression_is_treated_as_cache_miss(db_session, monkeypatch):
+    await _store(db_session=db_session, id='id', value=b'component-descriptor ' * 200)
+    await db_session.execute(
+        sqlalchemy.update(dm.DBCache).values(compression=dcm.CompressionFormat.ZSTD)
+    )
+    await db_session.commit()
+    monkeypatch.setattr(deliverydb_cache.util, '_zstandard', lambda: None)
+
+    assert await deliverydb.cache.find_cached_value(db_session=db_session, id='id') is None
@@ -0,0 +1,108 @@
+import asyncio
+
+import prometheus_client
+import pytest
+import sqlalchemy
+import sqlalchemy.exc
+
+import deliverydb
+
+
+def _sample_value(name: str, lane: str) -> float:
+    return prometheus_client.REGISTRY.get_sample_value(name, {'lane': lane}) or 0
+
+
+@pytest.mark.asyncio
+async def test_lanes_use_separate_engines(db_url):
+    create_all_calls = []
+
+    def record_create_all(*args, **kwargs):
+        create_all_calls.append(args)
+
+    sqlalchemy.event.listen(deliverydb.dm.Base.metadata, 'before_create', record_create_all)
+
+    request_sessionmakers = await asyncio.gather(*[
+        deliverydb.sqlalchemy_sessionmaker(
+            db_url=db_url,
+            lane=deliverydb.PoolLane.REQUEST,
+        ) for _ in range(4)
+    ])
+    low_prio_sessionmaker = await deliverydb.sqlalchemy_sessionmaker(
+        db_url=db_url,
+        lane=deliverydb.PoolLane.LOW_PRIO,
+    )
+
+    assert len({id(sessionmaker) for sessionmaker in request_sessionmakers}) == 1
+    request_sessionmaker = request_sessionmakers[0]
+    assert request_sessionmaker.kw['bind'] is not low_prio_sessionmaker.kw['bind']
+
+    # schema is only created once per database, regardless of the number of lanes
+    assert len(create_all_calls) == 1
+    sqlalchemy.event.remove(deliverydb.dm.Base.metadata, 'before_create', record_create_all)
+
+    checkouts_before = _sample_value(
+        name='delivery_db_pool_checkout_wait_seconds_count',
+        lane=deliverydb.PoolLane.REQUEST,
+    )
+
+    async with request_sessionmaker() as db_session:
+        await db_session.execute(sqlalchemy.text('SELECT 1'))
+
+        assert _sample_value(
+            name='delivery_db_pool_connections_in_use',
+            lane=deliverydb.PoolLane.REQUEST,
+        ) == 1
+
+    assert _sample_value(
+        name='delivery_db_pool_checkout_wait_seconds_count',
+        lane=deliverydb.PoolLane.REQUEST,
+    ) == checkouts_before + 1
+    assert _sample_value(
+        name='delivery_db_pool_connections_in_use',
+        lane=deliverydb.PoolLane.REQUEST,
+    ) == 0
+
+    await request_sessionmaker.kw['bind'].dispose()
+    await low_prio_sessionmaker.kw['bind'].dispose()
+
+
+@pytest.mark.asyncio
+async def test_exhausted_lane_times_out(db_url):
+    deliverydb.configure_pool_lanes(deliverydb.PoolCfg(
+        lane=deliverydb.PoolLane.LOW_PRIO,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+    ))
+    timeouts_before = _sample_value(
+        name='delivery_db_pool_checkout_timeouts_total',
+        lane=deliverydb.PoolLane.LOW_PRIO,
+    )
+
+    blocking_session = await deliverydb.sqlalchemy_session(
+        db_url=db_url,
+        lane=deliverydb.PoolLane.LOW_PRIO,
+    )
+    await blocking_session.execute(sqlalchemy.text('SELECT 1'))
+
+    db_session = await deliverydb.sqlalchemy_session(
+        db_url=db_url,
+        lane=deliverydb.PoolLane.LOW_PRIO,
+    )
+    with pytest.raises(sqlalchemy.exc.TimeoutError):
+        await db_session.execute(sqlalchemy.text('SELECT 1'))
+
+    assert _sample_value(
+        name='delivery_db_pool_checkout_timeouts_total',
+        lane=deliverydb.PoolLane.LOW_PRIO,
+    ) == timeouts_before + 1
+
+    # other lanes are not affected by the exhausted lane
+    async with await deliverydb.sqlalchemy_session(
+        db_url=db_url,
+        lane=deliverydb.PoolLane.REQUEST,
+    ) as request_session:
+        await request_session.execute(sqlalchemy.text('SELECT 1'))
+
+    await db_session.close()
+    await blocking_session.close()
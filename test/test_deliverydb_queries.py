@@ -0,0 +1,412 @@
+import asyncio
+import contextlib
+import dataclasses
+import datetime
+
+import aiohttp.test_utils
+import aiohttp.web
+import pytest
+import sqlalchemy
+import sqlalchemy.dialects.postgresql
+import sqlalchemy.ext.asyncio as sqlasync
+
+import oci.model
+import ocm
+
+import consts
+import deliverydb
+import deliverydb.model as dm
+import deliverydb.util
+import metadata
+import odg.model
+import rescore.artefacts
+
+
+@pytest.fixture
+def component() -> ocm.Component:
+    return ocm.Component(
+        name='component',
+        version='1.0.0',
+        repositoryContexts=[],
+        provider='',
+        sources=[],
+        componentReferences=[],
+        resources=[
+            ocm.Resource(
+                name=f'image-{idx}',
+                version='1.0.0',
+                type=ocm.ArtefactType.OCI_IMAGE,
+                access=ocm.OciAccess(imageReference=f'registry.local/image-{idx}:1.0.0'),
+            ) for idx in range(3)
+        ],
+        labels=[],
+    )
+
+
+def _artefact_metadata(
+    id: str,
+    component_version: str | None,
+    artefact_name: str,
+    artefact_version: str='1.0.0',
+    type: str=odg.model.Datatype.VULNERABILITY_FINDING,
+    datasource: str=odg.model.Datasource.BDBA,
+) -> dm.ArtefactMetaData:
+    return dm.ArtefactMetaData(
+        id=id,
+        type=type,
+        component_name='component',
+        component_version=component_version,
+        artefact_kind=odg.model.ArtefactKind.RESOURCE,
+        artefact_name=artefact_name,
+        artefact_version=artefact_version,
+        artefact_type=ocm.ArtefactType.OCI_IMAGE,
+        artefact_extra_id={},
+        artefact_extra_id_normalised='',
+        meta={'datasource': datasource, 'type': type},
+        data={'severity': 'CRITICAL'},
+        datasource=datasource,
+    )
+
+
+@contextlib.contextmanager
+def _query_plans(
+    sessionmaker: sqlasync.async_sessionmaker,
+    table_name: str='artefact_metadata',
+):
+    '''
+    yields a list which is filled with the query plans (`EXPLAIN QUERY PLAN`) of all statements
+    which select from `table_name` while the context is active
+    '''
+    engine = sessionmaker.kw['bind'].sync_engine
+    query_plans = []
+
+    def explain(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().startswith('SELECT') or table_name not in statement:
+            return
+
+        query_plans.append('\n'.join(
+            row[-1] for row in conn.exec_driver_sql(
+                f'EXPLAIN QUERY PLAN {statement}',
+                parameters,
+            )
+        ))
+
+    sqlalchemy.event.listen(engine, 'before_cursor_execute', explain)
+    try:
+        yield query_plans
+    finally:
+        sqlalchemy.event.remove(engine, 'before_cursor_execute', explain)
+
+
+@pytest.mark.asyncio
+async def test_findings_for_component(sessionmaker, component):
+    async with sessionmaker() as db_session:
+        db_session.add_all([
+            _artefact_metadata(id='versioned', component_version='1.0.0', artefact_name='image-0'),
+            _artefact_metadata(id='deduplicated', component_version=None, artefact_name='image-2'),
+            _artefact_metadata(
+                id='other-artefact-version',
+                component_version=None,
+                artefact_name='image-1',
+                artefact_version='2.0.0',
+            ),
+            _artefact_metadata(
+                id='other-version',
+                component_version='2.0.0',
+                artefact_name='image-0',
+            ),
+            _artefact_metadata(
+                id='other-datasource',
+                component_version='1.0.0',
+                artefact_name='image-0',
+                datasource=odg.model.Datasource.CLAMAV,
+            ),
+        ])
+        await db_session.commit()
+
+        with _query_plans(sessionmaker=sessionmaker) as query_plans:
+            findings = await deliverydb.util.findings_for_component(
+                component=component,
+                finding_type=odg.model.Datatype.VULNERABILITY_FINDING,
+                datasource=odg.model.Datasource.BDBA,
+                db_session=db_session,
+            )
+
+    assert {finding.artefact.artefact.artefact_name for finding in findings} == {
+        'image-0',
+        'image-2',
+    }
+
+    query_plan, = query_plans
+    assert 'USING INDEX ix_artefact_metadata_type_datasource_component' in query_plan
+    assert 'SCAN artefact_metadata' not in query_plan
+
+
+@pytest.mark.asyncio
+async def test_rescorings_for_component_use_index(sessionmaker, component):
+    async with sessionmaker() as db_session:
+        with _query_plans(sessionmaker=sessionmaker) as query_plans:
+            await deliverydb.util.rescorings_for_component(
+                component=component,
+                finding_type=odg.model.Datatype.VULNERABILITY_FINDING,
+                db_session=db_session,
+            )
+
+    query_plan, = query_plans
+    assert 'USING INDEX ix_artefact_metadata_type_referenced_type_component' in query_plan
+    assert 'SCAN artefact_metadata' not in query_plan
+
+
+def test_artefacts_are_passed_as_values_relation_for_postgresql():
+    rows_in = deliverydb.util.RowsIn(
+        columns=(dm.ArtefactMetaData.artefact_name, dm.ArtefactMetaData.artefact_version),
+        rows=[('image', '1.0.0'), ('image', '1.0.0'), ('other-image', '1.0.0')],
+    )
+
+    statement = str(rows_in.compile(dialect=sqlalchemy.dialects.postgresql.dialect()))
+    assert 'IN (SELECT' in statement
+    assert statement.count('VALUES') == 1
+    assert len(rows_in.rows) == 2
+
+
+@pytest.mark.asyncio
+async def test_missing_indexes_are_created(tmp_path, monkeypatch):
+    monkeypatch.setattr(deliverydb, 'sessionmakers', {})
+    monkeypatch.setattr(deliverydb, '_sessionmakers_lock', asyncio.Lock())
+    monkeypatch.setattr(deliverydb, '_initialised_db_urls', set())
+    db_url = f'sqlite+aiosqlite:///{tmp_path / "delivery.db"}'
+
+    # artefact metadata relation as it was created before indexes were added
+    engine = sqlasync.create_async_engine(db_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            lambda conn: dm.ArtefactMetaData.__table__.create(conn, checkfirst=False),
+        )
+        await conn.execute(sqlalchemy.text(
+            'DROP INDEX ix_artefact_metadata_type_datasource_component'
+        ))
+    await engine.dispose()
+
+    sessionmaker = await deliverydb.sqlalchemy_sessionmaker(db_url=db_url)
+    engine = sessionmaker.kw['bind']
+
+    async with engine.connect() as conn:
+        index_names = await conn.run_sync(
+            lambda conn: {
+                index['name'] for index in sqlalchemy.inspect(conn).get_indexes('artefact_metadata')
+            },
+        )
+
+    await engine.dispose()
+
+    assert index_names == {index.name for index in dm.ArtefactMetaData.__table__.indexes}
+
+
+def _artefact(component_version: str | None) -> odg.model.ComponentArtefactId:
+    return odg.model.ComponentArtefactId(
+        component_name='component',
+        component_version=component_version,
+        artefact=odg.model.LocalArtefactId(
+            artefact_name='image-0',
+            artefact_version='1.0.0',
+            artefact_type=ocm.ArtefactType.OCI_IMAGE,
+            artefact_extra_id={'platform': 'linux/amd64'},
+        ),
+        artefact_kind=odg.model.ArtefactKind.RESOURCE,
+    )
+
+
+def _scan_info(artefact: odg.model.ComponentArtefactId) -> dm.ArtefactMetaData:
+    return deliverydb.util.to_db_artefact_metadata(
+        artefact_metadata=odg.model.ArtefactMetadata(
+            artefact=artefact,
+            meta=odg.model.Metadata(
+                datasource=odg.model.Datasource.BDBA,
+                type=odg.model.Datatype.ARTEFACT_SCAN_INFO,
+                creation_date=datetime.datetime.now(),
+            ),
+            data={},
+        ),
+    )
+
+
+@pytest.mark.asyncio
+async def test_artefact_metadata_is_looked_up_by_artefact_key(sessionmaker):
+    async with sessionmaker() as db_session:
+        db_session.add_all([
+            _scan_info(artefact=_artefact(component_version='1.0.0')),
+            _scan_info(artefact=_artefact(component_version=None)),
+            _scan_info(artefact=_artefact(component_version='2.0.0')),
+        ])
+        await db_session.commit()
+
+        with _query_plans(sessionmaker=sessionmaker) as query_plans:
+            artefact_metadata = await rescore.artefacts._find_artefact_metadata(
+                db_session=db_session,
+                artefact=_artefact(component_version='1.0.0'),
+            )
+
+    assert sorted(
+        str(artefact_metadatum.artefact.component_version)
+        for artefact_metadatum in artefact_metadata
+    ) == ['1.0.0', 'None']
+
+    query_plan, = query_plans
+    assert 'USING INDEX ix_artefact_metadata_artefact_key_type' in query_plan
+
+
+@pytest.mark.asyncio
+async def test_artefact_keys_are_backfilled(sessionmaker):
+    scan_info = _scan_info(artefact=_artefact(component_version='1.0.0'))
+    id, artefact_key = scan_info.id, scan_info.artefact_key
+    scan_info.artefact_key = None
+
+    async with sessionmaker() as db_session:
+        db_session.add(scan_info)
+        await db_session.commit()
+
+    engine = sessionmaker.kw['bind']
+
+    # data migrations are not part of the initialisation of a delivery-db
+    await deliverydb.migrate_db(engine)
+    async with sessionmaker() as db_session:
+        assert (await db_session.get(dm.ArtefactMetaData, id)).artefact_key is None
+
+    assert await deliverydb.migrate_data(engine)
+    async with sessionmaker() as db_session:
+        assert (await db_session.get(dm.ArtefactMetaData, id)).artefact_key == artefact_key
+
+        # data migrations are only applied once per delivery-db
+        scan_info = await db_session.get(dm.ArtefactMetaData, id)
+        scan_info.artefact_key = None
+        await db_session.commit()
+
+    await deliverydb.migrate_data(engine)
+    async with sessionmaker() as db_session:
+        assert (await db_session.get(dm.ArtefactMetaData, id)).artefact_key is None
+
+        await db_session.execute(sqlalchemy.delete(dm.Migration).where(
+            dm.Migration.name == deliverydb.backfill_artefact_keys.__name__,
+        ))
+        await db_session.commit()
+
+    await deliverydb.migrate_data(engine)
+    async with sessionmaker() as db_session:
+        assert (await db_session.get(dm.ArtefactMetaData, id)).artefact_key == artefact_key
+        assert await db_session.get(dm.Migration, deliverydb.backfill_artefact_keys.__name__)
+
+
+@pytest.mark.asyncio
+async def test_missing_indexes_are_added(sessionmaker):
+    engine = sessionmaker.kw['bind']
+    index_name = 'ix_artefact_metadata_artefact_key_type'
+
+    async def index_names() -> set[str]:
+        async with engine.connect() as conn:
+            return await conn.run_sync(lambda conn: {
+                index['name'] for index in sqlalchemy.inspect(conn).get_indexes('artefact_metadata')
+            })
+
+    async with engine.begin() as conn:
+        await conn.execute(sqlalchemy.text(f'DROP INDEX {index_name}'))
+    assert index_name not in await index_names()
+
+    await deliverydb.migrate_db(engine)
+    assert index_name in await index_names()
+
+
+@pytest.mark.asyncio
+async def test_advisory_lock_is_polled_instead_of_blocking():
+    statements = []
+    lock_results = iter((False, False, True))
+
+    class Connection:
+        async def scalar(self, statement):
+            statements.append(str(statement))
+            return next(lock_results)
+
+    await deliverydb._acquire_advisory_lock(
+        connection=Connection(),
+        key=deliverydb.MIGRATIONS_ADVISORY_LOCK_KEY,
+        poll_interval_seconds=0,
+    )
+
+    assert len(statements) == 3
+    assert all('pg_try_advisory_lock' in statement for statement in statements)
+
+
+def _rescoring(
+    artefact: odg.model.ComponentArtefactId,
+    referenced_type: str=odg.model.Datatype.VULNERABILITY_FINDING,
+) -> dm.ArtefactMetaData:
+    return deliverydb.util.to_db_artefact_metadata(
+        artefact_metadata=odg.model.ArtefactMetadata(
+            artefact=artefact,
+            meta=odg.model.Metadata(
+                datasource=odg.model.Datasource.DELIVERY_DASHBOARD,
+                type=odg.model.Datatype.RESCORING,
+                creation_date=datetime.datetime.now(),
+            ),
+            data=odg.model.CustomRescoring(
+                finding=odg.model.RescoringVulnerabilityFinding(
+                    package_name='package',
+                    cve='CVE-0',
+                ),
+                referenced_type=referenced_type,
+                severity='NONE',
+                user=odg.model.User(username='user'),
+            ),
+        ),
+    )
+
+
+@pytest.mark.asyncio
+async def test_findings_and_rescorings_are_queried_at_once(sessionmaker):
+    async def component_descriptor_lookup(component_id, absent_ok=False):
+        raise oci.model.OciImageNotFoundException()
+
+    @aiohttp.web.middleware
+    async def db_session_middleware(request, handler):
+        async with sessionmaker() as db_session:
+            request[consts.REQUEST_DB_SESSION] = db_session
+            return await handler(request)
+
+    app = aiohttp.web.Application(middlewares=[db_session_middleware])
+    app[consts.APP_COMPONENT_DESCRIPTOR_LOOKUP] = component_descriptor_lookup
+    app[consts.APP_FINDING_CFGS] = []
+    app.router.add_view('/artefacts/metadata/query', metadata.ArtefactMetadataQuery)
+
+    async with sessionmaker() as db_session:
+        db_session.add_all([
+            _scan_info(artefact=_artefact(component_version='1.0.0')),
+            # only rescorings match regardless of the component version (rescoring scopes)
+            _scan_info(artefact=_artefact(component_version=None)),
+            _rescoring(artefact=_artefact(component_version=None)),
+            # the referenced type only filters rescorings
+            _rescoring(
+                artefact=_artefact(component_version='1.0.0'),
+                referenced_type=odg.model.Datatype.LICENSE_FINDING,
+            ),
+        ])
+        await db_session.commit()
+
+    async with aiohttp.test_utils.TestClient(aiohttp.test_utils.TestServer(app)) as client:
+        res = await client.post(
+            '/artefacts/metadata/query',
+            params=[
+                ('type', odg.model.Datatype.ARTEFACT_SCAN_INFO),
+                ('type', odg.model.Datatype.RESCORING),
+                ('referenced_type', odg.model.Datatype.VULNERABILITY_FINDING),
+            ],
+            json={'entries': [dataclasses.asdict(_artefact(component_version='1.0.0'))]},
+        )
+        assert res.status == 200
+        artefact_metadata = await res.json()
+
+    assert sorted(
+        (entry['meta']['type'], entry['artefact']['component_version'])
+        for entry in artefact_metadata
+    ) == [
+        (odg.model.Datatype.ARTEFACT_SCAN_INFO, '1.0.0'),
+        (odg.model.Datatype.RESCORING, None),
+    ]
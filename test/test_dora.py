@@ -1,3 +1,5 @@
+import asyncio
+import datetime
 import os
 
 import pytest
@@ -5,6 +7,7 @@ import pytest
 import cnudie.util
 import ocm
 
+import caching
 import dora
 import test.resources.lookup_mocks as lookup_mocks
 
@@ -27,6 +30,12 @@ versions_lookup_mockup = lookup_mocks.versions_lookup_mockup_factory(
 )
 
 
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    # don't leave filesystem cache entries in the repository
+    monkeypatch.setattr(caching, 'default_cache_dir', str(tmp_path / 'cache'))
+
+
 @pytest.mark.asyncio
 async def test_get_next_older_descriptor():
 
@@ -98,3 +107,110 @@ def test_dependency_changes_between_versions():
         dependency_name_filter=['c3'],
     )
     assert len(dependency_changes) == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('max_concurrency', [1, 2, 8])
+async def test_versions_descriptors_newer_than(max_concurrency):
+    descriptors = await dora.versions_descriptors_newer_than(
+        component_name='TestComponent_1',
+        date=datetime.datetime(2023, 12, 19, tzinfo=datetime.UTC),
+        component_descriptor_lookup=component_descriptor_lookup_mockup,
+        version_lookup=versions_lookup_mockup,
+        sorting_direction='asc',
+        max_concurrency=max_concurrency,
+    )
+
+    assert [descriptor.component.version for descriptor in descriptors] == ['v2.0.0', 'v3.0.0']
+
+
+@pytest.mark.asyncio
+async def test_dora_jobs_are_deduplicated(monkeypatch):
+    calculations = []
+    calculation_may_finish = asyncio.Event()
+
+    async def dora_response(key, job, **kwargs):
+        calculations.append(key)
+        job.total_changes = 2
+        job.resolved_changes = 1
+        await calculation_may_finish.wait()
+        return dora.DoraResponse(
+            change_lead_time_median=1,
+            change_lead_time_average=2,
+            dependencies={},
+        )
+
+    monkeypatch.setattr(dora, 'dora_response', dora_response)
+
+    dora_jobs = dora.DoraJobs()
+
+    jobs = [
+        dora_jobs.submit(
+            key='key',
+            time_span_days=90,
+            target_descriptors_with_updates=(),
+            github_api_lookup=None,
+        ) for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+
+    assert all(job is jobs[0] for job in jobs)
+    assert dora_jobs.job('key').progress()['resolved_changes'] == 1
+    assert await dora_jobs.result('key') is None
+
+    calculation_may_finish.set()
+    await jobs[0].task
+
+    assert calculations == ['key']
+    assert dora_jobs.job('key') is None
+    assert (await dora_jobs.result('key')).change_lead_time_average == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_dora_jobs_are_retried(monkeypatch):
+    async def dora_response(**kwargs):
+        raise RuntimeError('github unavailable')
+
+    monkeypatch.setattr(dora, 'dora_response', dora_response)
+
+    dora_jobs = dora.DoraJobs()
+    job = dora_jobs.submit(
+        key='key',
+        time_span_days=90,
+        target_descriptors_with_updates=(),
+        github_api_lookup=None,
+    )
+    await job.task
+
+    assert dora_jobs.job('key') is None
+    assert await dora_jobs.result('key') is None
+
+
+@pytest.mark.asyncio
+async def test_dora_response_is_read_from_db_cache(db_session, monkeypatch):
+    async def categorize_by_changed_component(**kwargs):
+        return {}
+
+    def create_response_object(**kwargs):
+        return dora.DoraResponse(
+            change_lead_time_median=1,
+            change_lead_time_average=2,
+            dependencies={},
+        )
+
+    monkeypatch.setattr(dora, 'categorize_by_changed_component', categorize_by_changed_component)
+    monkeypatch.setattr(dora, 'create_response_object', create_response_object)
+
+    assert await dora.cached_dora_response(key='key', db_session=db_session) is None
+
+    await dora.dora_response(
+        key='key',
+        time_span_days=90,
+        target_descriptors_with_updates=(),
+        github_api_lookup=None,
+        db_session=db_session,
+    )
+
+    # e.g. another replica which did not calculate the result itself
+    result = await dora.DoraJobs().result(key='key', db_session=db_session)
+    assert result.change_lead_time_average == 2
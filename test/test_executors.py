@@ -0,0 +1,112 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import threading
+
+import pytest
+
+import executors
+
+
+@pytest.fixture
+def lane_executor():
+    lane_executor = executors.LaneExecutor(cfg=executors.ExecutorLaneCfg(
+        lane=executors.ExecutorLane.GITHUB,
+        max_workers=1,
+        max_queue_depth=2,
+    ))
+
+    yield lane_executor
+
+    lane_executor.shutdown(wait=True, cancel_futures=True)
+
+
+def test_queue_depth_is_bounded(lane_executor):
+    release = threading.Event()
+
+    running = lane_executor.submit(release.wait)
+    queued = [lane_executor.submit(lambda: 42) for _ in range(2)]
+
+    with pytest.raises(executors.ExecutorLaneSaturated):
+        lane_executor.submit(lambda: 42)
+
+    # cancelled tasks free up their slot in the queue
+    assert queued[1].cancel()
+    queued.append(lane_executor.submit(lambda: 42))
+
+    release.set()
+    assert running.result(timeout=5)
+    assert queued[0].result(timeout=5) == queued[2].result(timeout=5) == 42
+    assert lane_executor._queued_tasks == 0
+
+
+def test_reserved_slots_are_not_rejected(lane_executor, monkeypatch):
+    monkeypatch.setattr(executors, '_executors', {executors.ExecutorLane.GITHUB: lane_executor})
+    started = threading.Event()
+    release = threading.Event()
+
+    def block():
+        started.set()
+        return release.wait()
+
+    def submit_elsewhere() -> concurrent.futures.Future:
+        # other callers do not hold the reservation
+        return contextvars.Context().run(lane_executor.submit, lambda: 42)
+
+    running = lane_executor.submit(block)
+    queued = []
+
+    try:
+        assert started.wait(timeout=5)
+
+        with executors.reserved(executors.ExecutorLane.GITHUB):
+            queued.append(submit_elsewhere())
+
+            # remaining slot is reserved
+            with pytest.raises(executors.ExecutorLaneSaturated):
+                submit_elsewhere()
+
+            # holder of the reservation may still submit tasks, even though the queue is full
+            queued.append(lane_executor.submit(lambda: 42))
+    finally:
+        release.set()
+
+    assert running.result(timeout=5)
+    assert [future.result(timeout=5) for future in queued] == [42, 42]
+    assert lane_executor._reserved_slots == 0
+
+
+def test_parse_lane_cfg():
+    cfg = executors.parse_lane_cfg('github=16/512')
+    assert cfg.lane is executors.ExecutorLane.GITHUB
+    assert (cfg.max_workers, cfg.max_queue_depth) == (16, 512)
+
+    # unspecified queue depth is kept
+    cfg = executors.parse_lane_cfg('k8s=2')
+    assert cfg.max_queue_depth == executors.lane_cfgs[executors.ExecutorLane.K8S].max_queue_depth
+
+    with pytest.raises(ValueError):
+        executors.parse_lane_cfg('unknown=2')
+
+
+@pytest.mark.asyncio
+async def test_lanes_are_isolated(monkeypatch):
+    monkeypatch.setattr(executors, '_executors', {})
+    var = contextvars.ContextVar('var')
+    var.set('value')
+
+    release = threading.Event()
+    blocked = asyncio.ensure_future(asyncio.gather(*[
+        executors.run_in_lane(executors.ExecutorLane.GITHUB, release.wait)
+        for _ in range(executors.lane_cfgs[executors.ExecutorLane.GITHUB].max_workers)
+    ]))
+
+    # saturated GitHub lane does not affect work which is executed in other lanes
+    assert await asyncio.wait_for(
+        executors.run_in_lane(executors.ExecutorLane.CPU, var.get),
+        timeout=5,
+    ) == 'value'
+
+    release.set()
+    await blocked
+    executors.shutdown()
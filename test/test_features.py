@@ -0,0 +1,85 @@
+import time
+
+import pytest
+import yaml
+
+import features
+
+
+@pytest.fixture
+def cfg_dir(tmp_path, monkeypatch):
+    cfgs = {
+        'FEATURES_CFG_PATH': ('features_cfg.yaml', {'upgradePRs': True}),
+        'EXTENSIONS_CFG_PATH': ('extensions_cfg.yaml', {}),
+        'FINDINGS_CFG_PATH': ('findings_cfg.yaml', []),
+        'OCM_REPO_MAPPINGS_PATH': ('ocm_repo_mappings.yaml', [
+            {'repository': 'europe-docker.pkg.dev/gardener-project/releases'},
+        ]),
+        'PROFILES_PATH': ('profiles.yaml', [
+            {'name': 'default', 'finding_types': ['finding/vulnerability']},
+        ]),
+    }
+
+    for env_var, (file_name, cfg) in cfgs.items():
+        path = tmp_path / file_name
+        path.write_text(yaml.safe_dump(cfg))
+        monkeypatch.setenv(env_var, str(path))
+
+    monkeypatch.setattr(features, 'feature_cfgs', [
+        features.FeatureDeliveryDB(features.FeatureStates.UNAVAILABLE),
+    ])
+    monkeypatch.setattr(features, '_loaded_cfg_sources', {})
+
+    return tmp_path
+
+
+def test_only_changed_cfgs_are_reloaded(cfg_dir):
+    features.apply_raw_cfg()
+
+    profiles_feature = features.get_feature(features.FeatureProfiles)
+    repo_contexts_feature = features.get_feature(features.FeatureRepoContexts)
+    upgrade_prs_feature = features.get_feature(features.FeatureUpgradePRs)
+
+    assert profiles_feature.find_profile(None).name == 'default'
+    assert upgrade_prs_feature.state is features.FeatureStates.AVAILABLE
+    # features which are not derived from cfg files are kept
+    assert features.get_feature(features.FeatureDeliveryDB)
+
+    # unchanged cfg files do not result in new features
+    features.apply_raw_cfg()
+
+    assert features.get_feature(features.FeatureProfiles) is profiles_feature
+    assert features.get_feature(features.FeatureRepoContexts) is repo_contexts_feature
+    assert features.get_feature(features.FeatureUpgradePRs) is upgrade_prs_feature
+
+    (cfg_dir / 'profiles.yaml').write_text(yaml.safe_dump([
+        {'name': 'default', 'finding_types': []},
+        {'name': 'other'},
+    ]))
+    features.apply_raw_cfg()
+
+    new_profiles_feature = features.get_feature(features.FeatureProfiles)
+    assert new_profiles_feature is not profiles_feature
+    assert new_profiles_feature.find_profile('other').name == 'other'
+    assert new_profiles_feature.find_profile('unknown') is None
+    assert features.get_feature(features.FeatureRepoContexts) is repo_contexts_feature
+
+    assert len({type(feature) for feature in features.feature_cfgs}) == len(features.feature_cfgs)
+
+
+def test_file_change_events_are_debounced(monkeypatch):
+    applied = []
+    monkeypatch.setattr(features, 'apply_raw_cfg', lambda: applied.append(time.monotonic()))
+
+    event_handler = features.CfgFileChangeEventHandler(debounce_seconds=0.1)
+
+    for _ in range(5):
+        event_handler.dispatch(event=None)
+        time.sleep(0.01)
+
+    time.sleep(0.3)
+    assert len(applied) == 1
+
+    event_handler.dispatch(event=None)
+    time.sleep(0.3)
+    assert len(applied) == 2
@@ -0,0 +1,253 @@
+import collections
+import concurrent.futures
+import datetime
+import http.server
+import json
+import threading
+
+import pytest
+
+import cryptography.hazmat.primitives.asymmetric.rsa
+import cryptography.hazmat.primitives.serialization
+
+import secret_mgmt.github
+
+
+_repo_url_attributes = (
+    'archive_url', 'assignees_url', 'blobs_url', 'branches_url', 'collaborators_url',
+    'comments_url', 'commits_url', 'compare_url', 'contents_url', 'contributors_url',
+    'deployments_url', 'downloads_url', 'events_url', 'forks_url', 'git_commits_url',
+    'git_refs_url', 'git_tags_url', 'hooks_url', 'html_url', 'issue_comment_url',
+    'issue_events_url', 'issues_url', 'keys_url', 'labels_url', 'languages_url', 'merges_url',
+    'milestones_url', 'notifications_url', 'pulls_url', 'releases_url', 'stargazers_url',
+    'statuses_url', 'subscribers_url', 'subscription_url', 'tags_url', 'teams_url', 'trees_url',
+    'url',
+)
+_user_url_attributes = (
+    'avatar_url', 'events_url', 'followers_url', 'following_url', 'gists_url', 'html_url',
+    'organizations_url', 'received_events_url', 'repos_url', 'starred_url', 'subscriptions_url',
+    'url',
+)
+
+
+def _repo_raw(org: str, name: str) -> dict:
+    url = f'https://api.example.com/repos/{org}/{name}'
+    return {attribute: url for attribute in _repo_url_attributes} | {
+        'description': None,
+        'fork': False,
+        'full_name': f'{org}/{name}',
+        'id': 1,
+        'name': name,
+        'owner': {attribute: url for attribute in _user_url_attributes} | {
+            'gravatar_id': '',
+            'id': 1,
+            'login': org,
+            'type': 'Organization',
+        },
+        'private': False,
+    }
+
+
+class FakeGitHub(http.server.ThreadingHTTPServer):
+    '''
+    local stand-in for the GitHub api, serving installation tokens and accessible repositories
+    '''
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FakeGitHubRequestHandler)
+        self.requests = collections.Counter()
+        self.token_validity = datetime.timedelta(hours=1)
+        self.repositories = ['repo']
+        self._lock = threading.Lock()
+
+    @property
+    def api_url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}/api/v3'
+
+    def record(self, method: str, path: str) -> int:
+        with self._lock:
+            self.requests[(method, path)] += 1
+            return self.requests.total()
+
+
+class FakeGitHubRequestHandler(http.server.BaseHTTPRequestHandler):
+    def _respond(self, status: int, body: dict):
+        raw_body = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(raw_body)))
+        self.send_header('X-RateLimit-Limit', '5000')
+        self.send_header('X-RateLimit-Remaining', str(5000 - self.server.requests.total()))
+        self.end_headers()
+        self.wfile.write(raw_body)
+
+    def do_POST(self):
+        request_count = self.server.record('POST', self.path)
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+        expires_at = datetime.datetime.now(tz=datetime.timezone.utc) + self.server.token_validity
+        self._respond(201, {
+            'token': f'token-{request_count}',
+            'expires_at': expires_at.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        })
+
+    def do_GET(self):
+        self.server.record('GET', self.path.split('?')[0])
+
+        self._respond(200, {
+            'total_count': len(self.server.repositories),
+            'repositories': [
+                _repo_raw(org='org', name=name)
+                for name in self.server.repositories
+            ],
+        })
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeSecretFactory:
+    def __init__(self, github_app: secret_mgmt.github.GitHubApp):
+        self.github_apps = [github_app]
+
+    def github_app(self) -> list[secret_mgmt.github.GitHubApp]:
+        return self.github_apps
+
+
+@pytest.fixture
+def fake_github():
+    server = FakeGitHub()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope='module')
+def private_key() -> str:
+    key = cryptography.hazmat.primitives.asymmetric.rsa.generate_private_key(
+        public_exponent=65537,
+        key_size=2048,
+    )
+    return key.private_bytes(
+        encoding=cryptography.hazmat.primitives.serialization.Encoding.PEM,
+        format=cryptography.hazmat.primitives.serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=cryptography.hazmat.primitives.serialization.NoEncryption(),
+    ).decode()
+
+
+@pytest.fixture
+def secret_factory(fake_github, private_key) -> FakeSecretFactory:
+    return FakeSecretFactory(github_app=secret_mgmt.github.GitHubApp(
+        api_url=fake_github.api_url,
+        app_id=1,
+        mappings=[secret_mgmt.github.GitHubAppMapping(installation_id=42, org='org')],
+        private_key=private_key,
+        tls_verify=False,
+    ))
+
+
+_token_path = '/api/v3/app/installations/42/access_tokens'
+_repositories_path = '/api/v3/installation/repositories'
+
+
+class RecordingObserver(secret_mgmt.github.GitHubClientObserver):
+    def __init__(self):
+        self.responses = []
+        self.token_exchanges = []
+
+    def record_response(self, hostname, installation, status, **kwargs):
+        self.responses.append((hostname, installation, status))
+
+    def record_token_exchange(self, hostname, installation):
+        self.token_exchanges.append((hostname, installation))
+
+
+def test_clients_and_tokens_are_reused(fake_github, secret_factory):
+    registry = secret_mgmt.github.GitHubClientRegistry()
+    observer = RecordingObserver()
+    registry.add_observer(observer)
+
+    github_apis = [
+        registry.github_api(
+            secret_factory=secret_factory,
+            repo_url=repo_url,
+        ) for repo_url in (
+            'https://127.0.0.1/org/repo',
+            'https://127.0.0.1/org/repo/path',
+            'https://127.0.0.1/org',
+        )
+    ]
+
+    assert all(github_api is github_apis[0] for github_api in github_apis)
+    assert github_apis[0].session.auth.token == 'token-1'
+    assert fake_github.requests[('POST', _token_path)] == 1
+    assert fake_github.requests[('GET', _repositories_path)] == 1
+
+    metrics = registry.metrics()[('127.0.0.1', 42)]
+    assert metrics.requests_total == {201: 1, 200: 1}
+    assert metrics.token_exchanges_total == 1
+    assert metrics.quota_limit == 5000
+    assert metrics.quota_remaining == 4998
+
+    assert observer.responses == [('127.0.0.1', 42, 201), ('127.0.0.1', 42, 200)]
+    assert observer.token_exchanges == [('127.0.0.1', 42)]
+
+    with pytest.raises(ValueError):
+        registry.github_api(
+            secret_factory=secret_factory,
+            repo_url='https://127.0.0.1/org/inaccessible-repo',
+        )
+    assert registry.github_api(
+        secret_factory=secret_factory,
+        repo_url='https://127.0.0.1/org/inaccessible-repo',
+        absent_ok=True,
+    ) is None
+
+
+def test_expiring_tokens_are_refreshed(fake_github, secret_factory):
+    registry = secret_mgmt.github.GitHubClientRegistry(token_refresh_margin_seconds=300)
+    fake_github.token_validity = datetime.timedelta(seconds=60)
+
+    for idx in range(3):
+        github_api = registry.github_api(
+            secret_factory=secret_factory,
+            repo_url='https://127.0.0.1/org',
+        )
+        assert github_api.session.auth.token == f'token-{idx + 1}'
+
+    assert fake_github.requests[('POST', _token_path)] == 3
+
+
+def test_rotated_credentials(fake_github, secret_factory, private_key):
+    registry = secret_mgmt.github.GitHubClientRegistry()
+
+    github_api = registry.github_api(
+        secret_factory=secret_factory,
+        repo_url='https://127.0.0.1/org',
+    )
+
+    secret_factory.github_apps[0].private_key = private_key + '\n'
+
+    assert registry.github_api(
+        secret_factory=secret_factory,
+        repo_url='https://127.0.0.1/org',
+    ) is not github_api
+    assert fake_github.requests[('POST', _token_path)] == 2
+
+
+def test_concurrent_lookups_exchange_token_once(fake_github, secret_factory):
+    registry = secret_mgmt.github.GitHubClientRegistry()
+
+    def github_api(_):
+        return registry.github_api(
+            secret_factory=secret_factory,
+            repo_url='https://127.0.0.1/org/repo',
+        )
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        github_apis = list(executor.map(github_api, range(16)))
+
+    assert len({id(github_api) for github_api in github_apis}) == 1
+    assert fake_github.requests[('POST', _token_path)] == 1
+    assert fake_github.requests[('GET', _repositories_path)] == 1
@@ -0,0 +1,400 @@
+import datetime
+import functools
+import os
+import unittest.mock
+
+import pytest
+
+import github3.issues.issue
+import github3.session
+
+import github_util
+import issue_replicator.github
+import issue_replicator.rendering
+import odg.findings
+import odg.model
+import paths
+
+
+own_dir = os.path.dirname(__file__)
+res_dir = os.path.join(own_dir, 'resources')
+
+
+def _user_raw(login: str) -> dict:
+    url = f'https://api.github.com/users/{login}'
+    return {
+        'avatar_url': f'{url}/avatar',
+        'events_url': f'{url}/events{{/privacy}}',
+        'followers_url': f'{url}/followers',
+        'following_url': f'{url}/following{{/other_user}}',
+        'gists_url': f'{url}/gists{{/gist_id}}',
+        'gravatar_id': '',
+        'html_url': f'https://github.com/{login}',
+        'id': 1,
+        'login': login,
+        'organizations_url': f'{url}/orgs',
+        'received_events_url': f'{url}/received_events',
+        'repos_url': f'{url}/repos',
+        'site_admin': False,
+        'starred_url': f'{url}/starred{{/owner}}{{/repo}}',
+        'subscriptions_url': f'{url}/subscriptions',
+        'type': 'User',
+        'url': url,
+    }
+
+
+def _issue_raw(
+    number: int,
+    labels: list[str],
+    state: str='open',
+    is_pull_request: bool=False,
+) -> dict:
+    url = f'https://api.github.com/repos/org/repo/issues/{number}'
+    issue_raw = {
+        'assignee': None,
+        'assignees': [],
+        'body': '',
+        'closed_at': None,
+        'comments': 0,
+        'comments_url': f'{url}/comments',
+        'created_at': '2025-01-01T00:00:00Z',
+        'events_url': f'{url}/events',
+        'html_url': f'https://github.com/org/repo/issues/{number}',
+        'id': number,
+        'labels': [
+            {
+                'color': 'ffffff',
+                'description': None,
+                'name': label,
+                'url': f'https://api.github.com/repos/org/repo/labels/{label}',
+            } for label in labels
+        ],
+        'labels_url': f'{url}/labels{{/name}}',
+        'locked': False,
+        'milestone': None,
+        'number': number,
+        'state': state,
+        'title': f'issue {number}',
+        'updated_at': '2025-01-01T00:00:00Z',
+        'url': url,
+        'user': _user_raw('odg'),
+    }
+
+    if is_pull_request:
+        issue_raw['pull_request'] = {'url': url}
+
+    return issue_raw
+
+
+class FakeRepository:
+    full_name = 'org/repo'
+
+    def __init__(self):
+        self.session = github3.session.GitHubSession()
+        self.issues_raw: list[dict] = []
+        self.issues_calls: list[dict] = []
+
+    def issues(self, **kwargs):
+        self.issues_calls.append(kwargs)
+
+        for issue_raw in self.issues_raw:
+            if kwargs.get('state') in ('open', 'closed') and issue_raw['state'] != kwargs['state']:
+                continue
+            yield github3.issues.issue.ShortIssue(issue_raw, self.session)
+
+
+def test_issue_index_refresh():
+    repository = FakeRepository()
+    repository.issues_raw = [
+        _issue_raw(number=1, labels=['id-a', 'vulnerability']),
+        _issue_raw(number=2, labels=['id-a', 'malware'], state='closed'),
+        _issue_raw(number=3, labels=['id-a', 'vulnerability'], is_pull_request=True),
+    ]
+
+    index = issue_replicator.github.IssueIndex(number_included_closed_issues=10)
+    index.refresh(repository=repository)
+
+    # initial refresh retrieves open and (limited number of) closed issues
+    assert [call['state'] for call in repository.issues_calls] == ['open', 'closed']
+    assert repository.issues_calls[1]['number'] == 10
+
+    issues = index.issues_for_labels(labels=('id-a', 'vulnerability'), repository=repository)
+    assert [issue.number for issue in issues] == [1]
+    assert isinstance(issues[0], github3.issues.issue.ShortIssue)
+
+    issues = index.issues_for_labels(labels=('id-a',), repository=repository)
+    assert [issue.number for issue in issues] == [1, 2]
+
+    assert not index.issues_for_labels(labels=('id-b',), repository=repository)
+
+    # subsequent refreshes only retrieve recently updated issues and replace their labels
+    repository.issues_raw = [
+        _issue_raw(number=1, labels=['id-b', 'vulnerability']),
+        _issue_raw(number=4, labels=['id-a', 'vulnerability']),
+    ]
+    index.refresh(repository=repository)
+
+    assert repository.issues_calls[-1]['state'] == 'all'
+    assert isinstance(repository.issues_calls[-1]['since'], datetime.datetime)
+
+    issues = index.issues_for_labels(labels=('id-a', 'vulnerability'), repository=repository)
+    assert [issue.number for issue in issues] == [4]
+    issues = index.issues_for_labels(labels=('id-b', 'vulnerability'), repository=repository)
+    assert [issue.number for issue in issues] == [1]
+
+
+def test_issue_index_upsert():
+    repository = FakeRepository()
+    index = issue_replicator.github.IssueIndex(number_included_closed_issues=10)
+
+    index.upsert(github3.issues.issue.ShortIssue(
+        _issue_raw(number=5, labels=['id-c']),
+        repository.session,
+    ))
+    index.upsert(_issue_raw(number=6, labels=['id-c'], state='closed'))
+
+    issues = index.issues_for_labels(labels=('id-c',), repository=repository)
+    assert [(issue.number, issue.state) for issue in issues] == [(5, 'open'), (6, 'closed')]
+
+
+def _malware_finding(
+    artefact: odg.model.ComponentArtefactId,
+    filename: str,
+    malware: str,
+) -> issue_replicator.github.AggregatedFinding:
+    return issue_replicator.github.AggregatedFinding(
+        finding=odg.model.ArtefactMetadata(
+            artefact=artefact,
+            meta=odg.model.Metadata(
+                datasource=odg.model.Datasource.CLAMAV,
+                type=odg.model.Datatype.MALWARE_FINDING,
+            ),
+            data=odg.model.ClamAVMalwareFinding(
+                finding=odg.model.MalwareFindingDetails(
+                    filename=filename,
+                    content_digest=f'sha256:{filename}',
+                    malware=malware,
+                    context=None,
+                ),
+                octets_count=42,
+                scan_duration_seconds=0.1,
+                clamav_version=None,
+                signature_version=None,
+                freshclam_timestamp=None,
+                severity='BLOCKER',
+            ),
+        ),
+    )
+
+
+@pytest.fixture
+def malware_finding_cfg() -> odg.findings.Finding:
+    return odg.findings.Finding.from_file(
+        path=paths.findings_cfg_path(),
+        finding_type=odg.model.Datatype.MALWARE_FINDING,
+    )
+
+
+@pytest.fixture(autouse=True)
+def fragment_cache():
+    issue_replicator.rendering.fragment_cache.clear()
+    yield issue_replicator.rendering.fragment_cache
+    issue_replicator.rendering.fragment_cache.clear()
+
+
+def test_malware_issue_body(malware_finding_cfg, fragment_cache):
+    artefacts = tuple(
+        odg.model.ComponentArtefactId(
+            component_name='example.com/component',
+            component_version='1.0.0',
+            artefact_kind=odg.model.ArtefactKind.RESOURCE,
+            artefact=odg.model.LocalArtefactId(
+                artefact_name='image',
+                artefact_type='ociImage',
+                artefact_version='1.0.0',
+                artefact_extra_id={'platform': platform},
+            ),
+        ) for platform in ('linux/arm64', 'linux/amd64')
+    )
+    findings = (
+        _malware_finding(artefact=artefacts[0], filename='/bin/a', malware='Eicar-Signature'),
+        _malware_finding(artefact=artefacts[1], filename='/bin/b', malware='Eicar-Signature'),
+        _malware_finding(artefact=artefacts[1], filename='/bin/c', malware='Win.Test.EICAR'),
+    )
+
+    lookup_calls = []
+
+    def component_descriptor_lookup(component_id, absent_ok=False):
+        lookup_calls.append(component_id)
+        return None
+
+    for _ in range(2):
+        template_variables = issue_replicator.github._template_vars(
+            finding_cfg=malware_finding_cfg,
+            artefacts=artefacts,
+            artefacts_without_scan=set(),
+            findings=findings,
+            due_date=datetime.date(2025, 1, 31),
+            delivery_dashboard_url='https://delivery-dashboard.example.com',
+            component_descriptor_lookup=component_descriptor_lookup,
+            sprint_name='2501a',
+        )
+        body = issue_replicator.rendering.compile_template(
+            malware_finding_cfg.issues.template,
+        ).render(**template_variables)
+
+        with open(os.path.join(res_dir, 'issue_replicator_malware_body.md')) as file:
+            assert body == file.read()
+
+    # shared fragments (e.g. ocm lookups) are only rendered once
+    assert len(lookup_calls) == len(artefacts)
+    assert fragment_cache.hits > 0
+
+
+def test_pending_scan_issue_body(malware_finding_cfg):
+    artefact = odg.model.ComponentArtefactId(
+        component_name='example.com/component',
+        component_version='1.0.0',
+        artefact_kind=odg.model.ArtefactKind.SOURCE,
+        artefact=odg.model.LocalArtefactId(
+            artefact_name='source',
+            artefact_type='git',
+            artefact_version='1.0.0',
+        ),
+    )
+    artefact_without_scan = malware_finding_cfg.issues.strip_artefact(
+        artefact=artefact,
+        keep_group_attributes=False,
+    )
+
+    template_variables = issue_replicator.github._template_vars(
+        finding_cfg=malware_finding_cfg,
+        artefacts=(artefact,),
+        artefacts_without_scan={artefact_without_scan},
+        findings=(),
+        due_date=datetime.date(2025, 1, 31),
+        delivery_dashboard_url='https://delivery-dashboard.example.com',
+        component_descriptor_lookup=lambda component_id, absent_ok=False: None,
+    )
+    body = issue_replicator.rendering.compile_template(
+        malware_finding_cfg.issues.template,
+    ).render(**template_variables)
+
+    with open(os.path.join(res_dir, 'issue_replicator_pending_scan_body.md')) as file:
+        assert body == file.read()
+
+
+@pytest.mark.parametrize(
+    'template',
+    [
+        '{summary}',
+        'plain text without fields {{escaped}}',
+        '# {artefact.component_name} ({meta.type!s:>20})\n{data[severity]:{width}}',
+    ],
+)
+def test_compiled_template(template):
+    variables = {
+        'summary': 'summary',
+        'artefact': odg.model.ComponentArtefactId(component_name='component'),
+        'meta': odg.model.Metadata(datasource='clamav', type='finding/malware'),
+        'data': {'severity': 'BLOCKER'},
+        'width': 10,
+    }
+
+    compiled_template = issue_replicator.rendering.compile_template(template)
+
+    assert compiled_template.render(**variables) == template.format(**variables)
+    assert issue_replicator.rendering.compile_template(template) is compiled_template
+
+
+def test_is_update_required():
+    repository = FakeRepository()
+    issue_raw = _issue_raw(number=7, labels=['id-d', 'finding/malware'])
+    issue_raw['body'] = 'body'
+    issue_raw['assignees'] = [_user_raw('alice')]
+    issue = github3.issues.issue.ShortIssue(issue_raw, repository.session)
+
+    kwargs = {
+        'issue': issue,
+        'body': 'body',
+        'title': 'issue 7',
+        'labels': {'id-d', 'finding/malware'},
+        'assignees': {'alice'},
+        'assignee_mode': odg.model.ResponsibleAssigneeModes.OVERWRITE,
+        'milestone': None,
+    }
+
+    assert not issue_replicator.github.is_update_required(**kwargs)
+    assert not issue_replicator.github.is_update_required(**kwargs | {
+        'title': None,
+        'assignees': set(),
+        'assignee_mode': odg.model.ResponsibleAssigneeModes.EXTEND,
+    })
+
+    assert issue_replicator.github.is_update_required(**kwargs | {'body': 'changed body'})
+    assert issue_replicator.github.is_update_required(**kwargs | {'title': 'changed title'})
+    assert issue_replicator.github.is_update_required(**kwargs | {'labels': {'id-d'}})
+    assert issue_replicator.github.is_update_required(**kwargs | {'assignees': {'bob'}})
+
+    issue_raw['state'] = 'closed'
+    closed_issue = github3.issues.issue.ShortIssue(issue_raw, repository.session)
+    assert issue_replicator.github.is_update_required(**kwargs | {'issue': closed_issue})
+
+
+def test_merge_issue_mutations():
+    repository = FakeRepository()
+    issue = github3.issues.issue.ShortIssue(
+        _issue_raw(number=8, labels=['id-e']),
+        repository.session,
+    )
+    IssueMutation = issue_replicator.github.IssueMutation
+    IssueMutationType = issue_replicator.github.IssueMutationType
+
+    update, create = issue_replicator.github.merge_issue_mutations([
+        IssueMutation(
+            type=IssueMutationType.UPDATE,
+            issue=issue,
+            title='title',
+            body='first',
+            labels={'id-e', 'a'},
+            assignees={'alice'},
+        ),
+        IssueMutation(
+            type=IssueMutationType.CLOSE,
+            issue=issue,
+            closing_reason=issue_replicator.github.IssueComments.NO_FINDINGS,
+        ),
+        IssueMutation(type=IssueMutationType.CREATE, labels={'id-f'}, assignees={'alice'}),
+        IssueMutation(
+            type=IssueMutationType.UPDATE,
+            issue=issue,
+            body='second',
+            labels={'id-e', 'b'},
+            assignees={'bob'},
+        ),
+        IssueMutation(type=IssueMutationType.CREATE, labels={'id-f'}, body='body'),
+    ])
+
+    # earlier label and assignee changes are retained
+    assert update.type is IssueMutationType.UPDATE
+    assert (update.title, update.body) == ('title', 'second')
+    assert update.labels == {'id-e', 'a', 'b'}
+    assert update.assignees == {'alice', 'bob'}
+
+    assert create.type is IssueMutationType.CREATE
+    assert (create.body, create.assignees) == ('body', {'alice'})
+
+
+@pytest.mark.parametrize('core_rate_limit', (
+    {},
+    {'limit': 5000, 'remaining': 5000, 'reset': None},
+))
+def test_request_scheduler_caches_quota(core_rate_limit):
+    gh_api = unittest.mock.Mock()
+    gh_api.rate_limit.return_value = {'resources': {'core': core_rate_limit}}
+
+    scheduler = github_util.RequestScheduler(gh_api=gh_api, requests_per_minute=6000)
+    results = scheduler.execute(functools.partial(str, idx) for idx in range(10))
+
+    assert results == [str(idx) for idx in range(10)]
+    assert gh_api.rate_limit.call_count == 1
@@ -0,0 +1,229 @@
+import collections
+import hashlib
+import io
+import os
+import pathlib
+import stat
+import tarfile
+
+import pytest
+import yaml
+
+import oci.model
+import ocm
+
+import odg_operator.__main__ as odgo
+import odg_operator.helm as odgh
+import odg_operator.odg_model as odgm
+
+
+helm_stub = '''#!/bin/sh
+# stand-in for `helm template --include-crds <chart> -f <values>`, renders the values as configmap
+echo "$3" >> "$HELM_STUB_CALLS"
+echo "---"
+echo "kind: ConfigMap"
+echo "data:"
+sed 's/^/  /' "$5"
+'''
+
+
+def _helm_chart_archive(chart_name: str, values: dict) -> bytes:
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode='w:gz') as tf:
+        content = yaml.safe_dump(values).encode()
+        info = tarfile.TarInfo(name=f'{chart_name}/values.yaml')
+        info.size = len(content)
+        tf.addfile(info, io.BytesIO(content))
+    return buf.getvalue()
+
+
+class FakeBlobResponse:
+    def __init__(self, content: bytes):
+        self.content = content
+
+    def iter_content(self, chunk_size: int):
+        for idx in range(0, len(self.content), chunk_size):
+            yield self.content[idx:idx + chunk_size]
+
+
+class FakeOciClient:
+    def __init__(self, helm_chart: bytes):
+        self.helm_chart = helm_chart
+        self.digest = f'sha256:{hashlib.sha256(helm_chart).hexdigest()}'
+        self.blob_requests = 0
+
+    def manifest(self, image_reference: str):
+        return oci.model.OciImageManifest(
+            config=oci.model.OciBlobRef(
+                digest='sha256:config',
+                mediaType='application/json',
+                size=2,
+            ),
+            layers=[
+                oci.model.OciBlobRef(
+                    digest=self.digest,
+                    mediaType=odgo.HELM_CHART_MEDIA_TYPE,
+                    size=len(self.helm_chart),
+                ),
+            ],
+        )
+
+    def blob(self, image_reference: str, digest: str, stream: bool=True):
+        assert digest == self.digest
+        self.blob_requests += 1
+        return FakeBlobResponse(self.helm_chart)
+
+
+class FakeApi:
+    '''
+    records the server-side-apply requests issued against the kubernetes api
+    '''
+    def __init__(self):
+        self.applied = collections.defaultdict(list)
+
+    def patch_namespaced_custom_object(self, **kwargs):
+        self.applied['managed-resource'].append(kwargs)
+
+    def patch_namespaced_secret(self, **kwargs):
+        self.applied['secret'].append(kwargs)
+
+
+class FakeKubernetesApi:
+    def __init__(self):
+        self.custom_kubernetes_api = self.core_kubernetes_api = FakeApi()
+
+
+@pytest.fixture
+def helm_calls_path(tmp_path, monkeypatch) -> pathlib.Path:
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    helm_path = bin_dir / 'helm'
+    helm_path.write_text(helm_stub)
+    helm_path.chmod(helm_path.stat().st_mode | stat.S_IEXEC)
+
+    helm_calls_path = tmp_path / 'helm-calls'
+    helm_calls_path.touch()
+
+    monkeypatch.setenv('PATH', f'{bin_dir}{os.pathsep}{os.environ["PATH"]}')
+    monkeypatch.setenv('HELM_STUB_CALLS', str(helm_calls_path))
+
+    return helm_calls_path
+
+
+def test_extensions_are_only_rendered_on_change(
+    tmp_path,
+    monkeypatch,
+    helm_calls_path,
+):
+    oci_client = FakeOciClient(helm_chart=_helm_chart_archive(
+        chart_name='chart',
+        values={'replicas': 1},
+    ))
+    kubernetes_api = FakeKubernetesApi()
+    chart_cache = odgh.ChartCache(cache_dir=str(tmp_path / 'charts'))
+
+    replicas_for_extension = {
+        'extension-a': 2,
+        'extension-b': 3,
+    }
+
+    def extension_instance_from_definition(extension_definition, **kwargs):
+        return odgm.ExtensionInstance(
+            name=extension_definition.name,
+            installation_artefacts=[odgm.ExtensionInstallationArtefact(
+                helm_chart_name='chart',
+                artefact=ocm.Resource(
+                    name='chart',
+                    version='1.0.0',
+                    type=ocm.ArtefactType.HELM_CHART,
+                    access=ocm.OciAccess(imageReference='registry.local/chart:1.0.0'),
+                ),
+            )],
+            values=[odgm.ExtensionInstanceValue(
+                helm_chart_name='chart',
+                helm_attribute='replicas',
+                value=replicas_for_extension[extension_definition.name],
+            )],
+        )
+
+    monkeypatch.setattr(
+        odgm.ExtensionInstance,
+        'from_definition',
+        extension_instance_from_definition,
+    )
+
+    odg = odgm.ODG(
+        name='odg',
+        namespace='odg-namespace',
+        context={},
+        extensions=list(replicas_for_extension),
+        uid='uid',
+        generation=1,
+        annotations={},
+        status={},
+    )
+    extension_definitions = [
+        odgm.ExtensionDefinition(
+            name=extension_name,
+            installation=odgm.ExtensionInstallation(ocm_references=[], value_templates=[]),
+        ) for extension_name in replicas_for_extension
+    ]
+
+    def create_or_update_odg():
+        status_for_extension, has_error = odgo.create_or_update_odg(
+            odg=odg,
+            extension_definitions=extension_definitions,
+            component_descriptor_lookup=None,
+            oci_client=oci_client,
+            kubernetes_api=kubernetes_api,
+            chart_cache=chart_cache,
+        )
+        assert not has_error
+        assert set(status_for_extension) == set(replicas_for_extension)
+
+    create_or_update_odg()
+
+    # helm chart is shared by both extensions, hence only retrieved once
+    assert oci_client.blob_requests == 1
+    assert chart_cache.extractions == 1
+    assert len(helm_calls_path.read_text().splitlines()) == 2
+
+    applied_secrets = kubernetes_api.core_kubernetes_api.applied['secret']
+    assert sorted(secret['name'] for secret in applied_secrets) == [
+        'odg-extension-a-chart',
+        'odg-extension-b-chart',
+    ]
+    assert all(
+        secret['_content_type'] == 'application/apply-patch+yaml'
+        and secret['field_manager'] == odgo.ODG_FIELD_MANAGER
+        and secret['body']['apiVersion'] == 'v1'
+        for secret in applied_secrets
+    )
+    assert len(kubernetes_api.custom_kubernetes_api.applied['managed-resource']) == 2
+
+    # unchanged extensions are not rendered again, but still applied to revert drift in the cluster
+    create_or_update_odg()
+
+    assert oci_client.blob_requests == 1
+    assert len(helm_calls_path.read_text().splitlines()) == 2
+    assert len(kubernetes_api.core_kubernetes_api.applied['secret']) == 4
+
+    replicas_for_extension['extension-a'] = 4
+    create_or_update_odg()
+
+    assert len(helm_calls_path.read_text().splitlines()) == 3
+    assert len(kubernetes_api.core_kubernetes_api.applied['secret']) == 6
+
+
+def test_chart_cache_verifies_digest(tmp_path):
+    chart_cache = odgh.ChartCache(cache_dir=str(tmp_path))
+    helm_chart = _helm_chart_archive(chart_name='chart', values={})
+
+    with pytest.raises(ValueError):
+        chart_cache.charts_path(
+            digest=f'sha256:{hashlib.sha256(b"other").hexdigest()}',
+            fetch=lambda: (helm_chart,),
+        )
+
+    # no partially extracted charts are left behind
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,138 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import aiohttp.test_utils
+import aiohttp.web
+import prometheus_client
+import prometheus_client.multiprocess
+import pytest
+
+import cache_metrics
+import middleware.prometheus as mp
+
+
+@pytest.mark.parametrize('user_agent, expected_class', (
+    (None, mp.UserAgentClass.NONE),
+    ('  ', mp.UserAgentClass.NONE),
+    ('Mozilla/5.0 (X11; Linux x86_64; rv:131.0) Gecko/20100101 Firefox/131.0', mp.UserAgentClass.BROWSER), # noqa: E501
+    ('kube-probe/1.30', mp.UserAgentClass.KUBE_PROBE),
+    ('Prometheus/2.54.1', mp.UserAgentClass.PROMETHEUS),
+    ('curl/8.5.0', mp.UserAgentClass.CURL),
+    ('python-requests/2.32.3', mp.UserAgentClass.PYTHON),
+    ('Python/3.12 aiohttp/3.10.10', mp.UserAgentClass.PYTHON),
+    ('Go-http-client/1.1', mp.UserAgentClass.GO),
+    ('Apache-HttpClient/4.5.14 (Java/17.0.2)', mp.UserAgentClass.JAVA),
+    ('my-custom-client/1.0 (build 1234)', mp.UserAgentClass.OTHER),
+))
+def test_user_agent_class(user_agent, expected_class):
+    assert mp.user_agent_class(user_agent) is expected_class
+
+
+def test_normalised_method():
+    assert mp.normalised_method('GET') == 'GET'
+    assert mp.normalised_method('PROPFIND-1234') == mp.OTHER_METHOD
+
+
+@pytest.mark.asyncio
+async def test_requests_are_labelled_by_route_template():
+    async def component(request: aiohttp.web.Request):
+        return aiohttp.web.Response(body=b'x' * 2000)
+
+    app = aiohttp.web.Application()
+    app.router.add_get('/components/{name}', component)
+    mp.add_prometheus_middleware(app=app)
+
+    async with aiohttp.test_utils.TestClient(aiohttp.test_utils.TestServer(app)) as client:
+        for name in ('a', 'b', 'c'):
+            response = await client.get(
+                f'/components/{name}',
+                headers={'User-Agent': f'curl/8.{name}'},
+            )
+            assert response.status == 200
+
+        assert (await client.get('/unknown/path')).status == 404
+
+    def sample_value(name: str, **labels) -> float | None:
+        return prometheus_client.REGISTRY.get_sample_value(name, labels)
+
+    assert sample_value(
+        'requests_total',
+        endpoint='/components/{name}',
+        user_agent='curl',
+        method='GET',
+        status='200',
+    ) == 3
+    assert sample_value(
+        'requests_total',
+        endpoint=mp.UNMATCHED_ROUTE,
+        user_agent='python',
+        method='GET',
+        status='404',
+    ) == 1
+    assert sample_value(
+        'response_size_bytes_sum',
+        endpoint='/components/{name}',
+        method='GET',
+    ) == 3 * 2000
+    assert sample_value(
+        'requests_in_flight_bucket',
+        endpoint='/components/{name}',
+        le='1.0',
+    ) == 3
+    assert sample_value(
+        'requests_concurrency',
+        endpoint='/components/{name}',
+        method='GET',
+    ) == 0
+
+
+def test_cache_metrics_are_recorded():
+    registry = cache_metrics.CacheMetricsRegistry()
+    registry.add_observer(mp.cache_metrics_observer)
+    labels = {'tier': 'filesystem', 'name': 'test_cache_metrics_are_recorded'}
+
+    registry.record(
+        tier=cache_metrics.CacheTier.FILESYSTEM,
+        name=labels['name'],
+        result=cache_metrics.CacheResult.HIT,
+        latency_seconds=0.003,
+        served_bytes=10,
+    )
+    registry.record_eviction(tier=cache_metrics.CacheTier.FILESYSTEM, name=labels['name'])
+
+    def sample_value(name: str, **extra_labels) -> float | None:
+        return prometheus_client.REGISTRY.get_sample_value(name, labels | extra_labels)
+
+    assert sample_value('cache_lookups_total', result='hit') == 1
+    assert sample_value('cache_lookup_latency_seconds_bucket', le='0.005') == 1
+    assert sample_value('cache_served_bytes_total') == 10
+    assert sample_value('cache_evictions_total') == 1
+
+
+def test_process_local_metrics_are_aggregated_across_workers(tmp_path):
+    record_lookup = textwrap.dedent('''
+        import cache_metrics
+        import middleware.prometheus as mp
+
+        cache_metrics.cache_metrics_registry.add_observer(mp.cache_metrics_observer)
+        cache_metrics.record(tier='delivery-db', name='name', result='hit', served_bytes=10)
+    ''')
+
+    for _ in range(2):
+        subprocess.run(
+            [sys.executable, '-c', record_lookup],
+            env=os.environ | {
+                mp.MULTIPROC_DIR_ENV_VAR: str(tmp_path),
+                'PYTHONPATH': os.pathsep.join(sys.path),
+            },
+            check=True,
+        )
+
+    registry = prometheus_client.CollectorRegistry()
+    prometheus_client.multiprocess.MultiProcessCollector(registry, path=str(tmp_path))
+
+    labels = {'tier': 'delivery-db', 'name': 'name'}
+    assert registry.get_sample_value('cache_lookups_total', labels | {'result': 'hit'}) == 2
+    assert registry.get_sample_value('cache_served_bytes_total', labels) == 20
@@ -231,3 +231,171 @@ def test_generate_sast_rescorings(
         'central-linting-is-optional-for-external-components'
     ]
     assert rescoring.data.severity == 'no-linter-required'
+
+
+def _vulnerability_rescoring(
+    cve: str,
+    severity: str,
+    component_name: str | None=None,
+    artefact_name: str | None=None,
+    artefact_version: str | None=None,
+    creation_date: datetime.datetime=datetime.datetime(2024, 1, 1),
+) -> odg.model.ArtefactMetadata:
+    return odg.model.ArtefactMetadata(
+        artefact=odg.model.ComponentArtefactId(
+            component_name=component_name,
+            artefact=odg.model.LocalArtefactId(
+                artefact_name=artefact_name,
+                artefact_version=artefact_version,
+                artefact_type='ociImage',
+            ),
+            artefact_kind=odg.model.ArtefactKind.RESOURCE,
+        ),
+        meta=odg.model.Metadata(
+            datasource=odg.model.Datasource.DELIVERY_DASHBOARD,
+            type=odg.model.Datatype.RESCORING,
+            creation_date=creation_date,
+        ),
+        data=odg.model.CustomRescoring(
+            finding=odg.model.RescoringVulnerabilityFinding(
+                package_name='openssl',
+                cve=cve,
+            ),
+            referenced_type=odg.model.Datatype.VULNERABILITY_FINDING,
+            severity=severity,
+            user=odg.model.User(username='user'),
+        ),
+    )
+
+
+def _vulnerability_finding(
+    component_name: str,
+    cve: str,
+) -> odg.model.ArtefactMetadata:
+    return odg.model.ArtefactMetadata(
+        artefact=odg.model.ComponentArtefactId(
+            component_name=component_name,
+            component_version='1.0.0',
+            artefact=odg.model.LocalArtefactId(
+                artefact_name='image',
+                artefact_version='1.0.0',
+                artefact_type='ociImage',
+            ),
+            artefact_kind=odg.model.ArtefactKind.RESOURCE,
+        ),
+        meta=odg.model.Metadata(
+            datasource=odg.model.Datasource.BDBA,
+            type=odg.model.Datatype.VULNERABILITY_FINDING,
+        ),
+        data=odg.model.VulnerabilityFinding(
+            package_name='openssl',
+            package_version='3.0.0',
+            base_url=None,
+            report_url=None,
+            product_id=-1,
+            group_id=-1,
+            severity='CRITICAL',
+            cve=cve,
+            cvss_v3_score=9.8,
+            cvss=dict(),
+            summary=None,
+        ),
+    )
+
+
+def test_rescoring_index_preserves_specificity():
+    global_rescoring = _vulnerability_rescoring(cve='CVE-1', severity='MEDIUM')
+    newer_global_rescoring = _vulnerability_rescoring(
+        cve='CVE-1',
+        severity='NONE',
+        creation_date=datetime.datetime(2024, 2, 1),
+    )
+    component_rescoring = _vulnerability_rescoring(
+        cve='CVE-1',
+        severity='MEDIUM',
+        component_name='component',
+    )
+    artefact_rescoring = _vulnerability_rescoring(
+        cve='CVE-1',
+        severity='NONE',
+        component_name='component',
+        artefact_name='image',
+    )
+    single_rescoring = _vulnerability_rescoring(
+        cve='CVE-1',
+        severity='NONE',
+        component_name='component',
+        artefact_name='image',
+        artefact_version='1.0.0',
+    )
+    other_version_rescoring = _vulnerability_rescoring(
+        cve='CVE-1',
+        severity='NONE',
+        component_name='component',
+        artefact_name='image',
+        artefact_version='2.0.0',
+    )
+    other_cve_rescoring = _vulnerability_rescoring(
+        cve='CVE-2',
+        severity='NONE',
+        component_name='component',
+    )
+
+    rescorings = (
+        global_rescoring,
+        single_rescoring,
+        other_cve_rescoring,
+        component_rescoring,
+        newer_global_rescoring,
+        other_version_rescoring,
+        artefact_rescoring,
+    )
+    rescoring_index = rescore.utility.RescoringIndex(rescorings=rescorings)
+    assert len(rescoring_index) == len(rescorings)
+
+    assert rescoring_index.rescorings_for_finding(
+        finding=_vulnerability_finding(component_name='component', cve='CVE-1'),
+    ) == (
+        single_rescoring,
+        artefact_rescoring,
+        component_rescoring,
+        newer_global_rescoring,
+        global_rescoring,
+    )
+    assert rescoring_index.rescorings_for_finding(
+        finding=_vulnerability_finding(component_name='other-component', cve='CVE-1'),
+    ) == (
+        newer_global_rescoring,
+        global_rescoring,
+    )
+    assert rescoring_index.rescorings_for_finding(
+        finding=_vulnerability_finding(component_name='other-component', cve='CVE-2'),
+    ) == ()
+
+    finding = _vulnerability_finding(component_name='component', cve='CVE-2')
+    assert rescoring_index.rescorings_for_findings(
+        findings=[finding],
+    ) == [rescore.utility.rescorings_for_finding_by_specificity(
+        finding=finding,
+        rescorings=rescorings,
+    )] == [(other_cve_rescoring,)]
+
+
+def test_rescoring_index_matches_sast_findings(
+    sast_finding_public: odg.model.ArtefactMetadata,
+    sast_finding_cfg: odg.findings.Finding,
+    sast_categorisation: odg.findings.FindingCategorisation,
+):
+    rescoring = rescore.utility.rescoring_for_sast_finding(
+        finding=sast_finding_public,
+        sast_finding_cfg=sast_finding_cfg,
+        categorisation=sast_categorisation,
+        user=odg.model.User(
+            username="test_user",
+        ),
+        creation_timestamp=datetime.datetime.now(),
+    )
+
+    rescoring_index = rescore.utility.RescoringIndex(rescorings=[rescoring])
+
+    assert rescoring_index.rescorings_for_finding(finding=sast_finding_public) == (rescoring,)
@@ -0,0 +1,137 @@
+import threading
+import time
+import unittest.mock
+
+import pytest
+
+import github.codeowners
+
+import odg.model
+import responsibles_extension.strategies as res
+import secret_mgmt.github
+
+
+@pytest.fixture
+def resolved_teams(monkeypatch) -> list[str]:
+    '''
+    patches the resolution of GitHub team members (which takes some time so that concurrent
+    resolutions overlap) and returns the list of resolved teams
+    '''
+    resolved_teams = []
+    lock = threading.Lock()
+
+    def resolve_team_members(team, github_api, absent_ok=True):
+        time.sleep(0.05)
+        with lock:
+            resolved_teams.append(str(team))
+        yield from (f'{team.name}-member-{idx}' for idx in range(2))
+
+    gh_api = unittest.mock.Mock()
+    gh_api.rate_limit.return_value = {
+        'resources': {'core': {'limit': 5000, 'remaining': 5000, 'reset': None}},
+    }
+
+    monkeypatch.setattr(github.codeowners, 'resolve_team_members', resolve_team_members)
+    monkeypatch.setattr(secret_mgmt.github, 'github_api', lambda **kwargs: gh_api)
+
+    return resolved_teams
+
+
+def _team(teamname: str) -> res.GitHubTeamResponsible:
+    return res.GitHubTeamResponsible(teamname=teamname, github_hostname='github.foo.bar')
+
+
+def _usernames(user_identities: list[odg.model.UserIdentity]) -> list[str]:
+    return [
+        identifier.username
+        for user_identity in user_identities
+        for identifier in user_identity.identifiers
+    ]
+
+
+def test_static_responsibles(resolved_teams):
+    team_members_cache = res.TeamMembersCache(requests_per_minute=6000)
+    strategy = res.StaticResponsibles(
+        type=res.StrategyTypes.STATIC_RESPONSIBLES,
+        responsibles=[
+            _team('org/team-a'),
+            res.GitHubUserResponsible(username='user', github_hostname='github.foo.bar'),
+            _team('org/team-b'),
+        ],
+    )
+
+    def usernames() -> list[str]:
+        return _usernames(list(strategy.iter_responsibles(
+            artefact=None,
+            datatype=odg.model.Datatype.VULNERABILITY_FINDING,
+            secret_factory=None,
+            delivery_client=None,
+            team_members_cache=team_members_cache,
+        )))
+
+    expected_usernames = [
+        'team-a-member-0',
+        'team-a-member-1',
+        'user',
+        'team-b-member-0',
+        'team-b-member-1',
+    ]
+    assert usernames() == expected_usernames
+    assert sorted(resolved_teams) == ['org/team-a', 'org/team-b']
+
+    # team members are shared across artefacts
+    assert usernames() == expected_usernames
+    assert len(resolved_teams) == 2
+
+
+def test_concurrent_lookups_are_coalesced(resolved_teams):
+    team_members_cache = res.TeamMembersCache(requests_per_minute=6000, max_workers=8)
+
+    members_of_teams = team_members_cache.members_of_teams(
+        responsibles=[_team('org/team'), _team('org/Team'), _team('org/other-team')] * 3,
+        secret_factory=None,
+    )
+
+    assert members_of_teams[0] == ('team-member-0', 'team-member-1')
+    assert members_of_teams[-1] == ('other-team-member-0', 'other-team-member-1')
+    assert sorted(resolved_teams) == ['org/other-team', 'org/team']
+
+
+def test_failed_lookups_are_not_cached(resolved_teams, monkeypatch):
+    team_members_cache = res.TeamMembersCache(requests_per_minute=6000)
+
+    def resolve_team_members(team, github_api, absent_ok=True):
+        raise RuntimeError('team not found')
+        yield
+
+    with monkeypatch.context() as m:
+        m.setattr(github.codeowners, 'resolve_team_members', resolve_team_members)
+
+        with pytest.raises(RuntimeError):
+            team_members_cache.team_members(responsible=_team('org/team'), secret_factory=None)
+
+    assert team_members_cache.team_members(responsible=_team('org/team'), secret_factory=None)
+    assert resolved_teams == ['org/team']
+
+
+def test_request_schedulers_are_bound_to_github_api(resolved_teams, monkeypatch):
+    team_members_cache = res.TeamMembersCache(requests_per_minute=6000)
+    gh_apis = []
+
+    def github_api(**kwargs):
+        # github api is re-created once its credentials changed
+        gh_api = unittest.mock.Mock()
+        gh_api.rate_limit.return_value = {
+            'resources': {'core': {'limit': 5000, 'remaining': 5000, 'reset': None}},
+        }
+        gh_apis.append(gh_api)
+        return gh_api
+
+    monkeypatch.setattr(secret_mgmt.github, 'github_api', github_api)
+
+    first_scheduler = team_members_cache._request_scheduler(org_url='org', secret_factory=None)
+    second_scheduler = team_members_cache._request_scheduler(org_url='org', secret_factory=None)
+
+    assert first_scheduler is not second_scheduler
+    assert first_scheduler.gh_api is gh_apis[0]
+    assert second_scheduler.gh_api is gh_apis[1]
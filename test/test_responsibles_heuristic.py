@@ -1,6 +1,12 @@
+import random
+import time
+import unittest.mock
+
+import github3.users
 import pytest
 import yaml
 
+import caching
 import paths
 import responsibles.github_statistics as rg
 
@@ -98,3 +104,166 @@ def test_mcm(
         'himanshu-kun',
         'ialidzhikov',
     }
+
+
+def _weighted_totals_reference(
+    repo_stats: list[dict],
+    weight_function_identifier: str,
+) -> tuple[float, float]:
+    '''
+    straight-forward (non-vectorised) calculation of the weighted commit and loc totals
+    '''
+    now = int(time.time())
+    repo_age_in_days = int((now - int(repo_stats[0]['weeks'][0]['w'])) / 60 / 60 / 24)
+
+    commit_total = 0
+    loc_total = 0
+    for r in repo_stats:
+        for week in r['weeks']:
+            if week['c'] == 0:
+                continue
+
+            week_weight = rg.weight(
+                method=weight_function_identifier,
+                days_delta=int((now - int(week['w'])) / 60 / 60 / 24),
+                repo_age_days=repo_age_in_days,
+            )
+            commit_total += week_weight * week['c']
+            loc_total += week_weight * (week['a'] + week['d'])
+
+    return commit_total, loc_total
+
+
+@pytest.mark.parametrize('weight_function_identifier', ['linear', 'sigmoid'])
+@pytest.mark.parametrize('path', [
+    paths.test_resources_apiserver_proxy,
+    paths.test_resources_mcm,
+])
+def test_global_stats_totals(
+    path: str,
+    weight_function_identifier: str,
+):
+    repo_stats = _load_yaml(path=path)
+
+    processed_stats = rg.global_stats(
+        repo_stats=repo_stats,
+        weight_function_identifier=weight_function_identifier,
+        max_responsibles=3,
+        percentile_min=85,
+    )
+
+    commit_total, loc_total = _weighted_totals_reference(
+        repo_stats=repo_stats,
+        weight_function_identifier=weight_function_identifier,
+    )
+
+    assert processed_stats.commit_total == pytest.approx(commit_total)
+    assert processed_stats.loc_total == pytest.approx(loc_total)
+    assert len(processed_stats.authors_in_commit_n_percentile) <= 3
+    assert len(processed_stats.authors_in_loc_n_percentile) <= 3
+
+
+def test_global_stats_is_vectorised(monkeypatch):
+    '''
+    synthetic large repository (50 contributors with 10 years of weekly statistics each), the
+    weights of all weeks are expected to be calculated at once (i.e. the weight function is only
+    fitted once)
+    '''
+    weight = unittest.mock.Mock(wraps=rg.weight)
+    monkeypatch.setattr(rg, 'weight', weight)
+
+    rng = random.Random(42)
+    first_week = int(time.time()) - 60 * 60 * 24 * 7 * 520
+
+    repo_stats = [
+        {
+            'author': {'login': f'user-{idx}'},
+            'weeks': [
+                {
+                    'w': first_week + week_idx * 60 * 60 * 24 * 7,
+                    'c': (commits := rng.choice((0, 0, 0, 1, 2, 5))),
+                    'a': commits * rng.randint(0, 100),
+                    'd': commits * rng.randint(0, 50),
+                } for week_idx in range(520)
+            ],
+        } for idx in range(50)
+    ]
+
+    processed_stats = rg.global_stats(
+        repo_stats=repo_stats,
+        weight_function_identifier='sigmoid',
+        max_responsibles=3,
+        percentile_min=85,
+    )
+
+    assert processed_stats.commit_total > 0
+    assert len(processed_stats.authors_in_commit_n_percentile) <= 3
+    assert weight.call_count == 1
+
+
+def _gh_user_raw(login: str) -> dict:
+    url = f'https://api.github.com/users/{login}'
+    return {
+        'avatar_url': f'{url}/avatar',
+        'events_url': f'{url}/events{{/privacy}}',
+        'followers_url': f'{url}/followers',
+        'following_url': f'{url}/following{{/other_user}}',
+        'gists_url': f'{url}/gists{{/gist_id}}',
+        'gravatar_id': '',
+        'html_url': f'https://github.com/{login}',
+        'id': 1,
+        'login': login,
+        'organizations_url': f'{url}/orgs',
+        'received_events_url': f'{url}/received_events',
+        'repos_url': f'{url}/repos',
+        'site_admin': False,
+        'starred_url': f'{url}/starred{{/owner}}{{/repo}}',
+        'subscriptions_url': f'{url}/subscriptions',
+        'type': 'User',
+        'url': url,
+        'bio': None,
+        'blog': None,
+        'company': None,
+        'created_at': '2025-01-01T00:00:00Z',
+        'email': f'{login}@mail.foo',
+        'followers': 0,
+        'following': 0,
+        'hireable': None,
+        'location': None,
+        'name': 'First Last',
+        'public_gists': 0,
+        'public_repos': 0,
+        'updated_at': '2025-01-01T00:00:00Z',
+        'suspended_at': None,
+    }
+
+
+def test_github_users_are_persisted(tmp_path, monkeypatch):
+    monkeypatch.setattr(caching, 'default_cache_dir', str(tmp_path / 'dora'))
+
+    def gh_api_mock() -> unittest.mock.Mock:
+        gh_api = unittest.mock.Mock()
+        gh_api._github_url = 'https://github.com'
+        gh_api.user.side_effect = lambda username: github3.users.User(
+            _gh_user_raw(username),
+            gh_api.session,
+        )
+        return gh_api
+
+    def user_identifiers(gh_api) -> list:
+        assert not rg.is_suspended(gh_api=gh_api, username='user')
+        return list(rg.user_identifiers_for_responsible(
+            username='user',
+            repo_url='github.com/org/repo',
+            gh_api=gh_api,
+        ))
+
+    gh_api = gh_api_mock()
+    identifiers = user_identifiers(gh_api)
+    assert gh_api.user.call_count == 1
+
+    # e.g. after a restart, users are read from the filesystem
+    gh_api = gh_api_mock()
+    assert user_identifiers(gh_api) == identifiers
+    assert gh_api.user.call_count == 0
+    assert len(identifiers) == 3
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+import ocm
+
+import odg.model
+import responsibles
+import responsibles.resolution
+
+
+source = ocm.Source(
+    name='source',
+    version='1.0.0',
+    type=ocm.ArtefactType.GIT,
+    access=ocm.GithubAccess(
+        type=ocm.AccessType.GITHUB,
+        repoUrl='github.foo.bar/org/repo',
+        ref='refs/heads/master',
+    ),
+    labels=[],
+)
+
+user_identity = odg.model.UserIdentity(identifiers=[
+    odg.model.GithubUser(source='github', username='user', github_hostname='github.foo.bar'),
+])
+
+
+@pytest.fixture
+def statistics_attempts(monkeypatch) -> list[ocm.Source]:
+    '''
+    patches the retrieval of contributor statistics which are pending for the first two attempts
+    '''
+    attempts = []
+
+    def user_identities_from_source(source, github_api_lookup):
+        attempts.append(source)
+        if len(attempts) <= 2:
+            return None
+        return [user_identity]
+
+    monkeypatch.setattr(
+        responsibles,
+        'user_identities_from_source',
+        user_identities_from_source,
+    )
+
+    return attempts
+
+
+@pytest.mark.asyncio
+async def test_concurrent_resolutions_share_job(statistics_attempts):
+    resolver = responsibles.resolution.ResponsiblesResolver(
+        github_api_lookup=None,
+        poll_interval_seconds=0.01,
+    )
+
+    results = await asyncio.gather(*[
+        resolver.user_identities(source=source, wait_seconds=5)
+        for _ in range(10)
+    ])
+
+    assert results == [(user_identity,)] * 10
+    assert len(statistics_attempts) == 3
+
+    # finished resolutions are kept, hence clients which retry do not re-trigger the resolution
+    assert await resolver.user_identities(source=source) == (user_identity,)
+    assert len(statistics_attempts) == 3
+
+
+@pytest.mark.asyncio
+async def test_pending_resolution_continues_in_background(statistics_attempts):
+    resolver = responsibles.resolution.ResponsiblesResolver(
+        github_api_lookup=None,
+        poll_interval_seconds=0.05,
+    )
+
+    assert await resolver.user_identities(source=source, wait_seconds=0) is None
+
+    await resolver.resolve(source=source)
+    assert await resolver.user_identities(source=source, wait_seconds=0) == (user_identity,)
+    assert len(statistics_attempts) == 3
+
+
+@pytest.mark.asyncio
+async def test_timed_out_resolution_is_reattempted(statistics_attempts):
+    resolver = responsibles.resolution.ResponsiblesResolver(
+        github_api_lookup=None,
+        poll_interval_seconds=0.01,
+        timeout_seconds=0,
+    )
+
+    assert await resolver.user_identities(source=source) is None
+    assert len(statistics_attempts) == 1
+
+    assert await resolver.user_identities(source=source) is None
+    assert await resolver.user_identities(source=source) == (user_identity,)
+    assert len(statistics_attempts) == 3
+
+
+@pytest.mark.asyncio
+async def test_non_github_sources_are_skipped(statistics_attempts):
+    resolver = responsibles.resolution.ResponsiblesResolver(github_api_lookup=None)
+
+    assert await resolver.user_identities(source=None) == ()
+    assert not statistics_attempts
@@ -0,0 +1,178 @@
+import asyncio
+import datetime
+import random
+import unittest.mock
+
+import pytest
+
+import ocm
+import version as versionutil
+
+import odg.extensions_cfg
+import version_index
+
+
+def _synthetic_tags(
+    count: int,
+    seed: int=42,
+) -> list[str]:
+    rng = random.Random(seed)
+
+    tags = {}
+    while len(tags) < count:
+        version = f'{rng.randint(0, 3)}.{rng.randint(0, 120)}.{rng.randint(0, 20)}'
+
+        match rng.randint(0, 9):
+            case 0:
+                version = f'{version}-dev-{rng.randint(0, 1000)}'
+            case 1:
+                version = f'v{version}'
+            case 2:
+                version = f'{version}-rc.{rng.randint(0, 5)}'
+
+        # prevent versions which only differ in their prefix as their order is not defined
+        tags[versionutil.parse_to_semver(version)] = version
+
+    return list(tags.values())
+
+
+def _greatest_versions_reference(
+    versions: list[str],
+    max_versions: int,
+) -> list[str]:
+    # previous implementation, which parses all versions several times for each query
+    versions = [
+        v for v in versions
+        if versionutil.parse_to_semver(v)
+    ]
+    versions = [
+        v for v in versions
+        if not (pv := versionutil.parse_to_semver(v)).prerelease and not pv.build
+    ]
+    versions = sorted(versions, key=lambda v: versionutil.parse_to_semver(v))
+
+    return versions[-max_versions:]
+
+
+def test_incremental_updates():
+    index = version_index.ComponentVersionIndex(component_name='component')
+
+    assert index.update(['1.0.0', '1.1.0-dev', 'v1.2.0']) == 3
+    assert index.versions() == ['1.0.0', '1.1.0-dev', 'v1.2.0']
+    assert index.greatest_version(
+        version_filter=odg.extensions_cfg.VersionFilter.RELEASES_ONLY,
+    ) == 'v1.2.0'
+
+    # only new versions are added, removed versions are dropped
+    assert index.update(['1.0.0', '1.1.0-dev', '1.1.1', 'invalid']) == 2
+    assert index.versions(
+        version_filter=odg.extensions_cfg.VersionFilter.RELEASES_ONLY,
+        invalid_semver_ok=True,
+    ) == ['1.0.0', '1.1.1']
+
+    with pytest.raises(ValueError):
+        index.versions()
+
+
+@pytest.mark.asyncio
+async def test_index_is_only_refreshed_after_interval():
+    registry = version_index.VersionIndexRegistry(refresh_interval_seconds=60)
+    fetched_versions = []
+
+    async def fetch_versions():
+        fetched_versions.append(None)
+        await asyncio.sleep(0.01)
+        return ['1.0.0', '2.0.0']
+
+    indices = await asyncio.gather(*[
+        registry.index(
+            component_name='component',
+            fetch_versions=fetch_versions,
+        ) for _ in range(5)
+    ])
+
+    assert all(index is indices[0] for index in indices)
+    assert len(fetched_versions) == 1
+
+    indices[0].refreshed_at -= 60
+    await registry.index(
+        component_name='component',
+        fetch_versions=fetch_versions,
+    )
+    assert len(fetched_versions) == 2
+
+
+@pytest.mark.asyncio
+async def test_creation_dates_of_releases_are_cached():
+    versions = ['1.0.0', '1.1.0', '1.2.0-dev', '1.2.0', '1.3.0']
+    creation_date_for_version = {
+        version: datetime.datetime(2024, 1, idx + 1, tzinfo=datetime.timezone.utc)
+        for idx, version in enumerate(versions)
+    }
+    looked_up_versions = []
+
+    async def component_descriptor_lookup(component_id: ocm.ComponentIdentity):
+        looked_up_versions.append(component_id.version)
+
+        return ocm.ComponentDescriptor(
+            meta=ocm.Metadata(),
+            component=ocm.Component(
+                name=component_id.name,
+                version=component_id.version,
+                repositoryContexts=[],
+                provider='',
+                sources=[],
+                componentReferences=[],
+                resources=[],
+                labels=[],
+                creationTime=creation_date_for_version[component_id.version].isoformat(),
+            ),
+            signatures=[],
+        )
+
+    index = version_index.ComponentVersionIndex(component_name='component')
+    index.update(versions)
+
+    async def versions_in_date_range():
+        return [
+            version async for version in index.iter_versions_in_date_range(
+                versions=index.versions(),
+                component_descriptor_lookup=component_descriptor_lookup,
+                start_date='2024-01-02',
+                end_date='2024-01-04',
+                batch_size=2,
+            )
+        ]
+
+    assert await versions_in_date_range() == ['1.2.0', '1.2.0-dev', '1.1.0']
+    assert sorted(looked_up_versions) == ['1.0.0', '1.1.0', '1.2.0', '1.2.0-dev', '1.3.0']
+
+    looked_up_versions.clear()
+    assert await versions_in_date_range() == ['1.2.0', '1.2.0-dev', '1.1.0']
+
+    # descriptors of non-release versions might be overwritten, hence they are looked-up again
+    assert looked_up_versions == ['1.2.0-dev']
+
+
+def test_version_index_parses_versions_once(monkeypatch):
+    '''
+    synthetic tag list (5000 tags, including prereleases), the index is expected to parse each
+    version only once instead of re-parsing and sorting all versions for each query
+    '''
+    tags = _synthetic_tags(count=5000)
+    expected_versions = _greatest_versions_reference(versions=tags, max_versions=5)
+
+    parse_to_semver = unittest.mock.Mock(wraps=versionutil.parse_to_semver)
+    monkeypatch.setattr(version_index.versionutil, 'parse_to_semver', parse_to_semver)
+
+    index = version_index.ComponentVersionIndex(component_name='component')
+    index.update(tags)
+    for _ in range(20):
+        # refreshing with an unchanged tag list must not cause re-parsing
+        assert index.update(tags) == 0
+        versions = index.versions(
+            version_filter=odg.extensions_cfg.VersionFilter.RELEASES_ONLY,
+        )[-5:]
+
+    assert versions == expected_versions
+    assert parse_to_semver.call_count == len(set(tags))
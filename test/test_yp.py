@@ -0,0 +1,97 @@
+import odg.model
+import yp
+
+
+github_mappings = [
+    {'name': 'github', 'api_url': 'https://api.github.com'},
+    {'name': 'github-foo', 'api_url': 'https://github.foo.bar/api/v3'},
+]
+
+
+def _entry(
+    idx: int,
+    name: str | None=None,
+) -> yp.AddressbookEntry:
+    return yp.AddressbookEntry(
+        name=name or f'First{idx} Last{idx}',
+        email=f'User{idx}@mail.foo',
+        github={'github': f'user{idx}', 'github-foo': f'User{idx}-Foo'},
+    )
+
+
+addressbook_entries = [_entry(idx) for idx in range(1000)] + [
+    _entry(idx=1000, name='Twin Name'),
+    _entry(idx=1001, name='Twin Name'),
+]
+
+
+def test_addressbook_lookup():
+    addressbook = yp.Addressbook(
+        entries=addressbook_entries,
+        github_mappings=github_mappings,
+        source='yellow-pages',
+    )
+
+    def find_entry(*identifiers: odg.model.UserIdentifierBase) -> yp.AddressbookEntry | None:
+        return addressbook.find_entry(user_id=odg.model.UserIdentity(identifiers=list(identifiers)))
+
+    assert find_entry(odg.model.EmailAddress(source='', email='USER42@mail.foo')) is (
+        addressbook_entries[42]
+    )
+    assert find_entry(odg.model.GithubUser(
+        source='',
+        username='user7-foo',
+        github_hostname='github.foo.bar',
+    )) is addressbook_entries[7]
+    # github-user is not known for unmapped github instance
+    assert not find_entry(odg.model.GithubUser(
+        source='',
+        username='user7',
+        github_hostname='github.other.bar',
+    ))
+    # first matching entry wins
+    assert find_entry(
+        odg.model.EmailAddress(source='', email='user9@mail.foo'),
+        odg.model.GithubUser(source='', username='user3', github_hostname='github.com'),
+    ) is addressbook_entries[3]
+
+    assert find_entry(odg.model.PersonalName(
+        source='',
+        first_name='First5',
+        last_name='Last5',
+    )) is addressbook_entries[5]
+    # ambiguous personal names are ignored
+    assert not find_entry(odg.model.PersonalName(source='', first_name='Twin', last_name='Name'))
+
+
+def test_inject():
+    user_id = odg.model.UserIdentity(identifiers=[
+        odg.model.GithubUser(source='github', username='User3', github_hostname='github.com'),
+    ])
+
+    injected_user_id = yp.inject(
+        addressbook_source='yellow-pages',
+        addressbook_entries=yp.Addressbook(
+            entries=addressbook_entries,
+            github_mappings=github_mappings,
+        ),
+        addressbook_github_mappings=github_mappings,
+        user_id=user_id,
+    )
+
+    # passing plain entries (instead of an indexed addressbook) yields the same result
+    assert injected_user_id == yp.inject(
+        addressbook_source='yellow-pages',
+        addressbook_entries=addressbook_entries,
+        addressbook_github_mappings=github_mappings,
+        user_id=user_id,
+    )
+    assert injected_user_id.identifiers == [
+        odg.model.GithubUser(source='github', username='User3', github_hostname='github.com'),
+        odg.model.GithubUser(
+            source='yellow-pages',
+            username='User3-Foo',
+            github_hostname='github.foo.bar',
+        ),
+        odg.model.PersonalName(source='yellow-pages', first_name='First3', last_name='Last3'),
+    ]
@@ -202,6 +202,20 @@ def param_as_bool(
     )
 
 
+def route_template(
+    request: aiohttp.web.Request,
+    default: str | None=None,
+) -> str | None:
+    '''
+    returns the template of the route which matched the `request` (e.g. `/components/{name}`).
+    In contrast to the actual path, it is of bounded cardinality and thus suitable as metric label.
+    '''
+    if (resource := request.match_info.route.resource) is not None:
+        return resource.canonical
+
+    return default
+
+
 def error_description(
     error_id: str,
     **kwargs,
@@ -0,0 +1,254 @@
+'''
+Index of the versions of components. Versions are parsed only once (when they are first seen) and
+kept sorted, so that queries for the greatest (release) versions of a component do not require
+re-parsing and re-sorting the full list of versions. The creation dates of released component
+versions are cached permanently, as released component descriptors are immutable.
+'''
+import asyncio
+import bisect
+import collections.abc
+import dataclasses
+import datetime
+import time
+
+import cachetools
+import semver
+
+import cnudie.retrieve_async
+import ocm
+import version as versionutil
+
+import odg.extensions_cfg
+import util
+
+
+@dataclasses.dataclass(frozen=True)
+class IndexedVersion:
+    version: str
+    parsed: semver.VersionInfo
+
+    @property
+    def is_release(self) -> bool:
+        return not (self.parsed.prerelease or self.parsed.build)
+
+    def sort_key(self) -> tuple[semver.VersionInfo, str]:
+        # versions might only differ in their (stripped) prefix, e.g. `v1.0.0` and `1.0.0`
+        return self.parsed, self.version
+
+
+class ComponentVersionIndex:
+    '''
+    Sorted (ascending) index of the versions of a single component. Versions which cannot be parsed
+    as semver are tracked separately in `invalid_versions`.
+    '''
+    def __init__(
+        self,
+        component_name: str,
+    ):
+        self.component_name = component_name
+        self.refreshed_at: float | None = None
+        self.invalid_versions: set[str] = set()
+
+        self._versions: list[IndexedVersion] = []
+        self._releases: list[IndexedVersion] = []
+        self._known_versions: set[str] = set()
+        self._release_creation_dates: dict[str, datetime.datetime] = {}
+        self._lock = asyncio.Lock()
+
+    def update(
+        self,
+        versions: collections.abc.Iterable[str],
+    ) -> int:
+        '''
+        updates the index to contain exactly the passed-in `versions`. Only versions which are not
+        yet contained in the index are parsed and inserted. Returns the number of added versions.
+        '''
+        versions = set(versions)
+
+        if removed_versions := self._known_versions - versions:
+            self._versions = [v for v in self._versions if v.version not in removed_versions]
+            self._releases = [v for v in self._releases if v.version not in removed_versions]
+            self.invalid_versions -= removed_versions
+            self._known_versions -= removed_versions
+
+        added_versions = 0
+        for version in versions - self._known_versions:
+            self._known_versions.add(version)
+            added_versions += 1
+
+            if not (parsed_version := versionutil.parse_to_semver(
+                version=version,
+                invalid_semver_ok=True,
+            )):
+                self.invalid_versions.add(version)
+                continue
+
+            indexed_version = IndexedVersion(
+                version=version,
+                parsed=parsed_version,
+            )
+
+            bisect.insort(self._versions, indexed_version, key=IndexedVersion.sort_key)
+            if indexed_version.is_release:
+                bisect.insort(self._releases, indexed_version, key=IndexedVersion.sort_key)
+
+        return added_versions
+
+    def _indexed_versions(
+        self,
+        version_filter: odg.extensions_cfg.VersionFilter,
+        invalid_semver_ok: bool,
+    ) -> list[IndexedVersion]:
+        if self.invalid_versions and not invalid_semver_ok:
+            raise ValueError(
+                f'{self.component_name} has invalid semver versions: {self.invalid_versions}'
+            )
+
+        if version_filter is odg.extensions_cfg.VersionFilter.RELEASES_ONLY:
+            return self._releases
+
+        return self._versions
+
+    def versions(
+        self,
+        version_filter: odg.extensions_cfg.VersionFilter=odg.extensions_cfg.VersionFilter.ALL,
+        invalid_semver_ok: bool=False,
+    ) -> list[str]:
+        '''
+        returns the (valid semver) versions in ascending order
+
+        @raises ValueError: if the index contains invalid semver versions and `invalid_semver_ok`
+                            is not set
+        '''
+        return [
+            indexed_version.version
+            for indexed_version in self._indexed_versions(
+                version_filter=version_filter,
+                invalid_semver_ok=invalid_semver_ok,
+            )
+        ]
+
+    def greatest_version(
+        self,
+        version_filter: odg.extensions_cfg.VersionFilter=odg.extensions_cfg.VersionFilter.ALL,
+        invalid_semver_ok: bool=False,
+    ) -> str | None:
+        if not (indexed_versions := self._indexed_versions(
+            version_filter=version_filter,
+            invalid_semver_ok=invalid_semver_ok,
+        )):
+            return None
+
+        return indexed_versions[-1].version
+
+    async def creation_date(
+        self,
+        version: str,
+        component_descriptor_lookup: cnudie.retrieve_async.ComponentDescriptorLookupById,
+    ) -> datetime.datetime:
+        if creation_date := self._release_creation_dates.get(version):
+            return creation_date
+
+        component_descriptor = await util.retrieve_component_descriptor(
+            ocm.ComponentIdentity(
+                name=self.component_name,
+                version=version,
+            ),
+            component_descriptor_lookup=component_descriptor_lookup,
+        )
+        creation_date = util.get_creation_date(component_descriptor.component)
+
+        # descriptors of non-release versions (e.g. snapshots) might be overwritten
+        if versionutil.is_final(version):
+            self._release_creation_dates[version] = creation_date
+
+        return creation_date
+
+    async def iter_versions_in_date_range(
+        self,
+        versions: collections.abc.Sequence[str],
+        component_descriptor_lookup: cnudie.retrieve_async.ComponentDescriptorLookupById,
+        start_date: str,
+        end_date: str,
+        batch_size: int=8,
+    ) -> collections.abc.AsyncGenerator[str, None, None]:
+        '''
+        yields the passed-in (ascending) `versions` in descending order, as long as they were
+        created within the date range [`start_date`, `end_date`] (iso-formatted dates). Iteration
+        stops at the first version created before `start_date`. The creation dates of up to
+        `batch_size` versions are retrieved concurrently.
+        '''
+        versions = list(reversed(versions))
+
+        for idx in range(0, len(versions), batch_size):
+            batch = versions[idx:idx + batch_size]
+
+            creation_dates = await asyncio.gather(*[
+                self.creation_date(
+                    version=version,
+                    component_descriptor_lookup=component_descriptor_lookup,
+                ) for version in batch
+            ])
+
+            for version, creation_date in zip(batch, creation_dates):
+                creation_date = creation_date.strftime('%Y-%m-%d')
+
+                if creation_date > end_date:
+                    continue
+
+                if creation_date < start_date:
+                    return
+
+                yield version
+
+
+class VersionIndexRegistry:
+    '''
+    Holds the version indices of up to `max_indices` components. An index is refreshed if it is
+    older than `refresh_interval_seconds`. Upon refresh, the (possibly cached) list of versions is
+    retrieved again, but only versions which were not known before are parsed and inserted.
+    '''
+    def __init__(
+        self,
+        refresh_interval_seconds: int=60,
+        max_indices: int=1024,
+    ):
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self._indices = cachetools.LRUCache(maxsize=max_indices)
+
+    async def index(
+        self,
+        component_name: str,
+        fetch_versions: collections.abc.Callable[[], collections.abc.Awaitable[list[str]]],
+        ocm_repo: ocm.OciOcmRepository | None=None,
+    ) -> ComponentVersionIndex:
+        key = (component_name, ocm_repo.oci_ref if ocm_repo else None)
+
+        if not (index := self._indices.get(key)):
+            index = ComponentVersionIndex(component_name=component_name)
+            self._indices[key] = index
+
+        if (
+            index.refreshed_at
+            and time.monotonic() - index.refreshed_at < self.refresh_interval_seconds
+        ):
+            return index
+
+        # refresh concurrent requests only once
+        async with index._lock:
+            if (
+                index.refreshed_at
+                and time.monotonic() - index.refreshed_at < self.refresh_interval_seconds
+            ):
+                return index
+
+            index.update(await fetch_versions() or [])
+            index.refreshed_at = time.monotonic()
+
+        return index
+
+    def clear(self):
+        self._indices.clear()
+
+
+version_indices = VersionIndexRegistry()
@@ -63,37 +63,6 @@ class Sprint:
         }
 
 
-def _github_url(
-    github_name: str,
-    addressbook_github_mappings: collections.abc.Iterable[dict],
-):
-    '''
-    looks up the github-url maintained in `repo`'s github mapping file for the logical
-    github instance name, as used in `repo`'s addressbook file
-
-    If not such mapping is found, None is returned.
-    '''
-    for entry in addressbook_github_mappings:
-        # expected attrs: name, api_url
-        if entry['name'] == github_name:
-            return entry['api_url']
-
-    return None # no matching entry was found
-
-
-def _github_name(
-    github_url: str,
-    addressbook_github_mappings: collections.abc.Iterable[dict],
-):
-    normalised_gh_domain = util.normalise_url_to_second_and_tld(url=github_url)
-    for entry in addressbook_github_mappings:
-        normalised_entry_domain = util.normalise_url_to_second_and_tld(url=entry['api_url'])
-        if normalised_entry_domain == normalised_gh_domain:
-            return entry['name']
-
-    return None
-
-
 @dataclasses.dataclass
 class AddressbookEntry:
     name: str # firstname lastname (space-separated)
@@ -101,60 +70,137 @@ class AddressbookEntry:
     github: dict[str, str | None] # github-name: username
 
 
-def find_addressbook_entry(
-    addressbook_entries: collections.abc.Iterable[AddressbookEntry],
-    addressbook_github_mappings: collections.abc.Iterable[dict],
-    user_id: odg.model.UserIdentity,
-) -> AddressbookEntry | None:
+class Addressbook:
     '''
-    looks up first matching entry from given addressbook-entries (assumption: there is at most
-    one addressbook entry per actual user)
+    addressbook entries indexed by email-address, GitHub username (per GitHub instance) and personal
+    name, so that looking up users does not require a scan of all entries. If several entries match,
+    the first one (in order of `entries`) is returned, same as for a linear scan.
 
-    returns AddressbookEntry if found (based on github-user or email-address), or None if no such
-    entry is found.
+    Personal names are not unique, hence they are only considered if no entry matches by
+    email-address or GitHub username, and only if exactly one entry has the respective name.
     '''
-    for addressbook_entry in addressbook_entries:
+    def __init__(
+        self,
+        entries: collections.abc.Iterable[AddressbookEntry],
+        github_mappings: collections.abc.Iterable[dict],
+        source: str | None=None,
+    ):
+        self.entries = list(entries)
+        self.github_mappings = list(github_mappings)
+        self.source = source
+
+        self._github_names_by_hostname = {
+            util.normalise_url_to_second_and_tld(url=entry['api_url']): entry['name']
+            for entry in reversed(self.github_mappings) # first mapping wins
+        }
+        self._github_urls_by_name = {
+            entry['name']: entry['api_url']
+            for entry in reversed(self.github_mappings)
+        }
+
+        self._indices_by_email: dict[str, int] = {}
+        self._indices_by_github_user: dict[tuple[str, str], int] = {}
+        self._indices_by_name: dict[str, list[int]] = collections.defaultdict(list)
+
+        for idx, entry in enumerate(self.entries):
+            self._indices_by_email.setdefault(entry.email.lower(), idx)
+
+            for github_name, username in entry.github.items():
+                if username:
+                    self._indices_by_github_user.setdefault((github_name, username.lower()), idx)
+
+            self._indices_by_name[entry.name.lower()].append(idx)
+
+    def github_name(
+        self,
+        github_url: str,
+    ) -> str | None:
+        return self._github_names_by_hostname.get(
+            util.normalise_url_to_second_and_tld(url=github_url),
+        )
+
+    def github_url(
+        self,
+        github_name: str,
+    ) -> str | None:
+        return self._github_urls_by_name.get(github_name)
+
+    def _iter_indices(
+        self,
+        user_id: odg.model.UserIdentity,
+    ) -> collections.abc.Generator[int, None, None]:
         for user_info in user_id.identifiers:
             if user_info.type is odg.model.UserTypes.EMAIL_ADDRESS:
-                if user_info.email.lower() == addressbook_entry.email:
-                    return addressbook_entry
+                if (idx := self._indices_by_email.get(user_info.email.lower())) is not None:
+                    yield idx
+
             elif user_info.type is odg.model.UserTypes.GITHUB_USER:
-                if not (github_name := _github_name(
-                    github_url=user_info.github_hostname,
-                    addressbook_github_mappings=addressbook_github_mappings,
-                )):
+                if not user_info.username:
                     continue
-                github_name_from_addressbook_entry = addressbook_entry.github.get(github_name)
-
-                # both required
-                if not (github_name_from_addressbook_entry and user_info.username):
+                if not (github_name := self.github_name(github_url=user_info.github_hostname)):
                     continue
 
-                if github_name_from_addressbook_entry.lower() == user_info.username.lower():
-                    return addressbook_entry
+                if (idx := self._indices_by_github_user.get(
+                    (github_name, user_info.username.lower()),
+                )) is not None:
+                    yield idx
 
-    return None
+    def find_entry(
+        self,
+        user_id: odg.model.UserIdentity,
+    ) -> AddressbookEntry | None:
+        if (idx := min(self._iter_indices(user_id=user_id), default=None)) is not None:
+            return self.entries[idx]
 
+        for user_info in user_id.identifiers:
+            if user_info.type is not odg.model.UserTypes.PERSONAL_NAME:
+                continue
 
-def inject_personal_name(
-    addressbook_source: str | None,
-    addressbook_entries: collections.abc.Iterable[AddressbookEntry],
+            name = f'{user_info.first_name} {user_info.last_name}'.lower()
+            if len(indices := self._indices_by_name.get(name, ())) == 1:
+                return self.entries[indices[0]]
+
+        return None
+
+
+def addressbook(
+    addressbook_entries: collections.abc.Iterable[AddressbookEntry] | Addressbook,
+    addressbook_github_mappings: collections.abc.Iterable[dict],
+    addressbook_source: str | None=None,
+) -> Addressbook:
+    if isinstance(addressbook_entries, Addressbook):
+        return addressbook_entries
+
+    return Addressbook(
+        entries=addressbook_entries,
+        github_mappings=addressbook_github_mappings,
+        source=addressbook_source,
+    )
+
+
+def find_addressbook_entry(
+    addressbook_entries: collections.abc.Iterable[AddressbookEntry] | Addressbook,
     addressbook_github_mappings: collections.abc.Iterable[dict],
     user_id: odg.model.UserIdentity,
-) -> odg.model.UserIdentity:
+) -> AddressbookEntry | None:
     '''
-    injects personalName looked-up in passed addressbook-entries into the
-    given `UserIdentity`, if no personalName identifier is present already.
+    looks up first matching entry from given addressbook-entries (assumption: there is at most
+    one addressbook entry per actual user)
+
+    returns AddressbookEntry if found (based on github-user, email-address or personal name), or None
+    if no such entry is found. Pass an `Addressbook` to look up several users (indexed lookup).
     '''
-    addressbook_entry = find_addressbook_entry(
+    return addressbook(
         addressbook_entries=addressbook_entries,
         addressbook_github_mappings=addressbook_github_mappings,
-        user_id=user_id,
-    )
+    ).find_entry(user_id=user_id)
 
-    if not addressbook_entry:
-        return user_id
 
+def _with_personal_name(
+    user_id: odg.model.UserIdentity,
+    addressbook_entry: AddressbookEntry,
+    addressbook_source: str | None,
+) -> odg.model.UserIdentity:
     def iter_infos() -> collections.abc.Generator[odg.model.UserIdentifierBase, None, None]:
         has_name = False
         for info in user_id.identifiers:
@@ -176,26 +222,12 @@ def inject_personal_name(
     )
 
 
-def inject_github_users(
-    addressbook_source: str | None,
-    addressbook_entries: collections.abc.Iterable[AddressbookEntry],
-    addressbook_github_mappings: collections.abc.Iterable[dict],
+def _with_github_users(
     user_id: odg.model.UserIdentity,
+    addressbook_entry: AddressbookEntry,
+    addressbook: Addressbook,
+    addressbook_source: str | None,
 ) -> odg.model.UserIdentity:
-    '''
-    injects additional known github-user-IDs looked-up in passed addressbook-entries into the
-    given `UserIdentity`. If no additional user-IDs are found, the passed-in object is returned
-    unchanged.
-    '''
-    addressbook_entry = find_addressbook_entry(
-        addressbook_entries=addressbook_entries,
-        addressbook_github_mappings=addressbook_github_mappings,
-        user_id=user_id,
-    )
-
-    if not addressbook_entry:
-        return user_id
-
     def iter_infos() -> collections.abc.Generator[odg.model.UserIdentifierBase, None, None]:
         seen_github_hostnames = set() # keep first entry for each github-host
         for info in user_id.identifiers:
@@ -209,10 +241,7 @@ def inject_github_users(
 
         for gh_name, username in addressbook_entry.github.items():
             gh_hostname = util.normalise_url_to_second_and_tld(
-                _github_url(
-                    github_name=gh_name,
-                    addressbook_github_mappings=addressbook_github_mappings,
-                )
+                addressbook.github_url(github_name=gh_name)
             )
             if gh_hostname in seen_github_hostnames:
                 # existing entries "win" over yellow-pages-entries
@@ -232,22 +261,84 @@ def inject_github_users(
     )
 
 
-def inject(
+def inject_personal_name(
     addressbook_source: str | None,
-    addressbook_entries: collections.abc.Iterable[AddressbookEntry],
+    addressbook_entries: collections.abc.Iterable[AddressbookEntry] | Addressbook,
     addressbook_github_mappings: collections.abc.Iterable[dict],
     user_id: odg.model.UserIdentity,
 ) -> odg.model.UserIdentity:
-    user_id = inject_github_users(
-        addressbook_source=addressbook_source,
+    '''
+    injects personalName looked-up in passed addressbook-entries into the
+    given `UserIdentity`, if no personalName identifier is present already.
+    '''
+    addressbook_entry = find_addressbook_entry(
         addressbook_entries=addressbook_entries,
         addressbook_github_mappings=addressbook_github_mappings,
         user_id=user_id,
     )
-    user_id = inject_personal_name(
+
+    if not addressbook_entry:
+        return user_id
+
+    return _with_personal_name(
+        user_id=user_id,
+        addressbook_entry=addressbook_entry,
         addressbook_source=addressbook_source,
+    )
+
+
+def inject_github_users(
+    addressbook_source: str | None,
+    addressbook_entries: collections.abc.Iterable[AddressbookEntry] | Addressbook,
+    addressbook_github_mappings: collections.abc.Iterable[dict],
+    user_id: odg.model.UserIdentity,
+) -> odg.model.UserIdentity:
+    '''
+    injects additional known github-user-IDs looked-up in passed addressbook-entries into the
+    given `UserIdentity`. If no additional user-IDs are found, the passed-in object is returned
+    unchanged.
+    '''
+    book = addressbook(
+        addressbook_entries=addressbook_entries,
+        addressbook_github_mappings=addressbook_github_mappings,
+        addressbook_source=addressbook_source,
+    )
+
+    if not (addressbook_entry := book.find_entry(user_id=user_id)):
+        return user_id
+
+    return _with_github_users(
+        user_id=user_id,
+        addressbook_entry=addressbook_entry,
+        addressbook=book,
+        addressbook_source=addressbook_source,
+    )
+
+
+def inject(
+    addressbook_source: str | None,
+    addressbook_entries: collections.abc.Iterable[AddressbookEntry] | Addressbook,
+    addressbook_github_mappings: collections.abc.Iterable[dict],
+    user_id: odg.model.UserIdentity,
+) -> odg.model.UserIdentity:
+    book = addressbook(
         addressbook_entries=addressbook_entries,
         addressbook_github_mappings=addressbook_github_mappings,
+        addressbook_source=addressbook_source,
+    )
+
+    # injected github-users stem from the found entry, hence there is no need to look it up again
+    if not (addressbook_entry := book.find_entry(user_id=user_id)):
+        return user_id
+
+    user_id = _with_github_users(
         user_id=user_id,
+        addressbook_entry=addressbook_entry,
+        addressbook=book,
+        addressbook_source=addressbook_source,
+    )
+    return _with_personal_name(
+        user_id=user_id,
+        addressbook_entry=addressbook_entry,
+        addressbook_source=addressbook_source,
     )
-    return user_id